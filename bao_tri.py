@@ -0,0 +1,206 @@
+"""Công cụ bảo trì dữ liệu (index phụ, danh mục đề thi, nén segment log, thống kê, phân tích câu hỏi, chấm lại song song, kiểm tra chép bài, khóa chống nộp trùng)."""
+
+import argparse
+import sys
+
+from src.storage import create_storage, STORAGE_BACKENDS
+from src.storage.exam_stats import open_exam_stats
+from src.storage.item_analysis import open_item_analysis
+from src.storage.idempotency import open_idempotency_index
+from src.business.grading_engine import create_grading_engine
+from src.business.parallel_grading import ParallelGrader, DEFAULT_CHUNK_SIZE
+from src.business.collusion import CollusionDetector, DEFAULT_MIN_IDENTICAL_WRONG
+
+
+def kiem_tra_index(storage):
+    """Kiểm tra index phụ có khớp với dữ liệu không (với SQLite: integrity_check).
+
+    Returns:
+        True nếu index nhất quán
+    """
+    report = storage.check_indexes()
+    ok = True
+    for entity, fields in report.items():
+        for field, counts in fields.items():
+            status = "✓" if counts['missing'] == 0 and counts['stale'] == 0 else "✗"
+            if status == "✗":
+                ok = False
+            print(f"{status} {entity}.{field}: thiếu {counts['missing']}, thừa {counts['stale']}")
+    problems = storage.check_integrity()
+    for problem in problems:
+        ok = False
+        print(f"✗ integrity_check: {problem}")
+    if not report and not problems:
+        print("✓ integrity_check: ok")
+    return ok
+
+
+def xay_lai_index(storage):
+    """Xây dựng lại toàn bộ index phụ từ dữ liệu."""
+    if storage.rebuild_indexes():
+        print("✓ Đã xây dựng lại index")
+        return True
+    print("✗ Không thể xây dựng lại index")
+    return False
+
+
+def xay_lai_danh_muc(storage):
+    """Xây dựng lại danh mục đề thi (catalog) từ dữ liệu đề thi."""
+    if storage.rebuild_exam_catalog():
+        print(f"✓ Đã xây dựng lại danh mục: {len(storage.list_exam_summaries())} đề thi")
+        return True
+    print("✗ Không thể xây dựng lại danh mục đề thi")
+    return False
+
+
+def nen_segment(storage):
+    """Nén các segment log: bỏ các phiên bản cũ và bản ghi đã xóa."""
+    reports = storage.compact_segments()
+    if not reports:
+        print("✓ Không có segment log để nén (chỉ dùng với STORAGE_BACKEND=segments)")
+        return True
+    for entity, report in reports.items():
+        print(f"✓ {entity}: {report['records']} bản ghi, "
+              f"{report['bytes_before']} → {report['bytes_after']} byte, "
+              f"xóa {report['segments_removed']} segment cũ")
+    return True
+
+
+def xay_lai_thong_ke(storage):
+    """Tính lại thống kê điểm của mọi đề thi từ các kết quả đã lưu."""
+    exam_stats = open_exam_stats(storage.base_path)
+    if exam_stats.rebuild(storage.iter_results):
+        overall = exam_stats.overall()
+        print(f"✓ Đã tính lại thống kê: {overall['count']} kết quả, {len(exam_stats.list())} đề thi")
+        return True
+    print("✗ Không thể tính lại thống kê")
+    return False
+
+
+def xay_lai_phan_tich(storage, exam_id=None):
+    """Tính lại phân tích câu hỏi của một đề (hoặc mọi đề) từ các kết quả đã lưu."""
+    item_analysis = open_item_analysis(storage.base_path)
+    exam_ids = [exam_id] if exam_id else [s['exam_id'] for s in storage.list_exam_summaries()]
+    ok = True
+    for current in exam_ids:
+        if not item_analysis.rebuild_exam(current, storage.iter_results(exam_id=current)):
+            print(f"✗ Không thể tính lại phân tích câu hỏi: {current}")
+            ok = False
+    if ok:
+        print(f"✓ Đã tính lại phân tích câu hỏi: {len(exam_ids)} đề thi")
+    return ok
+
+
+def cham_song_song(storage, exam_id=None, regrade=False, workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Chấm các bài làm chưa có kết quả bằng nhiều tiến trình.
+
+    Returns:
+        True nếu không có bài nào lỗi
+    """
+    engine = create_grading_engine(storage)
+    grader = ParallelGrader(storage, workers=workers, chunk_size=chunk_size, engine=engine)
+
+    def bao_tien_do(done, total):
+        print(f"\r  Đã chấm {done}/{total} bài", end='', flush=True)
+
+    summary = grader.run(exam_id=exam_id, regrade=regrade, progress=bao_tien_do)
+    if summary['total']:
+        print()
+    for submission_id, msg in summary['errors']:
+        print(f"✗ {submission_id}: {msg}")
+    skipped = f", bỏ qua {summary['skipped']} bài không còn" if summary['skipped'] else ""
+    print(f"✓ Đã chấm {summary['graded']}/{summary['total']} bài{skipped} "
+          f"({grader.workers} tiến trình, {summary['elapsed']:.1f}s)")
+    return summary['failed'] == 0
+
+
+def kiem_tra_chep_bai(storage, exam_id, workers=None, min_identical_wrong=DEFAULT_MIN_IDENTICAL_WRONG, top=20):
+    """In các cặp bài làm có nhiều câu sai giống hệt nhau của một đề.
+
+    Returns:
+        True nếu kiểm tra được (kể cả khi có cặp đáng ngờ)
+    """
+    detector = CollusionDetector(storage, workers=workers, min_identical_wrong=min_identical_wrong)
+    success, msg, report = detector.run(exam_id)
+    if not success:
+        print(f"✗ {msg}")
+        return False
+    for pair in report['pairs'][:top]:
+        first, second = pair['student_ids']
+        print(f"  {first} - {second}: {pair['identical_wrong']} câu sai giống nhau "
+              f"(sai {pair['wrong_answers'][0]}/{pair['wrong_answers'][1]}, "
+              f"giống {pair['identical_answers']} câu, tương đồng {pair['similarity']:.2f})")
+    print(f"✓ {msg} trong {report['submissions']} bài "
+          f"(so sánh {report['candidates']} cặp, {report['elapsed']:.1f}s)")
+    return True
+
+
+def don_khoa_nop_bai(storage, days=7):
+    """Xóa các khóa chống nộp trùng cũ hơn số ngày cho trước.
+
+    Returns:
+        True
+    """
+    removed = open_idempotency_index(storage.base_path).purge(days * 86400)
+    print(f"✓ Đã xóa {removed} khóa chống nộp trùng cũ hơn {days} ngày")
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bảo trì dữ liệu hệ thống chấm trắc nghiệm")
+    parser.add_argument('--data', default='data', help="Thư mục dữ liệu (mặc định: data)")
+    parser.add_argument('--backend', choices=STORAGE_BACKENDS,
+                        help="Kiểu lưu trữ (mặc định: biến môi trường STORAGE_BACKEND hoặc file)")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('check-indexes', help="Kiểm tra index phụ")
+    subparsers.add_parser('rebuild-indexes', help="Xây dựng lại index phụ")
+    subparsers.add_parser('rebuild-catalog', help="Xây dựng lại danh mục đề thi")
+    subparsers.add_parser('compact', help="Nén segment log (bỏ phiên bản cũ và bản ghi đã xóa)")
+    subparsers.add_parser('rebuild-stats', help="Tính lại thống kê điểm theo đề")
+    items_parser = subparsers.add_parser('rebuild-items', help="Tính lại phân tích câu hỏi")
+    items_parser.add_argument('--exam', help="Chỉ tính lại đề thi này")
+    grade_parser = subparsers.add_parser('grade', help="Chấm song song các bài làm chưa có kết quả")
+    grade_parser.add_argument('--exam', help="Chỉ chấm bài của đề thi này")
+    grade_parser.add_argument('--all', action='store_true', help="Chấm lại cả các bài đã có kết quả")
+    grade_parser.add_argument('--workers', type=int, help="Số tiến trình (mặc định: số lõi CPU)")
+    grade_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                              help=f"Số bài mỗi lô (mặc định: {DEFAULT_CHUNK_SIZE})")
+    collusion_parser = subparsers.add_parser('collusion', help="Tìm các cặp bài có nhiều câu sai giống nhau")
+    collusion_parser.add_argument('--exam', required=True, help="Đề thi cần kiểm tra")
+    collusion_parser.add_argument('--workers', type=int, help="Số tiến trình (mặc định: số lõi CPU)")
+    collusion_parser.add_argument('--min-wrong', type=int, default=DEFAULT_MIN_IDENTICAL_WRONG,
+                                  help=f"Số câu sai giống nhau tối thiểu (mặc định: {DEFAULT_MIN_IDENTICAL_WRONG})")
+    collusion_parser.add_argument('--top', type=int, default=20, help="Số cặp in ra (mặc định: 20)")
+    purge_parser = subparsers.add_parser('purge-idempotency', help="Xóa các khóa chống nộp trùng cũ")
+    purge_parser.add_argument('--days', type=int, default=7, help="Giữ lại khóa của bao nhiêu ngày (mặc định: 7)")
+    args = parser.parse_args(argv)
+
+    storage = create_storage(base_path=args.data, backend=args.backend)
+    try:
+        if args.command == 'check-indexes':
+            ok = kiem_tra_index(storage)
+        elif args.command == 'rebuild-indexes':
+            ok = xay_lai_index(storage)
+        elif args.command == 'compact':
+            ok = nen_segment(storage)
+        elif args.command == 'rebuild-stats':
+            ok = xay_lai_thong_ke(storage)
+        elif args.command == 'rebuild-items':
+            ok = xay_lai_phan_tich(storage, exam_id=args.exam)
+        elif args.command == 'collusion':
+            ok = kiem_tra_chep_bai(storage, args.exam, workers=args.workers,
+                                   min_identical_wrong=args.min_wrong, top=args.top)
+        elif args.command == 'purge-idempotency':
+            ok = don_khoa_nop_bai(storage, days=args.days)
+        elif args.command == 'grade':
+            ok = cham_song_song(storage, exam_id=args.exam, regrade=args.all,
+                                workers=args.workers, chunk_size=args.chunk_size)
+        else:
+            ok = xay_lai_danh_muc(storage)
+    finally:
+        storage.close()
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
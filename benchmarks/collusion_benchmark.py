@@ -0,0 +1,108 @@
+"""Benchmark phát hiện chép bài: LSH so với so sánh mọi cặp.
+
+Tạo dữ liệu giả (mỗi lớp có 1% bài chép của bạn khác, sửa 2-3 câu) rồi đo
+thời gian, số cặp được so sánh và số bài chép tìm được khi số bài tăng dần:
+
+    python benchmarks/collusion_benchmark.py [--sizes 1000 2000 4000 8000] [--workers 4]
+
+Cột "mũ" là số mũ k ước lượng giữa hai cỡ liên tiếp (thời gian ~ n^k): so
+sánh mọi cặp cho k = 2, LSH cho k nhỏ hơn. So sánh mọi cặp chỉ chạy tới
+--brute-force-max bài (mặc định 5000).
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.business.answer_key import AnswerKey  # noqa: E402
+from src.business.collusion import CollusionDetector, compare_sheets, pack_answers, popcount  # noqa: E402
+
+
+def tao_lop(key, students, rng, copy_rate=0.01):
+    """Bài làm giả: học sinh làm độc lập, thêm copy_rate bài chép của bạn khác."""
+    submissions = []
+    for number in range(students):
+        ability = rng.uniform(0.3, 0.9)
+        answers = {}
+        for question_id, correct in zip(key.question_ids, key.normalized):
+            distractors = [choice for choice in 'ABCD' if choice != correct]
+            if rng.random() < ability:
+                answers[question_id] = correct
+            else:
+                # Một phương án nhiễu được chọn nhiều hơn hẳn
+                answers[question_id] = rng.choices(distractors, weights=[3, 1, 1])[0]
+        submissions.append({'submission_id': f'S{number:06d}', 'student_id': f'ST{number:06d}', 'answers': answers})
+
+    copies = []
+    for number in range(int(students * copy_rate)):
+        source = rng.choice(submissions)
+        answers = dict(source['answers'])
+        for question_id in rng.sample(key.question_ids, rng.randint(2, 3)):
+            answers[question_id] = rng.choice('ABCD')
+        copies.append({'submission_id': f'C{number:06d}', 'student_id': f'CP{number:06d}', 'answers': answers})
+    return submissions + copies
+
+
+def so_sanh_moi_cap(detector, key, submissions):
+    """Cách làm ngây thơ: so sánh mọi cặp bằng bit-plane."""
+    sheets = [pack_answers(key, submission['answers']) for submission in submissions]
+    wrong = [popcount(sheet[4]) for sheet in sheets]
+    found = 0
+    for i in range(len(sheets)):
+        for j in range(i + 1, len(sheets)):
+            identical_wrong, _ = compare_sheets(sheets[i], sheets[j])
+            if (identical_wrong >= detector.min_identical_wrong
+                    and identical_wrong / (wrong[i] + wrong[j] - identical_wrong) >= detector.min_similarity):
+                found += 1
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark phát hiện chép bài")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 2000, 4000, 8000, 16000])
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=None, help="Số tiến trình (mặc định: số lõi CPU)")
+    parser.add_argument('--brute-force-max', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    key = AnswerKey(
+        'BENCH', [f'Q{i:03d}' for i in range(1, args.questions + 1)],
+        [rng.choice('ABCD') for _ in range(args.questions)]
+    )
+    detector = CollusionDetector(None, workers=args.workers)
+
+    print(f"{'bài':>7} {'b x r':>7} {'mọi cặp':>12} {'cặp so sánh':>12} {'tỉ lệ':>7} {'LSH (s)':>8} {'mũ':>5} "
+          f"{'cặp nghi':>9} {'bắt chép':>9} {'mọi cặp (s)':>12} {'cặp nghi':>9}")
+    previous = None
+    for size in args.sizes:
+        submissions = tao_lop(key, size, rng)
+        copies = [s['submission_id'] for s in submissions if s['submission_id'].startswith('C')]
+        report = detector.detect(key, submissions)
+        flagged = {submission_id for pair in report['pairs'] for submission_id in pair['submission_ids']}
+        caught = sum(1 for submission_id in copies if submission_id in flagged)
+        all_pairs = len(submissions) * (len(submissions) - 1) // 2
+        exponent = ''
+        if previous is not None:
+            exponent = math.log(report['elapsed'] / previous[1]) / math.log(len(submissions) / previous[0])
+            exponent = f"{exponent:.2f}"
+        previous = (len(submissions), report['elapsed'])
+
+        brute = ''
+        if len(submissions) <= args.brute_force_max:
+            started = time.perf_counter()
+            brute_pairs = so_sanh_moi_cap(detector, key, submissions)
+            brute = f"{time.perf_counter() - started:12.2f} {brute_pairs:9d}"
+        print(f"{len(submissions):7d} {report['bands']:3d}x{report['rows']:<3d} {all_pairs:12d} "
+              f"{report['candidates']:12d} {report['candidates'] / all_pairs:7.2%} {report['elapsed']:8.2f} {exponent:>5} "
+              f"{len(report['pairs']):9d} {caught:4d}/{len(copies):<4d} {brute}")
+
+
+if __name__ == "__main__":
+    main()
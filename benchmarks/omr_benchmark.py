@@ -0,0 +1,68 @@
+"""Benchmark đọc phiếu quét: thời gian đọc mỗi phiếu và số phiếu/giây.
+
+Vẽ N phiếu giả (xoay, lệch, nhiễu như ảnh quét thật) vào một thư mục tạm
+rồi chấm cả thư mục với số tiến trình khác nhau:
+
+    python benchmarks/omr_benchmark.py [--sheets 1000] [--questions 50] [--workers 1 2 4]
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.storage import create_storage  # noqa: E402
+from src.business.exam_manager import ExamManager  # noqa: E402
+from src.omr.batch import ScanGrader  # noqa: E402
+from src.omr.image import write_png  # noqa: E402
+from src.omr.template import SheetTemplate  # noqa: E402
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark đọc phiếu quét")
+    parser.add_argument('--sheets', type=int, default=1000)
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    temp_dir = tempfile.mkdtemp()
+    try:
+        storage = create_storage(base_path=os.path.join(temp_dir, 'data'), backend='sqlite')
+        questions = [
+            {'content': f'Câu {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'},
+             'correct_answer': rng.choice('ABCD')}
+            for i in range(1, args.questions + 1)
+        ]
+        success, msg, exam_id = ExamManager(storage).create_exam("Benchmark", "GV001", questions=questions)
+        template = SheetTemplate(args.questions)
+        scans = os.path.join(temp_dir, 'scans')
+        os.makedirs(scans)
+        print(f"Đang vẽ {args.sheets} phiếu...")
+        for number in range(args.sheets):
+            image = template.render(
+                f'{number:06d}', [rng.choice('ABCD') for _ in range(args.questions)],
+                angle=rng.uniform(-2, 2), offset=(rng.uniform(-4, 4), rng.uniform(-4, 4)),
+                noise=10.0, seed=number
+            )
+            write_png(os.path.join(scans, f'{number:06d}.png'), image)
+
+        print(f"{'tiến trình':>10} {'phiếu':>7} {'lỗi':>5} {'TB (ms)':>8} {'p50 (ms)':>9} "
+              f"{'p95 (ms)':>9} {'phiếu/s':>8} {'tổng (s)':>9}")
+        for workers in args.workers:
+            summary = ScanGrader(storage, workers=workers).grade_folder(exam_id, scans)
+            latency = summary['latency']
+            print(f"{summary['workers']:10d} {summary['total']:7d} {summary['failed']:5d} {latency['mean']:8.2f} "
+                  f"{latency['p50']:9.2f} {latency['p95']:9.2f} {summary['throughput']:8.1f} {summary['elapsed']:9.2f}")
+        storage.close()
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
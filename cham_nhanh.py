@@ -1,21 +1,43 @@
-"""Tool chấm nhanh từ file CSV."""
+"""Tool chấm nhanh từ file CSV.
 
-from src.storage.file_storage import FileStorageManager
+Chấm cả lớp từ file phiếu trả lời:
+    python cham_nhanh.py --exam EXAM001 --file phieu.csv [--report bao_cao.csv]
+Chấm cả lớp từ thư mục ảnh phiếu đã quét (PGM/PNG, cần numpy):
+    python cham_nhanh.py --exam EXAM001 --scans thu_muc_anh [--workers 4] [--report bao_cao.csv]
+In phiếu trắng của một đề:
+    python cham_nhanh.py --exam EXAM001 --blank-sheet phieu.png
+Không có tham số thì chạy demo.
+"""
+
+from src.storage import create_storage
 from src.business.exam_manager import ExamManager
-from src.business.grading_engine import GradingEngine
+from src.business.grading_engine import create_grading_engine, GradingEngine
+from src.business.bulk_grading import BulkGrader, SHEET_FORMATS, sheet_format
 from src.models.submission import Submission
+from src.omr.batch import ScanGrader
+from src.omr.image import write_pgm, write_png
+import argparse
+import sys
 import uuid
 import csv
 
 
+# Storage và GradingEngine dùng chung giữa các lần chấm (đáp án được cache)
+_grading = None
+
+
+def _grading_engine() -> GradingEngine:
+    global _grading
+    if _grading is None:
+        _grading = create_grading_engine(create_storage(base_path="data"))
+    return _grading
+
+
 def tao_de_mau():
     """Tạo đề thi mẫu 4 câu."""
-    storage = FileStorageManager(base_path="data")
+    storage = create_storage(base_path="data")
     manager = ExamManager(storage)
     
-    # Tạo đề thi
-    success, msg, exam_id = manager.create_exam("Đề thi mẫu", "GV001")
-    
     # 4 câu hỏi mẫu
     questions = [
         ("1 + 1 = ?", {'A': '1', 'B': '2', 'C': '3', 'D': '4'}, 'B'),
@@ -24,8 +46,11 @@ def tao_de_mau():
         ("4 + 4 = ?", {'A': '6', 'B': '7', 'C': '8', 'D': '9'}, 'C'),
     ]
     
-    for content, choices, correct in questions:
-        manager.add_question(exam_id, content, choices, correct)
+    # Tạo đề thi kèm câu hỏi
+    success, msg, exam_id = manager.create_exam("Đề thi mẫu", "GV001", questions=[
+        {'content': content, 'choices': choices, 'correct_answer': correct}
+        for content, choices, correct in questions
+    ])
     
     print(f"✓ Đã tạo đề thi mẫu: {exam_id}")
     return exam_id
@@ -39,20 +64,16 @@ def cham_tu_dap_an(exam_id, student_id, dap_an_list):
         student_id: Mã học sinh
         dap_an_list: List đáp án ['A', 'B', 'C', 'D']
     """
-    storage = FileStorageManager(base_path="data")
-    grading = GradingEngine(storage)
+    grading = _grading_engine()
     
-    # Load đề thi
-    exam_dict = storage.load_exam(exam_id)
-    if not exam_dict:
+    # Đáp án đã biên dịch (chỉ đọc đề thi khi đề thay đổi)
+    key = grading.answer_key(exam_id)
+    if key is None:
         print(f"✗ Đề thi không tồn tại: {exam_id}")
         return
     
     # Tạo answers dict
-    answers = {}
-    for i, q in enumerate(exam_dict['questions']):
-        if i < len(dap_an_list):
-            answers[q['question_id']] = dap_an_list[i]
+    answers = dict(zip(key.question_ids, dap_an_list))
     
     # Tạo submission
     submission_id = f"S{uuid.uuid4().hex[:8].upper()}"
@@ -63,10 +84,8 @@ def cham_tu_dap_an(exam_id, student_id, dap_an_list):
         answers=answers
     )
     
-    storage.save_submission(submission.to_dict())
-    
-    # Chấm bài
-    success, msg, result = grading.grade_submission(submission_id)
+    # Chấm bài (lưu bài làm và kết quả cùng lúc)
+    success, msg, result = grading.grade(submission)
     
     if success:
         print(f"\n{'='*50}")
@@ -85,7 +104,104 @@ def cham_tu_dap_an(exam_id, student_id, dap_an_list):
         print(f"✗ Lỗi: {msg}")
 
 
-def main():
+def cham_tu_file(exam_id, file_path, report_path=None, fmt=None):
+    """Chấm cả lớp từ file phiếu trả lời CSV hoặc JSONL.
+    
+    Args:
+        exam_id: Mã đề thi
+        file_path: File phiếu trả lời (mỗi dòng một học sinh)
+        report_path: File CSV báo cáo từng học sinh (tùy chọn)
+        fmt: 'csv' hoặc 'jsonl' (mặc định: theo đuôi file)
+    
+    Returns:
+        Summary dict, hoặc None nếu đề thi không tồn tại
+    """
+    grading = _grading_engine()
+    fmt = fmt or sheet_format(file_path)
+    report = open(report_path, 'w', encoding='utf-8', newline='') if report_path else None
+    try:
+        with open(file_path, 'r', encoding='utf-8-sig', newline='') as sheet:
+            summary = BulkGrader(grading.storage, engine=grading).grade_sheet(
+                exam_id, sheet, fmt, report,
+                progress=lambda done: print(f"  Đã xử lý {done} dòng", end='\r')
+            )
+    except ValueError as e:
+        print(f"✗ {e}")
+        return None
+    finally:
+        if report:
+            report.close()
+    
+    print(f"\n✓ Đã chấm {summary['graded']}/{summary['total']} bài ({summary['elapsed']}s)")
+    for error in summary['errors']:
+        print(f"  ✗ Dòng {error['line']} ({error['student_id'] or '-'}): {error['message']}")
+    if summary['failed'] > len(summary['errors']):
+        print(f"  ... và {summary['failed'] - len(summary['errors'])} lỗi khác")
+    if report_path:
+        print(f"✓ Báo cáo: {report_path}")
+    return summary
+
+
+def cham_tu_anh(exam_id, folder, report_path=None, workers=None):
+    """Chấm cả lớp từ thư mục ảnh phiếu trả lời đã quét.
+    
+    Args:
+        exam_id: Mã đề thi
+        folder: Thư mục ảnh PGM/PNG (mỗi ảnh một phiếu)
+        report_path: File CSV báo cáo từng phiếu (tùy chọn)
+        workers: Số tiến trình đọc ảnh (mặc định: số lõi CPU)
+    
+    Returns:
+        Summary dict, hoặc None nếu đề thi không tồn tại
+    """
+    grading = _grading_engine()
+    report = open(report_path, 'w', encoding='utf-8', newline='') if report_path else None
+    try:
+        summary = ScanGrader(grading.storage, engine=grading, workers=workers).grade_folder(
+            exam_id, folder, report,
+            progress=lambda done, total: print(f"  Đã đọc {done}/{total} phiếu", end='\r')
+        )
+    except (ValueError, ImportError) as e:
+        print(f"✗ {e}")
+        return None
+    finally:
+        if report:
+            report.close()
+    
+    latency = summary['latency']
+    print(f"\n✓ Đã chấm {summary['graded']}/{summary['total']} phiếu "
+          f"({summary['workers']} tiến trình, {summary['elapsed']}s, {summary['throughput']} phiếu/s)")
+    if latency['count']:
+        print(f"  Thời gian đọc mỗi phiếu: TB {latency['mean']} ms, p50 {latency['p50']} ms, "
+              f"p95 {latency['p95']} ms, max {latency['max']} ms")
+    if summary['review']:
+        print(f"  ⚠ {summary['review']} phiếu cần xem lại (tô nhiều ô hoặc tô mờ)")
+    for error in summary['errors']:
+        print(f"  ✗ {error['file']}: {error['message']}")
+    if summary['failed'] > len(summary['errors']):
+        print(f"  ... và {summary['failed'] - len(summary['errors'])} lỗi khác")
+    if report_path:
+        print(f"✓ Báo cáo: {report_path}")
+    return summary
+
+
+def in_phieu_trang(exam_id, out_path):
+    """Vẽ phiếu trả lời trắng của một đề ra file PNG/PGM để in."""
+    try:
+        template = ScanGrader(_grading_engine().storage, engine=_grading_engine()).template(exam_id)
+        image = template.render()
+    except (ValueError, ImportError) as e:
+        print(f"✗ {e}")
+        return False
+    if out_path.lower().endswith('.pgm'):
+        write_pgm(out_path, image)
+    else:
+        write_png(out_path, image)
+    print(f"✓ Phiếu trắng {template.questions} câu: {out_path}")
+    return True
+
+
+def demo():
     print("=== DEMO CHẤM NHANH ===\n")
     
     # Tạo đề thi mẫu
@@ -118,5 +234,30 @@ def main():
     print(f"  cham_tu_dap_an('{exam_id}', 'HS004', ['B', 'C', 'C', 'C'])")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Chấm nhanh bài trắc nghiệm")
+    parser.add_argument('--exam', help="Mã đề thi")
+    parser.add_argument('--file', help="File phiếu trả lời (CSV hoặc JSONL)")
+    parser.add_argument('--report', help="File CSV báo cáo từng học sinh")
+    parser.add_argument('--format', choices=SHEET_FORMATS, help="Định dạng file (mặc định: theo đuôi file)")
+    parser.add_argument('--scans', help="Thư mục ảnh phiếu đã quét (PGM/PNG)")
+    parser.add_argument('--workers', type=int, help="Số tiến trình đọc ảnh (mặc định: số lõi CPU)")
+    parser.add_argument('--blank-sheet', help="Vẽ phiếu trắng của đề ra file PNG/PGM")
+    args = parser.parse_args()
+    
+    if not (args.file or args.scans or args.blank_sheet):
+        demo()
+        return 0
+    if not args.exam:
+        parser.error("--file, --scans và --blank-sheet cần kèm --exam")
+    if args.blank_sheet:
+        return 0 if in_phieu_trang(args.exam, args.blank_sheet) else 1
+    if args.scans:
+        summary = cham_tu_anh(args.exam, args.scans, args.report, args.workers)
+    else:
+        summary = cham_tu_file(args.exam, args.file, args.report, args.format)
+    return 0 if summary is not None else 1
+
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,8 +1,8 @@
 """Tool đơn giản để tạo đề thi và chấm điểm."""
 
-from src.storage.file_storage import FileStorageManager
+from src.storage import create_storage
 from src.business.exam_manager import ExamManager
-from src.business.grading_engine import GradingEngine
+from src.business.grading_engine import create_grading_engine
 from src.models.submission import Submission
 from datetime import datetime
 import uuid
@@ -12,7 +12,7 @@ def tao_de_thi():
     """Tạo đề thi mới."""
     print("\n=== TẠO ĐỀ THI ===")
     
-    storage = FileStorageManager(base_path="data")
+    storage = create_storage(base_path="data")
     manager = ExamManager(storage)
     
     # Nhập thông tin đề thi
@@ -67,8 +67,8 @@ def cham_bai():
     """Chấm bài thi."""
     print("\n=== CHẤM BÀI THI ===")
     
-    storage = FileStorageManager(base_path="data")
-    grading = GradingEngine(storage)
+    storage = create_storage(base_path="data")
+    grading = create_grading_engine(storage)
     
     # Nhập thông tin
     exam_id = input("Nhập mã đề thi: ")
@@ -104,12 +104,9 @@ def cham_bai():
         answers=answers
     )
     
-    # Lưu submission
-    storage.save_submission(submission.to_dict())
-    
-    # Chấm bài
+    # Chấm bài (lưu bài làm và kết quả cùng lúc)
     print("\n⏳ Đang chấm bài...")
-    success, msg, result = grading.grade_submission(submission_id)
+    success, msg, result = grading.grade(submission)
     
     if not success:
         print(f"✗ Lỗi: {msg}")
@@ -0,0 +1,17 @@
+"""Cấu hình pytest: web_app dùng thư mục dữ liệu tạm, không ghi vào data/."""
+
+import os
+import shutil
+import tempfile
+
+
+_data_dir = tempfile.mkdtemp(prefix='cham-trac-nghiem-test-')
+
+
+def pytest_configure(config):
+    # Đặt trước khi test nào import web_app (storage được tạo lúc import)
+    os.environ['DATA_DIR'] = _data_dir
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_data_dir, ignore_errors=True)
@@ -0,0 +1,68 @@
+"""Answer Key - Đáp án đã biên dịch sẵn từ đề thi."""
+
+from typing import Dict, List, Tuple
+
+
+class AnswerKey:
+    """Đáp án của một đề thi, chuẩn hóa sẵn để chấm nhiều bài liên tiếp.
+
+    Compiling the key once per exam avoids re-reading the exam and
+    re-normalizing every correct answer for each submission.
+    """
+
+    def __init__(self, exam_id: str, question_ids: List[str], correct_answers: List[str]):
+        """Initialize AnswerKey.
+
+        Args:
+            exam_id: ID của đề thi
+            question_ids: Mã câu hỏi theo thứ tự trong đề
+            correct_answers: Đáp án đúng (nguyên bản) theo cùng thứ tự
+        """
+        self.exam_id = exam_id
+        self.question_ids = list(question_ids)
+        self.correct_answers = list(correct_answers)
+        self.normalized = [answer.strip().upper() for answer in self.correct_answers]
+
+    @classmethod
+    def from_exam(cls, exam_dict: dict) -> 'AnswerKey':
+        """Biên dịch đáp án từ exam dict."""
+        questions = exam_dict['questions']
+        return cls(
+            exam_id=exam_dict['exam_id'],
+            question_ids=[q['question_id'] for q in questions],
+            correct_answers=[q['correct_answer'] for q in questions]
+        )
+
+    @property
+    def total_questions(self) -> int:
+        return len(self.question_ids)
+
+    def as_dict(self) -> Dict[str, str]:
+        """Return {question_id: correct_answer}."""
+        return dict(zip(self.question_ids, self.correct_answers))
+
+    def grade_answers(self, answers: Dict[str, str]) -> Tuple[int, List[dict]]:
+        """Chấm một bộ câu trả lời.
+
+        Args:
+            answers: {question_id: đáp án của học sinh}
+
+        Returns:
+            Tuple of (số câu đúng, details)
+        """
+        correct_count = 0
+        details = []
+        for question_id, correct_answer, normalized in zip(
+            self.question_ids, self.correct_answers, self.normalized
+        ):
+            student_answer = answers.get(question_id, '')
+            is_correct = student_answer.strip().upper() == normalized
+            if is_correct:
+                correct_count += 1
+            details.append({
+                'question_id': question_id,
+                'student_answer': student_answer,
+                'correct_answer': correct_answer,
+                'is_correct': is_correct
+            })
+        return correct_count, details
@@ -0,0 +1,270 @@
+"""Bulk Grading - Chấm cả lớp từ một file phiếu trả lời (CSV hoặc JSONL).
+
+The file is parsed line by line and graded in batches of batch_size rows
+with one compiled answer key; each batch is stored with a single
+save_graded_many call and its rows are appended to the per-student
+report as soon as they are graded. Only one batch is held in memory, so
+memory use does not grow with the size of the file.
+
+CSV rows are ``student_id, answer1, answer2, ...`` or
+``student_id, ABCD...``. An optional header row starts with student_id
+(or ma_hs); if its other columns are question ids, answers are matched
+by id instead of by position. JSONL lines are objects with student_id
+and answers (a string, a list, or a {question_id: answer} dict).
+Positional answers must give one answer (possibly blank) per question;
+a row with more or fewer answers, or with a question id the exam does
+not have, is reported as a row error instead of being graded.
+"""
+
+import csv
+import json
+import time
+import uuid
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+
+from src.business.answer_key import AnswerKey
+from src.business.grading_engine import create_grading_engine, GradingEngine
+from src.models.submission import Submission
+from src.storage.base_storage import BaseStorageManager
+
+
+SHEET_FORMATS = ('csv', 'jsonl')
+
+# First cell of a CSV header row
+HEADER_NAMES = {'student_id', 'ma_hs', 'mã hs', 'mahs'}
+
+# Rows graded and stored per batch
+BULK_BATCH_SIZE = 500
+
+# Row errors returned in the summary (all of them are in the report)
+MAX_REPORTED_ERRORS = 20
+
+# Directory of the per-student reports inside a storage base_path
+REPORTS_DIR = 'reports'
+
+REPORT_HEADER = ['Dòng', 'Mã HS', 'Điểm', 'Số câu đúng', 'Số câu sai', 'Tổng câu', 'Trạng thái']
+
+Answers = Union[List[str], Dict[str, str]]
+
+
+def sheet_format(filename: str, default: str = 'csv') -> str:
+    """Guess the sheet format from a file name (.jsonl / .ndjson / .csv)."""
+    suffix = Path(filename or '').suffix.lower()
+    if suffix in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if suffix == '.csv':
+        return 'csv'
+    return default
+
+
+def _answer_cells(cells: List[str]) -> List[str]:
+    """Answers of one CSV row; a single 'ABCD' cell is one answer per letter."""
+    cells = [cell.strip().upper() for cell in cells]
+    if len(cells) == 1 and len(cells[0]) > 1:
+        return list(cells[0])
+    return cells
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[dict]:
+    """Parse CSV sheet lines.
+
+    Yields:
+        {'line', 'student_id', 'answers'} per row, or {'line', 'error'}
+    """
+    question_ids = None
+    for number, cells in enumerate(csv.reader(lines), 1):
+        if not cells or not any(cell.strip() for cell in cells):
+            continue
+        student_id = cells[0].strip()
+        if number == 1 and student_id.lower() in HEADER_NAMES:
+            header = [cell.strip() for cell in cells[1:]]
+            # Question id columns (not a single "answers" column or 1, 2, 3...)
+            if len(header) > 1 and all(header) and not all(cell.isdigit() for cell in header):
+                question_ids = header
+            continue
+        if not student_id:
+            yield {'line': number, 'error': 'Thiếu mã học sinh'}
+            continue
+        if question_ids is not None:
+            if len(cells) - 1 > len(question_ids):
+                yield {'line': number, 'student_id': student_id, 'error': 'Dòng có nhiều cột hơn tiêu đề'}
+                continue
+            answers = {
+                question_id: cell.strip().upper()
+                for question_id, cell in zip(question_ids, cells[1:])
+            }
+        else:
+            answers = _answer_cells(cells[1:])
+        yield {'line': number, 'student_id': student_id, 'answers': answers}
+
+
+def iter_jsonl_rows(lines: Iterable[str]) -> Iterator[dict]:
+    """Parse JSONL sheet lines (same output as iter_csv_rows)."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            student_id = str(record.get('student_id') or '').strip()
+            answers = record.get('answers', [])
+        except Exception:
+            yield {'line': number, 'error': 'Dòng JSON không hợp lệ'}
+            continue
+        if not student_id:
+            yield {'line': number, 'error': 'Thiếu mã học sinh'}
+        elif isinstance(answers, str):
+            yield {'line': number, 'student_id': student_id, 'answers': _answer_cells([answers])}
+        elif isinstance(answers, list):
+            yield {'line': number, 'student_id': student_id, 'answers': [str(a).strip().upper() for a in answers]}
+        elif isinstance(answers, dict):
+            answers = {str(q): str(a).strip().upper() for q, a in answers.items()}
+            yield {'line': number, 'student_id': student_id, 'answers': answers}
+        else:
+            yield {'line': number, 'error': 'Trường answers không hợp lệ'}
+
+
+def iter_sheet_rows(lines: Iterable[str], fmt: str = 'csv') -> Iterator[dict]:
+    """Parse a CSV or JSONL answer sheet lazily."""
+    if fmt == 'csv':
+        return iter_csv_rows(lines)
+    if fmt == 'jsonl':
+        return iter_jsonl_rows(lines)
+    raise ValueError(f"Định dạng không hỗ trợ: {fmt}")
+
+
+def map_answers(key: AnswerKey, answers: Answers) -> Dict[str, str]:
+    """Map positional answers to question ids; blank answers are dropped.
+
+    Raises:
+        ValueError: If positional answers are not one per question, or an
+            answer is keyed by a question id the exam does not have (a
+            shifted or mistyped row)
+    """
+    if isinstance(answers, dict):
+        known = set(key.question_ids)
+        unknown = [question_id for question_id in answers if question_id not in known]
+        if unknown:
+            raise ValueError(f"Mã câu hỏi không có trong đề: {', '.join(unknown)}")
+        return {question_id: answer for question_id, answer in answers.items() if answer}
+    if len(answers) != key.total_questions:
+        raise ValueError(f"Số câu trả lời ({len(answers)}) khác số câu của đề ({key.total_questions})")
+    return {question_id: answer for question_id, answer in zip(key.question_ids, answers) if answer}
+
+
+def new_report_id() -> str:
+    return f"B{uuid.uuid4().hex[:10].upper()}"
+
+
+def report_path(base_path: str, report_id: str) -> Path:
+    """Path of a bulk grading report inside a storage base_path."""
+    return Path(base_path) / REPORTS_DIR / f'{report_id}.csv'
+
+
+class BulkGrader:
+    """Chấm một file phiếu trả lời của cả lớp theo từng lô."""
+
+    def __init__(
+        self,
+        storage: BaseStorageManager,
+        engine: Optional[GradingEngine] = None,
+        batch_size: int = BULK_BATCH_SIZE
+    ):
+        """Initialize BulkGrader.
+
+        Args:
+            storage: Storage manager
+            engine: GradingEngine used to grade and store (its result
+                listeners see every new result)
+            batch_size: Rows graded and stored per batch
+        """
+        self.storage = storage
+        self.engine = engine or create_grading_engine(storage)
+        self.batch_size = batch_size
+
+    def grade_sheet(
+        self,
+        exam_id: str,
+        lines: Iterable[str],
+        fmt: str = 'csv',
+        report: Optional[TextIO] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> dict:
+        """Chấm toàn bộ phiếu trả lời của một đề thi.
+
+        Args:
+            exam_id: ID của đề thi
+            lines: Lines of the sheet (an open text file or any iterable)
+            fmt: 'csv' or 'jsonl'
+            report: Text file receiving the per-student CSV report
+            progress: Called with the number of rows processed after each batch
+
+        Returns:
+            Summary dict with exam_id, total, graded, failed, errors
+            (first MAX_REPORTED_ERRORS row errors) and elapsed seconds
+
+        Raises:
+            ValueError: If the exam does not exist or fmt is unknown
+        """
+        key = self.engine.answer_key(exam_id)
+        if key is None:
+            raise ValueError(f"Đề thi không tồn tại: {exam_id}")
+        rows = iter_sheet_rows(lines, fmt)
+
+        writer = csv.writer(report) if report is not None else None
+        if writer:
+            writer.writerow(REPORT_HEADER)
+
+        summary = {'exam_id': exam_id, 'total': 0, 'graded': 0, 'failed': 0, 'errors': []}
+        start = time.perf_counter()
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self._grade_batch(key, batch, summary, writer)
+            if progress:
+                progress(summary['total'])
+
+        summary['elapsed'] = round(time.perf_counter() - start, 3)
+        return summary
+
+    def _grade_batch(self, key: AnswerKey, batch: List[dict], summary: dict, writer):
+        submissions = []
+        for row in batch:
+            if 'error' in row:
+                continue
+            try:
+                answers = map_answers(key, row['answers'])
+            except ValueError as e:
+                row['error'] = str(e)
+                continue
+            submissions.append(Submission(
+                submission_id=f"S{uuid.uuid4().hex[:8].upper()}",
+                exam_id=key.exam_id,
+                student_id=row['student_id'],
+                answers=answers
+            ))
+        outcomes = iter(self.engine.grade_many(key, submissions))
+
+        for row in batch:
+            summary['total'] += 1
+            if 'error' in row:
+                success, msg, result = False, row['error'], None
+            else:
+                success, msg, result = next(outcomes)
+
+            if success:
+                summary['graded'] += 1
+                if writer:
+                    writer.writerow([
+                        row['line'], result['student_id'], result['score'], result['correct_answers'],
+                        result['wrong_answers'], result['total_questions'], 'OK'
+                    ])
+                continue
+
+            summary['failed'] += 1
+            if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                summary['errors'].append({'line': row['line'], 'student_id': row.get('student_id'), 'message': msg})
+            if writer:
+                writer.writerow([row['line'], row.get('student_id', ''), '', '', '', '', msg])
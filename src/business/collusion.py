@@ -0,0 +1,349 @@
+"""Collusion Detection - Phát hiện các cặp bài làm giống nhau bất thường.
+
+Two students sharing many correct answers proves little; sharing many
+identical wrong answers is the classic sign of copying. Each submission
+is packed into bit-planes (one int bitmask per choice A-D plus a mask of
+the questions answered wrongly), so the identical wrong answers of a pair
+are one AND/OR over the planes and a popcount.
+
+Comparing every pair is quadratic (12.5M pairs for 5,000 students), so
+candidate pairs are found with locality-sensitive hashing first: every
+submission's set of (question, wrong choice) tokens gets a MinHash
+signature, split into bands; only submissions sharing a whole band are
+compared. Pairs with a wrong-answer Jaccard similarity s collide in at
+least one of b bands of r rows with probability 1 - (1 - s^r)^b.
+
+With fixed b and r, unrelated pairs collide with a fixed probability and
+the candidates stay a constant share of all pairs. So r and b are tuned
+per exam: the similarity of a random sample of pairs estimates how often
+unrelated sheets collide, b is the smallest number of bands that finds
+pairs of similarity TARGET_SIMILARITY with probability TARGET_RECALL, and
+r minimizes the estimated signature plus comparison work. Larger classes
+get longer bands, and the candidates grow sub-quadratically. A band
+bucket holding more than max_bucket submissions is a wrong-answer pattern
+shared by a large part of the class (typically a wrong key), not copying,
+and is skipped.
+
+Signatures and pair comparisons are split into chunks and run by a
+ProcessPoolExecutor; each worker receives the packed submissions once,
+through the pool initializer.
+"""
+
+import math
+import os
+import random
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from src.business.answer_key import AnswerKey
+from src.storage.base_storage import BaseStorageManager
+
+
+DEFAULT_MIN_IDENTICAL_WRONG = 5
+DEFAULT_MIN_SIMILARITY = 0.5
+DEFAULT_MAX_BUCKET = 200
+DEFAULT_CHUNK_SIZE = 2000
+
+# LSH tuning: pairs at least this similar are candidates with this probability
+TARGET_SIMILARITY = 0.6
+TARGET_RECALL = 0.95
+MAX_ROWS = 16
+SAMPLE_PAIRS = 2000
+# Cost of comparing one candidate pair, in hash-token minimums
+PAIR_COST = 50
+
+CHOICES = ('A', 'B', 'C', 'D')
+CHOICE_INDEX = {choice: index for index, choice in enumerate(CHOICES)}
+
+# Mersenne prime of the MinHash functions (a * token + b) mod P
+HASH_PRIME = (1 << 61) - 1
+
+# A packed submission: one bitmask per choice, then the wrong-answer mask
+PackedSheet = Tuple[int, int, int, int, int]
+
+
+# Number of set bits of an int
+popcount = int.bit_count
+
+
+def pack_answers(key: AnswerKey, answers: Dict[str, str]) -> PackedSheet:
+    """Pack a submission's answers into bit-planes (bit i = question i).
+
+    Answers other than A-D (blank, invalid) are in no plane and never
+    count as identical.
+    """
+    planes = [0, 0, 0, 0]
+    wrong = 0
+    for position, (question_id, correct) in enumerate(zip(key.question_ids, key.normalized)):
+        answer = answers.get(question_id, '')
+        choice = CHOICE_INDEX.get(answer.strip().upper() if isinstance(answer, str) else '')
+        if choice is None:
+            continue
+        bit = 1 << position
+        planes[choice] |= bit
+        if CHOICES[choice] != correct:
+            wrong |= bit
+    return planes[0], planes[1], planes[2], planes[3], wrong
+
+
+def compare_sheets(first: PackedSheet, second: PackedSheet) -> Tuple[int, int]:
+    """Return (identical wrong answers, identical answers) of two sheets."""
+    same = (first[0] & second[0]) | (first[1] & second[1]) | (first[2] & second[2]) | (first[3] & second[3])
+    return popcount(same & first[4]), popcount(same)
+
+
+def wrong_tokens(sheet: PackedSheet) -> List[int]:
+    """(question, wrong choice) pairs of a sheet as ints: position * 4 + choice."""
+    tokens = []
+    for choice in range(len(CHOICES)):
+        mask = sheet[choice] & sheet[4]
+        while mask:
+            low = mask & -mask
+            tokens.append((low.bit_length() - 1) * len(CHOICES) + choice)
+            mask ^= low
+    return tokens
+
+
+class MinHasher:
+    """MinHash signatures over the wrong-answer tokens of one exam."""
+
+    def __init__(self, total_questions: int, num_hashes: int, seed: int = 0):
+        """Initialize MinHasher.
+
+        Args:
+            total_questions: Number of questions (tokens are 4 per question)
+            num_hashes: Signature length (bands x rows)
+            seed: Seed of the hash functions
+        """
+        rng = random.Random(seed)
+        params = [(rng.randrange(1, HASH_PRIME), rng.randrange(HASH_PRIME)) for _ in range(num_hashes)]
+        # Hash values of every token, so a signature is an element-wise min
+        self.table = [
+            tuple((a * token + b) % HASH_PRIME for a, b in params)
+            for token in range(total_questions * len(CHOICES))
+        ]
+
+    def signature(self, tokens: Sequence[int]) -> Tuple[int, ...]:
+        """Signature of a non-empty token set."""
+        return tuple(map(min, zip(*(self.table[token] for token in tokens))))
+
+
+def bands_for(rows: int, similarity: float = TARGET_SIMILARITY, recall: float = TARGET_RECALL) -> int:
+    """Fewest bands of `rows` rows finding pairs of `similarity` with probability `recall`."""
+    return max(1, math.ceil(math.log(1 - recall) / math.log(1 - similarity ** rows)))
+
+
+def tune_lsh(sheets: List[PackedSheet], eligible: List[int], seed: int = 0) -> Tuple[int, int]:
+    """Choose (bands, rows) for the eligible sheets of one exam.
+
+    The cost of r rows is the signature work, n * b * r * tokens, plus the
+    expected comparisons of unrelated pairs, b * n^2 / 2 * E[J^r], with
+    E[J^r] estimated from SAMPLE_PAIRS random pairs.
+    """
+    count = len(eligible)
+    if count < 2:
+        return bands_for(1), 1
+    rng = random.Random(seed)
+    similarities = []
+    for _ in range(SAMPLE_PAIRS):
+        i, j = rng.sample(eligible, 2)
+        identical_wrong = compare_sheets(sheets[i], sheets[j])[0]
+        similarities.append(identical_wrong / (popcount(sheets[i][4]) + popcount(sheets[j][4]) - identical_wrong))
+    tokens = sum(popcount(sheets[index][4]) for index in eligible) / count
+
+    def cost(rows):
+        collisions = sum(similarity ** rows for similarity in similarities) / len(similarities)
+        bands = bands_for(rows)
+        return bands * count * rows * tokens + PAIR_COST * bands * count * count / 2 * collisions
+
+    rows = min(range(1, MAX_ROWS + 1), key=cost)
+    return bands_for(rows), rows
+
+
+# Worker process state, set by _init_worker
+_worker_sheets: List[PackedSheet] = []
+_worker_hasher: Optional[MinHasher] = None
+
+
+def _init_worker(sheets: List[PackedSheet], hasher: MinHasher):
+    """Pool initializer: keep the packed sheets and hash tables."""
+    global _worker_sheets, _worker_hasher
+    _worker_sheets = sheets
+    _worker_hasher = hasher
+
+
+def signatures(sheets: List[PackedSheet], hasher: MinHasher, indexes: Iterable[int]) -> List[Tuple[int, ...]]:
+    """MinHash signatures of the given sheets (each needs a wrong answer)."""
+    return [hasher.signature(wrong_tokens(sheets[index])) for index in indexes]
+
+
+def score_pairs(sheets: List[PackedSheet], pairs: Iterable[Tuple[int, int]]) -> List[Tuple[int, int, int, int]]:
+    """Return (i, j, identical wrong, identical answers) of candidate pairs."""
+    return [(i, j) + compare_sheets(sheets[i], sheets[j]) for i, j in pairs]
+
+
+def _signature_chunk(indexes: List[int]) -> List[Tuple[int, ...]]:
+    return signatures(_worker_sheets, _worker_hasher, indexes)
+
+
+def _score_chunk(pairs: List[Tuple[int, int]]) -> List[Tuple[int, int, int, int]]:
+    return score_pairs(_worker_sheets, pairs)
+
+
+def _chunks(items: list, size: int) -> List[list]:
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+
+class CollusionDetector:
+    """Tìm các cặp bài làm có nhiều câu sai giống hệt nhau."""
+
+    def __init__(
+        self,
+        storage: BaseStorageManager,
+        workers: Optional[int] = None,
+        min_identical_wrong: int = DEFAULT_MIN_IDENTICAL_WRONG,
+        min_similarity: float = DEFAULT_MIN_SIMILARITY,
+        bands: Optional[int] = None,
+        rows: Optional[int] = None,
+        max_bucket: int = DEFAULT_MAX_BUCKET,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+    ):
+        """Initialize CollusionDetector.
+
+        Args:
+            storage: Storage manager
+            workers: Number of worker processes (default: CPU count);
+                1 runs in the current process
+            min_identical_wrong: Identical wrong answers needed to report a pair
+            min_similarity: Jaccard similarity of the wrong answers needed
+                to report a pair
+            bands: LSH bands (default: tuned per exam, see tune_lsh)
+            rows: MinHash values per band (default: tuned per exam)
+            max_bucket: Larger band buckets are skipped
+            chunk_size: Sheets or pairs per worker task
+        """
+        if min_identical_wrong < 1:
+            raise ValueError("min_identical_wrong must be at least 1")
+        self.storage = storage
+        self.workers = workers or os.cpu_count() or 1
+        self.min_identical_wrong = min_identical_wrong
+        self.min_similarity = min_similarity
+        self.bands = bands
+        self.rows = rows
+        self.max_bucket = max_bucket
+        self.chunk_size = chunk_size
+
+    def run(self, exam_id: str) -> Tuple[bool, str, Optional[dict]]:
+        """Kiểm tra các bài làm của một đề.
+
+        Args:
+            exam_id: ID của đề thi
+
+        Returns:
+            Tuple of (success, message, report dict) - see detect()
+        """
+        exam = self.storage.load_exam(exam_id)
+        if not exam:
+            return False, f"Đề thi không tồn tại: {exam_id}", None
+        report = self.detect(AnswerKey.from_exam(exam), self.storage.list_submissions(exam_id=exam_id))
+        return True, f"Tìm thấy {len(report['pairs'])} cặp bài đáng ngờ", report
+
+    def detect(self, key: AnswerKey, submissions: List[dict]) -> dict:
+        """Find suspicious pairs among submissions of one exam.
+
+        Returns:
+            Dict with exam_id, submissions, eligible (sheets with enough
+            wrong answers), bands and rows of the LSH, candidates (pairs
+            compared), pairs (ranked by identical wrong answers, then
+            similarity) and elapsed seconds
+        """
+        started = time.perf_counter()
+        sheets = [pack_answers(key, submission.get('answers') or {}) for submission in submissions]
+        eligible = [
+            index for index, sheet in enumerate(sheets)
+            if popcount(sheet[4]) >= self.min_identical_wrong
+        ]
+        bands, rows = self.bands, self.rows
+        if rows is None:
+            tuned_bands, rows = tune_lsh(sheets, eligible)
+            bands = bands or tuned_bands
+        bands = bands or bands_for(rows)
+        hasher = MinHasher(key.total_questions, bands * rows)
+
+        pool = None
+        if self.workers > 1 and len(eligible) > self.chunk_size:
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker, initargs=(sheets, hasher)
+            )
+        try:
+            if pool is None:
+                sigs = signatures(sheets, hasher, eligible)
+            else:
+                sigs = [sig for chunk in pool.map(_signature_chunk, _chunks(eligible, self.chunk_size)) for sig in chunk]
+
+            candidates = sorted(self._candidate_pairs(eligible, sigs, submissions, bands, rows))
+            if pool is None or len(candidates) <= self.chunk_size:
+                scored = score_pairs(sheets, candidates)
+            else:
+                scored = [row for chunk in pool.map(_score_chunk, _chunks(candidates, self.chunk_size)) for row in chunk]
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        pairs = []
+        for i, j, identical_wrong, identical_answers in scored:
+            if identical_wrong < self.min_identical_wrong:
+                continue
+            wrong = (popcount(sheets[i][4]), popcount(sheets[j][4]))
+            similarity = identical_wrong / (wrong[0] + wrong[1] - identical_wrong)
+            if similarity < self.min_similarity:
+                continue
+            if submissions[i]['submission_id'] > submissions[j]['submission_id']:
+                i, j = j, i
+                wrong = wrong[::-1]
+            pairs.append({
+                'submission_ids': [submissions[i]['submission_id'], submissions[j]['submission_id']],
+                'student_ids': [submissions[i].get('student_id'), submissions[j].get('student_id')],
+                'identical_wrong': identical_wrong,
+                'identical_answers': identical_answers,
+                'wrong_answers': list(wrong),
+                'similarity': round(similarity, 4)
+            })
+        pairs.sort(key=lambda pair: (-pair['identical_wrong'], -pair['similarity'], pair['submission_ids']))
+
+        return {
+            'exam_id': key.exam_id,
+            'submissions': len(submissions),
+            'eligible': len(eligible),
+            'bands': bands,
+            'rows': rows,
+            'candidates': len(candidates),
+            'pairs': pairs,
+            'elapsed': time.perf_counter() - started
+        }
+
+    def _candidate_pairs(
+        self,
+        eligible: List[int],
+        sigs: List[Tuple[int, ...]],
+        submissions: List[dict],
+        bands: int,
+        rows: int
+    ) -> set:
+        """Pairs of sheets sharing at least one LSH band (not of the same student)."""
+        candidates = set()
+        for band in range(bands):
+            buckets = defaultdict(list)
+            start = band * rows
+            for index, sig in zip(eligible, sigs):
+                buckets[sig[start:start + rows]].append(index)
+            for members in buckets.values():
+                if len(members) < 2 or len(members) > self.max_bucket:
+                    continue
+                for position, i in enumerate(members):
+                    for j in members[position + 1:]:
+                        if submissions[i].get('student_id') != submissions[j].get('student_id'):
+                            candidates.add((i, j))
+        return candidates
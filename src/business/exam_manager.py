@@ -5,26 +5,35 @@ from datetime import datetime
 import uuid
 
 from src.models.exam import Exam, Question
-from src.storage.file_storage import FileStorageManager
+from src.storage.base_storage import BaseStorageManager
 
 
 class ExamManager:
     """Manages exam-related business logic."""
     
-    def __init__(self, storage: FileStorageManager):
+    def __init__(self, storage: BaseStorageManager):
         """Initialize ExamManager.
         
         Args:
-            storage: FileStorageManager instance
+            storage: Storage manager (see create_storage)
         """
         self.storage = storage
     
-    def create_exam(self, title: str, teacher_id: str) -> Tuple[bool, str, Optional[str]]:
+    def create_exam(
+        self,
+        title: str,
+        teacher_id: str,
+        questions: Optional[List[dict]] = None
+    ) -> Tuple[bool, str, Optional[str]]:
         """Create a new exam.
         
         Args:
             title: Exam title
             teacher_id: ID of the teacher creating the exam
+            questions: Optional list of question dicts (content, choices,
+                correct_answer). They are validated up front and saved with
+                the exam in a single write; nothing is written if any
+                question is invalid.
         
         Returns:
             Tuple of (success, message, exam_id)
@@ -35,6 +44,10 @@ class ExamManager:
         if not teacher_id:
             return False, "Mã giáo viên không được để trống", None
         
+        new_questions, errors = self._build_questions(questions or [], [])
+        if errors:
+            return False, "; ".join(errors), None
+        
         # Generate unique exam ID
         exam_id = f"E{uuid.uuid4().hex[:8].upper()}"
         
@@ -43,7 +56,7 @@ class ExamManager:
             exam_id=exam_id,
             title=title,
             created_by=teacher_id,
-            questions=[]
+            questions=new_questions
         )
         
         # Save to storage
@@ -72,39 +85,136 @@ class ExamManager:
         Returns:
             Tuple of (success, message, question_id)
         """
-        # Load exam
-        exam_dict = self.storage.load_exam(exam_id)
-        if not exam_dict:
-            return False, f"Đề thi không tồn tại: {exam_id}", None
+        # Load, modify and save under the exam lock (other workers may
+        # update the same exam concurrently)
+        with self.storage.exam_lock(exam_id):
+            # Load exam
+            exam_dict = self.storage.load_exam(exam_id)
+            if not exam_dict:
+                return False, f"Đề thi không tồn tại: {exam_id}", None
+            
+            exam = Exam.from_dict(exam_dict)
+            
+            # Generate question ID
+            question_id = f"Q{len(exam.questions) + 1:03d}"
+            
+            # Create question
+            question = Question(
+                question_id=question_id,
+                content=content,
+                choices=choices,
+                correct_answer=correct_answer
+            )
+            
+            # Validate question
+            is_valid, error_msg = question.validate()
+            if not is_valid:
+                return False, error_msg, None
+            
+            # Add question to exam
+            success, msg = exam.add_question(question)
+            if not success:
+                return False, msg, None
+            
+            # Save exam
+            if self.storage.save_exam(exam.to_dict()):
+                return True, "Thêm câu hỏi thành công", question_id
+            else:
+                return False, "Không thể lưu đề thi", None
+    
+    def add_questions(
+        self,
+        exam_id: str,
+        questions: List[dict]
+    ) -> Tuple[bool, str, List[str], List[str]]:
+        """Add several questions to an exam with a single load and save.
         
-        exam = Exam.from_dict(exam_dict)
+        All questions are validated first; if any is invalid nothing is
+        written and the errors of every invalid question are returned.
         
-        # Generate question ID
-        question_id = f"Q{len(exam.questions) + 1:03d}"
+        Args:
+            exam_id: ID of the exam
+            questions: List of dicts with content, choices and correct_answer
         
-        # Create question
-        question = Question(
-            question_id=question_id,
-            content=content,
-            choices=choices,
-            correct_answer=correct_answer
-        )
+        Returns:
+            Tuple of (success, message, question_ids, errors). question_ids
+            is empty unless the questions were saved; errors holds one
+            message per invalid question.
+        """
+        if not questions:
+            return False, "Danh sách câu hỏi trống", [], []
+        
+        with self.storage.exam_lock(exam_id):
+            # Load exam
+            exam_dict = self.storage.load_exam(exam_id)
+            if not exam_dict:
+                return False, f"Đề thi không tồn tại: {exam_id}", [], []
+            
+            exam = Exam.from_dict(exam_dict)
+            
+            new_questions, errors = self._build_questions(questions, exam.questions)
+            if errors:
+                return False, f"Có {len(errors)} câu hỏi không hợp lệ", [], errors
+            
+            exam.questions.extend(new_questions)
+            
+            # Save exam once for the whole batch
+            if self.storage.save_exam(exam.to_dict()):
+                return True, f"Thêm {len(new_questions)} câu hỏi thành công", [q.question_id for q in new_questions], []
+            else:
+                return False, "Không thể lưu đề thi", [], []
+    
+    def _build_questions(
+        self,
+        questions: List[dict],
+        existing: List[Question]
+    ) -> Tuple[List[Question], List[str]]:
+        """Create and validate Question objects for a batch.
         
-        # Validate question
-        is_valid, error_msg = question.validate()
-        if not is_valid:
-            return False, error_msg, None
+        Args:
+            questions: List of dicts with content, choices and correct_answer
+            existing: Questions already in the exam (for ID numbering)
         
-        # Add question to exam
-        success, msg = exam.add_question(question)
-        if not success:
-            return False, msg, None
+        Returns:
+            Tuple of (questions, error messages)
+        """
+        used_ids = {q.question_id for q in existing}
+        next_number = len(existing) + 1
+        built = []
+        errors = []
         
-        # Save exam
-        if self.storage.save_exam(exam.to_dict()):
-            return True, "Thêm câu hỏi thành công", question_id
-        else:
-            return False, "Không thể lưu đề thi", None
+        for index, data in enumerate(questions, 1):
+            # Generate question ID
+            question_id = f"Q{next_number:03d}"
+            while question_id in used_ids:
+                next_number += 1
+                question_id = f"Q{next_number:03d}"
+            
+            if not isinstance(data, dict) or not isinstance(data.get('choices') or {}, dict):
+                errors.append(f"Câu {index}: Dữ liệu câu hỏi không hợp lệ")
+                continue
+            
+            try:
+                question = Question(
+                    question_id=question_id,
+                    content=data.get('content', ''),
+                    choices=data.get('choices') or {},
+                    correct_answer=data.get('correct_answer', '')
+                )
+                is_valid, error_msg = question.validate()
+            except (AttributeError, TypeError):
+                errors.append(f"Câu {index}: Dữ liệu câu hỏi không hợp lệ")
+                continue
+            
+            if not is_valid:
+                errors.append(f"Câu {index}: {error_msg}")
+                continue
+            
+            used_ids.add(question_id)
+            next_number += 1
+            built.append(question)
+        
+        return built, errors
     
     def update_exam(self, exam_id: str, updates: dict) -> Tuple[bool, str]:
         """Update exam information.
@@ -116,29 +226,30 @@ class ExamManager:
         Returns:
             Tuple of (success, message)
         """
-        # Load exam
-        exam_dict = self.storage.load_exam(exam_id)
-        if not exam_dict:
-            return False, f"Đề thi không tồn tại: {exam_id}"
-        
-        # Update allowed fields (not exam_id)
-        if 'title' in updates:
-            exam_dict['title'] = updates['title']
-        
-        if 'questions' in updates:
-            exam_dict['questions'] = updates['questions']
-        
-        # Validate updated exam
-        exam = Exam.from_dict(exam_dict)
-        is_valid, error_msg = exam.validate()
-        if not is_valid:
-            return False, error_msg
-        
-        # Save updated exam
-        if self.storage.save_exam(exam.to_dict()):
-            return True, "Cập nhật đề thi thành công"
-        else:
-            return False, "Không thể lưu đề thi"
+        with self.storage.exam_lock(exam_id):
+            # Load exam
+            exam_dict = self.storage.load_exam(exam_id)
+            if not exam_dict:
+                return False, f"Đề thi không tồn tại: {exam_id}"
+            
+            # Update allowed fields (not exam_id)
+            if 'title' in updates:
+                exam_dict['title'] = updates['title']
+            
+            if 'questions' in updates:
+                exam_dict['questions'] = updates['questions']
+            
+            # Validate updated exam
+            exam = Exam.from_dict(exam_dict)
+            is_valid, error_msg = exam.validate()
+            if not is_valid:
+                return False, error_msg
+            
+            # Save updated exam
+            if self.storage.save_exam(exam.to_dict()):
+                return True, "Cập nhật đề thi thành công"
+            else:
+                return False, "Không thể lưu đề thi"
     
     def delete_exam(self, exam_id: str) -> Tuple[bool, str]:
         """Delete an exam.
@@ -184,6 +295,16 @@ class ExamManager:
         exams = self.storage.list_exams()
         return True, f"Tìm thấy {len(exams)} đề thi", exams
     
+    def list_exam_summaries(self) -> Tuple[bool, str, List[dict]]:
+        """List exam summaries (no questions) from the exam catalog.
+        
+        Returns:
+            Tuple of (success, message, list of summary dicts with exam_id,
+            title, created_by, created_at, question_count, content_hash)
+        """
+        summaries = self.storage.list_exam_summaries()
+        return True, f"Tìm thấy {len(summaries)} đề thi", summaries
+    
     def validate_exam(self, exam_dict: dict) -> Tuple[bool, str]:
         """Validate an exam dictionary.
         
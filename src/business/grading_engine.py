@@ -1,23 +1,182 @@
 """Grading Engine - Chấm điểm tự động."""
 
-from typing import Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional, Union
 from datetime import datetime
 import uuid
 
-from src.storage.file_storage import FileStorageManager
+from src.storage.exam_stats import open_exam_stats
+from src.storage.base_storage import BaseStorageManager
+from src.storage.item_analysis import open_item_analysis
 from src.models.result import Result
+from src.models.submission import Submission
+from src.business.answer_key import AnswerKey
+from src.business.vector_grading import VectorGrader
+
+
+# Compact batches at least this large are graded with NumPy when it is installed
+VECTOR_MIN_BATCH = 64
+
+# Called with (saved result, previous version of that result or None)
+ResultListener = Callable[[dict, Optional[dict]], None]
 
 
 class GradingEngine:
     """Chấm điểm tự động cho bài thi."""
     
-    def __init__(self, storage: FileStorageManager):
+    def __init__(self, storage: BaseStorageManager, vectorize: bool = True):
         """Initialize GradingEngine.
         
         Args:
-            storage: FileStorageManager instance
+            storage: Storage manager (see create_storage)
+            vectorize: Grade large batches with NumPy when available
         """
         self.storage = storage
+        self.vectorize = vectorize
+        self.result_listeners: List[ResultListener] = []
+        # exam_id -> (content_hash, compiled AnswerKey)
+        self._answer_keys: Dict[str, Tuple[str, AnswerKey]] = {}
+    
+    def add_result_listener(self, listener: ResultListener):
+        """Đăng ký hàm được gọi sau mỗi kết quả được lưu.
+        
+        Used by running aggregates (e.g. exam statistics) that must see
+        every new or replaced result.
+        """
+        self.result_listeners.append(listener)
+    
+    def notify_results(self, results: List[dict], previous: Optional[List[Optional[dict]]] = None):
+        """Báo cho các listener về các kết quả vừa lưu.
+        
+        Args:
+            results: Saved result dictionaries
+            previous: Replaced version of each result (None for new results)
+        """
+        if not self.result_listeners:
+            return
+        previous = previous or [None] * len(results)
+        for result, old in zip(results, previous):
+            for listener in self.result_listeners:
+                try:
+                    listener(result, old)
+                except Exception:
+                    # A failing aggregate must not fail grading; it can be rebuilt
+                    continue
+    
+    def answer_key(self, exam_id: str) -> Optional[AnswerKey]:
+        """Đáp án đã biên dịch của một đề thi (None nếu đề không tồn tại).
+        
+        Keys are cached per exam and recompiled only when the exam's
+        content hash in the catalog changes.
+        """
+        summary = self.storage.get_exam_summary(exam_id)
+        if not summary:
+            return None
+        cached = self._answer_keys.get(exam_id)
+        if cached is not None and cached[0] == summary['content_hash']:
+            return cached[1]
+        
+        exam_dict = self.storage.load_exam(exam_id)
+        if not exam_dict:
+            return None
+        key = AnswerKey.from_exam(exam_dict)
+        self._answer_keys[exam_id] = (summary['content_hash'], key)
+        return key
+    
+    def grade(
+        self,
+        submission: Union[dict, Submission],
+        exam: Optional[dict] = None,
+        result_id: Optional[str] = None
+    ) -> Tuple[bool, str, Optional[dict]]:
+        """Chấm một bài làm trong bộ nhớ rồi lưu bài làm và kết quả cùng lúc.
+        
+        Unlike grade_submission, the submission is not read back from
+        storage; it is written together with its result by
+        storage.save_graded, so no submission is left without a result.
+        
+        Args:
+            submission: Bài làm (Submission hoặc dict)
+            exam: Exam dict (mặc định: dùng đáp án đã biên dịch trong cache)
+            result_id: Fixed result id (e.g. derived from a queue ticket);
+                grading the same submission again replaces that result
+                instead of adding a second one
+        
+        Returns:
+            Tuple of (success, message, result_dict)
+        """
+        submission_dict = submission.to_dict() if isinstance(submission, Submission) else submission
+        exam_id = submission_dict.get('exam_id')
+        
+        if exam is not None:
+            if exam.get('exam_id') != exam_id:
+                return False, f"Bài làm không thuộc đề thi: {exam.get('exam_id')}", None
+            key = AnswerKey.from_exam(exam)
+        else:
+            key = self.answer_key(exam_id)
+        if key is None:
+            return False, f"Đề thi không tồn tại: {exam_id}", None
+        
+        # Grade and validate
+        try:
+            success, msg, result = self._grade_with_key(key, submission_dict)
+        except Exception:
+            success, msg, result = False, "Dữ liệu bài làm không hợp lệ", None
+        if not success:
+            return False, msg, None
+        
+        previous = None
+        if result_id is not None:
+            result.result_id = result_id
+            previous = self.storage.load_result(result_id)
+        if not self.storage.save_graded(submission_dict, result.to_dict(compact=True)):
+            return False, "Không thể lưu kết quả", None
+        
+        result_dict = result.to_dict()
+        self.notify_results([result_dict], [previous])
+        return True, "Chấm bài thành công", result_dict
+    
+    def grade_many(
+        self,
+        key: AnswerKey,
+        submissions: List[Union[dict, Submission]]
+    ) -> List[Tuple[bool, str, Optional[dict]]]:
+        """Chấm một lô bài làm mới và lưu bài làm cùng kết quả một lần.
+        
+        Batch form of grade: only submissions that were graded are stored,
+        together with their results, in one storage.save_graded_many call.
+        Results are returned in the stored (compact) form; use
+        Result.verbose_dict for per-question details.
+        
+        Args:
+            key: Đáp án đã biên dịch
+            submissions: Danh sách bài làm chưa lưu (dict hoặc Submission)
+        
+        Returns:
+            List of (success, message, result_dict) in the same order
+        """
+        submissions = [
+            submission.to_dict() if isinstance(submission, Submission) else submission
+            for submission in submissions
+        ]
+        outcomes = self.grade_block(key, submissions, compact=True)
+        graded = [
+            (submission, result)
+            for submission, (success, msg, result) in zip(submissions, outcomes)
+            if success
+        ]
+        if not graded:
+            return outcomes
+        
+        if not self.storage.save_graded_many(
+            [submission for submission, _ in graded],
+            [result for _, result in graded]
+        ):
+            return [
+                (False, "Không thể lưu kết quả", None) if success else (success, msg, result)
+                for success, msg, result in outcomes
+            ]
+        self.notify_results([result for _, result in graded])
+        return outcomes
     
     def grade_submission(self, submission_id: str) -> Tuple[bool, str, Optional[dict]]:
         """Chấm điểm một bài làm.
@@ -38,55 +197,195 @@ class GradingEngine:
         if not exam_dict:
             return False, f"Đề thi không tồn tại: {submission_dict['exam_id']}", None
         
-        # Grade each question
-        total_questions = len(exam_dict['questions'])
-        correct_answers = 0
-        details = []
+        # Grade and validate
+        success, msg, result = self._grade_with_key(AnswerKey.from_exam(exam_dict), submission_dict)
+        if not success:
+            return False, msg, None
+        
+        # Stored compactly; callers get the verbose details
+        if self.storage.save_result(result.to_dict(compact=True)):
+            result_dict = result.to_dict()
+            self.notify_results([result_dict])
+            return True, "Chấm bài thành công", result_dict
+        else:
+            return False, "Không thể lưu kết quả", None
+    
+    def grade_batch(
+        self,
+        exam_id: str,
+        submissions: List[Union[dict, Submission]]
+    ) -> List[Tuple[bool, str, Optional[dict]]]:
+        """Chấm nhiều bài làm của cùng một đề thi.
+        
+        The exam is loaded and its answer key compiled once, all
+        submissions are graded in one pass, and the results are written
+        with a single batched storage call.
+        
+        Args:
+            exam_id: ID của đề thi
+            submissions: Danh sách bài làm (dict hoặc Submission)
+        
+        Returns:
+            List of (success, message, result_dict), one per submission,
+            in the same order
+        """
+        exam_dict = self.storage.load_exam(exam_id)
+        if not exam_dict:
+            msg = f"Đề thi không tồn tại: {exam_id}"
+            return [(False, msg, None) for _ in submissions]
+        
+        return self._grade_and_save(AnswerKey.from_exam(exam_dict), submissions)
+    
+    def grade_stored_submissions(self, submission_ids: List[str]) -> List[Tuple[bool, str, Optional[dict]]]:
+        """Chấm các bài làm đã lưu, nạp đáp án một lần cho mỗi đề thi.
+        
+        Args:
+            submission_ids: Danh sách ID bài làm
+        
+        Returns:
+            List of (success, message, result_dict) in the same order
+        """
+        outcomes: List[Optional[Tuple[bool, str, Optional[dict]]]] = [None] * len(submission_ids)
+        by_exam: Dict[str, List[Tuple[int, dict]]] = {}
+        
+        for position, submission_id in enumerate(submission_ids):
+            submission_dict = self.storage.load_submission(submission_id)
+            if not submission_dict:
+                outcomes[position] = (False, f"Bài làm không tồn tại: {submission_id}", None)
+                continue
+            by_exam.setdefault(submission_dict['exam_id'], []).append((position, submission_dict))
+        
+        for exam_id, entries in by_exam.items():
+            batch_outcomes = self.grade_batch(exam_id, [submission for _, submission in entries])
+            for (position, _), outcome in zip(entries, batch_outcomes):
+                outcomes[position] = outcome
+        
+        return outcomes
+    
+    def _grade_and_save(
+        self,
+        key: AnswerKey,
+        submissions: List[Union[dict, Submission]]
+    ) -> List[Tuple[bool, str, Optional[dict]]]:
+        """Chấm một lô bài làm bằng đáp án đã biên dịch và lưu một lần."""
+        outcomes = self.grade_block(key, submissions)
+        to_save = [Result.compact_dict(result) for success, msg, result in outcomes if success]
+        
+        if to_save and not self.storage.save_results(to_save):
+            return [
+                (False, "Không thể lưu kết quả", None) if success else (success, msg, result)
+                for success, msg, result in outcomes
+            ]
+        self.notify_results([result for success, msg, result in outcomes if success])
+        return outcomes
+    
+    def grade_block(
+        self,
+        key: AnswerKey,
+        submissions: List[Union[dict, Submission]],
+        compact: bool = False
+    ) -> List[Tuple[bool, str, Optional[dict]]]:
+        """Chấm một lô bài làm bằng đáp án đã biên dịch (không ghi dữ liệu).
+        
+        Args:
+            key: Đáp án đã biên dịch
+            submissions: Danh sách bài làm (dict hoặc Submission)
+            compact: Return results in the compact storage form. Large
+                compact blocks are graded with NumPy when it is available,
+                without building per-question details at all; verbose
+                details cost one dict per answer either way, so verbose
+                blocks use the scalar path
         
-        for question in exam_dict['questions']:
-            question_id = question['question_id']
-            correct_answer = question['correct_answer']
-            student_answer = submission_dict['answers'].get(question_id, '')
+        Returns:
+            List of (success, message, result_dict) in the same order
+        """
+        submissions = [
+            submission.to_dict() if isinstance(submission, Submission) else submission
+            for submission in submissions
+        ]
+        
+        graded = None
+        if compact and self.vectorize and len(submissions) >= VECTOR_MIN_BATCH:
+            graded = VectorGrader(key).grade_compact(
+                [submission.get('answers') for submission in submissions], self.calculate_score
+            )
+        
+        outcomes = []
+        for position, submission in enumerate(submissions):
+            if submission.get('exam_id') != key.exam_id:
+                outcomes.append((False, f"Bài làm không thuộc đề thi: {key.exam_id}", None))
+                continue
             
-            is_correct = self.compare_answers(student_answer, correct_answer)
-            if is_correct:
-                correct_answers += 1
+            try:
+                if graded is None:
+                    success, msg, result = self._grade_with_key(key, submission)
+                elif graded[position] is None:
+                    success, msg, result = False, "Dữ liệu bài làm không hợp lệ", None
+                else:
+                    correct_answers, score, packed = graded[position]
+                    details = None if packed else key.grade_answers(submission['answers'])[1]
+                    success, msg, result = self._build_result(
+                        key, submission, correct_answers, details, score=score, packed=packed
+                    )
+            except Exception:
+                success, msg, result = False, "Dữ liệu bài làm không hợp lệ", None
+            if not success:
+                outcomes.append((False, msg, None))
+                continue
             
-            details.append({
-                'question_id': question_id,
-                'student_answer': student_answer,
-                'correct_answer': correct_answer,
-                'is_correct': is_correct
-            })
+            outcomes.append((True, "Chấm bài thành công", result.to_dict(compact=compact)))
+        
+        return outcomes
+    
+    def _grade_with_key(self, key: AnswerKey, submission_dict: dict) -> Tuple[bool, str, Optional[Result]]:
+        """Chấm một bài làm bằng đáp án đã biên dịch (không ghi dữ liệu).
+        
+        Returns:
+            Tuple of (success, message, Result)
+        """
+        correct_answers, details = key.grade_answers(submission_dict['answers'])
+        return self._build_result(key, submission_dict, correct_answers, details)
+    
+    def _build_result(
+        self,
+        key: AnswerKey,
+        submission_dict: dict,
+        correct_answers: int,
+        details: Optional[List[dict]],
+        score: Optional[float] = None,
+        packed: Optional[dict] = None
+    ) -> Tuple[bool, str, Optional[Result]]:
+        """Tạo và kiểm tra Result từ số câu đúng và chi tiết đã chấm.
+        
+        score may be precomputed (vector path); details may be given in the
+        compact form as packed instead.
+        """
+        total_questions = key.total_questions
         
         # Calculate score
         wrong_answers = total_questions - correct_answers
-        score = self.calculate_score(correct_answers, total_questions)
+        if score is None:
+            score = self.calculate_score(correct_answers, total_questions)
         
         # Create result
         result_id = f"R{uuid.uuid4().hex[:8].upper()}"
         result = Result(
             result_id=result_id,
-            submission_id=submission_id,
+            submission_id=submission_dict['submission_id'],
             exam_id=submission_dict['exam_id'],
             student_id=submission_dict['student_id'],
             score=score,
             total_questions=total_questions,
             correct_answers=correct_answers,
             wrong_answers=wrong_answers,
-            details=details
+            details=details,
+            packed=packed
         )
         
-        # Validate and save
         is_valid, error_msg = result.validate()
         if not is_valid:
             return False, error_msg, None
-        
-        result_dict = result.to_dict()
-        if self.storage.save_result(result_dict):
-            return True, "Chấm bài thành công", result_dict
-        else:
-            return False, "Không thể lưu kết quả", None
+        return True, "Chấm bài thành công", result
     
     def calculate_score(self, correct: int, total: int) -> float:
         """Tính điểm theo thang 10.
@@ -125,6 +424,24 @@ class GradingEngine:
         """
         result_dict = self.storage.load_result(result_id)
         if result_dict:
-            return True, "Lấy kết quả thành công", result_dict
+            return True, "Lấy kết quả thành công", Result.verbose_dict(result_dict)
         else:
             return False, f"Kết quả không tồn tại: {result_id}", None
+
+
+def create_grading_engine(storage: BaseStorageManager, vectorize: bool = True) -> GradingEngine:
+    """Tạo GradingEngine đã đăng ký listener thống kê điểm và phân tích câu hỏi.
+    
+    Every entry point that stores results (web app, CLIs, bulk, scan,
+    parallel and incremental grading) builds its engine here, so the
+    running aggregates under storage.base_path see every result no matter
+    which process graded it.
+    
+    Args:
+        storage: Storage manager
+        vectorize: Grade large batches with NumPy when available
+    """
+    engine = GradingEngine(storage, vectorize=vectorize)
+    engine.add_result_listener(open_exam_stats(storage.base_path).record)
+    engine.add_result_listener(open_item_analysis(storage.base_path).record)
+    return engine
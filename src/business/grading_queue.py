@@ -0,0 +1,174 @@
+"""Grading Queue - Chấm bài nền từ hàng đợi.
+
+With the queue enabled, /api/submit-exam only writes the submission to
+the durable JobQueue and answers with a ticket. A pool of worker threads
+claims jobs in small batches and grades them with GradingEngine.grade,
+so a burst of submissions at the end of an exam is absorbed by the queue
+instead of by request latency.
+
+A job may carry the idempotency key its submission claimed (under
+IDEMPOTENCY_KEY_FIELD). Once the job is graded the key's record gets the
+result id, so retries are answered after the job row is purged; if the
+job fails the key is released so the submission can be sent again.
+
+The result id of a job is derived from its ticket (ticket_result_id), so
+a job graded twice (its lease expired while it was being graded and
+another worker claimed it) replaces its result instead of adding one.
+"""
+
+import os
+import threading
+import time
+from typing import List, Optional
+
+from src.business.grading_engine import GradingEngine
+from src.storage.idempotency import IdempotencyIndex
+from src.storage.job_queue import JobQueue
+
+
+# Environment variables enabling the queue in web_app.py
+QUEUE_ENV_VAR = 'GRADING_QUEUE'
+QUEUE_WORKERS_ENV_VAR = 'GRADING_QUEUE_WORKERS'
+
+DEFAULT_WORKERS = 2
+
+# Field of a queued submission holding its idempotency key
+IDEMPOTENCY_KEY_FIELD = 'idempotency_key'
+
+# Jobs claimed per database round trip
+CLAIM_BATCH_SIZE = 20
+
+# Seconds an idle worker waits before polling the queue again (jobs
+# enqueued by other processes are only seen by polling)
+POLL_INTERVAL = 0.5
+
+# Finished jobs (and their tickets) are kept this many seconds
+JOB_RETENTION = 24 * 3600
+PURGE_INTERVAL = 3600
+
+
+def ticket_result_id(ticket: str) -> str:
+    """Result id of the job with this ticket (T<hex> -> R<hex>)."""
+    return f"R{ticket[1:]}"
+
+
+def queue_enabled() -> bool:
+    """True if GRADING_QUEUE is set to 1/true/yes/on."""
+    return os.environ.get(QUEUE_ENV_VAR, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def queue_workers() -> int:
+    """Worker thread count from GRADING_QUEUE_WORKERS (default 2)."""
+    try:
+        return max(int(os.environ.get(QUEUE_WORKERS_ENV_VAR, DEFAULT_WORKERS)), 1)
+    except ValueError:
+        return DEFAULT_WORKERS
+
+
+class GradingWorkers:
+    """Nhóm luồng chấm các bài làm trong hàng đợi."""
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        engine: GradingEngine,
+        workers: int = DEFAULT_WORKERS,
+        batch_size: int = CLAIM_BATCH_SIZE,
+        poll_interval: float = POLL_INTERVAL,
+        idempotency: Optional[IdempotencyIndex] = None
+    ):
+        """Initialize GradingWorkers.
+
+        Args:
+            queue: Job queue to drain
+            engine: GradingEngine used to grade and save each submission
+            workers: Number of worker threads
+            batch_size: Jobs claimed at a time by one worker
+            poll_interval: Idle wait between polls, in seconds
+            idempotency: Index updated with the outcome of jobs that carry
+                an idempotency key
+        """
+        self.queue = queue
+        self.engine = engine
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.idempotency = idempotency
+        self._threads: List[threading.Thread] = []
+        self._stop = threading.Event()
+        self._last_purge = 0.0
+
+    def grade_job(self, job: dict) -> bool:
+        """Chấm một việc đã nhận và ghi trạng thái của nó vào hàng đợi."""
+        submission = dict(job['submission'])
+        key = submission.pop(IDEMPOTENCY_KEY_FIELD, None)
+        self.queue.mark_started(job['ticket'])
+        try:
+            success, msg, result = self.engine.grade(submission, result_id=ticket_result_id(job['ticket']))
+        except Exception as e:
+            success, msg, result = False, str(e), None
+        if success:
+            completed = self.queue.complete(job['ticket'], result['result_id'], msg)
+            if key and self.idempotency is not None:
+                self.idempotency.complete(key, {'ticket': job['ticket'], 'result_id': result['result_id']})
+            return completed
+        self.queue.fail(job['ticket'], msg)
+        if key and self.idempotency is not None:
+            # A failed job must not answer retries of its submission forever
+            self.idempotency.release(key)
+        return False
+
+    def run_once(self) -> int:
+        """Claim and grade one batch of jobs.
+
+        Returns:
+            Number of jobs processed (0 if the queue was empty)
+        """
+        jobs = self.queue.claim(self.batch_size)
+        for job in jobs:
+            self.grade_job(job)
+        return len(jobs)
+
+    def drain(self) -> int:
+        """Grade jobs in the calling thread until the queue is empty."""
+        processed = 0
+        while True:
+            count = self.run_once()
+            if not count:
+                return processed
+            processed += count
+
+    def _purge_if_due(self):
+        now = time.time()
+        if now - self._last_purge >= PURGE_INTERVAL:
+            self._last_purge = now
+            self.queue.purge(JOB_RETENTION)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.run_once():
+                    continue
+                self._purge_if_due()
+            except Exception:
+                # Keep the worker alive; the job's lease lets it be retried
+                pass
+            self.queue.wait_for_jobs(self.poll_interval)
+
+    def start(self):
+        """Start the worker threads (no-op if already running)."""
+        if self._threads:
+            return
+        self._stop.clear()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'grading-worker-{number}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the worker threads after their current batch."""
+        self._stop.set()
+        self.queue.wake_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
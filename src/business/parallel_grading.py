@@ -0,0 +1,230 @@
+"""Parallel Grading - Chấm lại nhiều bài làm trên nhiều lõi CPU.
+
+Submission ids are split into chunks and graded by a ProcessPoolExecutor.
+Each worker process opens its own storage manager and receives every
+compiled AnswerKey once, through the pool initializer, so a task only
+carries a list of ids. Workers load and grade their chunk without writing;
+the parent process saves each returned chunk with one save_results call,
+which keeps all writes in a single process.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.business.answer_key import AnswerKey
+from src.business.grading_engine import create_grading_engine, GradingEngine
+from src.storage.factory import create_storage, storage_backend_name
+from src.storage.base_storage import BaseStorageManager
+
+
+DEFAULT_CHUNK_SIZE = 200
+
+# Worker process state, set by _init_worker
+_worker_engine: Optional[GradingEngine] = None
+_worker_keys: Dict[str, AnswerKey] = {}
+_worker_exam_id: Optional[str] = None
+
+# (submission_id, message) of an id that was not graded
+Skipped = Tuple[str, str]
+
+
+def _init_worker(base_path: str, backend: str, keys: Dict[str, AnswerKey], exam_id: Optional[str] = None):
+    """Pool initializer: open storage and keep the answer keys."""
+    global _worker_engine, _worker_keys, _worker_exam_id
+    _worker_engine = GradingEngine(create_storage(base_path=base_path, backend=backend))
+    _worker_keys = keys
+    _worker_exam_id = exam_id
+
+
+def _grade_chunk(submission_ids: List[str]) -> Tuple[List[dict], List[Skipped], List[Skipped]]:
+    """Grade one chunk of submissions in a worker (no writes).
+
+    Returns:
+        See grade_ids
+    """
+    return grade_ids(_worker_engine, _worker_keys, submission_ids, _worker_exam_id)
+
+
+def grade_ids(
+    engine: GradingEngine,
+    keys: Dict[str, AnswerKey],
+    submission_ids: List[str],
+    exam_id: Optional[str] = None
+) -> Tuple[List[dict], List[Skipped], List[Skipped]]:
+    """Load and grade submissions with precompiled keys (no writes).
+
+    Submissions are grouped by exam so each group goes through
+    GradingEngine.grade_block, which uses the vector path for large groups.
+    Ids whose submission no longer exists, or (with exam_id) belongs to
+    another exam, are stale index entries: they are skipped, not failed.
+
+    Args:
+        engine: Engine whose storage the submissions are loaded from
+        keys: Compiled answer keys by exam_id
+        submission_ids: Ids to grade
+        exam_id: Exam the ids were listed for (None = all exams)
+
+    Returns:
+        Tuple of (compact result dicts, [(submission_id, error message)],
+        [(submission_id, reason)] of skipped ids)
+    """
+    results = []
+    errors = []
+    skipped = []
+    by_exam: Dict[str, List[dict]] = {}
+    for submission_id in submission_ids:
+        submission = engine.storage.load_submission(submission_id)
+        if not submission:
+            skipped.append((submission_id, f"Bài làm không tồn tại: {submission_id}"))
+        elif exam_id and submission.get('exam_id') != exam_id:
+            skipped.append((submission_id, f"Bài làm không thuộc đề thi: {exam_id}"))
+        elif submission.get('exam_id') not in keys:
+            errors.append((submission_id, f"Đề thi không tồn tại: {submission.get('exam_id')}"))
+        else:
+            by_exam.setdefault(submission['exam_id'], []).append(submission)
+
+    for group_exam_id, submissions in by_exam.items():
+        outcomes = engine.grade_block(keys[group_exam_id], submissions, compact=True)
+        for submission, (success, msg, result) in zip(submissions, outcomes):
+            if success:
+                results.append(result)
+            else:
+                errors.append((submission['submission_id'], msg))
+    return results, errors, skipped
+
+
+class ParallelGrader:
+    """Chấm song song các bài làm đã lưu bằng nhiều tiến trình."""
+
+    def __init__(
+        self,
+        storage: BaseStorageManager,
+        workers: Optional[int] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        engine: Optional[GradingEngine] = None
+    ):
+        """Initialize ParallelGrader.
+
+        Args:
+            storage: Storage manager (every worker opens the same backend)
+            workers: Number of worker processes (default: CPU count);
+                1 grades in the current process
+            chunk_size: Number of submissions per task
+            engine: GradingEngine whose result listeners are notified of
+                saved results (default: create_grading_engine)
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        self.storage = storage
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.engine = engine or create_grading_engine(storage)
+
+    def _existing_results(self, exam_id: Optional[str]) -> Dict[str, List[dict]]:
+        """Map submission_id -> id, exam and score of every result already stored."""
+        existing: Dict[str, List[dict]] = {}
+        for result in self.storage.iter_results(exam_id=exam_id):
+            existing.setdefault(result['submission_id'], []).append({
+                'result_id': result['result_id'],
+                'exam_id': result['exam_id'],
+                'score': result['score']
+            })
+        return existing
+
+    def _compile_keys(self, exam_id: Optional[str]) -> Dict[str, AnswerKey]:
+        if exam_id:
+            exam = self.storage.load_exam(exam_id)
+            exams = [exam] if exam else []
+        else:
+            exams = self.storage.list_exams()
+        return {exam['exam_id']: AnswerKey.from_exam(exam) for exam in exams}
+
+    def _chunks(self, submission_ids: List[str]) -> Iterable[List[str]]:
+        for start in range(0, len(submission_ids), self.chunk_size):
+            yield submission_ids[start:start + self.chunk_size]
+
+    def run(
+        self,
+        exam_id: Optional[str] = None,
+        regrade: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> dict:
+        """Chấm các bài làm chưa có kết quả (hoặc chấm lại tất cả).
+
+        When regrading, each new result keeps the result_id of the
+        submission's existing result, so results are replaced, not
+        duplicated. A submission with several stored results (duplicates)
+        has every one of them replaced.
+
+        Args:
+            exam_id: Only submissions of this exam
+            regrade: Regrade submissions that already have a result
+            progress: Called with (done, total) after each chunk
+
+        Returns:
+            Summary dict with total, graded, failed, skipped (stale ids:
+            submission deleted or moved to another exam), errors (failed
+            and skipped ids with their message) and elapsed seconds
+        """
+        started = time.perf_counter()
+        existing = self._existing_results(exam_id)
+        submission_ids = self.storage.list_submission_ids(exam_id)
+        if not regrade:
+            submission_ids = [sid for sid in submission_ids if sid not in existing]
+        keys = self._compile_keys(exam_id)
+
+        summary = {'total': len(submission_ids), 'graded': 0, 'failed': 0, 'skipped': 0, 'errors': []}
+        done = 0
+
+        def merge(chunk_size, chunk_results, chunk_errors, chunk_skipped):
+            nonlocal done
+            # One stored copy per existing result of the submission
+            to_save = []
+            previous = []
+            for result in chunk_results:
+                olds = existing.get(result['submission_id']) or [None]
+                for copy_number, old in enumerate(olds):
+                    copy = result if copy_number == 0 else dict(result)
+                    if old is not None:
+                        copy['result_id'] = old['result_id']
+                    to_save.append(copy)
+                    previous.append(old)
+            if to_save and self.storage.save_results(to_save):
+                summary['graded'] += len(chunk_results)
+                self.engine.notify_results(to_save, previous)
+            else:
+                chunk_errors = chunk_errors + [
+                    (result['submission_id'], "Không thể lưu kết quả") for result in chunk_results
+                ]
+            summary['failed'] += len(chunk_errors)
+            summary['skipped'] += len(chunk_skipped)
+            summary['errors'].extend(chunk_errors + chunk_skipped)
+            done += chunk_size
+            if progress:
+                progress(done, summary['total'])
+
+        chunks = list(self._chunks(submission_ids))
+        if self.workers == 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                merge(len(chunk), *grade_ids(self.engine, keys, chunk, exam_id))
+        else:
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(chunks)),
+                initializer=_init_worker,
+                initargs=(str(self.storage.base_path), storage_backend_name(self.storage), keys, exam_id)
+            ) as pool:
+                futures = {pool.submit(_grade_chunk, chunk): chunk for chunk in chunks}
+                for future in as_completed(futures):
+                    chunk = futures[future]
+                    try:
+                        chunk_outcome = future.result()
+                    except Exception as e:
+                        # A crashed worker (BrokenProcessPool) or a grading error
+                        # fails this chunk only; the other chunks are merged
+                        chunk_outcome = ([], [(sid, f"Lỗi khi chấm: {e}") for sid in chunk], [])
+                    merge(len(chunk), *chunk_outcome)
+
+        summary['elapsed'] = time.perf_counter() - started
+        return summary
@@ -0,0 +1,326 @@
+"""Regrade - Chấm lại kết quả khi đáp án của đề thi được sửa.
+
+Results keep each student answer in ``details``, so when only some correct
+answers change, the affected results are updated in place from their own
+details: only the changed questions are re-checked and the counts and
+score recomputed. Submissions are re-read only when the question list
+itself changed (questions added, removed or reordered) or a result has no
+usable details.
+
+Regrade jobs run in a thread of the worker that received the exam update,
+but their state is a JSON file under <base_path>/regrade_jobs/, so a
+status poll answered by any gunicorn worker (or after a restart) sees it.
+"""
+
+import json
+import re
+import threading
+import time
+import uuid
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Dict, Optional, Set
+
+from src.business.answer_key import AnswerKey
+from src.business.grading_engine import create_grading_engine, GradingEngine
+from src.models.result import Result
+from src.storage.file_lock import atomic_write_json
+from src.storage.base_storage import BaseStorageManager
+
+
+# Results are written back in batches of this size
+REGRADE_BATCH_SIZE = 500
+
+# Directory of the regrade job states inside a storage base_path
+REGRADE_JOBS_DIR = 'regrade_jobs'
+
+# A running job not updated for this long lost its worker (crash, restart)
+JOB_STALE_SECONDS = 600
+
+# Finished job states are deleted after this many seconds
+JOB_RETENTION = 7 * 24 * 3600
+
+JOB_ID_PATTERN = re.compile(r'J[0-9A-F]{8}')
+
+
+def diff_answer_keys(old_key: AnswerKey, new_key: AnswerKey) -> Optional[Set[str]]:
+    """So sánh hai bộ đáp án.
+
+    Returns:
+        Set of question ids whose correct answer changed, or None if the
+        question list itself differs and results must be fully regraded
+    """
+    if old_key.question_ids != new_key.question_ids:
+        return None
+    return {
+        question_id
+        for question_id, old, new, old_text, new_text in zip(
+            new_key.question_ids, old_key.normalized, new_key.normalized,
+            old_key.correct_answers, new_key.correct_answers
+        )
+        if old != new or old_text != new_text
+    }
+
+
+class IncrementalRegrader:
+    """Cập nhật các kết quả của một đề thi theo đáp án mới."""
+
+    def __init__(
+        self,
+        storage: BaseStorageManager,
+        batch_size: int = REGRADE_BATCH_SIZE,
+        engine: Optional[GradingEngine] = None
+    ):
+        """Initialize IncrementalRegrader.
+
+        Args:
+            storage: Storage manager
+            batch_size: Number of results written per save_results call
+            engine: GradingEngine whose result listeners are notified of
+                updated results (default: create_grading_engine)
+        """
+        self.storage = storage
+        self.batch_size = batch_size
+        self.engine = engine or create_grading_engine(storage)
+
+    def _apply_changes(self, result: dict, key: AnswerKey, changed: Set[str]) -> bool:
+        """Re-check the changed questions of one result in place.
+
+        Returns:
+            True if the result was updated, False if it has to be regraded
+            from its submission
+        """
+        details = result.get('details') or []
+        if [detail.get('question_id') for detail in details] != key.question_ids:
+            return False
+
+        answers = key.as_dict()
+        for detail in details:
+            question_id = detail['question_id']
+            if question_id in changed:
+                detail['correct_answer'] = answers[question_id]
+                detail['is_correct'] = self.engine.compare_answers(
+                    detail.get('student_answer', ''), answers[question_id]
+                )
+        return True
+
+    def _regrade_from_submission(self, result: dict, key: AnswerKey) -> bool:
+        submission = self.storage.load_submission(result['submission_id'])
+        if not submission:
+            return False
+        correct_count, details = key.grade_answers(submission.get('answers', {}))
+        result['details'] = details
+        result['correct_answers'] = correct_count
+        return True
+
+    def regrade_exam(
+        self,
+        exam_id: str,
+        old_key: AnswerKey,
+        new_key: Optional[AnswerKey] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> dict:
+        """Chấm lại các kết quả của một đề thi sau khi đáp án thay đổi.
+
+        Args:
+            exam_id: ID của đề thi
+            old_key: Đáp án trước khi sửa
+            new_key: Đáp án mới (mặc định: đọc từ đề thi đã lưu)
+            progress: Called with (done, total) after each batch
+
+        Returns:
+            Summary dict with total, changed, failed and changed_questions
+        """
+        if new_key is None:
+            exam = self.storage.load_exam(exam_id)
+            if not exam:
+                raise ValueError(f"Đề thi không tồn tại: {exam_id}")
+            new_key = AnswerKey.from_exam(exam)
+
+        changed_questions = diff_answer_keys(old_key, new_key)
+        summary = {
+            'total': 0,
+            'changed': 0,
+            'failed': 0,
+            'changed_questions': sorted(changed_questions) if changed_questions is not None else None
+        }
+        if changed_questions == set():
+            return summary
+
+        # Stream the results in batches (keyset on result_id), so only one
+        # batch is in memory and rewritten results are never read again
+        total = len(self.storage.list_result_ids(exam_id=exam_id))
+        total_questions = new_key.total_questions
+        regraded_at = datetime.utcnow().isoformat() + 'Z'
+        after = None
+
+        while True:
+            results = [
+                Result.verbose_dict(result)
+                for result in islice(self.storage.iter_results(exam_id=exam_id, after=after), self.batch_size)
+            ]
+            if not results:
+                break
+            after = results[-1]['result_id']
+            summary['total'] += len(results)
+            batch = []
+            previous = []
+            for result in results:
+                before = (result.get('correct_answers'), result.get('score'))
+                old = {'result_id': result['result_id'], 'exam_id': result['exam_id'], 'score': result['score']}
+                if changed_questions is not None and self._apply_changes(result, new_key, changed_questions):
+                    correct_count = sum(1 for detail in result['details'] if detail['is_correct'])
+                elif self._regrade_from_submission(result, new_key):
+                    correct_count = result['correct_answers']
+                else:
+                    summary['failed'] += 1
+                    continue
+
+                result['total_questions'] = total_questions
+                result['correct_answers'] = correct_count
+                result['wrong_answers'] = total_questions - correct_count
+                result['score'] = self.engine.calculate_score(correct_count, total_questions)
+                # Every result gets the new correct answers in its details,
+                # but only those whose count or score moved are reported.
+                # graded_at (submission time in exports) is kept.
+                if (result['correct_answers'], result['score']) != before:
+                    result['regraded_at'] = regraded_at
+                    summary['changed'] += 1
+                batch.append(Result.compact_dict(result))
+                previous.append(old)
+
+            if batch and not self.storage.save_results(batch):
+                summary['failed'] += len(batch)
+            elif batch:
+                self.engine.notify_results(batch, previous)
+            if progress:
+                progress(summary['total'], max(total, summary['total']))
+
+        return summary
+
+
+class RegradeJobs:
+    """Chạy việc chấm lại trong luồng nền và theo dõi tiến độ."""
+
+    def __init__(
+        self,
+        storage: BaseStorageManager,
+        engine: Optional[GradingEngine] = None,
+        directory: Optional[str] = None
+    ):
+        """Initialize RegradeJobs.
+
+        Args:
+            storage: Storage manager
+            engine: GradingEngine whose result listeners see updated results
+            directory: Directory of the job states (default:
+                <storage.base_path>/regrade_jobs)
+        """
+        self.regrader = IncrementalRegrader(storage, engine=engine)
+        self.directory = Path(directory) if directory else Path(storage.base_path) / REGRADE_JOBS_DIR
+        self._jobs: Dict[str, dict] = {}
+        self._threads: Dict[str, threading.Thread] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, job_id: str) -> Path:
+        return self.directory / f'{job_id}.json'
+
+    def _save(self, job: dict):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self._path(job['job_id']), job)
+        except Exception:
+            # The job keeps running; this worker still answers from memory
+            pass
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs[job_id]
+            job.update(fields, updated_at=time.time())
+            self._save(dict(job))
+
+    def _purge(self):
+        """Delete finished job states older than JOB_RETENTION."""
+        cutoff = time.time() - JOB_RETENTION
+        for path in self.directory.glob('J*.json'):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+            except OSError:
+                continue
+
+    def start(self, exam_id: str, old_key: AnswerKey, new_key: Optional[AnswerKey] = None) -> str:
+        """Bắt đầu chấm lại trong nền.
+
+        Returns:
+            Job ID
+        """
+        self._purge()
+        job_id = f"J{uuid.uuid4().hex[:8].upper()}"
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'exam_id': exam_id,
+                'status': 'running',
+                'done': 0,
+                'total': 0,
+                'changed': 0,
+                'failed': 0,
+                'message': '',
+                'updated_at': time.time()
+            }
+            self._save(dict(self._jobs[job_id]))
+
+        def run():
+            try:
+                summary = self.regrader.regrade_exam(
+                    exam_id, old_key, new_key,
+                    progress=lambda done, total: self._update(job_id, done=done, total=total)
+                )
+                self._update(
+                    job_id,
+                    status='done',
+                    done=summary['total'],
+                    total=summary['total'],
+                    changed=summary['changed'],
+                    failed=summary['failed'],
+                    message=f"Đã cập nhật {summary['changed']}/{summary['total']} kết quả"
+                )
+            except Exception as e:
+                self._update(job_id, status='failed', message=str(e))
+
+        thread = threading.Thread(target=run, name=f'regrade-{job_id}', daemon=True)
+        self._threads[job_id] = thread
+        thread.start()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Trạng thái của một việc chấm lại (None nếu không tồn tại).
+
+        Jobs started by other workers are read from their state file. A
+        running job whose state has not moved for JOB_STALE_SECONDS lost
+        its worker and is reported as failed.
+        """
+        if not JOB_ID_PATTERN.fullmatch(job_id or ''):
+            return None
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return dict(job)
+        try:
+            with open(self._path(job_id), 'r', encoding='utf-8') as f:
+                job = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if job.get('status') == 'running' and time.time() - job.get('updated_at', 0) > JOB_STALE_SECONDS:
+            job['status'] = 'failed'
+            job['message'] = "Việc chấm lại bị gián đoạn (tiến trình chạy đã dừng)"
+        return job
+
+    def wait(self, job_id: str, timeout: Optional[float] = None) -> Optional[dict]:
+        """Chờ một việc chấm lại kết thúc (dùng cho CLI và kiểm thử)."""
+        thread = self._threads.get(job_id)
+        if thread is not None:
+            thread.join(timeout)
+        return self.get(job_id)
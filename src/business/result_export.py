@@ -0,0 +1,104 @@
+"""Result Export - Xuất kết quả ra CSV theo dạng luồng.
+
+Every function here is a generator of bytes chunks: results are read from
+storage one at a time and each chunk is yielded as soon as a few rows are
+written, so a web response (or a file) can be filled without building the
+whole export in memory.
+"""
+
+import csv
+import io
+import zipfile
+import zlib
+from typing import Iterable, Iterator, List
+
+from src.storage.base_storage import BaseStorageManager
+
+
+RESULT_CSV_HEADER = ['Mã HS', 'Điểm', 'Số câu đúng', 'Số câu sai', 'Tổng câu', 'Thời gian nộp']
+
+# Sort orders accepted by the export (iter_results order_by values)
+EXPORT_ORDERS = ('student_id', 'graded_at')
+
+# Rows written before a chunk is yielded
+ROWS_PER_CHUNK = 500
+
+
+def result_row(result: dict) -> list:
+    """CSV row of one result (same columns as RESULT_CSV_HEADER)."""
+    return [
+        result['student_id'],
+        result['score'],
+        result['correct_answers'],
+        result['wrong_answers'],
+        result['total_questions'],
+        result['graded_at']
+    ]
+
+
+def iter_csv(rows: Iterable[list], header: List[str], rows_per_chunk: int = ROWS_PER_CHUNK) -> Iterator[bytes]:
+    """Encode rows as UTF-8 CSV, yielding one chunk per rows_per_chunk rows."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    pending = 1
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= rows_per_chunk:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    if pending:
+        yield buffer.getvalue().encode('utf-8')
+
+
+def iter_exam_csv(storage: BaseStorageManager, exam_id: str, order_by: str = 'student_id') -> Iterator[bytes]:
+    """Stream the results of one exam as CSV."""
+    results = storage.iter_results(exam_id=exam_id, order_by=order_by)
+    return iter_csv((result_row(result) for result in results), RESULT_CSV_HEADER)
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a stream of chunks into one gzip stream."""
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Write-only, unseekable sink that ZipFile streams into."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def zip_exams_csv(storage: BaseStorageManager, exam_ids: List[str], order_by: str = 'student_id') -> Iterator[bytes]:
+    """Stream a zip archive with one CSV per exam (ket_qua_<exam_id>.csv)."""
+    sink = _ChunkBuffer()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for exam_id in exam_ids:
+            with archive.open(f'ket_qua_{exam_id}.csv', 'w', force_zip64=True) as entry:
+                for chunk in iter_exam_csv(storage, exam_id, order_by):
+                    entry.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+    # Central directory, written when the archive is closed
+    yield sink.drain()
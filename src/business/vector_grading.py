@@ -0,0 +1,184 @@
+"""Vectorized grading with NumPy (optional).
+
+Answers are encoded as small integers (blank/other = 0, A-D = 1-4) so a
+block of submissions becomes an (students x questions) uint8 matrix and
+grading is a single comparison against the encoded key plus a row sum.
+Encoding goes through a lookup table built once per block from the
+distinct answer values, so no Python code runs per answer. Results are
+built in the compact form (see src.models.result.pack_details) straight
+from the matrices: the answer letters come from one table lookup and
+the correct bitsets from np.packbits. Rows that cannot be stored
+compactly get their verbose details from AnswerKey.grade_answers.
+
+When NumPy is not installed, or the key contains something other than
+A-D, ``VectorGrader.enabled`` is False and callers use the pure-Python
+path in AnswerKey.grade_answers.
+"""
+
+from itertools import chain, repeat
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.business.answer_key import AnswerKey
+from src.models.result import BLANK_ANSWER, COMPACT_CHOICES, default_question_ids
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised by monkeypatching in tests
+    np = None
+
+
+BLANK = 0
+CHOICE_CODES: Dict[str, int] = {'A': 1, 'B': 2, 'C': 3, 'D': 4}
+CHOICES = ('', 'A', 'B', 'C', 'D')
+
+# Flag added to the code of an answer that grades as a choice (or blank)
+# but is not stored exactly in the compact form, e.g. ' b' or 'E'
+INEXACT = 8
+# Code of an answer that cannot be graded (not a string)
+INVALID = 0xFF
+# Compact letter of each code & 7 (7 only occurs in invalid rows)
+LETTERS = (BLANK_ANSWER + 'ABCD???').encode('ascii')
+
+
+def numpy_available() -> bool:
+    """Return True if NumPy can be used."""
+    return np is not None
+
+
+def encode_answer(answer: str) -> int:
+    """Encode one answer with the same normalization as compare_answers."""
+    code = CHOICE_CODES.get(answer)
+    if code is None:
+        code = CHOICE_CODES.get(answer.strip().upper(), BLANK)
+    return code
+
+
+def _lookup_code(value) -> int:
+    """Code of one answer value, with the INEXACT / INVALID flags."""
+    if not isinstance(value, str):
+        return INVALID
+    code = encode_answer(value)
+    if value != CHOICES[code]:
+        code |= INEXACT
+    return code
+
+
+class VectorGrader:
+    """Grades blocks of answer dicts against one compiled AnswerKey."""
+
+    def __init__(self, key: AnswerKey):
+        """Initialize VectorGrader.
+
+        Args:
+            key: Compiled answer key
+        """
+        self.key = key
+        self.key_codes = None
+        # Compact form of the key (None if it cannot be stored compactly)
+        self.packed_key = None
+        if all(answer in COMPACT_CHOICES for answer in key.correct_answers):
+            self.packed_key = ''.join(key.correct_answers)
+        self.packed_question_ids = None
+        if key.question_ids != default_question_ids(key.total_questions):
+            self.packed_question_ids = list(key.question_ids)
+        if np is not None and all(answer in CHOICE_CODES for answer in key.normalized):
+            self.key_codes = np.array(
+                [CHOICE_CODES[answer] for answer in key.normalized], dtype=np.uint8
+            )
+
+    @property
+    def enabled(self) -> bool:
+        return self.key_codes is not None
+
+    def encode(self, answers_list: List[Dict[str, str]]) -> Tuple['np.ndarray', 'np.ndarray', 'np.ndarray']:
+        """Encode answer dicts as an (students x questions) uint8 matrix.
+
+        Rows whose answers cannot be normalized (e.g. a non-string value)
+        are left blank and flagged as invalid.
+
+        Returns:
+            Tuple of (matrix, valid flags per row, exact flags per row:
+            every answer can be stored in the compact form)
+        """
+        question_ids = self.key.question_ids
+        blank_row = [''] * len(question_ids)
+        is_dict = [isinstance(answers, dict) for answers in answers_list]
+        flat = list(chain.from_iterable(
+            map(answers.get, question_ids, repeat('')) if ok else blank_row
+            for answers, ok in zip(answers_list, is_dict)
+        ))
+        try:
+            table = {value: _lookup_code(value) for value in dict.fromkeys(flat)}
+            codes = np.fromiter(map(table.__getitem__, flat), dtype=np.uint8, count=len(flat))
+        except TypeError:
+            # Unhashable answer values (lists, dicts) are invalid anyway
+            codes = np.fromiter(map(_lookup_code, flat), dtype=np.uint8, count=len(flat))
+        raw = codes.reshape(len(answers_list), len(question_ids))
+
+        valid = np.array(is_dict, dtype=bool) & ~(raw == INVALID).any(axis=1)
+        exact = valid & ~(raw & INEXACT).astype(bool).any(axis=1)
+        matrix = raw & 0x07
+        matrix[~valid] = BLANK
+        return matrix, valid, exact
+
+    def grade_matrix(self, matrix: 'np.ndarray') -> Tuple['np.ndarray', 'np.ndarray']:
+        """Grade an encoded answer matrix.
+
+        Returns:
+            Tuple of (correct counts per student, boolean correctness matrix)
+        """
+        correctness = matrix == self.key_codes
+        return correctness.sum(axis=1), correctness
+
+    def scores(self, counts: 'np.ndarray', calculate_score: Callable[[int, int], float]) -> List[float]:
+        """Map correct counts to scores using a lookup table built with
+        calculate_score, so rounding is identical to the scalar path."""
+        total = self.key.total_questions
+        table = [calculate_score(correct, total) for correct in range(total + 1)]
+        return [table[count] for count in counts.tolist()]
+
+    def grade_compact(
+        self,
+        answers_list: List[Dict[str, str]],
+        calculate_score: Callable[[int, int], float]
+    ) -> Optional[List[Optional[Tuple[int, float, Optional[dict]]]]]:
+        """Grade a block of answer dicts without building verbose details.
+
+        Returns:
+            One (correct count, score, packed) per answer dict - None for
+            rows that could not be encoded - or None if the vector path is
+            not available for this key. packed holds the compact detail
+            fields, or is None when the row (or the key) cannot be stored
+            compactly and needs AnswerKey.grade_answers for its details.
+        """
+        if not self.enabled:
+            return None
+
+        matrix, valid, exact = self.encode(answers_list)
+        counts, correctness = self.grade_matrix(matrix)
+        scores = self.scores(counts, calculate_score)
+
+        total = self.key.total_questions
+        letters = np.frombuffer(LETTERS, dtype=np.uint8)[matrix].tobytes().decode('ascii')
+        bits = np.packbits(correctness, axis=1, bitorder='little')
+        width = bits.shape[1]
+        bit_bytes = bits.tobytes()
+
+        graded = []
+        for row, (is_valid, is_exact, count, score) in enumerate(
+            zip(valid.tolist(), exact.tolist(), counts.tolist(), scores)
+        ):
+            if not is_valid:
+                graded.append(None)
+                continue
+            packed = None
+            if is_exact and self.packed_key is not None:
+                packed = {
+                    'packed_answers': letters[row * total:(row + 1) * total],
+                    'packed_key': self.packed_key,
+                    'correct_bits': format(int.from_bytes(bit_bytes[row * width:(row + 1) * width], 'little'), 'x')
+                }
+                if self.packed_question_ids is not None:
+                    packed['question_ids'] = self.packed_question_ids
+            graded.append((count, score, packed))
+        return graded
@@ -56,6 +56,14 @@ class Question:
             'correct_answer': self.correct_answer
         }
     
+    def to_student_dict(self) -> dict:
+        """Convert question to the student view (without the correct answer)."""
+        return {
+            'question_id': self.question_id,
+            'content': self.content,
+            'choices': self.choices
+        }
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'Question':
         """Create question from dictionary."""
@@ -138,6 +146,14 @@ class Exam:
             'questions': [q.to_dict() for q in self.questions]
         }
     
+    def to_student_dict(self) -> dict:
+        """Convert exam to the student view: questions and choices only."""
+        return {
+            'exam_id': self.exam_id,
+            'title': self.title,
+            'questions': [q.to_student_dict() for q in self.questions]
+        }
+    
     @classmethod
     def from_dict(cls, data: dict) -> 'Exam':
         """Create exam from dictionary."""
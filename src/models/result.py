@@ -4,8 +4,78 @@ from datetime import datetime
 from typing import List, Optional, Tuple
 
 
+# Compact result encoding: one character per question for the student's
+# answers ('.' = blank) and the key, plus a hex bitset of correct questions
+COMPACT_CHOICES = frozenset('ABCD')
+BLANK_ANSWER = '.'
+COMPACT_FIELDS = ('packed_answers', 'packed_key', 'correct_bits')
+
+
+def default_question_ids(count: int) -> List[str]:
+    """Question ids assigned by ExamManager: Q001, Q002, ..."""
+    return [f"Q{i:03d}" for i in range(1, count + 1)]
+
+
+def pack_details(details: List[dict]) -> Optional[dict]:
+    """Encode verbose details in the compact form.
+    
+    Returns:
+        Dict with the COMPACT_FIELDS (and question_ids unless they are the
+        default Q001.. sequence), or None if an answer or key is not a
+        single A-D letter or blank, i.e. cannot be restored exactly
+    """
+    answers = []
+    key = []
+    bits = 0
+    for position, detail in enumerate(details):
+        student_answer = detail['student_answer']
+        correct_answer = detail['correct_answer']
+        if correct_answer not in COMPACT_CHOICES:
+            return None
+        if student_answer == '':
+            answers.append(BLANK_ANSWER)
+        elif student_answer in COMPACT_CHOICES:
+            answers.append(student_answer)
+        else:
+            return None
+        key.append(correct_answer)
+        if detail['is_correct']:
+            bits |= 1 << position
+    
+    packed = {
+        'packed_answers': ''.join(answers),
+        'packed_key': ''.join(key),
+        'correct_bits': format(bits, 'x')
+    }
+    question_ids = [detail['question_id'] for detail in details]
+    if question_ids != default_question_ids(len(question_ids)):
+        packed['question_ids'] = question_ids
+    return packed
+
+
+def unpack_details(packed: dict) -> List[dict]:
+    """Expand the compact form back to verbose details."""
+    answers = packed['packed_answers']
+    key = packed['packed_key']
+    bits = int(packed['correct_bits'], 16)
+    question_ids = packed.get('question_ids') or default_question_ids(len(key))
+    return [
+        {
+            'question_id': question_id,
+            'student_answer': '' if answer == BLANK_ANSWER else answer,
+            'correct_answer': correct_answer,
+            'is_correct': bool(bits >> position & 1)
+        }
+        for position, (question_id, answer, correct_answer) in enumerate(zip(question_ids, answers, key))
+    ]
+
+
 class Result:
-    """Represents the grading result of a submission."""
+    """Represents the grading result of a submission.
+    
+    ``details`` may be held in the compact form (see pack_details) and is
+    only expanded to the verbose list of dicts when first accessed.
+    """
     
     def __init__(
         self,
@@ -18,7 +88,9 @@ class Result:
         correct_answers: int,
         wrong_answers: int,
         graded_at: Optional[str] = None,
-        details: Optional[List[dict]] = None
+        details: Optional[List[dict]] = None,
+        packed: Optional[dict] = None,
+        regraded_at: Optional[str] = None
     ):
         self.result_id = result_id
         self.submission_id = submission_id
@@ -29,7 +101,33 @@ class Result:
         self.correct_answers = correct_answers
         self.wrong_answers = wrong_answers
         self.graded_at = graded_at or datetime.utcnow().isoformat() + 'Z'
-        self.details = details or []
+        # Set when a corrected answer key changed the score; graded_at is kept
+        self.regraded_at = regraded_at
+        self._details = details or []
+        self._packed: Optional[dict] = None
+        if packed is not None:
+            # Details in the compact form, expanded on first access
+            self._packed = packed
+            self._details = None
+    
+    @property
+    def details(self) -> List[dict]:
+        """Verbose per-question details (expanded on first access)."""
+        if self._details is None:
+            self._details = unpack_details(self._packed)
+        return self._details
+    
+    @details.setter
+    def details(self, details: List[dict]):
+        self._details = details or []
+        self._packed = None
+    
+    @property
+    def correct_bits(self) -> int:
+        """Bitset of correctly answered questions (bit i = question i)."""
+        if self._packed is not None:
+            return int(self._packed['correct_bits'], 16)
+        return sum(1 << i for i, detail in enumerate(self.details) if detail['is_correct'])
     
     def validate(self) -> Tuple[bool, str]:
         """Validate result data.
@@ -66,9 +164,26 @@ class Result:
         
         return True, ""
     
-    def to_dict(self) -> dict:
-        """Convert result to dictionary."""
-        return {
+    def to_dict(self, compact: bool = False) -> dict:
+        """Convert result to dictionary.
+        
+        Args:
+            compact: Store details in the compact form when every answer
+                can be restored exactly; otherwise details stay verbose
+        """
+        if compact:
+            packed = self._packed if self._packed is not None else pack_details(self.details)
+            if packed is not None:
+                data = self._base_dict()
+                data.update(packed)
+                return data
+        
+        data = self._base_dict()
+        data['details'] = self.details
+        return data
+    
+    def _base_dict(self) -> dict:
+        data = {
             'result_id': self.result_id,
             'submission_id': self.submission_id,
             'exam_id': self.exam_id,
@@ -77,14 +192,16 @@ class Result:
             'total_questions': self.total_questions,
             'correct_answers': self.correct_answers,
             'wrong_answers': self.wrong_answers,
-            'graded_at': self.graded_at,
-            'details': self.details
+            'graded_at': self.graded_at
         }
+        if self.regraded_at:
+            data['regraded_at'] = self.regraded_at
+        return data
     
     @classmethod
     def from_dict(cls, data: dict) -> 'Result':
-        """Create result from dictionary."""
-        return cls(
+        """Create result from dictionary (verbose or compact)."""
+        result = cls(
             result_id=data['result_id'],
             submission_id=data['submission_id'],
             exam_id=data['exam_id'],
@@ -94,5 +211,24 @@ class Result:
             correct_answers=data['correct_answers'],
             wrong_answers=data['wrong_answers'],
             graded_at=data.get('graded_at'),
-            details=data.get('details', [])
+            details=data.get('details', []),
+            regraded_at=data.get('regraded_at')
         )
+        if 'details' not in data and 'packed_key' in data:
+            result._packed = {
+                field: data[field] for field in COMPACT_FIELDS + ('question_ids',) if field in data
+            }
+            result._details = None
+        return result
+    
+    @classmethod
+    def compact_dict(cls, data: dict) -> dict:
+        """Return a result dictionary in the compact storage form."""
+        return cls.from_dict(data).to_dict(compact=True)
+    
+    @classmethod
+    def verbose_dict(cls, data: dict) -> dict:
+        """Return a result dictionary with verbose details."""
+        if 'details' in data:
+            return data
+        return cls.from_dict(data).to_dict()
@@ -0,0 +1,7 @@
+"""Optical mark recognition of scanned answer sheets (needs NumPy)."""
+
+from .template import SheetTemplate
+from .reader import SheetReader, list_scans
+from .batch import ScanGrader
+
+__all__ = ['SheetTemplate', 'SheetReader', 'list_scans', 'ScanGrader']
@@ -0,0 +1,220 @@
+"""Grade a folder of scanned answer sheets on several CPU cores.
+
+Scans are read by a ProcessPoolExecutor; each worker builds one
+SheetReader for the exam's template through the pool initializer, so a
+task only carries file paths. Readings come back in file order and are
+graded and stored by the parent in batches with GradingEngine.grade_many,
+which keeps all writes in one process (as in ParallelGrader). The
+summary reports per-sheet read latency and overall throughput.
+"""
+
+import csv
+import math
+import os
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, TextIO, Union
+
+from src.business.bulk_grading import BULK_BATCH_SIZE, MAX_REPORTED_ERRORS, map_answers
+from src.business.grading_engine import create_grading_engine, GradingEngine
+from src.models.submission import Submission
+from src.omr.reader import SheetReader, list_scans
+from src.omr.template import SheetTemplate
+from src.storage.base_storage import BaseStorageManager
+
+
+# Scan paths per worker task
+OMR_CHUNK_SIZE = 16
+
+REPORT_HEADER = ['File', 'Mã HS', 'Điểm', 'Số câu đúng', 'Tổng câu', 'Độ tin cậy', 'Thời gian đọc (ms)', 'Trạng thái']
+
+# Worker process state, set by _init_worker
+_worker_reader: Optional[SheetReader] = None
+
+
+def _init_worker(template: SheetTemplate):
+    """Pool initializer: build the reader of the exam's template."""
+    global _worker_reader
+    _worker_reader = SheetReader(template)
+
+
+def _read_scan(path: str) -> dict:
+    return _worker_reader.read_file(path)
+
+
+def _latency_summary(latencies: List[float]) -> dict:
+    """Count, mean, p50, p95 and max of per-sheet latencies, in ms."""
+    values = sorted(latency * 1000 for latency in latencies)
+    if not values:
+        return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'max': None}
+
+    def percentile(fraction):
+        return round(values[max(int(math.ceil(fraction * len(values))) - 1, 0)], 2)
+
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 2),
+        'p50': percentile(0.5),
+        'p95': percentile(0.95),
+        'max': round(values[-1], 2)
+    }
+
+
+class ScanGrader:
+    """Chấm một thư mục ảnh phiếu trả lời đã quét."""
+
+    def __init__(
+        self,
+        storage: BaseStorageManager,
+        engine: Optional[GradingEngine] = None,
+        workers: Optional[int] = None,
+        batch_size: int = BULK_BATCH_SIZE,
+        id_digits: int = 6
+    ):
+        """Initialize ScanGrader.
+
+        Args:
+            storage: Storage manager
+            engine: GradingEngine used to grade and store (its result
+                listeners see every new result)
+            workers: Number of worker processes (default: CPU count);
+                1 reads in the current process
+            batch_size: Sheets graded and stored per batch
+            id_digits: Student id digits on the sheet template
+        """
+        self.storage = storage
+        self.engine = engine or create_grading_engine(storage)
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.id_digits = id_digits
+
+    def template(self, exam_id: str) -> SheetTemplate:
+        """Sheet template of an exam.
+
+        Raises:
+            ValueError: If the exam does not exist or does not fit on a sheet
+        """
+        key = self.engine.answer_key(exam_id)
+        if key is None:
+            raise ValueError(f"Đề thi không tồn tại: {exam_id}")
+        return SheetTemplate(key.total_questions, id_digits=self.id_digits)
+
+    def grade_folder(
+        self,
+        exam_id: str,
+        folder: Union[str, Path],
+        report: Optional[TextIO] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> dict:
+        """Đọc và chấm mọi ảnh phiếu trong một thư mục.
+
+        Sheets whose registration marks or student id cannot be read are
+        not graded; sheets with double marks or low-confidence answers are
+        graded and counted in `review`.
+
+        Args:
+            exam_id: ID của đề thi
+            folder: Folder of PGM/PNG scans
+            report: Text file receiving the per-sheet CSV report
+            progress: Called with (sheets done, total) after each batch
+
+        Returns:
+            Summary dict with exam_id, total, graded, failed, review,
+            errors (first MAX_REPORTED_ERRORS), latency (per-sheet read
+            time in ms: count, mean, p50, p95, max), throughput (sheets
+            per second), workers and elapsed seconds
+
+        Raises:
+            ValueError: If the exam does not exist or does not fit on a sheet
+        """
+        template = self.template(exam_id)
+        key = self.engine.answer_key(exam_id)
+        paths = [str(path) for path in list_scans(folder)]
+        writer = csv.writer(report) if report is not None else None
+        if writer:
+            writer.writerow(REPORT_HEADER)
+
+        summary = {'exam_id': exam_id, 'total': len(paths), 'graded': 0, 'failed': 0, 'review': 0, 'errors': []}
+        latencies = []
+        started = time.perf_counter()
+        batch = []
+
+        def flush():
+            self._grade_batch(key, batch, summary, writer)
+            batch.clear()
+            if progress:
+                progress(len(latencies), len(paths))
+
+        workers = min(self.workers, max(len(paths) // OMR_CHUNK_SIZE, 1))
+        if workers == 1:
+            reader = SheetReader(template)
+            readings = map(reader.read_file, paths)
+            pool = None
+        else:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(template,))
+            readings = pool.map(_read_scan, paths, chunksize=OMR_CHUNK_SIZE)
+        try:
+            for reading in readings:
+                latencies.append(reading['latency'])
+                batch.append(reading)
+                if len(batch) >= self.batch_size:
+                    flush()
+            if batch:
+                flush()
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        summary['latency'] = _latency_summary(latencies)
+        summary['throughput'] = round(len(paths) / elapsed, 2) if elapsed > 0 else None
+        summary['workers'] = workers
+        summary['elapsed'] = round(elapsed, 3)
+        return summary
+
+    def _grade_batch(self, key, readings: List[dict], summary: dict, writer):
+        submissions = []
+        for reading in readings:
+            if reading['error'] is not None:
+                continue
+            try:
+                answers = map_answers(key, reading['answers'])
+            except ValueError as e:
+                reading['error'] = str(e)
+                continue
+            submissions.append(Submission(
+                submission_id=f"S{uuid.uuid4().hex[:8].upper()}",
+                exam_id=key.exam_id,
+                student_id=reading['student_id'],
+                answers=answers
+            ))
+        outcomes = iter(self.engine.grade_many(key, submissions))
+
+        for reading in readings:
+            name = Path(reading['file']).name
+            latency_ms = round(reading['latency'] * 1000, 1)
+            if reading['error'] is None:
+                success, msg, result = next(outcomes)
+            else:
+                success, msg, result = False, reading['error'], None
+
+            if success:
+                summary['graded'] += 1
+                status = 'OK'
+                if reading['review']:
+                    summary['review'] += 1
+                    status = "Cần xem lại câu " + ', '.join(str(question) for question in reading['review'])
+                if writer:
+                    writer.writerow([
+                        name, result['student_id'], result['score'], result['correct_answers'],
+                        result['total_questions'], reading['confidence'], latency_ms, status
+                    ])
+                continue
+
+            summary['failed'] += 1
+            if len(summary['errors']) < MAX_REPORTED_ERRORS:
+                summary['errors'].append({'file': name, 'student_id': reading['student_id'], 'message': msg})
+            if writer:
+                writer.writerow([name, reading['student_id'] or '', '', '', '', reading['confidence'], latency_ms, msg])
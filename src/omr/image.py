@@ -0,0 +1,200 @@
+"""Read and write scanned answer sheets as 8-bit grayscale NumPy arrays.
+
+PGM files (P2 ASCII and P5 binary, 8 or 16 bit) are parsed directly.
+PNG files are read with Pillow when it is installed; otherwise a small
+decoder handles non-interlaced 8-bit grayscale, RGB and RGBA images
+(zlib plus the PNG row filters, unfiltered with NumPy one row at a
+time). Other formats (JPEG, TIFF) need Pillow.
+"""
+
+import struct
+import zlib
+from pathlib import Path
+from typing import Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised by monkeypatching in tests
+    np = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+IMAGE_SUFFIXES = ('.pgm', '.png', '.jpg', '.jpeg', '.tif', '.tiff')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# PNG color type -> channels (0 gray, 2 RGB, 4 gray + alpha, 6 RGBA)
+PNG_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+
+
+def require_numpy():
+    """Raise ImportError unless NumPy is installed (the OMR needs it)."""
+    if np is None:
+        raise ImportError("Cần cài numpy để đọc phiếu quét: pip install numpy")
+
+
+def _pgm_tokens(data: bytes, count: int):
+    """First `count` header tokens of a PGM file and the offset after them."""
+    tokens = []
+    position = 2
+    while len(tokens) < count:
+        while position < len(data) and data[position:position + 1].isspace():
+            position += 1
+        if data[position:position + 1] == b'#':
+            position = data.find(b'\n', position) + 1 or len(data)
+            continue
+        start = position
+        while position < len(data) and not data[position:position + 1].isspace():
+            position += 1
+        if position >= len(data):
+            raise ValueError("Ảnh PGM bị thiếu dữ liệu")
+        tokens.append(int(data[start:position]))
+    return tokens, position + 1
+
+
+def decode_pgm(data: bytes) -> 'np.ndarray':
+    """Decode a P2/P5 PGM file to a (height, width) uint8 array."""
+    magic = data[:2]
+    if magic not in (b'P2', b'P5'):
+        raise ValueError("Không phải ảnh PGM")
+    (width, height, maxval), offset = _pgm_tokens(data, 3)
+    if magic == b'P2':
+        pixels = np.array(data[offset:].split()[:width * height], dtype=np.float64)
+    elif maxval < 256:
+        pixels = np.frombuffer(data, dtype=np.uint8, count=width * height, offset=offset)
+    else:
+        pixels = np.frombuffer(data, dtype='>u2', count=width * height, offset=offset)
+    if pixels.size != width * height:
+        raise ValueError("Ảnh PGM bị thiếu dữ liệu")
+    if maxval != 255:
+        pixels = np.round(pixels.astype(np.float64) * (255 / maxval))
+    return pixels.astype(np.uint8).reshape(height, width)
+
+
+def _unfilter_row(kind: int, row: 'np.ndarray', prior: 'np.ndarray', bpp: int) -> 'np.ndarray':
+    """Undo one PNG row filter (None, Sub, Up, Average, Paeth)."""
+    if kind == 0:
+        return row
+    if kind == 1:
+        # Running sum over pixels, modulo 256 per byte
+        return np.cumsum(row.reshape(-1, bpp), axis=0, dtype=np.uint8).reshape(-1)
+    if kind == 2:
+        return row + prior
+    out = row.astype(np.int16)
+    up = prior.astype(np.int16)
+    for x in range(len(out)):
+        left = out[x - bpp] if x >= bpp else 0
+        if kind == 3:
+            out[x] = (out[x] + (left + up[x]) // 2) & 0xFF
+        else:
+            upper_left = up[x - bpp] if x >= bpp else 0
+            estimate = left + up[x] - upper_left
+            distances = (abs(estimate - left), abs(estimate - up[x]), abs(estimate - upper_left))
+            predictor = (left, up[x], upper_left)[distances.index(min(distances))]
+            out[x] = (out[x] + predictor) & 0xFF
+    return out.astype(np.uint8)
+
+
+def decode_png(data: bytes) -> 'np.ndarray':
+    """Decode a non-interlaced 8-bit PNG to a (height, width) uint8 array."""
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("Không phải ảnh PNG")
+    position = len(PNG_SIGNATURE)
+    header = None
+    compressed = []
+    while position < len(data):
+        try:
+            length, kind = struct.unpack('>I4s', data[position:position + 8])
+        except struct.error:
+            raise ValueError("Ảnh PNG bị thiếu dữ liệu")
+        chunk = data[position + 8:position + 8 + length]
+        position += 12 + length
+        if kind == b'IHDR':
+            if len(chunk) != 13:
+                raise ValueError("Ảnh PNG bị thiếu dữ liệu")
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif kind == b'IDAT':
+            compressed.append(chunk)
+        elif kind == b'IEND':
+            break
+    if header is None:
+        raise ValueError("Ảnh PNG thiếu IHDR")
+    width, height, depth, color_type, _, _, interlace = header
+    if depth != 8 or color_type not in PNG_CHANNELS or interlace:
+        raise ValueError("Ảnh PNG không hỗ trợ (cần 8 bit, không interlace) - hãy cài Pillow")
+
+    channels = PNG_CHANNELS[color_type]
+    stride = width * channels
+    try:
+        raw = np.frombuffer(zlib.decompress(b''.join(compressed)), dtype=np.uint8)
+    except zlib.error as e:
+        raise ValueError(f"Dữ liệu ảnh PNG bị hỏng: {e}")
+    if raw.size < (stride + 1) * height:
+        raise ValueError("Ảnh PNG bị thiếu dữ liệu")
+    raw = raw[:(stride + 1) * height].reshape(height, stride + 1)
+    pixels = np.empty((height, stride), dtype=np.uint8)
+    prior = np.zeros(stride, dtype=np.uint8)
+    for y in range(height):
+        prior = pixels[y] = _unfilter_row(int(raw[y, 0]), raw[y, 1:], prior, channels)
+    return to_gray(pixels.reshape(height, width, channels))
+
+
+def to_gray(pixels: 'np.ndarray') -> 'np.ndarray':
+    """Convert (h, w[, channels]) pixels to grayscale uint8 (alpha is dropped)."""
+    if pixels.ndim == 2:
+        return pixels
+    channels = pixels.shape[2]
+    if channels <= 2:
+        return pixels[:, :, 0]
+    weights = np.array([0.299, 0.587, 0.114])
+    return np.round(pixels[:, :, :3] @ weights).astype(np.uint8)
+
+
+def read_image(path: Union[str, Path]) -> 'np.ndarray':
+    """Read a scanned sheet as a (height, width) uint8 grayscale array.
+
+    Raises:
+        ValueError: If the file is not an image that can be decoded
+    """
+    require_numpy()
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data[:2] in (b'P2', b'P5'):
+        return decode_pgm(data)
+    if Image is not None:
+        try:
+            with Image.open(path) as image:
+                return np.asarray(image.convert('L'), dtype=np.uint8)
+        except Exception as e:
+            raise ValueError(f"Không đọc được ảnh: {e}")
+    if data.startswith(PNG_SIGNATURE):
+        return decode_png(data)
+    raise ValueError("Định dạng ảnh không hỗ trợ (chỉ PGM/PNG khi chưa cài Pillow)")
+
+
+def write_pgm(path: Union[str, Path], image: 'np.ndarray'):
+    """Write a uint8 grayscale array as a binary PGM file."""
+    height, width = image.shape
+    with open(path, 'wb') as f:
+        f.write(f'P5\n{width} {height}\n255\n'.encode('ascii'))
+        f.write(np.ascontiguousarray(image, dtype=np.uint8).tobytes())
+
+
+def _png_chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+
+def write_png(path: Union[str, Path], image: 'np.ndarray'):
+    """Write a uint8 grayscale array as a PNG file (no row filters)."""
+    height, width = image.shape
+    rows = np.zeros((height, width + 1), dtype=np.uint8)
+    rows[:, 1:] = image
+    with open(path, 'wb') as f:
+        f.write(PNG_SIGNATURE)
+        f.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)))
+        f.write(_png_chunk(b'IDAT', zlib.compress(rows.tobytes(), 6)))
+        f.write(_png_chunk(b'IEND', b''))
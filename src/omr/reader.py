@@ -0,0 +1,210 @@
+"""Read one scanned answer sheet: registration, bubble sampling, decoding.
+
+1. The four registration marks are found in the corners of the scan:
+   a box filter over the dark-pixel mask (one integral image) finds
+   the spot that is solid ink over most of a mark, which bubbles and
+   text are too small to be. The centroid of the ink around that spot
+   is the mark centre.
+2. An affine transform from page millimetres to pixels is fitted to the
+   four marks by least squares. It absorbs scale, shift and small
+   rotations of the page on the scanner.
+3. Every bubble is sampled at once: the sample points of all bubbles (a
+   disc inside the printed outline) are mapped through the transform,
+   gathered with one fancy-indexing read, and averaged per bubble.
+   Darkness is scaled between the paper white and the ink of the marks.
+4. A bubble is filled when its darkness reaches FILL_THRESHOLD. The
+   confidence of a field (one question or one id digit) is how far its
+   least clear bubble is from the threshold, from 0 (on the threshold)
+   to 1. Double marks, missing id digits and fields below
+   LOW_CONFIDENCE are listed for manual review.
+"""
+
+import time
+from pathlib import Path
+from typing import List, Union
+
+from src.omr.image import IMAGE_SUFFIXES, np, read_image, require_numpy
+from src.omr.template import BUBBLE_RADIUS, CHOICES, MARK_SIZE, PAGE_WIDTH, SheetTemplate
+
+
+FILL_THRESHOLD = 0.45
+LOW_CONFIDENCE = 0.35
+
+# Sample disc radius, as a share of the bubble radius (stays inside the outline)
+SAMPLE_RADIUS = 0.6
+SAMPLE_STEP = 0.4
+
+# Corner windows searched for the marks, as a share of the page
+MARK_WINDOW = 0.15
+
+# Share of a mark-sized box that must be ink
+MARK_SOLIDITY = 0.85
+
+# Largest distance (mm) between a found mark and where the fit puts it
+MAX_MARK_RESIDUAL = 2.0
+
+
+def failed_reading(error: str) -> dict:
+    """Reading of a sheet that cannot be used."""
+    return {'student_id': None, 'answers': [], 'confidence': 0.0, 'review': [], 'multiple': [], 'error': error}
+
+
+class SheetReader:
+    """Reads scans of one SheetTemplate."""
+
+    def __init__(self, template: SheetTemplate):
+        """Initialize SheetReader.
+
+        Args:
+            template: Layout of the sheets
+        """
+        require_numpy()
+        self.template = template
+        steps = np.arange(-SAMPLE_RADIUS, SAMPLE_RADIUS + 1e-9, SAMPLE_STEP / BUBBLE_RADIUS) * BUBBLE_RADIUS
+        dx, dy = np.meshgrid(steps, steps)
+        inside = np.hypot(dx, dy) <= SAMPLE_RADIUS * BUBBLE_RADIUS
+        offsets = np.stack([dx[inside], dy[inside]], axis=-1)
+        centers = np.concatenate([
+            template.id_centers().reshape(-1, 2),
+            template.answer_centers().reshape(-1, 2)
+        ])
+        # (bubbles * samples, 3) homogeneous page coordinates of all sample points
+        points = (centers[:, None, :] + offsets[None, :, :]).reshape(-1, 2)
+        self.points = np.hstack([points, np.ones((len(points), 1))])
+        self.samples = len(offsets)
+        self.id_bubbles = template.id_digits * 10
+
+    def find_marks(self, image: 'np.ndarray', dark: 'np.ndarray') -> 'np.ndarray':
+        """Pixel centres (x, y) of the four registration marks.
+
+        Raises:
+            ValueError: If a mark is not found
+        """
+        height, width = image.shape
+        pixels_per_mm = width / PAGE_WIDTH
+        box = max(int(MARK_SIZE * 0.7 * pixels_per_mm), 3)
+        window_h, window_w = int(height * MARK_WINDOW), int(width * MARK_WINDOW)
+        corners = [
+            (0, 0), (0, width - window_w),
+            (height - window_h, 0), (height - window_h, width - window_w)
+        ]
+        found = []
+        for top, left in corners:
+            mask = dark[top:top + window_h, left:left + window_w]
+            integral = np.zeros((mask.shape[0] + 1, mask.shape[1] + 1), dtype=np.int64)
+            integral[1:, 1:] = mask.cumsum(axis=0).cumsum(axis=1)
+            sums = integral[box:, box:] - integral[:-box, box:] - integral[box:, :-box] + integral[:-box, :-box]
+            if sums.size == 0 or sums.max() < MARK_SOLIDITY * box * box:
+                raise ValueError("Không tìm thấy dấu định vị ở góc phiếu")
+            y, x = np.unravel_index(np.argmax(sums), sums.shape)
+            # Centroid of the ink around the solid box
+            reach = box
+            y0, x0 = max(y - reach, 0), max(x - reach, 0)
+            ys, xs = np.nonzero(mask[y0:y + box + reach, x0:x + box + reach])
+            found.append((left + x0 + xs.mean() + 0.5, top + y0 + ys.mean() + 0.5))
+        return np.array(found)
+
+    def ink_level(self, image: 'np.ndarray', marks: 'np.ndarray') -> float:
+        """Median gray level of the centres of the marks."""
+        reach = max(int(MARK_SIZE / 4 * image.shape[1] / PAGE_WIDTH), 1)
+        patches = [
+            image[max(int(y) - reach, 0):int(y) + reach, max(int(x) - reach, 0):int(x) + reach].ravel()
+            for x, y in marks
+        ]
+        return float(np.median(np.concatenate(patches)))
+
+    def fit(self, marks: 'np.ndarray') -> 'np.ndarray':
+        """(3, 2) affine matrix taking homogeneous page mm to pixels.
+
+        Raises:
+            ValueError: If the marks do not fit an affine page
+        """
+        page = np.hstack([self.template.mark_centers(), np.ones((4, 1))])
+        matrix = np.linalg.lstsq(page, marks, rcond=None)[0]
+        pixels_per_mm = np.sqrt(abs(np.linalg.det(matrix[:2])))
+        residual = np.abs(page @ matrix - marks).max() / pixels_per_mm
+        if residual > MAX_MARK_RESIDUAL:
+            raise ValueError("Dấu định vị không khớp mẫu phiếu")
+        return matrix
+
+    def darkness(self, image: 'np.ndarray', matrix: 'np.ndarray', white: float, ink: float) -> 'np.ndarray':
+        """Darkness (0 paper - 1 ink) of every bubble, id bubbles first."""
+        pixels = np.rint(self.points @ matrix - 0.5).astype(np.intp)
+        xs = np.clip(pixels[:, 0], 0, image.shape[1] - 1)
+        ys = np.clip(pixels[:, 1], 0, image.shape[0] - 1)
+        values = image[ys, xs].reshape(-1, self.samples).mean(axis=1)
+        return np.clip((white - values) / max(white - ink, 1.0), 0.0, 1.0)
+
+    def read(self, image: 'np.ndarray') -> dict:
+        """Decode one scan.
+
+        Returns:
+            Dict with student_id (None if unreadable), answers (one
+            string per question, '' = blank or double mark), confidence
+            (lowest field confidence), review (1-based question numbers
+            to check), multiple (questions with several marks) and error
+            (None, or why the sheet cannot be used)
+        """
+        image = np.asarray(image, dtype=np.uint8)
+        white = float(np.percentile(image[::4, ::4], 95))
+        dark = image < (white + float(image.min())) / 2
+        try:
+            marks = self.find_marks(image, dark)
+            matrix = self.fit(marks)
+        except ValueError as e:
+            return failed_reading(str(e))
+        ink = self.ink_level(image, marks)
+
+        darkness = self.darkness(image, matrix, white, ink)
+        filled = darkness >= FILL_THRESHOLD
+        # Distance from the threshold, scaled to 0-1 on each side
+        clarity = np.where(filled, (darkness - FILL_THRESHOLD) / (1 - FILL_THRESHOLD), 1 - darkness / FILL_THRESHOLD)
+
+        id_filled = filled[:self.id_bubbles].reshape(self.template.id_digits, 10)
+        id_clarity = clarity[:self.id_bubbles].reshape(self.template.id_digits, 10).min(axis=1)
+        answer_filled = filled[self.id_bubbles:].reshape(self.template.questions, len(CHOICES))
+        answer_clarity = clarity[self.id_bubbles:].reshape(self.template.questions, len(CHOICES)).min(axis=1)
+
+        error = None
+        student_id = None
+        if (id_filled.sum(axis=1) == 1).all():
+            student_id = ''.join(str(digit) for digit in id_filled.argmax(axis=1))
+        else:
+            error = "Không đọc được mã học sinh"
+
+        marked = answer_filled.sum(axis=1)
+        answers = [
+            CHOICES[int(np.argmax(row))] if count == 1 else ''
+            for row, count in zip(answer_filled, marked)
+        ]
+        multiple = [int(question) + 1 for question in np.nonzero(marked > 1)[0]]
+        review = sorted(set(multiple) | {int(question) + 1 for question in np.nonzero(answer_clarity < LOW_CONFIDENCE)[0]})
+        confidence = float(min(answer_clarity.min(), id_clarity.min()))
+
+        return {
+            'student_id': student_id,
+            'answers': answers,
+            'confidence': round(confidence, 3),
+            'review': review,
+            'multiple': multiple,
+            'error': error
+        }
+
+    def read_file(self, path: Union[str, Path]) -> dict:
+        """Read and decode one scan file; adds file and latency (seconds)."""
+        started = time.perf_counter()
+        try:
+            reading = self.read(read_image(path))
+        except (OSError, ValueError) as e:
+            reading = failed_reading(f"Không đọc được ảnh: {e}")
+        reading['file'] = str(path)
+        reading['latency'] = time.perf_counter() - started
+        return reading
+
+
+def list_scans(folder: Union[str, Path]) -> List[Path]:
+    """Scan files of a folder (PGM, PNG, ...), sorted by name."""
+    return sorted(
+        path for path in Path(folder).iterdir()
+        if path.is_file() and path.suffix.lower() in IMAGE_SUFFIXES
+    )
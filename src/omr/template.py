@@ -0,0 +1,202 @@
+"""Fixed layout of the printed answer sheet.
+
+Coordinates are in millimetres on an A4 page. The layout has:
+
+- four square registration marks, one near each corner;
+- a student id block: one column of ten bubbles (0-9) per digit;
+- an answer block: one row of four bubbles (A-D) per question, in
+  columns of ROWS_PER_COLUMN questions.
+
+SheetTemplate.render draws the sheet as a grayscale image: blank for
+printing, or filled in and optionally rotated, shifted and noisy to make
+synthetic scans for tests and benchmarks.
+"""
+
+import math
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+from src.omr.image import np, require_numpy
+
+
+PAGE_WIDTH = 210.0
+PAGE_HEIGHT = 297.0
+
+# Registration marks: squares of MARK_SIZE mm, MARK_MARGIN mm from the edges
+MARK_SIZE = 8.0
+MARK_MARGIN = 10.0
+
+BUBBLE_RADIUS = 2.2
+BUBBLE_OUTLINE = 0.3
+
+# Student id block
+ID_ORIGIN = (40.0, 40.0)
+ID_COLUMN_SPACING = 7.0
+ID_ROW_SPACING = 5.5
+MAX_ID_DIGITS = 10
+
+# Answer block
+ANSWER_ORIGIN = (26.0, 112.0)
+ANSWER_COLUMN_WIDTH = 46.0
+ANSWER_ROW_SPACING = 7.0
+CHOICE_SPACING = 7.0
+ROWS_PER_COLUMN = 20
+ANSWER_COLUMNS = 4
+
+CHOICES = ('A', 'B', 'C', 'D')
+DIGITS = tuple(str(digit) for digit in range(10))
+
+# Pixels per mm of rendered sheets (about 100 dpi)
+DEFAULT_PIXELS_PER_MM = 4.0
+
+
+class SheetTemplate:
+    """Layout of an answer sheet with a given number of questions."""
+
+    def __init__(self, questions: int, id_digits: int = 6):
+        """Initialize SheetTemplate.
+
+        Args:
+            questions: Number of questions (at most max_questions())
+            id_digits: Number of student id digits
+
+        Raises:
+            ValueError: If the sheet cannot hold that many questions or digits
+        """
+        if questions < 1 or questions > self.max_questions():
+            raise ValueError(f"Phiếu chỉ chứa được 1-{self.max_questions()} câu hỏi")
+        if id_digits < 1 or id_digits > MAX_ID_DIGITS:
+            raise ValueError(f"Mã học sinh phải có 1-{MAX_ID_DIGITS} chữ số")
+        self.questions = questions
+        self.id_digits = id_digits
+
+    @staticmethod
+    def max_questions() -> int:
+        return ROWS_PER_COLUMN * ANSWER_COLUMNS
+
+    def mark_centers(self) -> 'np.ndarray':
+        """(4, 2) centres (x, y) of the marks: top-left, top-right, bottom-left, bottom-right."""
+        require_numpy()
+        near = MARK_MARGIN + MARK_SIZE / 2
+        return np.array([
+            (near, near), (PAGE_WIDTH - near, near),
+            (near, PAGE_HEIGHT - near), (PAGE_WIDTH - near, PAGE_HEIGHT - near)
+        ])
+
+    def id_centers(self) -> 'np.ndarray':
+        """(id_digits, 10, 2) bubble centres of the student id block."""
+        require_numpy()
+        digit, value = np.meshgrid(np.arange(self.id_digits), np.arange(10), indexing='ij')
+        return np.stack([
+            ID_ORIGIN[0] + digit * ID_COLUMN_SPACING,
+            ID_ORIGIN[1] + value * ID_ROW_SPACING
+        ], axis=-1).astype(np.float64)
+
+    def answer_centers(self) -> 'np.ndarray':
+        """(questions, 4, 2) bubble centres of the answer block."""
+        require_numpy()
+        question, choice = np.meshgrid(np.arange(self.questions), np.arange(len(CHOICES)), indexing='ij')
+        column, row = np.divmod(question, ROWS_PER_COLUMN)
+        return np.stack([
+            ANSWER_ORIGIN[0] + column * ANSWER_COLUMN_WIDTH + choice * CHOICE_SPACING,
+            ANSWER_ORIGIN[1] + row * ANSWER_ROW_SPACING
+        ], axis=-1).astype(np.float64)
+
+    def render(
+        self,
+        student_id: str = '',
+        answers: Sequence[str] = (),
+        pixels_per_mm: float = DEFAULT_PIXELS_PER_MM,
+        angle: float = 0.0,
+        offset: Tuple[float, float] = (0.0, 0.0),
+        noise: float = 0.0,
+        faint: Iterable[int] = (),
+        seed: int = 0
+    ) -> 'np.ndarray':
+        """Draw the sheet as a (height, width) uint8 grayscale image.
+
+        Args:
+            student_id: Digits to fill in the id block ('' = blank)
+            answers: One string per question: '', a choice, or several
+                choices (a double mark)
+            pixels_per_mm: Resolution
+            angle: Rotation of the page on the scanner, in degrees
+            offset: Shift of the page on the scanner, in mm
+            noise: Standard deviation of added Gaussian noise (gray levels)
+            faint: 0-based question numbers whose marks are light gray
+            seed: Seed of the noise
+        """
+        require_numpy()
+        height = int(round(PAGE_HEIGHT * pixels_per_mm))
+        width = int(round(PAGE_WIDTH * pixels_per_mm))
+        image = np.full((height, width), 255.0)
+        page = _PageTransform(pixels_per_mm, angle, offset)
+
+        for x, y in self.mark_centers():
+            page.fill_square(image, x, y, MARK_SIZE / 2, 0.0)
+
+        filled: Dict[Tuple[str, int, int], float] = {}
+        for digit, char in enumerate(student_id[:self.id_digits]):
+            if char.isdigit():
+                filled[('id', digit, int(char))] = 0.0
+        faint = set(faint)
+        for question, answer in enumerate(answers[:self.questions]):
+            for char in (answer or '').upper():
+                if char in CHOICES:
+                    filled[('answer', question, CHOICES.index(char))] = 150.0 if question in faint else 0.0
+
+        for block, centers in (('id', self.id_centers()), ('answer', self.answer_centers())):
+            for row in range(centers.shape[0]):
+                for column in range(centers.shape[1]):
+                    x, y = centers[row, column]
+                    shade = filled.get((block, row, column))
+                    page.draw_bubble(image, x, y, shade)
+
+        if noise:
+            image += np.random.default_rng(seed).normal(0.0, noise, image.shape)
+        return np.clip(np.round(image), 0, 255).astype(np.uint8)
+
+
+class _PageTransform:
+    """Maps page millimetres to scan pixels (scale, rotation about the centre, shift)."""
+
+    def __init__(self, pixels_per_mm: float, angle: float, offset: Tuple[float, float]):
+        self.scale = pixels_per_mm
+        radians = math.radians(angle)
+        self.cos = math.cos(radians)
+        self.sin = math.sin(radians)
+        self.offset = offset
+
+    def to_pixel(self, x: float, y: float) -> Tuple[float, float]:
+        dx, dy = x - PAGE_WIDTH / 2, y - PAGE_HEIGHT / 2
+        return (
+            (PAGE_WIDTH / 2 + self.offset[0] + dx * self.cos - dy * self.sin) * self.scale,
+            (PAGE_HEIGHT / 2 + self.offset[1] + dx * self.sin + dy * self.cos) * self.scale
+        )
+
+    def _patch(self, image: 'np.ndarray', x: float, y: float, half: float):
+        """Pixel window around a shape and the page coordinates of its pixels."""
+        px, py = self.to_pixel(x, y)
+        reach = half * self.scale * 1.5 + 2
+        top, bottom = max(int(py - reach), 0), min(int(py + reach) + 1, image.shape[0])
+        left, right = max(int(px - reach), 0), min(int(px + reach) + 1, image.shape[1])
+        rows, columns = np.mgrid[top:bottom, left:right]
+        # Inverse transform of the pixel centres back to page mm
+        u = (columns + 0.5) / self.scale - PAGE_WIDTH / 2 - self.offset[0]
+        v = (rows + 0.5) / self.scale - PAGE_HEIGHT / 2 - self.offset[1]
+        page_x = u * self.cos + v * self.sin + PAGE_WIDTH / 2
+        page_y = -u * self.sin + v * self.cos + PAGE_HEIGHT / 2
+        return image[top:bottom, left:right], page_x - x, page_y - y
+
+    def fill_square(self, image: 'np.ndarray', x: float, y: float, half: float, shade: float):
+        window, dx, dy = self._patch(image, x, y, half)
+        window[(np.abs(dx) <= half) & (np.abs(dy) <= half)] = shade
+
+    def draw_bubble(self, image: 'np.ndarray', x: float, y: float, shade: Optional[float]):
+        """Draw a bubble outline, filled with shade unless shade is None."""
+        window, dx, dy = self._patch(image, x, y, BUBBLE_RADIUS)
+        distance = np.hypot(dx, dy)
+        outline = np.abs(distance - BUBBLE_RADIUS) <= BUBBLE_OUTLINE / 2
+        window[outline] = np.minimum(window[outline], 90.0)
+        if shade is not None:
+            inside = distance <= BUBBLE_RADIUS
+            window[inside] = np.minimum(window[inside], shade)
@@ -1 +1,7 @@
 """Storage layer for file-based data persistence."""
+
+from .factory import create_storage, storage_backend_name, STORAGE_BACKENDS
+from .base_storage import BaseStorageManager
+from .file_storage import FileStorageManager
+
+__all__ = ['create_storage', 'storage_backend_name', 'STORAGE_BACKENDS', 'BaseStorageManager', 'FileStorageManager']
@@ -0,0 +1,230 @@
+"""Backend-independent part of the storage managers."""
+
+import json
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.storage.pagination import decode_cursor, take_page
+from src.storage.file_lock import file_lock, LOCK_SUFFIX
+
+
+# Orders supported by iter_results
+RESULT_ORDERS = ('result_id', 'student_id', 'graded_at')
+
+
+def check_result_order(order_by: str, after: Optional[str] = None):
+    """Validate the order_by/after arguments of iter_results."""
+    if order_by not in RESULT_ORDERS:
+        raise ValueError(f"Unknown result order: {order_by}")
+    if after is not None and order_by != 'result_id':
+        raise ValueError("after requires order_by='result_id'")
+
+
+class BaseStorageManager:
+    """Helpers shared by every storage backend.
+    
+    Subclasses set base_path and storage_mode and implement the
+    save_*/load_*/list_*/delete_* methods, iter_results and the index
+    maintenance methods; everything here is written in terms of those.
+    """
+    
+    base_path: Path
+    storage_mode: str
+    
+    def close(self):
+        """Release resources held by the storage manager."""
+    
+    def compact_segments(self) -> Dict[str, Dict[str, int]]:
+        """Compact the segment logs of backends that have them.
+        
+        Returns:
+            {entity: SegmentLog.compact() report}; empty without segment logs
+        """
+        return {}
+    
+    def check_indexes(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Compare secondary index files with the stored records.
+        
+        Returns:
+            {entity: {field: {'missing': n, 'stale': n}}}; empty for
+            backends without index files
+        """
+        return {}
+    
+    def check_integrity(self) -> List[str]:
+        """Run the backend's own consistency check, if it has one.
+        
+        Returns:
+            Problems found (empty if none)
+        """
+        return []
+    
+    @contextmanager
+    def exam_lock(self, exam_id: str):
+        """Hold the lock of one exam across a load/modify/save sequence.
+        
+        The lock excludes other threads and other processes sharing the
+        data directory, so concurrent updates of one exam (e.g. two
+        add_question calls in different gunicorn workers) are serialized
+        instead of overwriting each other.
+        
+        Args:
+            exam_id: ID of the exam
+        """
+        with file_lock(self.base_path / 'locks' / f'exam-{exam_id}{LOCK_SUFFIX}'):
+            yield
+    
+    def list_results_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        **filters
+    ) -> Tuple[List[dict], Optional[str]]:
+        """List one page of results in result_id order.
+        
+        Args:
+            limit: Maximum number of results
+            cursor: Opaque cursor returned with the previous page
+            **filters: exam_id, student_id, graded_from, graded_to
+        
+        Returns:
+            Tuple of (results, cursor of the next page or None)
+        
+        Raises:
+            ValueError: If the cursor or limit is invalid
+        """
+        records = self.iter_results(after=decode_cursor(cursor), **filters)
+        return take_page(records, limit, 'result_id')
+    
+    def import_from_json(self, file_path: str, data_type: str) -> bool:
+        """Import data from a JSON file.
+        
+        Args:
+            file_path: Path to the JSON file
+            data_type: Type of data ('exam', 'user', 'submission', 'result')
+        
+        Returns:
+            True if successful
+        """
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            
+            # Save based on data type
+            if data_type == 'exam':
+                return self.save_exam(data)
+            elif data_type == 'user':
+                return self.save_user(data)
+            elif data_type == 'submission':
+                return self.save_submission(data)
+            elif data_type == 'result':
+                return self.save_result(data)
+            else:
+                return False
+        except Exception:
+            return False
+    
+    def export_to_json(self, data: dict, file_path: str) -> bool:
+        """Export data to a JSON file.
+        
+        Args:
+            data: Data dictionary to export
+            file_path: Path where to save the JSON file
+        
+        Returns:
+            True if successful
+        """
+        try:
+            with open(file_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            return True
+        except Exception:
+            return False
+    
+    def import_from_csv(self, file_path: str) -> Optional[dict]:
+        """Import exam questions from a CSV file.
+        
+        CSV format: question_id,content,choice_A,choice_B,choice_C,choice_D,correct_answer
+        
+        Args:
+            file_path: Path to the CSV file
+        
+        Returns:
+            Dictionary with questions list or None if failed
+        """
+        try:
+            import csv
+            questions = []
+            
+            with open(file_path, 'r', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                for row in reader:
+                    question = {
+                        'question_id': row['question_id'],
+                        'content': row['content'],
+                        'choices': {
+                            'A': row['choice_A'],
+                            'B': row['choice_B'],
+                            'C': row['choice_C'],
+                            'D': row['choice_D']
+                        },
+                        'correct_answer': row['correct_answer']
+                    }
+                    questions.append(question)
+            
+            return {'questions': questions}
+        except Exception:
+            return None
+    
+    def export_to_csv(
+        self,
+        data: Iterable[dict],
+        file_path: str,
+        compress: bool = False,
+        fieldnames: Optional[List[str]] = None
+    ) -> bool:
+        """Export data to a CSV file.
+        
+        Rows are written as they are read, so data may be any iterable
+        (e.g. iter_results()). Rows need not share their keys: keys
+        outside the header are left out and missing ones are written
+        empty. Pass fieldnames when later rows may carry columns the
+        first row lacks (e.g. regraded_at or details of some results).
+        
+        Args:
+            data: Dictionaries to export
+            file_path: Path where to save the CSV file
+            compress: Write a gzip-compressed file
+            fieldnames: CSV columns (default: keys of the first row)
+        
+        Returns:
+            True if successful; on failure no partial file is left
+        """
+        opened = False
+        try:
+            import csv
+            import gzip
+            
+            rows = iter(data)
+            first = next(rows, None)
+            if first is None:
+                return False
+            
+            if fieldnames is None:
+                fieldnames = list(first.keys())
+            
+            opener = gzip.open if compress else open
+            with opener(file_path, 'wt', encoding='utf-8', newline='') as f:
+                opened = True
+                writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+                writer.writeheader()
+                writer.writerow(first)
+                for row in rows:
+                    writer.writerow(row)
+            
+            return True
+        except Exception:
+            if opened:
+                Path(file_path).unlink(missing_ok=True)
+            return False
@@ -0,0 +1,102 @@
+"""In-process LRU cache for parsed exams."""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024
+
+
+def copy_json(value: Any) -> Any:
+    """Copy a JSON-like structure (dicts, lists and scalars).
+
+    Much cheaper than copy.deepcopy for parsed JSON, and enough to keep
+    callers from mutating the cached object.
+    """
+    if isinstance(value, dict):
+        return {key: copy_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_json(item) for item in value]
+    return value
+
+
+class ExamCache:
+    """LRU cache of exam dictionaries validated by a freshness stamp.
+
+    The stamp is whatever cheaply identifies a version of the stored exam
+    (FileStorageManager uses the file's mtime, size and inode). An entry is
+    only returned when the caller's current stamp matches the cached one,
+    and always as a copy, so callers can mutate what they get freely.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        """Initialize cache.
+
+        Args:
+            max_entries: Maximum number of cached exams (0 disables caching)
+            max_bytes: Maximum total size of cached exams (serialized bytes)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Hashable, dict, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, exam_id: str, stamp: Hashable) -> Optional[dict]:
+        """Return a copy of the cached exam if its stamp is still current."""
+        with self._lock:
+            entry = self._entries.get(exam_id)
+            if entry is None or entry[0] != stamp:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(exam_id)
+            self.hits += 1
+            exam = entry[1]
+        return copy_json(exam)
+
+    def put(self, exam_id: str, stamp: Hashable, exam: dict, size: int):
+        """Cache an exam. The cache keeps its own copy."""
+        if self.max_entries <= 0 or size > self.max_bytes:
+            self.invalidate(exam_id)
+            return
+        exam = copy_json(exam)
+        with self._lock:
+            self._remove(exam_id)
+            self._entries[exam_id] = (stamp, exam, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, exam_id: str):
+        entry = self._entries.pop(exam_id, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    def invalidate(self, exam_id: str):
+        """Drop an exam from the cache."""
+        with self._lock:
+            self._remove(exam_id)
+
+    def clear(self):
+        """Drop all cached exams."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current size."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes
+            }
@@ -0,0 +1,126 @@
+"""Lightweight exam catalog (one summary row per exam)."""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from src.storage.file_lock import atomic_write_json, file_lock, lock_path
+
+
+SUMMARY_FIELDS = ('exam_id', 'title', 'created_by', 'created_at', 'question_count', 'content_hash')
+
+
+def exam_content_hash(exam: dict) -> str:
+    """Return a stable SHA-256 hex digest of an exam's content."""
+    canonical = json.dumps(exam, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def exam_summary(exam: dict) -> dict:
+    """Build the catalog summary of an exam dictionary."""
+    return {
+        'exam_id': exam['exam_id'],
+        'title': exam.get('title'),
+        'created_by': exam.get('created_by'),
+        'created_at': exam.get('created_at'),
+        'question_count': len(exam.get('questions', [])),
+        'content_hash': exam_content_hash(exam)
+    }
+
+
+class ExamCatalog:
+    """Exam summaries persisted in a single JSON file.
+
+    The catalog is kept in memory and re-read only when the file's stat
+    stamp changes, so listing exams costs one stat() instead of parsing
+    every exam with all its questions. Changes re-read the file under an
+    inter-process lock, so workers sharing the catalog do not drop each
+    other's entries.
+    """
+
+    def __init__(self, file_path: str):
+        """Initialize catalog.
+
+        Args:
+            file_path: Path of the catalog JSON file
+        """
+        self.file_path = Path(file_path)
+        self._entries: Dict[str, dict] = {}
+        self._stamp = None
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        return self.file_path.exists()
+
+    def _current_stamp(self):
+        try:
+            stat = os.stat(self.file_path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _reload(self):
+        """Re-read the catalog file if another writer changed it."""
+        stamp = self._current_stamp()
+        if stamp == self._stamp:
+            return
+        entries = {}
+        if stamp is not None:
+            try:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    entries = {entry['exam_id']: entry for entry in json.load(f)}
+            except Exception:
+                entries = {}
+        self._entries = entries
+        self._stamp = stamp
+
+    def _write(self) -> bool:
+        try:
+            self.file_path.parent.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self.file_path, list(self._entries.values()))
+            self._stamp = self._current_stamp()
+            return True
+        except Exception:
+            return False
+
+    def upsert(self, exam: dict) -> bool:
+        """Add or refresh the summary of an exam."""
+        with self._lock, file_lock(lock_path(self.file_path)):
+            self._reload()
+            self._entries[exam['exam_id']] = exam_summary(exam)
+            return self._write()
+
+    def remove(self, exam_id: str) -> bool:
+        """Remove an exam from the catalog."""
+        with self._lock, file_lock(lock_path(self.file_path)):
+            self._reload()
+            if self._entries.pop(exam_id, None) is None:
+                return True
+            return self._write()
+
+    def get(self, exam_id: str) -> Optional[dict]:
+        """Return the summary of one exam or None."""
+        with self._lock:
+            self._reload()
+            entry = self._entries.get(exam_id)
+            return dict(entry) if entry else None
+
+    def list(self) -> List[dict]:
+        """Return all exam summaries."""
+        with self._lock:
+            self._reload()
+            return [dict(entry) for entry in self._entries.values()]
+
+    def exam_ids(self) -> List[str]:
+        with self._lock:
+            self._reload()
+            return list(self._entries)
+
+    def rebuild(self, exams: Iterable[dict]) -> bool:
+        """Replace the catalog with summaries of the given exams."""
+        with self._lock, file_lock(lock_path(self.file_path)):
+            self._entries = {exam['exam_id']: exam_summary(exam) for exam in exams}
+            return self._write()
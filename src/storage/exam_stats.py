@@ -0,0 +1,362 @@
+"""Running score statistics per exam.
+
+Each exam has one small JSON file holding count, sum, sum of squares,
+min, max and a histogram of scores. Scores have two decimals on a 0-10
+scale, so the histogram is kept exactly, keyed by score in hundredths
+(at most 1001 buckets). Adding or removing one result is O(1) and min/max
+stay exact after removals.
+
+The histogram also answers percentile ranks in O(buckets), and a bounded
+min-heap of the TOP_CAPACITY best results answers top-k queries in O(k).
+When a result leaves a full heap (it was regraded below the best result
+left out, or moved to another exam) the results that could replace it
+are not known, so the leaderboard is marked stale and rebuilt from that
+exam's results.
+Statistics can always be rebuilt from the stored results.
+"""
+
+import heapq
+import json
+import math
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.storage.file_lock import atomic_write_json, file_lock, lock_path
+
+
+# Directory of the statistics files inside a storage base_path
+STATS_DIR = 'stats'
+
+# Scores are stored in hundredths: 0..1000
+SCORE_SCALE = 100
+MAX_BUCKET = 10 * SCORE_SCALE
+
+# Buckets of the coarse histogram returned by summarize(): [0,1), ..., [9,10]
+SUMMARY_BINS = 10
+
+# Results kept per exam for top_k(); larger k are capped to this
+TOP_CAPACITY = 100
+
+
+def score_bucket(score: float) -> int:
+    """Map a 0-10 score to its histogram bucket (hundredths)."""
+    return min(max(int(round(score * SCORE_SCALE)), 0), MAX_BUCKET)
+
+
+def empty_stats(exam_id: str) -> dict:
+    return {
+        'exam_id': exam_id,
+        'count': 0,
+        'sum': 0.0,
+        'sumsq': 0.0,
+        'min': None,
+        'max': None,
+        'histogram': {},
+        'top': [],
+        'cutoff': None,
+        'top_stale': False
+    }
+
+
+def add_score(stats: dict, score: float):
+    """Add one score to an exam's running statistics."""
+    bucket = score_bucket(score)
+    key = str(bucket)
+    stats['count'] += 1
+    stats['sum'] += score
+    stats['sumsq'] += score * score
+    stats['histogram'][key] = stats['histogram'].get(key, 0) + 1
+    if stats['min'] is None or bucket < stats['min']:
+        stats['min'] = bucket
+    if stats['max'] is None or bucket > stats['max']:
+        stats['max'] = bucket
+
+
+def remove_score(stats: dict, score: float):
+    """Remove one previously added score."""
+    bucket = score_bucket(score)
+    key = str(bucket)
+    if stats['histogram'].get(key, 0) <= 0:
+        return
+    stats['count'] -= 1
+    stats['sum'] -= score
+    stats['sumsq'] -= score * score
+    stats['histogram'][key] -= 1
+    if stats['histogram'][key] == 0:
+        del stats['histogram'][key]
+    if stats['count'] == 0:
+        stats.update(empty_stats(stats['exam_id']))
+    elif bucket in (stats['min'], stats['max']):
+        # Constant-time: the histogram has at most MAX_BUCKET + 1 keys
+        buckets = [int(b) for b in stats['histogram']]
+        stats['min'] = min(buckets)
+        stats['max'] = max(buckets)
+
+
+def _top_entry(result: dict) -> list:
+    """Heap entry of a result, ordered by score then result id."""
+    return [score_bucket(result['score']), result.get('result_id', ''), result.get('student_id', '')]
+
+
+def add_result(stats: dict, result: dict):
+    """Add one graded result: its score and, if among the best, its leaderboard entry."""
+    add_score(stats, result['score'])
+    entry = _top_entry(result)
+    if len(stats['top']) < TOP_CAPACITY:
+        heapq.heappush(stats['top'], entry)
+        return
+    if entry > stats['top'][0]:
+        entry = heapq.heapreplace(stats['top'], entry)
+    # Best entry ever left out of the leaderboard
+    if stats['cutoff'] is None or entry > stats['cutoff']:
+        stats['cutoff'] = entry
+
+
+def remove_result(stats: dict, result: dict) -> bool:
+    """Remove a previously added result (needs 'score', optionally 'result_id').
+
+    Returns:
+        True if the result was on the leaderboard
+    """
+    remove_score(stats, result['score'])
+    result_id = result.get('result_id')
+    if result_id is None:
+        return False
+    for position, entry in enumerate(stats['top']):
+        if entry[1] == result_id:
+            stats['top'][position] = stats['top'][-1]
+            stats['top'].pop()
+            heapq.heapify(stats['top'])
+            return True
+    return False
+
+
+def replace_result(stats: dict, previous: Optional[dict], result: dict):
+    """Add a result in place of its previous version (if any).
+
+    A result that leaves a full leaderboard can only be replaced by one of
+    the results left out of it, which are not kept: unless the new version
+    beats all of them (the cutoff), the leaderboard is marked stale.
+    """
+    left = previous is not None and remove_result(stats, previous)
+    add_result(stats, result)
+    if left and stats['cutoff'] is not None and _top_entry(result) < stats['cutoff']:
+        stats['top_stale'] = True
+
+
+def percentile_rank(stats: dict, score: float) -> Optional[float]:
+    """Percent of results below score, counting ties as half (O(buckets))."""
+    if not stats['count']:
+        return None
+    bucket = score_bucket(score)
+    below = equal = 0
+    for key, bucket_count in stats['histogram'].items():
+        if int(key) < bucket:
+            below += bucket_count
+        elif int(key) == bucket:
+            equal += bucket_count
+    return round((below + equal / 2) * 100 / stats['count'], 1)
+
+
+def top_results(stats: dict, k: int) -> List[dict]:
+    """Best k results, highest score first (ties in heap order, by result id)."""
+    best = heapq.nlargest(min(k, TOP_CAPACITY), stats['top'])
+    return [
+        {'rank': rank, 'result_id': result_id, 'student_id': student_id, 'score': bucket / SCORE_SCALE}
+        for rank, (bucket, result_id, student_id) in enumerate(best, 1)
+    ]
+
+
+def summarize(stats: dict) -> dict:
+    """Convert running statistics to the API shape."""
+    count = stats['count']
+    mean = stats['sum'] / count if count else None
+    stddev = None
+    if count:
+        stddev = math.sqrt(max(stats['sumsq'] / count - mean * mean, 0.0))
+    histogram = [0] * SUMMARY_BINS
+    for bucket, bucket_count in stats['histogram'].items():
+        histogram[min(int(bucket) // SCORE_SCALE, SUMMARY_BINS - 1)] += bucket_count
+    return {
+        'exam_id': stats['exam_id'],
+        'count': count,
+        'mean': round(mean, 2) if mean is not None else None,
+        'stddev': round(stddev, 2) if stddev is not None else None,
+        'min': stats['min'] / SCORE_SCALE if stats['min'] is not None else None,
+        'max': stats['max'] / SCORE_SCALE if stats['max'] is not None else None,
+        'histogram': histogram
+    }
+
+
+class ExamStatsStore:
+    """Running statistics of all exams, one JSON file per exam."""
+
+    def __init__(self, directory: str):
+        """Initialize stats store.
+
+        Args:
+            directory: Directory holding the per-exam statistics files
+        """
+        self.directory = Path(directory)
+        self._cache: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def exists(self) -> bool:
+        """True once the store has been built (see rebuild)."""
+        return (self.directory / '.built').exists()
+
+    def _path(self, exam_id: str) -> Path:
+        return self.directory / f'{exam_id}.json'
+
+    def _stamp(self, path: Path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _read(self, exam_id: str) -> dict:
+        """Return an exam's statistics, re-reading the file only if it changed."""
+        path = self._path(exam_id)
+        stamp = self._stamp(path)
+        cached = self._cache.get(exam_id)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        stats = empty_stats(exam_id)
+        if stamp is not None:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    stats = json.load(f)
+            except Exception:
+                stats = empty_stats(exam_id)
+        if 'top' not in stats:
+            # Written before leaderboards were kept
+            stats.update(top=[], cutoff=None, top_stale=stats['count'] > 0)
+        self._cache[exam_id] = (stamp, stats)
+        return stats
+
+    def _write(self, stats: dict) -> bool:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self._path(stats['exam_id'])
+            atomic_write_json(path, stats)
+            self._cache[stats['exam_id']] = (self._stamp(path), stats)
+            return True
+        except Exception:
+            return False
+
+    def record(self, result: dict, previous: Optional[dict] = None) -> bool:
+        """Add a graded result, replacing the previous version of it if given.
+
+        Signature matches GradingEngine result listeners. Each exam file is
+        re-read and written under its inter-process lock.
+        """
+        with self._lock:
+            if previous is not None and previous.get('exam_id') != result['exam_id']:
+                with file_lock(lock_path(self._path(previous['exam_id']))):
+                    old_stats = self._read(previous['exam_id'])
+                    if remove_result(old_stats, previous) and old_stats['cutoff'] is not None:
+                        old_stats['top_stale'] = True
+                    self._write(old_stats)
+                previous = None
+            with file_lock(lock_path(self._path(result['exam_id']))):
+                stats = self._read(result['exam_id'])
+                replace_result(stats, previous, result)
+                return self._write(stats)
+
+    def get(self, exam_id: str) -> dict:
+        """Return the statistics summary of one exam."""
+        with self._lock:
+            return summarize(self._read(exam_id))
+
+    def percentile(self, exam_id: str, score: float) -> Optional[float]:
+        """Return the percentile rank of a score among an exam's results.
+
+        Ties count as half, so the only result of an exam is at 50.0.
+        None if the exam has no results.
+        """
+        with self._lock:
+            return percentile_rank(self._read(exam_id), score)
+
+    def needs_rebuild(self, exam_id: str) -> bool:
+        """True if the exam's leaderboard lost entries it cannot refill."""
+        with self._lock:
+            return self._read(exam_id).get('top_stale', False)
+
+    def top_k(self, exam_id: str, k: int) -> List[dict]:
+        """Return the k best results of an exam (k is capped to TOP_CAPACITY).
+
+        Each entry has rank, result_id, student_id and score. Call
+        rebuild_exam first if needs_rebuild(exam_id).
+        """
+        with self._lock:
+            return top_results(self._read(exam_id), k)
+
+    def list(self) -> List[dict]:
+        """Return the statistics summaries of all exams with results."""
+        with self._lock:
+            if not self.directory.exists():
+                return []
+            return [
+                summarize(self._read(path.stem))
+                for path in sorted(self.directory.glob('*.json'))
+            ]
+
+    def overall(self) -> dict:
+        """Return the result count and mean score over all exams."""
+        with self._lock:
+            if not self.directory.exists():
+                return {'count': 0, 'mean': None}
+            all_stats = [self._read(path.stem) for path in self.directory.glob('*.json')]
+        count = sum(stats['count'] for stats in all_stats)
+        total = sum(stats['sum'] for stats in all_stats)
+        return {'count': count, 'mean': round(total / count, 2) if count else None}
+
+    def rebuild(self, iter_results: Callable[..., Iterable[dict]]) -> bool:
+        """Recompute all statistics from the stored results.
+
+        Args:
+            iter_results: Storage iter_results; called once without
+                arguments to find the exams with results, then once per
+                exam (exam_id=...) while holding that exam's lock, so
+                results recorded by other workers meanwhile are not lost
+        """
+        try:
+            exam_ids = dict.fromkeys(result['exam_id'] for result in iter_results())
+            if self.directory.exists():
+                exam_ids.update(dict.fromkeys(path.stem for path in sorted(self.directory.glob('*.json'))))
+            ok = all([self.rebuild_exam(exam_id, iter_results(exam_id=exam_id)) for exam_id in exam_ids])
+            self.directory.mkdir(parents=True, exist_ok=True)
+            (self.directory / '.built').touch()
+            return ok
+        except Exception:
+            return False
+
+    def rebuild_exam(self, exam_id: str, results: Iterable[dict]) -> bool:
+        """Recompute one exam's statistics and leaderboard from its results.
+
+        The results are read while holding the exam's lock, so results
+        recorded by other workers during the scan are not lost. An exam
+        left without results has its statistics file removed.
+        """
+        with self._lock, file_lock(lock_path(self._path(exam_id))):
+            stats = empty_stats(exam_id)
+            for result in results:
+                add_result(stats, result)
+            if stats['count']:
+                return self._write(stats)
+            try:
+                self._path(exam_id).unlink()
+            except FileNotFoundError:
+                pass
+            except Exception:
+                return False
+            self._cache.pop(exam_id, None)
+            return True
+
+
+def open_exam_stats(base_path: str) -> ExamStatsStore:
+    """Open the statistics store of a storage base_path."""
+    return ExamStatsStore(Path(base_path) / STATS_DIR)
@@ -0,0 +1,47 @@
+"""Storage backend selection."""
+
+import os
+from typing import Optional
+
+from src.storage.base_storage import BaseStorageManager
+from src.storage.file_storage import FileStorageManager
+
+
+STORAGE_BACKENDS = ('file', 'segments', 'sqlite')
+
+# Environment variable used when no backend is passed explicitly
+BACKEND_ENV_VAR = 'STORAGE_BACKEND'
+
+
+def create_storage(base_path: str = "data", backend: Optional[str] = None) -> BaseStorageManager:
+    """Create the configured storage manager.
+
+    Args:
+        base_path: Base directory for data storage
+        backend: 'file' (one JSON file per record), 'segments' (JSON files
+            for exams/users, segment logs for submissions/results) or
+            'sqlite'. Defaults to the STORAGE_BACKEND environment variable,
+            then 'file'.
+
+    Returns:
+        FileStorageManager or SQLiteStorageManager
+    """
+    backend = (backend or os.environ.get(BACKEND_ENV_VAR) or 'file').lower()
+
+    if backend == 'file':
+        return FileStorageManager(base_path=base_path)
+    if backend == 'segments':
+        return FileStorageManager(base_path=base_path, storage_mode='segments')
+    if backend == 'sqlite':
+        from src.storage.sqlite_storage import SQLiteStorageManager
+        return SQLiteStorageManager(base_path=base_path)
+
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def storage_backend_name(storage: BaseStorageManager) -> str:
+    """Return the create_storage() backend name of a storage manager.
+
+    Used to open an equivalent storage manager in another process.
+    """
+    return {'files': 'file', 'segments': 'segments', 'sqlite': 'sqlite'}[storage.storage_mode]
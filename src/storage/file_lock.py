@@ -0,0 +1,120 @@
+"""Inter-process file locks and atomic file writes.
+
+Several gunicorn workers may share one data directory, so every
+read-modify-write of a shared file (an exam, the exam catalog, a
+statistics file, the tail of a segment log) is done while holding an
+advisory lock on a companion ``.lock`` file. Locks are fcntl.flock locks
+combined with a per-process re-entrant lock, so they exclude both other
+processes and other threads, and a thread may re-acquire a lock it
+already holds. Where fcntl is unavailable (Windows) only the per-process
+lock is taken.
+
+Whole-file writes go through atomic_write_json: the JSON is written to a
+temporary file in the same directory and renamed over the target, so a
+reader sees either the old or the new document, never half of one.
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+LOCK_SUFFIX = '.lock'
+
+
+class _PathLock:
+    """Re-entrant lock on one lock file, shared by all threads of a process."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._file = None
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = open(self.path, 'a+b')
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            except Exception:
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._file is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            finally:
+                self._file.close()
+                self._file = None
+        self._thread_lock.release()
+
+
+_path_locks: Dict[str, _PathLock] = {}
+_registry_lock = threading.Lock()
+
+
+def _path_lock(path: Path) -> _PathLock:
+    key = os.path.abspath(path)
+    with _registry_lock:
+        lock = _path_locks.get(key)
+        if lock is None:
+            lock = _path_locks[key] = _PathLock(Path(key))
+        return lock
+
+
+@contextmanager
+def file_lock(path: Union[str, Path]) -> Iterator[None]:
+    """Hold an exclusive lock on a lock file (created if missing).
+
+    Args:
+        path: Path of the lock file, usually the protected file plus
+            LOCK_SUFFIX
+    """
+    lock = _path_lock(Path(path))
+    lock.acquire()
+    try:
+        yield
+    finally:
+        lock.release()
+
+
+def lock_path(path: Union[str, Path]) -> Path:
+    """Lock file guarding a data file."""
+    path = Path(path)
+    return path.with_name(path.name + LOCK_SUFFIX)
+
+
+def atomic_write_json(path: Union[str, Path], data, indent=None):
+    """Write JSON to a temporary file and rename it over path.
+
+    Raises:
+        OSError: If the file cannot be written (the temporary file is removed)
+    """
+    path = Path(path)
+    temp_path = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            temp_path.unlink()
+        except OSError:
+            pass
+        raise
@@ -1,22 +1,88 @@
 """File storage manager for JSON-based persistence."""
 
+import bisect
 import json
 import os
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 
+from src.storage.base_storage import BaseStorageManager, check_result_order
+from src.storage.segment_log import SegmentLog, DEFAULT_MAX_SEGMENT_BYTES
+from src.storage.secondary_index import SecondaryIndex
+from src.storage.exam_cache import ExamCache, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES
+from src.storage.exam_catalog import ExamCatalog
+from src.storage.file_lock import atomic_write_json, file_lock, LOCK_SUFFIX
 
-class FileStorageManager:
+
+STORAGE_MODES = ('files', 'segments')
+
+# Entities that may be stored in segment logs instead of one file per record
+SEGMENT_ENTITIES = ('submissions', 'results')
+
+ID_FIELDS = {
+    'exams': 'exam_id',
+    'submissions': 'submission_id',
+    'results': 'result_id',
+    'users': 'user_id'
+}
+
+# Secondary indexes maintained on every save/delete: entity -> fields
+INDEXED_FIELDS = {
+    'submissions': ('exam_id', 'student_id'),
+    'results': ('exam_id', 'student_id')
+}
+
+
+class FileStorageManager(BaseStorageManager):
     """Manages file-based storage for all entities."""
     
-    def __init__(self, base_path: str = "data"):
+    def __init__(
+        self,
+        base_path: str = "data",
+        storage_mode: str = "files",
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        exam_cache_entries: int = DEFAULT_MAX_ENTRIES,
+        exam_cache_bytes: int = DEFAULT_MAX_BYTES
+    ):
         """Initialize storage manager.
         
         Args:
             base_path: Base directory for data storage
+            storage_mode: 'files' writes one JSON file per record; 'segments'
+                appends submissions and results to rotating JSON-lines
+                segment files under ``<base_path>/segments``
+            max_segment_bytes: Segment rotation size in 'segments' mode
+            exam_cache_entries: Maximum number of parsed exams kept in
+                memory by load_exam (0 disables the cache)
+            exam_cache_bytes: Maximum total file size of cached exams
         """
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"Unknown storage mode: {storage_mode}")
+        
         self.base_path = Path(base_path)
+        self.storage_mode = storage_mode
         self._ensure_directories()
+        self.exam_cache = ExamCache(max_entries=exam_cache_entries, max_bytes=exam_cache_bytes)
+        self.exam_catalog = ExamCatalog(self.base_path / 'catalog.json')
+        
+        self._segments: Dict[str, SegmentLog] = {}
+        if storage_mode == 'segments':
+            for entity in SEGMENT_ENTITIES:
+                self._segments[entity] = SegmentLog(
+                    self.base_path / 'segments' / entity,
+                    max_segment_bytes=max_segment_bytes
+                )
+        
+        self._indexes: Dict[str, Dict[str, SecondaryIndex]] = {
+            entity: {
+                field: SecondaryIndex(
+                    self.base_path / 'indexes' / entity / field,
+                    lock_path=self._index_lock_path(entity)
+                )
+                for field in fields
+            }
+            for entity, fields in INDEXED_FIELDS.items()
+        }
     
     def _ensure_directories(self):
         """Create necessary directories if they don't exist."""
@@ -25,6 +91,205 @@ class FileStorageManager:
             dir_path = self.base_path / dir_name
             dir_path.mkdir(parents=True, exist_ok=True)
     
+    def close(self):
+        """Release open segment file handles."""
+        for segment_log in self._segments.values():
+            segment_log.close()
+    
+    def compact_segments(self) -> Dict[str, Dict[str, int]]:
+        """Drop superseded versions and tombstones from the segment logs.
+        
+        Returns:
+            {entity: SegmentLog.compact() report}; empty in 'files' mode
+        """
+        return {entity: segment_log.compact() for entity, segment_log in self._segments.items()}
+    
+    def _load_record_file(self, entity: str, record_id: str) -> Optional[dict]:
+        """Load a one-file-per-record JSON document."""
+        try:
+            file_path = self.base_path / entity / f'{record_id}.json'
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            return None
+    
+    def _iter_records(self, entity: str):
+        """Yield every stored record of an entity.
+        
+        In 'segments' mode the segment log is read first, followed by any
+        per-file records written before the mode was switched on.
+        """
+        seen = set()
+        segment_log = self._segments.get(entity)
+        if segment_log is not None:
+            for record in segment_log.iter_records():
+                seen.add(record.get(ID_FIELDS[entity]))
+                yield record
+        
+        entity_dir = self.base_path / entity
+        if not entity_dir.exists():
+            return
+        
+        for file_path in entity_dir.glob('*.json'):
+            if seen and file_path.stem in seen:
+                continue
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    yield json.load(f)
+            except Exception:
+                continue
+    
+    def _load_stored(self, entity: str, record_id: str) -> Optional[dict]:
+        """Load a submission or result from the segment log or its own file."""
+        segment_log = self._segments.get(entity)
+        if segment_log is not None:
+            try:
+                record = segment_log.read(record_id)
+            except Exception:
+                return None
+            if record is not None:
+                return record
+        return self._load_record_file(entity, record_id)
+    
+    def _load_entity(self, entity: str, record_id: str) -> Optional[dict]:
+        if entity == 'submissions':
+            return self.load_submission(record_id)
+        return self.load_result(record_id)
+    
+    def _index_record(self, entity: str, record: dict, previous: Optional[dict] = None):
+        """Index a saved record; values the previous version already had are skipped."""
+        record_id = record[ID_FIELDS[entity]]
+        for field, index in self._indexes[entity].items():
+            value = record.get(field)
+            old_value = previous.get(field) if previous else None
+            if value == old_value:
+                continue
+            if old_value:
+                index.remove(old_value, record_id)
+            index.add(value, record_id)
+    
+    def _unindex_record(self, entity: str, record: dict):
+        record_id = record[ID_FIELDS[entity]]
+        for field, index in self._indexes[entity].items():
+            index.remove(record.get(field), record_id)
+    
+    def _index_marker(self, entity: str) -> Path:
+        return self.base_path / 'indexes' / entity / '.built'
+    
+    def _index_lock_path(self, entity: str) -> Path:
+        return self.base_path / 'locks' / f'index-{entity}{LOCK_SUFFIX}'
+    
+    def _filtered_records(self, entity: str, filters: Dict[str, Optional[str]]):
+        """Yield records matching all non-empty filters.
+        
+        Filtered listing reads only the ids found in the secondary indexes
+        (built on first use) instead of every record of the entity.
+        """
+        filters = {field: value for field, value in filters.items() if value}
+        if not filters:
+            yield from self._iter_records(entity)
+            return
+        
+        for record_id in self._candidate_ids(entity, filters):
+            record = self._load_entity(entity, record_id)
+            # Index entries may be stale (e.g. after a crash); always re-check
+            if record is None:
+                continue
+            if all(record.get(field) == value for field, value in filters.items()):
+                yield record
+    
+    def _record_ids(self, entity: str) -> List[str]:
+        """List the ids of every stored record of an entity without reading them."""
+        ids = {}
+        segment_log = self._segments.get(entity)
+        if segment_log is not None:
+            ids.update(dict.fromkeys(segment_log.keys()))
+        entity_dir = self.base_path / entity
+        if entity_dir.exists():
+            ids.update(dict.fromkeys(file_path.stem for file_path in entity_dir.glob('*.json')))
+        return list(ids)
+    
+    def _candidate_ids(self, entity: str, filters: Dict[str, str]) -> List[str]:
+        """Ids that may match the non-empty filters, from the secondary indexes.
+        
+        Index entries may be stale, so callers must re-check loaded records.
+        """
+        if not filters:
+            return self._record_ids(entity)
+        
+        if not self._index_marker(entity).exists():
+            with file_lock(self._index_lock_path(entity)):
+                # Another worker may have built them while we waited
+                if not self._index_marker(entity).exists():
+                    self.rebuild_indexes(entity)
+        
+        candidates = None
+        for field, value in filters.items():
+            ids = self._indexes[entity][field].lookup(value)
+            if candidates is None:
+                candidates = ids
+            else:
+                wanted = set(ids)
+                candidates = [record_id for record_id in candidates if record_id in wanted]
+        return candidates
+    
+    def _expected_index_entries(self, entity: str) -> Dict[str, Dict[str, set]]:
+        expected = {field: {} for field in INDEXED_FIELDS[entity]}
+        for record in self._iter_records(entity):
+            record_id = record.get(ID_FIELDS[entity])
+            if not record_id:
+                continue
+            for field in INDEXED_FIELDS[entity]:
+                value = record.get(field)
+                if value:
+                    expected[field].setdefault(value, set()).add(record_id)
+        return expected
+    
+    def rebuild_indexes(self, entity: Optional[str] = None) -> bool:
+        """Rebuild secondary indexes from the stored records.
+        
+        The records are scanned and the indexes rewritten while holding
+        the index lock of the entity, so ids added by concurrent saves
+        are either in the scan or appended after the rewrite.
+        
+        Args:
+            entity: 'submissions' or 'results'; None rebuilds both
+        
+        Returns:
+            True if successful
+        """
+        entities = [entity] if entity else list(INDEXED_FIELDS)
+        success = True
+        for name in entities:
+            with file_lock(self._index_lock_path(name)):
+                expected = self._expected_index_entries(name)
+                for field, entries in expected.items():
+                    success = self._indexes[name][field].rebuild(entries) and success
+                try:
+                    marker = self._index_marker(name)
+                    marker.parent.mkdir(parents=True, exist_ok=True)
+                    marker.touch()
+                except Exception:
+                    success = False
+        return success
+    
+    def check_indexes(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Compare secondary indexes with the stored records.
+        
+        Returns:
+            {entity: {field: {'missing': n, 'stale': n}}}
+        """
+        report = {}
+        for entity in INDEXED_FIELDS:
+            expected = self._expected_index_entries(entity)
+            report[entity] = {
+                field: self._indexes[entity][field].check(entries)
+                for field, entries in expected.items()
+            }
+        return report
+    
     def save_exam(self, exam: dict) -> bool:
         """Save an exam to file.
         
@@ -37,8 +302,9 @@ class FileStorageManager:
         try:
             exam_id = exam['exam_id']
             file_path = self.base_path / 'exams' / f'{exam_id}.json'
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(exam, f, ensure_ascii=False, indent=2)
+            self.exam_cache.invalidate(exam_id)
+            atomic_write_json(file_path, exam, indent=2)
+            self.exam_catalog.upsert(exam)
             return True
         except Exception:
             return False
@@ -46,6 +312,11 @@ class FileStorageManager:
     def load_exam(self, exam_id: str) -> Optional[dict]:
         """Load an exam from file.
         
+        Parsed exams are cached in memory and revalidated with a stat() of
+        the file, so repeated loads of an unchanged exam skip the read and
+        JSON parse. Every call returns a fresh copy that the caller may
+        modify.
+        
         Args:
             exam_id: ID of the exam to load
         
@@ -54,9 +325,19 @@ class FileStorageManager:
         """
         try:
             file_path = self.base_path / 'exams' / f'{exam_id}.json'
+            stat = os.stat(file_path)
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            
+            exam = self.exam_cache.get(exam_id, stamp)
+            if exam is not None:
+                return exam
+            
             with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+                exam = json.load(f)
+            self.exam_cache.put(exam_id, stamp, exam, stat.st_size)
+            return exam
         except FileNotFoundError:
+            self.exam_cache.invalidate(exam_id)
             return None
         except Exception:
             return None
@@ -81,6 +362,49 @@ class FileStorageManager:
         
         return exams
     
+    def list_exam_summaries(self) -> List[dict]:
+        """List exam summaries from the catalog without parsing questions.
+        
+        The catalog is rebuilt when it is missing or its exam ids no longer
+        match the files in the exams directory (e.g. exams copied in by
+        hand).
+        
+        Returns:
+            List of dicts with exam_id, title, created_by, created_at,
+            question_count and content_hash
+        """
+        exams_dir = self.base_path / 'exams'
+        file_ids = {file_path.stem for file_path in exams_dir.glob('*.json')}
+        if not file_ids and not self.exam_catalog.exists():
+            # Nothing to list yet: the catalog is created with the first exam
+            return []
+        if not self.exam_catalog.exists() or set(self.exam_catalog.exam_ids()) != file_ids:
+            self.rebuild_exam_catalog()
+        return self.exam_catalog.list()
+    
+    def get_exam_summary(self, exam_id: str) -> Optional[dict]:
+        """Return the catalog summary of one exam without reading the exam.
+        
+        Args:
+            exam_id: ID of the exam
+        
+        Returns:
+            Summary dict (see list_exam_summaries) or None if not found
+        """
+        summary = self.exam_catalog.get(exam_id)
+        if summary is None and (self.base_path / 'exams' / f'{exam_id}.json').exists():
+            self.rebuild_exam_catalog()
+            summary = self.exam_catalog.get(exam_id)
+        return summary
+    
+    def rebuild_exam_catalog(self) -> bool:
+        """Rebuild the exam catalog from the exam files.
+        
+        Returns:
+            True if successful
+        """
+        return self.exam_catalog.rebuild(self.list_exams())
+    
     def delete_exam(self, exam_id: str) -> bool:
         """Delete an exam file.
         
@@ -92,8 +416,10 @@ class FileStorageManager:
         """
         try:
             file_path = self.base_path / 'exams' / f'{exam_id}.json'
+            self.exam_cache.invalidate(exam_id)
             if file_path.exists():
                 file_path.unlink()
+                self.exam_catalog.remove(exam_id)
                 return True
             return False
         except Exception:
@@ -103,53 +429,183 @@ class FileStorageManager:
         """Save a submission to file."""
         try:
             submission_id = submission['submission_id']
-            file_path = self.base_path / 'submissions' / f'{submission_id}.json'
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(submission, f, ensure_ascii=False, indent=2)
+            previous = self._load_stored('submissions', submission_id)
+            if 'submissions' in self._segments:
+                if not self._segments['submissions'].append(submission_id, submission):
+                    return False
+            else:
+                atomic_write_json(self.base_path / 'submissions' / f'{submission_id}.json', submission, indent=2)
+            self._index_record('submissions', submission, previous)
             return True
         except Exception:
             return False
     
     def load_submission(self, submission_id: str) -> Optional[dict]:
         """Load a submission from file."""
-        try:
-            file_path = self.base_path / 'submissions' / f'{submission_id}.json'
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return None
-        except Exception:
-            return None
+        return self._load_stored('submissions', submission_id)
+    
+    def delete_submission(self, submission_id: str) -> bool:
+        """Delete a submission.
+        
+        Args:
+            submission_id: ID of the submission to delete
+        
+        Returns:
+            True if successful
+        """
+        return self._delete_record('submissions', submission_id)
     
     def save_result(self, result: dict) -> bool:
         """Save a result to file."""
         try:
             result_id = result['result_id']
-            file_path = self.base_path / 'results' / f'{result_id}.json'
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            previous = self._load_stored('results', result_id)
+            if 'results' in self._segments:
+                if not self._segments['results'].append(result_id, result):
+                    return False
+            else:
+                atomic_write_json(self.base_path / 'results' / f'{result_id}.json', result, indent=2)
+            self._index_record('results', result, previous)
+            return True
+        except Exception:
+            return False
+    
+    def save_results(self, results: List[dict]) -> bool:
+        """Save several results in one batch.
+        
+        In 'segments' mode the whole batch is a single append and flush.
+        
+        Args:
+            results: List of result dictionaries
+        
+        Returns:
+            True if all results were saved
+        """
+        if 'results' not in self._segments:
+            success = True
+            for result in results:
+                success = self.save_result(result) and success
+            return success
+        
+        try:
+            records = [(result['result_id'], result) for result in results]
+            previous = [self._load_stored('results', result_id) for result_id, _ in records]
+            if not self._segments['results'].append_many(records):
+                return False
+            for result, old in zip(results, previous):
+                self._index_record('results', result, old)
+            return True
+        except Exception:
+            return False
+    
+    def save_submissions(self, submissions: List[dict]) -> bool:
+        """Save several submissions in one batch.
+        
+        In 'segments' mode the whole batch is a single append and flush.
+        
+        Args:
+            submissions: List of submission dictionaries
+        
+        Returns:
+            True if all submissions were saved
+        """
+        if 'submissions' not in self._segments:
+            success = True
+            for submission in submissions:
+                success = self.save_submission(submission) and success
+            return success
+        
+        try:
+            records = [(submission['submission_id'], submission) for submission in submissions]
+            previous = [self._load_stored('submissions', submission_id) for submission_id, _ in records]
+            if not self._segments['submissions'].append_many(records):
+                return False
+            for submission, old in zip(submissions, previous):
+                self._index_record('submissions', submission, old)
             return True
         except Exception:
             return False
     
+    def save_graded_many(self, submissions: List[dict], results: List[dict]) -> bool:
+        """Save several submissions together with their results.
+        
+        Same guarantee as save_graded: the results are written first and
+        removed again if the submissions cannot be written.
+        
+        Args:
+            submissions: List of submission dictionaries
+            results: Result of each submission, in the same order
+        
+        Returns:
+            True if all were saved
+        """
+        if not self.save_results(results):
+            return False
+        if not self.save_submissions(submissions):
+            for result in results:
+                self.delete_result(result['result_id'])
+            return False
+        return True
+    
+    def save_graded(self, submission: dict, result: dict) -> bool:
+        """Save a submission together with its result.
+        
+        The result is written first and removed again if the submission
+        cannot be written, so a submission is never stored without its
+        result.
+        
+        Args:
+            submission: Submission dictionary
+            result: Result dictionary of that submission
+        
+        Returns:
+            True if both were saved
+        """
+        if not self.save_result(result):
+            return False
+        if not self.save_submission(submission):
+            self.delete_result(result['result_id'])
+            return False
+        return True
+    
     def load_result(self, result_id: str) -> Optional[dict]:
         """Load a result from file."""
+        return self._load_stored('results', result_id)
+    
+    def delete_result(self, result_id: str) -> bool:
+        """Delete a result.
+        
+        Args:
+            result_id: ID of the result to delete
+        
+        Returns:
+            True if successful
+        """
+        return self._delete_record('results', result_id)
+    
+    def _delete_record(self, entity: str, record_id: str) -> bool:
         try:
-            file_path = self.base_path / 'results' / f'{result_id}.json'
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return None
+            record = self._load_entity(entity, record_id)
+            if record is None:
+                return False
+            
+            segment_log = self._segments.get(entity)
+            if segment_log is not None:
+                segment_log.delete(record_id)
+            file_path = self.base_path / entity / f'{record_id}.json'
+            if file_path.exists():
+                file_path.unlink()
+            
+            self._unindex_record(entity, record)
+            return True
         except Exception:
-            return None
+            return False
     
     def save_user(self, user: dict) -> bool:
         """Save a user to file."""
         try:
             user_id = user['user_id']
-            file_path = self.base_path / 'users' / f'{user_id}.json'
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(user, f, ensure_ascii=False, indent=2)
+            atomic_write_json(self.base_path / 'users' / f'{user_id}.json', user, indent=2)
             return True
         except Exception:
             return False
@@ -218,160 +674,106 @@ class FileStorageManager:
         Returns:
             List of submission dictionaries
         """
-        submissions = []
-        submissions_dir = self.base_path / 'submissions'
-        if not submissions_dir.exists():
-            return submissions
-        
-        for file_path in submissions_dir.glob('*.json'):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    submission = json.load(f)
-                    # Apply filters
-                    if exam_id and submission.get('exam_id') != exam_id:
-                        continue
-                    if student_id and submission.get('student_id') != student_id:
-                        continue
-                    submissions.append(submission)
-            except Exception:
-                continue
-        
-        return submissions
+        return list(self._filtered_records(
+            'submissions', {'exam_id': exam_id, 'student_id': student_id}
+        ))
     
-    def list_results(self, exam_id: Optional[str] = None, student_id: Optional[str] = None) -> List[dict]:
-        """List results, optionally filtered by exam_id or student_id.
-        
-        Args:
-            exam_id: Optional exam ID filter
-            student_id: Optional student ID filter
-        
-        Returns:
-            List of result dictionaries
-        """
-        results = []
-        results_dir = self.base_path / 'results'
-        if not results_dir.exists():
-            return results
-        
-        for file_path in results_dir.glob('*.json'):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    result = json.load(f)
-                    # Apply filters
-                    if exam_id and result.get('exam_id') != exam_id:
-                        continue
-                    if student_id and result.get('student_id') != student_id:
-                        continue
-                    results.append(result)
-            except Exception:
-                continue
+    def list_submission_ids(self, exam_id: Optional[str] = None) -> List[str]:
+        """List submission IDs without reading the submissions.
         
-        return results
-    
-    def import_from_json(self, file_path: str, data_type: str) -> bool:
-        """Import data from a JSON file.
+        With exam_id the secondary index is used, so the returned ids may
+        include stale entries; callers must still check each loaded record.
         
         Args:
-            file_path: Path to the JSON file
-            data_type: Type of data ('exam', 'user', 'submission', 'result')
+            exam_id: Optional exam ID filter
         
         Returns:
-            True if successful
+            List of submission IDs
         """
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Save based on data type
-            if data_type == 'exam':
-                return self.save_exam(data)
-            elif data_type == 'user':
-                return self.save_user(data)
-            elif data_type == 'submission':
-                return self.save_submission(data)
-            elif data_type == 'result':
-                return self.save_result(data)
-            else:
-                return False
-        except Exception:
-            return False
+        return self._candidate_ids('submissions', {'exam_id': exam_id} if exam_id else {})
     
-    def export_to_json(self, data: dict, file_path: str) -> bool:
-        """Export data to a JSON file.
+    def list_results(self, exam_id: Optional[str] = None, student_id: Optional[str] = None) -> List[dict]:
+        """List results, optionally filtered by exam_id or student_id.
         
         Args:
-            data: Data dictionary to export
-            file_path: Path where to save the JSON file
+            exam_id: Optional exam ID filter
+            student_id: Optional student ID filter
         
         Returns:
-            True if successful
+            List of result dictionaries
         """
-        try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
-            return True
-        except Exception:
-            return False
+        return list(self._filtered_records(
+            'results', {'exam_id': exam_id, 'student_id': student_id}
+        ))
     
-    def import_from_csv(self, file_path: str) -> Optional[dict]:
-        """Import exam questions from a CSV file.
+    def list_result_ids(self, exam_id: Optional[str] = None) -> List[str]:
+        """List result IDs without reading the results.
         
-        CSV format: question_id,content,choice_A,choice_B,choice_C,choice_D,correct_answer
+        With exam_id the secondary index is used, so the returned ids may
+        include stale entries; callers must still check each loaded record.
         
         Args:
-            file_path: Path to the CSV file
+            exam_id: Optional exam ID filter
         
         Returns:
-            Dictionary with questions list or None if failed
+            List of result IDs
         """
-        try:
-            import csv
-            questions = []
-            
-            with open(file_path, 'r', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    question = {
-                        'question_id': row['question_id'],
-                        'content': row['content'],
-                        'choices': {
-                            'A': row['choice_A'],
-                            'B': row['choice_B'],
-                            'C': row['choice_C'],
-                            'D': row['choice_D']
-                        },
-                        'correct_answer': row['correct_answer']
-                    }
-                    questions.append(question)
-            
-            return {'questions': questions}
-        except Exception:
-            return None
+        return self._candidate_ids('results', {'exam_id': exam_id} if exam_id else {})
     
-    def export_to_csv(self, data: List[dict], file_path: str) -> bool:
-        """Export data to a CSV file.
+    def iter_results(
+        self,
+        exam_id: Optional[str] = None,
+        student_id: Optional[str] = None,
+        graded_from: Optional[str] = None,
+        graded_to: Optional[str] = None,
+        after: Optional[str] = None,
+        order_by: str = 'result_id'
+    ) -> Iterator[dict]:
+        """Yield results one record at a time.
         
         Args:
-            data: List of dictionaries to export
-            file_path: Path where to save the CSV file
-        
-        Returns:
-            True if successful
+            exam_id: Optional exam ID filter
+            student_id: Optional student ID filter
+            graded_from: Optional lower bound of graded_at (inclusive, ISO format)
+            graded_to: Optional upper bound of graded_at (inclusive, ISO format)
+            after: Only results whose result_id sorts after this one
+                (only with order_by='result_id')
+            order_by: 'result_id', 'student_id' or 'graded_at'; ties are
+                broken by result_id
+        
+        Yields:
+            Result dictionaries
+        
+        Raises:
+            ValueError: If order_by is unknown or combined with after
         """
-        try:
-            import csv
-            
-            if not data:
-                return False
-            
-            # Get all keys from first item
-            fieldnames = list(data[0].keys())
-            
-            with open(file_path, 'w', encoding='utf-8', newline='') as f:
-                writer = csv.DictWriter(f, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(data)
-            
-            return True
-        except Exception:
-            return False
+        check_result_order(order_by, after)
+        filters = {field: value for field, value in
+                   {'exam_id': exam_id, 'student_id': student_id}.items() if value}
+        result_ids = sorted(set(self._candidate_ids('results', filters)))
+        start = bisect.bisect_right(result_ids, after) if after is not None else 0
+        
+        def matching(ids):
+            for result_id in ids:
+                result = self.load_result(result_id)
+                if result is None:
+                    continue
+                if not all(result.get(field) == value for field, value in filters.items()):
+                    continue
+                graded_at = result.get('graded_at') or ''
+                if graded_from and graded_at < graded_from:
+                    continue
+                if graded_to and graded_at > graded_to:
+                    continue
+                yield result
+        
+        if order_by == 'result_id':
+            yield from matching(result_ids[start:])
+            return
+        
+        # Two passes: sort (key, id) pairs, then re-read each record in order,
+        # so only the sort keys are held in memory
+        keys = sorted(
+            (result.get(order_by) or '', result['result_id']) for result in matching(result_ids)
+        )
+        yield from matching(result_id for _, result_id in keys)
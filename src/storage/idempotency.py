@@ -0,0 +1,218 @@
+"""Idempotency keys of submissions.
+
+A retried submit (the browser timed out and sent the request again) must
+return the result of the first attempt instead of grading and storing a
+second copy. Every submission has a key: the client's Idempotency-Key
+(scoped to the exam and student), or a hash of exam_id, student_id and
+the answers.
+
+The first request for a key claims it by creating a file named after the
+key with O_CREAT | O_EXCL, which succeeds in exactly one thread of one
+process, across gunicorn workers too. Once its result is stored, the
+owner writes a small record into the file (the result id, or the queue
+ticket). Other requests for the key wait until the record is there and
+return it, so nothing is graded or written twice. Completed records are
+also kept in a bounded in-memory LRU, so retries reaching the same
+worker do not touch the disk.
+
+A claim left empty for longer than pending_timeout (its worker died) is
+taken over. A failed attempt releases its claim so the client can retry.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from src.storage.file_lock import atomic_write_json, file_lock
+
+
+# Directory of the idempotency records inside a storage base_path
+IDEMPOTENCY_DIR = 'idempotency'
+
+DEFAULT_MAX_MEMORY = 10000
+
+# Seconds after which an empty claim is considered abandoned
+PENDING_TIMEOUT = 30.0
+
+
+def submission_key(exam_id: str, student_id: str, answers: Dict[str, str]) -> str:
+    """Key derived from the content of a submission."""
+    payload = json.dumps([exam_id, student_id, answers], sort_keys=True, ensure_ascii=False)
+    return 'sub:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def client_key(value: str, exam_id: str, student_id: str) -> str:
+    """Key of a client-supplied Idempotency-Key value.
+
+    The value is scoped to the exam and student, so a key reused by
+    another student or for another exam never returns someone else's result.
+    """
+    payload = json.dumps([value, exam_id, student_id], ensure_ascii=False)
+    return 'client:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class IdempotencyIndex:
+    """Claims and completed records of idempotency keys, one file per key."""
+
+    def __init__(
+        self,
+        directory: str,
+        max_memory: int = DEFAULT_MAX_MEMORY,
+        pending_timeout: float = PENDING_TIMEOUT,
+        poll_interval: float = 0.02
+    ):
+        """Initialize idempotency index.
+
+        Args:
+            directory: Directory holding the key files
+            max_memory: Completed records kept in memory
+            pending_timeout: Seconds after which an empty claim is taken over
+            poll_interval: Seconds between checks while another request
+                holds the key
+        """
+        self.directory = Path(directory)
+        self.max_memory = max_memory
+        self.pending_timeout = pending_timeout
+        self.poll_interval = poll_interval
+        self._memory: 'OrderedDict[str, dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def _remember(self, key: str, record: dict):
+        with self._lock:
+            self._memory[key] = record
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory:
+                self._memory.popitem(last=False)
+
+    def _read(self, path: Path) -> Optional[dict]:
+        """Completed record of a key file (None while it is only claimed)."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            return json.loads(content) if content else None
+        except (OSError, ValueError):
+            return None
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return the completed record of a key, or None."""
+        with self._lock:
+            record = self._memory.get(key)
+            if record is not None:
+                self._memory.move_to_end(key)
+                return record
+        record = self._read(self._path(key))
+        if record is not None:
+            self._remember(key, record)
+        return record
+
+    def refresh(self, key: str) -> Optional[dict]:
+        """Re-read the record of a key from disk, dropping its in-memory copy.
+
+        Used when a remembered record may have been replaced by another
+        process (e.g. a queue ticket that later got its result id).
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+        return self.get(key)
+
+    def claim(self, key: str) -> Optional[dict]:
+        """Claim a key, or return the record of the request that holds it.
+
+        Returns:
+            None if the caller now owns the key (it must call complete or
+            release), otherwise the completed record of the key
+        """
+        record = self.get(key)
+        if record is not None:
+            return record
+        path = self._path(key)
+        while True:
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return None
+            except FileExistsError:
+                pass
+            record = self._wait(path)
+            if record is not None:
+                self._remember(key, record)
+                return record
+
+    def _wait(self, path: Path) -> Optional[dict]:
+        """Wait for a claimed key to be completed.
+
+        Returns None if the claim was released or abandoned (and removed),
+        so the caller can claim it again.
+        """
+        while True:
+            record = self._read(path)
+            if record is not None:
+                return record
+            try:
+                age = time.time() - os.stat(path).st_mtime
+            except FileNotFoundError:
+                return None
+            if age > self.pending_timeout:
+                with file_lock(self.directory / '.takeover.lock'):
+                    try:
+                        # Re-check under the lock: another waiter may have
+                        # taken it over and claimed it again already
+                        if self._read(path) is None and time.time() - os.stat(path).st_mtime > self.pending_timeout:
+                            path.unlink()
+                    except FileNotFoundError:
+                        pass
+                return None
+            time.sleep(self.poll_interval)
+
+    def complete(self, key: str, record: dict) -> bool:
+        """Store the record of a claimed key (e.g. {'result_id': ...})."""
+        self._remember(key, record)
+        try:
+            atomic_write_json(self._path(key), record)
+            return True
+        except Exception:
+            return False
+
+    def release(self, key: str):
+        """Give up a claim (or forget a record) so the key can be claimed again."""
+        with self._lock:
+            self._memory.pop(key, None)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def purge(self, max_age: float) -> int:
+        """Delete completed records older than max_age seconds.
+
+        Returns:
+            Number of records deleted
+        """
+        cutoff = time.time() - max_age
+        removed = 0
+        if not self.directory.exists():
+            return 0
+        for path in self.directory.glob('*/*'):
+            try:
+                if path.stat().st_mtime < cutoff and self._read(path) is not None:
+                    path.unlink()
+                    removed += 1
+            except OSError:
+                continue
+        with self._lock:
+            self._memory.clear()
+        return removed
+
+
+def open_idempotency_index(base_path: str) -> IdempotencyIndex:
+    """Open the idempotency index of a storage base_path."""
+    return IdempotencyIndex(Path(base_path) / IDEMPOTENCY_DIR)
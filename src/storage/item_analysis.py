@@ -0,0 +1,295 @@
+"""Question-level item analysis per exam.
+
+Each exam has one JSON file holding, for every question, the number of
+correct answers, the number of times each choice was picked and the
+correct answers tallied by score band (20 bands of 0.5 points). Adding a
+graded result touches each question once, so the store can be updated
+inline on every submission. From these tallies:
+
+- difficulty is the share of students answering correctly (p-value);
+- discrimination is p(upper 27%) - p(lower 27%), with the groups taken
+  from the score bands (the boundary band is split proportionally);
+- choice counts show how often each distractor was picked.
+
+Replacing a result (regrading) marks the exam stale instead of undoing
+the old tallies; a stale or missing exam is rebuilt from its stored
+results, with NumPy over the answer matrix when it is installed.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.models.result import BLANK_ANSWER, unpack_details
+from src.storage.file_lock import atomic_write_json, file_lock, lock_path
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - exercised by monkeypatching in tests
+    np = None
+
+
+# Directory of the item analysis files inside a storage base_path
+ITEM_ANALYSIS_DIR = 'item_analysis'
+
+# Score bands of the upper/lower group tallies: [0, 0.5), ..., [9.5, 10]
+SCORE_GROUPS = 20
+
+# Share of students in each of the upper and lower groups
+GROUP_FRACTION = 0.27
+
+# Choice keys of the counts; anything else counts as blank
+CHOICES = ('A', 'B', 'C', 'D')
+BLANK = 'blank'
+CHOICE_KEYS = CHOICES + (BLANK,)
+
+
+def score_group(score: float) -> int:
+    """Map a 0-10 score to its score band."""
+    return min(max(int(score * SCORE_GROUPS / 10), 0), SCORE_GROUPS - 1)
+
+
+def choice_key(answer: str) -> str:
+    """Normalize a student answer to one of CHOICE_KEYS."""
+    answer = (answer or '').strip().upper()
+    return answer if answer in CHOICES else BLANK
+
+
+def _answer_char(answer: str) -> str:
+    """One character per answer, as in the compact result form."""
+    key = choice_key(answer)
+    return BLANK_ANSWER if key == BLANK else key
+
+
+def empty_analysis(exam_id: str) -> dict:
+    return {
+        'exam_id': exam_id,
+        'count': 0,
+        'groups': [0] * SCORE_GROUPS,
+        'question_ids': [],
+        'questions': {},
+        'stale': False
+    }
+
+
+def _empty_question(correct_answer: str) -> dict:
+    return {
+        'correct_answer': correct_answer,
+        'correct': 0,
+        'choices': dict.fromkeys(CHOICE_KEYS, 0),
+        'correct_by_group': [0] * SCORE_GROUPS
+    }
+
+
+def _question(analysis: dict, question_id: str, correct_answer: str) -> dict:
+    question = analysis['questions'].get(question_id)
+    if question is None:
+        question = analysis['questions'][question_id] = _empty_question(correct_answer)
+        analysis['question_ids'].append(question_id)
+    return question
+
+
+def result_details(result: dict) -> List[dict]:
+    """Verbose details of a stored (possibly compact) result."""
+    if 'details' in result:
+        return result['details']
+    if 'packed_key' in result:
+        return unpack_details(result)
+    return []
+
+
+def add_result(analysis: dict, result: dict):
+    """Add one graded result: O(questions)."""
+    group = score_group(result['score'])
+    analysis['count'] += 1
+    analysis['groups'][group] += 1
+    for detail in result_details(result):
+        question = _question(analysis, detail['question_id'], detail['correct_answer'])
+        question['correct_answer'] = detail['correct_answer']
+        question['choices'][choice_key(detail['student_answer'])] += 1
+        if detail['is_correct']:
+            question['correct'] += 1
+            question['correct_by_group'][group] += 1
+
+
+def _group_correct(groups: List[int], correct_by_group: List[int], size: float, bands) -> float:
+    """Correct answers among the `size` students of the given bands, in order."""
+    remaining = size
+    correct = 0.0
+    for band in bands:
+        if remaining <= 0:
+            break
+        if not groups[band]:
+            continue
+        taken = min(groups[band], remaining)
+        correct += correct_by_group[band] * taken / groups[band]
+        remaining -= taken
+    return correct
+
+
+def summarize(analysis: dict) -> dict:
+    """Convert item tallies to the API shape."""
+    count = analysis['count']
+    groups = analysis['groups']
+    group_size = count * GROUP_FRACTION
+    questions = []
+    for question_id in analysis['question_ids']:
+        question = analysis['questions'][question_id]
+        difficulty = discrimination = None
+        if count:
+            difficulty = round(question['correct'] / count, 4)
+        if group_size > 0:
+            by_group = question['correct_by_group']
+            upper = _group_correct(groups, by_group, group_size, range(SCORE_GROUPS - 1, -1, -1))
+            lower = _group_correct(groups, by_group, group_size, range(SCORE_GROUPS))
+            discrimination = round((upper - lower) / group_size, 4)
+        questions.append({
+            'question_id': question_id,
+            'correct_answer': question['correct_answer'],
+            'difficulty': difficulty,
+            'discrimination': discrimination,
+            'choices': dict(question['choices'])
+        })
+    return {'exam_id': analysis['exam_id'], 'count': count, 'questions': questions}
+
+
+def _answer_rows(results: Iterable[dict]) -> Dict[Tuple[str, ...], dict]:
+    """Group results by question list as (answers, correct, bands) rows."""
+    blocks: Dict[Tuple[str, ...], dict] = {}
+    for result in results:
+        details = result_details(result)
+        question_ids = tuple(detail['question_id'] for detail in details)
+        block = blocks.get(question_ids)
+        if block is None:
+            block = blocks[question_ids] = {'answers': [], 'correct': [], 'groups': []}
+        # The latest key wins, as in add_result
+        block['key'] = [detail['correct_answer'] for detail in details]
+        block['answers'].append(''.join(_answer_char(detail['student_answer']) for detail in details))
+        block['correct'].append([detail['is_correct'] for detail in details])
+        block['groups'].append(score_group(result['score']))
+    return blocks
+
+
+def build_analysis(exam_id: str, results: Iterable[dict]) -> dict:
+    """Compute the item tallies of an exam from all its results.
+
+    With NumPy the results are turned into (students x questions) answer
+    and correctness matrices and every tally is a column reduction.
+    """
+    if np is None:
+        analysis = empty_analysis(exam_id)
+        for result in results:
+            add_result(analysis, result)
+        return analysis
+
+    analysis = empty_analysis(exam_id)
+    for question_ids, block in _answer_rows(results).items():
+        students = len(block['groups'])
+        groups = np.asarray(block['groups'], dtype=np.intp)
+        analysis['count'] += students
+        group_counts = np.bincount(groups, minlength=SCORE_GROUPS)
+        analysis['groups'] = [a + int(b) for a, b in zip(analysis['groups'], group_counts)]
+        if not question_ids:
+            continue
+
+        answers = np.frombuffer(''.join(block['answers']).encode('ascii'), dtype=np.uint8)
+        answers = answers.reshape(students, len(question_ids))
+        correct = np.asarray(block['correct'], dtype=bool)
+        # (bands x students) one-hot times (students x questions)
+        band_matrix = np.zeros((SCORE_GROUPS, students), dtype=np.int64)
+        band_matrix[groups, np.arange(students)] = 1
+        correct_by_group = band_matrix @ correct.astype(np.int64)
+        correct_counts = correct.sum(axis=0)
+        choice_counts = {
+            choice: (answers == ord(_answer_char(choice))).sum(axis=0)
+            for choice in CHOICE_KEYS
+        }
+
+        for position, (question_id, correct_answer) in enumerate(zip(question_ids, block['key'])):
+            question = _question(analysis, question_id, correct_answer)
+            question['correct_answer'] = correct_answer
+            question['correct'] += int(correct_counts[position])
+            for choice in CHOICE_KEYS:
+                question['choices'][choice] += int(choice_counts[choice][position])
+            question['correct_by_group'] = [
+                a + int(b) for a, b in zip(question['correct_by_group'], correct_by_group[:, position])
+            ]
+    return analysis
+
+
+class ItemAnalysisStore:
+    """Item analysis of all exams, one JSON file per exam."""
+
+    def __init__(self, directory: str):
+        """Initialize item analysis store.
+
+        Args:
+            directory: Directory holding the per-exam files
+        """
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    def _path(self, exam_id: str) -> Path:
+        return self.directory / f'{exam_id}.json'
+
+    def _read(self, exam_id: str) -> Optional[dict]:
+        try:
+            with open(self._path(exam_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception:
+            return None
+
+    def _write(self, analysis: dict) -> bool:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            atomic_write_json(self._path(analysis['exam_id']), analysis)
+            return True
+        except Exception:
+            return False
+
+    def needs_rebuild(self, exam_id: str) -> bool:
+        """True if the exam has no tallies yet or they are stale."""
+        analysis = self._read(exam_id)
+        return analysis is None or analysis.get('stale', False)
+
+    def record(self, result: dict, previous: Optional[dict] = None) -> bool:
+        """Add a graded result to its exam's tallies.
+
+        Signature matches GradingEngine result listeners. Exams without
+        tallies are skipped (they are built from all results on first
+        read); a replaced result marks its exam(s) stale.
+        """
+        exam_ids = [result['exam_id']]
+        if previous is not None and previous.get('exam_id') not in exam_ids:
+            exam_ids.append(previous['exam_id'])
+        with self._lock:
+            ok = True
+            for exam_id in exam_ids:
+                if not self._path(exam_id).exists():
+                    continue
+                with file_lock(lock_path(self._path(exam_id))):
+                    analysis = self._read(exam_id)
+                    if analysis is None or analysis.get('stale'):
+                        continue
+                    if previous is not None:
+                        analysis['stale'] = True
+                    else:
+                        add_result(analysis, result)
+                    ok = self._write(analysis) and ok
+            return ok
+
+    def get(self, exam_id: str) -> Optional[dict]:
+        """Return the item analysis summary of one exam (None if not built)."""
+        analysis = self._read(exam_id)
+        return summarize(analysis) if analysis is not None else None
+
+    def rebuild_exam(self, exam_id: str, results: Iterable[dict]) -> bool:
+        """Recompute one exam's tallies from its stored results."""
+        with self._lock, file_lock(lock_path(self._path(exam_id))):
+            return self._write(build_analysis(exam_id, results))
+
+
+def open_item_analysis(base_path: str) -> ItemAnalysisStore:
+    """Open the item analysis store of a storage base_path."""
+    return ItemAnalysisStore(Path(base_path) / ITEM_ANALYSIS_DIR)
@@ -0,0 +1,299 @@
+"""Durable queue of submissions waiting to be graded.
+
+Jobs live in their own SQLite database (queue.db inside a storage
+base_path, WAL mode), independent of the storage backend, so a submission
+is safe on disk as soon as it is enqueued. Several threads and processes
+can drain one queue: a job is claimed by moving it from 'queued' to
+'running' inside an IMMEDIATE transaction, so each job is handed out
+once. A job left 'running' by a crashed worker is handed out again once
+its lease expires.
+"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+
+QUEUE_DB_NAME = 'queue.db'
+
+# Job states
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Seconds a claimed job may stay 'running' before it is handed out again
+DEFAULT_LEASE_SECONDS = 300
+
+# Finished jobs used for the wait time / latency metrics
+METRICS_WINDOW = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    ticket TEXT UNIQUE NOT NULL,
+    exam_id TEXT,
+    student_id TEXT,
+    submission TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    result_id TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, seq);
+CREATE INDEX IF NOT EXISTS idx_jobs_finished ON jobs (finished_at);
+"""
+
+JOB_FIELDS = (
+    'ticket', 'exam_id', 'student_id', 'status', 'attempts',
+    'enqueued_at', 'started_at', 'finished_at', 'result_id', 'message'
+)
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted values."""
+    if not values:
+        return None
+    rank = max(int(math.ceil(fraction * len(values))) - 1, 0)
+    return values[rank]
+
+
+def _timing_summary(values: List[float]) -> dict:
+    values = sorted(values)
+    if not values:
+        return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'max': None}
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 4),
+        'p50': round(_percentile(values, 0.5), 4),
+        'p95': round(_percentile(values, 0.95), 4),
+        'max': round(values[-1], 4)
+    }
+
+
+class JobQueue:
+    """SQLite-backed queue of grading jobs, identified by ticket."""
+
+    def __init__(self, db_path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """Initialize job queue.
+
+        Args:
+            db_path: Path of the queue database (created if missing)
+            lease_seconds: Seconds before an unfinished claimed job is
+                handed out again
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # Wakes local workers as soon as a job is enqueued
+        self._available = threading.Condition()
+
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                str(self.db_path),
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close all database connections."""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+    def enqueue(self, submission: dict) -> Optional[str]:
+        """Durably add a submission to the queue.
+
+        Returns:
+            Ticket of the job, or None if it could not be written
+        """
+        ticket = f"T{uuid.uuid4().hex[:12].upper()}"
+        try:
+            self._connection().execute(
+                'INSERT INTO jobs (ticket, exam_id, student_id, submission, status, enqueued_at) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (ticket, submission.get('exam_id'), submission.get('student_id'),
+                 json.dumps(submission, ensure_ascii=False), QUEUED, time.time())
+            )
+        except Exception:
+            return None
+        with self._available:
+            self._available.notify()
+        return ticket
+
+    def wait_for_jobs(self, timeout: float):
+        """Block until a job is enqueued in this process or timeout expires."""
+        with self._available:
+            self._available.wait(timeout)
+
+    def wake_all(self):
+        """Wake every thread blocked in wait_for_jobs."""
+        with self._available:
+            self._available.notify_all()
+
+    def claim(self, limit: int = 1) -> List[dict]:
+        """Claim up to limit jobs, oldest first.
+
+        Jobs whose lease expired are claimed again before new ones.
+
+        Returns:
+            List of job dicts, each with its 'submission' dict
+        """
+        conn = self._connection()
+        now = time.time()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            rows = conn.execute(
+                'SELECT ticket, submission FROM jobs WHERE status = ? AND started_at < ? '
+                'ORDER BY seq LIMIT ?',
+                (RUNNING, now - self.lease_seconds, limit)
+            ).fetchall()
+            if len(rows) < limit:
+                rows += conn.execute(
+                    'SELECT ticket, submission FROM jobs WHERE status = ? ORDER BY seq LIMIT ?',
+                    (QUEUED, limit - len(rows))
+                ).fetchall()
+            conn.executemany(
+                'UPDATE jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE ticket = ?',
+                [(RUNNING, now, ticket) for ticket, _ in rows]
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            return []
+        return [{'ticket': ticket, 'submission': json.loads(data)} for ticket, data in rows]
+
+    def mark_started(self, ticket: str) -> bool:
+        """Stamp the time grading of a claimed job actually starts.
+
+        claim() hands out a batch at once; stamping each job when it is
+        picked up keeps the batch's waiting time in the wait time metric
+        instead of the latency, and renews the job's lease.
+        """
+        try:
+            cursor = self._connection().execute(
+                'UPDATE jobs SET started_at = ? WHERE ticket = ? AND status = ?',
+                (time.time(), ticket, RUNNING)
+            )
+            return cursor.rowcount > 0
+        except Exception:
+            return False
+
+    def _finish(self, ticket: str, status: str, result_id: Optional[str], message: str) -> bool:
+        try:
+            cursor = self._connection().execute(
+                'UPDATE jobs SET status = ?, finished_at = ?, result_id = ?, message = ? '
+                'WHERE ticket = ? AND status = ?',
+                (status, time.time(), result_id, message, ticket, RUNNING)
+            )
+            return cursor.rowcount > 0
+        except Exception:
+            return False
+
+    def complete(self, ticket: str, result_id: str, message: str = '') -> bool:
+        """Mark a claimed job as graded."""
+        return self._finish(ticket, DONE, result_id, message)
+
+    def fail(self, ticket: str, message: str) -> bool:
+        """Mark a claimed job as failed (it is not retried)."""
+        return self._finish(ticket, FAILED, None, message)
+
+    def get(self, ticket: str) -> Optional[dict]:
+        """Return the state of a job (without its submission) or None."""
+        try:
+            row = self._connection().execute(
+                f"SELECT {', '.join(JOB_FIELDS)} FROM jobs WHERE ticket = ?", (ticket,)
+            ).fetchone()
+        except Exception:
+            return None
+        return dict(zip(JOB_FIELDS, row)) if row else None
+
+    def depth(self) -> int:
+        """Number of jobs waiting to be claimed."""
+        try:
+            return self._connection().execute(
+                'SELECT COUNT(*) FROM jobs WHERE status = ?', (QUEUED,)
+            ).fetchone()[0]
+        except Exception:
+            return 0
+
+    def metrics(self, window: int = METRICS_WINDOW) -> dict:
+        """Queue depth, wait time and grading latency.
+
+        Wait time is enqueue to start, latency is start to finish, both in
+        seconds over the last `window` finished jobs. Computed from the
+        database, so they cover every process draining the queue.
+        """
+        conn = self._connection()
+        now = time.time()
+        try:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall())
+            oldest = conn.execute(
+                'SELECT MIN(enqueued_at) FROM jobs WHERE status = ?', (QUEUED,)
+            ).fetchone()[0]
+            rows = conn.execute(
+                'SELECT enqueued_at, started_at, finished_at FROM jobs '
+                'WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?',
+                (window,)
+            ).fetchall()
+        except Exception:
+            counts, oldest, rows = {}, None, []
+        return {
+            'depth': counts.get(QUEUED, 0),
+            'running': counts.get(RUNNING, 0),
+            'done': counts.get(DONE, 0),
+            'failed': counts.get(FAILED, 0),
+            'oldest_wait': round(now - oldest, 4) if oldest is not None else None,
+            'wait_time': _timing_summary([started - enqueued for enqueued, started, _ in rows]),
+            'latency': _timing_summary([finished - started for _, started, finished in rows])
+        }
+
+    def purge(self, max_age: float) -> int:
+        """Delete finished jobs older than max_age seconds.
+
+        Returns:
+            Number of jobs deleted
+        """
+        try:
+            cursor = self._connection().execute(
+                'DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?',
+                (DONE, FAILED, time.time() - max_age)
+            )
+            return cursor.rowcount
+        except Exception:
+            return 0
+
+
+def open_job_queue(base_path: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> JobQueue:
+    """Open the grading queue of a storage base_path."""
+    return JobQueue(Path(base_path) / QUEUE_DB_NAME, lease_seconds=lease_seconds)
@@ -0,0 +1,45 @@
+"""Opaque cursors for paginated listings."""
+
+import base64
+import json
+from itertools import islice
+from typing import Iterable, List, Optional, Tuple
+
+
+def encode_cursor(last_id: str) -> str:
+    """Encode the id of the last returned record as an opaque cursor."""
+    payload = json.dumps({'after': last_id}, ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[str]:
+    """Return the id a cursor points after (None for the first page).
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        after = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))['after']
+    except Exception:
+        raise ValueError(f"Invalid cursor: {cursor}")
+    if not isinstance(after, str):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return after
+
+
+def take_page(records: Iterable[dict], limit: int, id_field: str) -> Tuple[List[dict], Optional[str]]:
+    """Take up to limit records from an id-ordered iterator.
+
+    Returns:
+        Tuple of (records, cursor of the next page or None on the last page)
+    """
+    if limit < 1:
+        raise ValueError("limit must be at least 1")
+    page = list(islice(records, limit + 1))
+    if len(page) <= limit:
+        return page, None
+    page = page[:limit]
+    return page, encode_cursor(page[-1][id_field])
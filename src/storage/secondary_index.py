@@ -0,0 +1,163 @@
+"""Persistent secondary indexes (field value -> record ids).
+
+Each indexed value gets its own small append-only file::
+
+    <base>/indexes/<entity>/<field>/<quoted value>.idx
+
+containing ``+<record_id>`` and ``-<record_id>`` lines. Adding or
+removing an id is a single append, so index maintenance stays O(1) per
+save/delete; reading folds the lines into the current set of ids.
+
+Appends and rebuilds hold the same lock file (shared by every index of
+one entity), so a rebuild that scanned the records cannot overwrite an
+id appended by another process in the meantime. Rebuilt files are
+written to a temporary file and renamed into place.
+"""
+
+import hashlib
+import os
+import threading
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
+from urllib.parse import quote
+
+from src.storage.file_lock import file_lock
+
+
+INDEX_SUFFIX = '.idx'
+MAX_NAME_LENGTH = 150
+
+
+def _value_file_name(value: str) -> str:
+    """Turn an indexed value into a safe file name."""
+    name = quote(str(value), safe='')
+    if len(name) > MAX_NAME_LENGTH:
+        digest = hashlib.sha1(name.encode('utf-8')).hexdigest()
+        name = f'{name[:MAX_NAME_LENGTH - 41]}~{digest}'
+    return name + INDEX_SUFFIX
+
+
+class SecondaryIndex:
+    """Maps values of one record field to the ids of records holding them."""
+
+    def __init__(self, directory: str, lock_path: Optional[Union[str, Path]] = None):
+        """Initialize index.
+
+        Args:
+            directory: Directory holding one index file per value
+            lock_path: Lock file held by appends and rebuilds (None
+                disables locking)
+        """
+        self.directory = Path(directory)
+        self.lock_path = Path(lock_path) if lock_path is not None else None
+
+    def _path(self, value: str) -> Path:
+        return self.directory / _value_file_name(value)
+
+    def lock(self):
+        """Context manager holding the index lock."""
+        if self.lock_path is None:
+            return nullcontext()
+        return file_lock(self.lock_path)
+
+    def _append(self, value: str, line: str) -> bool:
+        try:
+            with self.lock():
+                self.directory.mkdir(parents=True, exist_ok=True)
+                with open(self._path(value), 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+            return True
+        except Exception:
+            return False
+
+    def add(self, value: str, record_id: str) -> bool:
+        """Record that a record holds a value."""
+        if not value:
+            return True
+        return self._append(value, f'+{record_id}')
+
+    def remove(self, value: str, record_id: str) -> bool:
+        """Record that a record no longer holds a value."""
+        if not value:
+            return True
+        return self._append(value, f'-{record_id}')
+
+    def _read_ids(self, file_path: Path) -> List[str]:
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            return []
+        except Exception:
+            return []
+
+        ids: Dict[str, None] = {}
+        for line in lines:
+            if line.startswith('+'):
+                ids[line[1:]] = None
+            elif line.startswith('-'):
+                ids.pop(line[1:], None)
+        return list(ids)
+
+    def lookup(self, value: str) -> List[str]:
+        """Return the ids of records holding a value, in insertion order."""
+        if not value:
+            return []
+        return self._read_ids(self._path(value))
+
+    def check(self, expected: Dict[str, Set[str]]) -> Dict[str, int]:
+        """Compare the index with the ids it should contain.
+
+        Args:
+            expected: Mapping of value -> set of record ids
+
+        Returns:
+            Dictionary with counts of 'missing' and 'stale' entries
+        """
+        missing = 0
+        stale = 0
+        expected_files = set()
+        for value, ids in expected.items():
+            if not value:
+                continue
+            expected_files.add(_value_file_name(value))
+            actual = set(self.lookup(value))
+            missing += len(ids - actual)
+            stale += len(actual - ids)
+
+        if self.directory.exists():
+            for file_path in self.directory.glob(f'*{INDEX_SUFFIX}'):
+                if file_path.name not in expected_files:
+                    stale += len(self._read_ids(file_path))
+
+        return {'missing': missing, 'stale': stale}
+
+    def rebuild(self, entries: Dict[str, Iterable[str]]) -> bool:
+        """Replace the index content with compacted files.
+
+        Args:
+            entries: Mapping of value -> record ids
+
+        Returns:
+            True if successful
+        """
+        try:
+            with self.lock():
+                self.directory.mkdir(parents=True, exist_ok=True)
+                written = set()
+                for value, ids in entries.items():
+                    if not value:
+                        continue
+                    file_path = self._path(value)
+                    temp_path = file_path.with_name(f'.{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        f.writelines(f'+{record_id}\n' for record_id in ids)
+                    os.replace(temp_path, file_path)
+                    written.add(file_path.name)
+                for file_path in self.directory.glob(f'*{INDEX_SUFFIX}'):
+                    if file_path.name not in written:
+                        file_path.unlink()
+            return True
+        except Exception:
+            return False
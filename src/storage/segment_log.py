@@ -0,0 +1,408 @@
+"""Append-only segment log for high-volume records.
+
+Records are stored as JSON lines in rotating segment files::
+
+    <json-encoded record id>\\t<json-encoded record>\\n
+
+A deleted record is written as a tombstone whose payload is ``null``.
+The newest line for an id wins, so updating a record is just another
+append. An in-memory index maps each id to the segment, byte offset and
+length of its latest payload; it is rebuilt by scanning the segments on
+startup, which only has to decode the short id prefix of each line.
+Appends hold an inter-process lock on the log directory, so processes
+sharing a log never interleave writes or compute wrong offsets, and
+always go to the newest segment. Before a read, the index catches up
+with lines other processes appended to that segment (or to segments
+started after it), so a newer version written elsewhere is never
+shadowed by a stale offset.
+
+Superseded versions and tombstones are only dropped by compact(), which
+copies the live records into new segments (numbered after the existing
+ones) under the append lock and then deletes the old segments. Segment
+numbers are never reused; a process that finds its newest scanned
+segment gone rescans the log from scratch.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.storage.file_lock import file_lock, LOCK_SUFFIX
+
+
+SEGMENT_SUFFIX = '.jsonl'
+DEFAULT_MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+TOMBSTONE = b'null'
+
+
+class SegmentLog:
+    """Append-only key/value log split across rotating segment files."""
+
+    def __init__(self, directory: str, max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES):
+        """Open (or create) a segment log and rebuild its offset index.
+
+        Args:
+            directory: Directory holding the segment files
+            max_segment_bytes: Size after which a new segment is started
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+
+        # record_id -> (segment_no, payload_offset, payload_length)
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        # segment_no -> number of bytes already scanned into the index
+        self._scanned: Dict[int, int] = {}
+        self._torn_segments = set()
+        self._readers: Dict[int, object] = {}
+        self._writer = None
+        self._writer_segment: Optional[int] = None
+        self._writer_size = 0
+        self._lock = threading.RLock()
+
+        self._refresh()
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+
+    def _segment_path(self, segment_no: int) -> Path:
+        return self.directory / f'{segment_no:08d}{SEGMENT_SUFFIX}'
+
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for file_path in self.directory.glob(f'*{SEGMENT_SUFFIX}'):
+            try:
+                numbers.append(int(file_path.stem))
+            except ValueError:
+                continue
+        return sorted(numbers)
+
+    def _refresh(self):
+        """Scan bytes appended since the last scan (by any process)."""
+        with self._lock:
+            for segment_no in self._segment_numbers():
+                self._scan_segment(segment_no)
+
+    def _catch_up(self):
+        """Scan what other processes appended since the last scan.
+
+        Appends only go to the newest segment, so this costs one stat of
+        the newest scanned segment and one of the segment after it.
+        """
+        with self._lock:
+            segment_no = max(self._scanned, default=0)
+            if segment_no and not self._segment_path(segment_no).exists():
+                # Compacted by another process: every offset is stale
+                self._reset()
+                self._refresh()
+                return
+            if segment_no:
+                self._scan_segment(segment_no)
+            while self._segment_path(segment_no + 1).exists():
+                segment_no += 1
+                self._scan_segment(segment_no)
+
+    def _reset(self):
+        """Forget the index and close handles (the segments were replaced)."""
+        self._index = {}
+        self._scanned = {}
+        self._torn_segments = set()
+        for reader in self._readers.values():
+            reader.close()
+        self._readers = {}
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def _scan_segment(self, segment_no: int):
+        start = self._scanned.get(segment_no, 0)
+        file_path = self._segment_path(segment_no)
+        try:
+            if file_path.stat().st_size <= start:
+                return
+            with open(file_path, 'rb') as f:
+                f.seek(start)
+                offset = start
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        # Torn write at the tail (crash or a writer in flight)
+                        self._torn_segments.add(segment_no)
+                        break
+                    self._index_line(segment_no, offset, line)
+                    offset += len(line)
+                else:
+                    self._torn_segments.discard(segment_no)
+                self._scanned[segment_no] = offset
+        except OSError:
+            return
+
+    def _index_line(self, segment_no: int, offset: int, line: bytes):
+        key_part, sep, payload = line.partition(b'\t')
+        if not sep:
+            return
+        try:
+            record_id = json.loads(key_part)
+        except ValueError:
+            return
+        payload = payload[:-1]
+        if payload == TOMBSTONE:
+            self._index.pop(record_id, None)
+        else:
+            payload_offset = offset + len(key_part) + 1
+            self._index[record_id] = (segment_no, payload_offset, len(payload))
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def _open_writer(self, line_size: int):
+        if self._writer is not None and (
+            self._writer_size == 0
+            or self._writer_size + line_size <= self.max_segment_bytes
+        ):
+            return
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        segments = self._segment_numbers()
+        segment_no = segments[-1] if segments else 1
+        file_path = self._segment_path(segment_no)
+        size = file_path.stat().st_size if file_path.exists() else 0
+        if (
+            segment_no in self._torn_segments
+            or (size > 0 and size + line_size > self.max_segment_bytes)
+        ):
+            # Never append after a torn tail; start a fresh segment instead
+            segment_no += 1
+            file_path = self._segment_path(segment_no)
+            size = 0
+
+        self._writer = open(file_path, 'ab')
+        self._writer_segment = segment_no
+        self._writer_size = size
+
+    def _encode(self, record_id: str, record: Optional[dict]) -> Tuple[bytes, bytes]:
+        key_part = json.dumps(record_id, ensure_ascii=False).encode('utf-8')
+        if record is None:
+            payload = TOMBSTONE
+        else:
+            payload = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return key_part, payload
+
+    def append_many(self, records: List[Tuple[str, Optional[dict]]]) -> bool:
+        """Append several records with a single write and flush.
+
+        Args:
+            records: List of (record_id, record) pairs; a record of None
+                writes a tombstone
+
+        Returns:
+            True if successful
+        """
+        if not records:
+            return True
+        encoded = [self._encode(record_id, record) for record_id, record in records]
+        size = sum(len(k) + len(p) + 2 for k, p in encoded)
+        with self._lock, file_lock(self.directory / f'append{LOCK_SUFFIX}'):
+            if self._writer is not None and not self._segment_path(self._writer_segment).exists():
+                # Another process compacted the log
+                self._reset()
+                self._refresh()
+            if self._writer is not None and self._segment_path(self._writer_segment + 1).exists():
+                # Another process started a newer segment: append there
+                self._writer.close()
+                self._writer = None
+            self._open_writer(size)
+            # Catch up with lines other processes appended to this segment
+            self._scan_segment(self._writer_segment)
+            self._writer_size = max(self._writer_size, self._scanned.get(self._writer_segment, 0))
+
+            offset = self._writer_size
+            chunks = []
+            for key_part, payload in encoded:
+                line = key_part + b'\t' + payload + b'\n'
+                chunks.append(line)
+            self._writer.write(b''.join(chunks))
+            self._writer.flush()
+
+            for line in chunks:
+                self._index_line(self._writer_segment, offset, line)
+                offset += len(line)
+            self._writer_size = offset
+            self._scanned[self._writer_segment] = offset
+            return True
+
+    def append(self, record_id: str, record: dict) -> bool:
+        """Append a record, replacing any earlier version with the same id."""
+        return self.append_many([(record_id, record)])
+
+    def delete(self, record_id: str) -> bool:
+        """Write a tombstone for a record.
+
+        Returns:
+            True if the record existed
+        """
+        with self._lock:
+            if not self.contains(record_id):
+                return False
+            return self.append_many([(record_id, None)])
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def contains(self, record_id: str) -> bool:
+        with self._lock:
+            if record_id not in self._index:
+                self._refresh()
+            return record_id in self._index
+
+    def _read_raw(self, location: Tuple[int, int, int]) -> bytes:
+        segment_no, offset, length = location
+        reader = self._readers.get(segment_no)
+        if reader is None:
+            reader = open(self._segment_path(segment_no), 'rb')
+            self._readers[segment_no] = reader
+        reader.seek(offset)
+        return reader.read(length)
+
+    def _read_payload(self, location: Tuple[int, int, int]) -> Optional[dict]:
+        return json.loads(self._read_raw(location).decode('utf-8'))
+
+    def read(self, record_id: str) -> Optional[dict]:
+        """Read the latest version of a record with one seek and read.
+
+        Returns:
+            Record dictionary or None if not found
+        """
+        with self._lock:
+            self._catch_up()
+            location = self._index.get(record_id)
+            if location is None:
+                self._refresh()
+                location = self._index.get(record_id)
+                if location is None:
+                    return None
+            return self._read_payload(location)
+
+    def keys(self) -> List[str]:
+        """Return the ids of all live records."""
+        with self._lock:
+            self._refresh()
+            return list(self._index.keys())
+
+    def iter_records(self) -> Iterator[dict]:
+        """Yield all live records in on-disk order."""
+        with self._lock:
+            self._refresh()
+            locations = sorted((location, record_id) for record_id, location in self._index.items())
+        for location, record_id in locations:
+            with self._lock:
+                try:
+                    record = self._read_payload(location)
+                except OSError:
+                    # Segment removed by a compaction since the listing
+                    record = self.read(record_id)
+                except ValueError:
+                    continue
+            if record is not None:
+                yield record
+
+    def compact(self) -> Dict[str, int]:
+        """Rewrite the live records into new segments and delete the old ones.
+
+        Runs under the append lock, so no process appends meanwhile.
+        Readers in other processes notice the removed segments and rescan.
+
+        Returns:
+            Dictionary with 'records', 'segments_removed', 'bytes_before'
+            and 'bytes_after'
+        """
+        with self._lock, file_lock(self.directory / f'append{LOCK_SUFFIX}'):
+            self._catch_up()
+            self._refresh()
+            old_segments = self._segment_numbers()
+            bytes_before = sum(self._segment_path(n).stat().st_size for n in old_segments)
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+            locations = sorted((location, record_id) for record_id, location in self._index.items())
+            index: Dict[str, Tuple[int, int, int]] = {}
+            sizes: Dict[int, int] = {}
+            segment_no = (old_segments[-1] if old_segments else 0) + 1
+            out = None
+            size = 0
+            try:
+                # Always write at least one segment, so numbers are never reused
+                for position in range(max(len(locations), 1)):
+                    line = b''
+                    if locations:
+                        location, record_id = locations[position]
+                        key_part = json.dumps(record_id, ensure_ascii=False).encode('utf-8')
+                        payload = self._read_raw(location)
+                        line = key_part + b'\t' + payload + b'\n'
+                    if out is not None and size and size + len(line) > self.max_segment_bytes:
+                        self._finish_compacted(out, segment_no)
+                        sizes[segment_no] = size
+                        segment_no += 1
+                        out = None
+                    if out is None:
+                        out = open(self._compact_temp_path(segment_no), 'wb')
+                        size = 0
+                    if line:
+                        index[record_id] = (segment_no, size + len(key_part) + 1, len(payload))
+                        out.write(line)
+                        size += len(line)
+                self._finish_compacted(out, segment_no)
+                sizes[segment_no] = size
+            except BaseException:
+                if out is not None:
+                    out.close()
+                    self._compact_temp_path(segment_no).unlink(missing_ok=True)
+                raise
+
+            for reader in self._readers.values():
+                reader.close()
+            self._readers = {}
+            for old_no in old_segments:
+                self._segment_path(old_no).unlink(missing_ok=True)
+            self._index = index
+            self._scanned = sizes
+            self._torn_segments = set()
+            return {
+                'records': len(index),
+                'segments_removed': len(old_segments),
+                'bytes_before': bytes_before,
+                'bytes_after': sum(sizes.values())
+            }
+
+    def _compact_temp_path(self, segment_no: int) -> Path:
+        return self.directory / f'.{segment_no:08d}.{os.getpid()}.compact.tmp'
+
+    def _finish_compacted(self, out, segment_no: int):
+        """Flush a compacted segment to disk and move it into place."""
+        out.flush()
+        os.fsync(out.fileno())
+        out.close()
+        os.replace(self._compact_temp_path(segment_no), self._segment_path(segment_no))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._index)
+
+    def close(self):
+        """Close the writer and all cached reader handles."""
+        with self._lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            for reader in self._readers.values():
+                reader.close()
+            self._readers = {}
+
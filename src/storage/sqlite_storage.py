@@ -0,0 +1,437 @@
+"""SQLite storage manager (stdlib sqlite3, WAL mode)."""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from src.storage.base_storage import BaseStorageManager, check_result_order
+from src.storage.exam_catalog import exam_summary, SUMMARY_FIELDS
+
+
+DEFAULT_DB_NAME = 'grading.db'
+
+# Rows fetched per round trip by iter_results
+ITER_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exams (
+    exam_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    title TEXT,
+    created_by TEXT,
+    created_at TEXT,
+    question_count INTEGER,
+    content_hash TEXT
+);
+CREATE TABLE IF NOT EXISTS submissions (
+    submission_id TEXT PRIMARY KEY,
+    exam_id TEXT,
+    student_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_exam ON submissions (exam_id);
+CREATE INDEX IF NOT EXISTS idx_submissions_student ON submissions (student_id);
+CREATE TABLE IF NOT EXISTS results (
+    result_id TEXT PRIMARY KEY,
+    exam_id TEXT,
+    student_id TEXT,
+    graded_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_exam ON results (exam_id);
+CREATE INDEX IF NOT EXISTS idx_results_student ON results (student_id);
+CREATE INDEX IF NOT EXISTS idx_results_graded_at ON results (graded_at);
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    role TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_role ON users (role);
+"""
+
+
+def _dumps(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False)
+
+
+class SQLiteStorageManager(BaseStorageManager):
+    """Stores all entities in a single SQLite database.
+
+    Exposes the same save_*/load_*/list_*/delete_* methods as
+    FileStorageManager, so the two are interchangeable. Import/export
+    helpers come from BaseStorageManager.
+    """
+
+    def __init__(self, base_path: str = "data", db_name: str = DEFAULT_DB_NAME):
+        """Initialize storage manager.
+
+        Args:
+            base_path: Base directory for data storage
+            db_name: Database file name inside base_path
+        """
+        self.base_path = Path(base_path)
+        self.base_path.mkdir(parents=True, exist_ok=True)
+        self.storage_mode = 'sqlite'
+        self.db_path = self.base_path / db_name
+
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+
+        self._connection().executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Add exam summary columns to databases created before they existed."""
+        conn = self._connection()
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(exams)')}
+        added = False
+        for column in SUMMARY_FIELDS[1:]:
+            if column not in columns:
+                column_type = 'INTEGER' if column == 'question_count' else 'TEXT'
+                conn.execute(f'ALTER TABLE exams ADD COLUMN {column} {column_type}')
+                added = True
+        if added:
+            self.rebuild_exam_catalog()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(
+                str(self.db_path),
+                timeout=30,
+                isolation_level=None,
+                check_same_thread=False
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Close all database connections."""
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._connections = []
+        self._local = threading.local()
+
+    def _execute(self, sql: str, params: tuple = ()) -> bool:
+        try:
+            self._connection().execute(sql, params)
+            return True
+        except Exception:
+            return False
+
+    def _fetch_one(self, sql: str, params: tuple) -> Optional[dict]:
+        try:
+            row = self._connection().execute(sql, params).fetchone()
+        except Exception:
+            return None
+        return json.loads(row[0]) if row else None
+
+    def _fetch_all(self, sql: str, params: tuple = ()) -> List[dict]:
+        try:
+            rows = self._connection().execute(sql, params).fetchall()
+        except Exception:
+            return []
+        return [json.loads(row[0]) for row in rows]
+
+    def _delete(self, sql: str, params: tuple) -> bool:
+        try:
+            cursor = self._connection().execute(sql, params)
+            return cursor.rowcount > 0
+        except Exception:
+            return False
+
+    @staticmethod
+    def _where(filters: Dict[str, Optional[str]]):
+        clauses = [f'{column} = ?' for column, value in filters.items() if value]
+        params = tuple(value for value in filters.values() if value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, params
+
+    # Exams
+
+    def save_exam(self, exam: dict) -> bool:
+        """Save an exam together with its catalog summary columns."""
+        try:
+            summary = exam_summary(exam)
+            return self._execute(
+                'INSERT OR REPLACE INTO exams (data, exam_id, title, created_by, created_at, '
+                'question_count, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (_dumps(exam),) + tuple(summary[field] for field in SUMMARY_FIELDS)
+            )
+        except Exception:
+            return False
+
+    def load_exam(self, exam_id: str) -> Optional[dict]:
+        """Load an exam or None if not found."""
+        return self._fetch_one('SELECT data FROM exams WHERE exam_id = ?', (exam_id,))
+
+    def list_exams(self) -> List[dict]:
+        """List all exams."""
+        return self._fetch_all('SELECT data FROM exams ORDER BY rowid')
+
+    def delete_exam(self, exam_id: str) -> bool:
+        """Delete an exam."""
+        return self._delete('DELETE FROM exams WHERE exam_id = ?', (exam_id,))
+
+    def list_exam_summaries(self) -> List[dict]:
+        """List exam summaries without reading the exam documents."""
+        try:
+            rows = self._connection().execute(
+                f"SELECT {', '.join(SUMMARY_FIELDS)} FROM exams ORDER BY rowid"
+            ).fetchall()
+        except Exception:
+            return []
+        return [dict(zip(SUMMARY_FIELDS, row)) for row in rows]
+
+    def get_exam_summary(self, exam_id: str) -> Optional[dict]:
+        """Return the summary of one exam or None if not found."""
+        try:
+            row = self._connection().execute(
+                f"SELECT {', '.join(SUMMARY_FIELDS)} FROM exams WHERE exam_id = ?", (exam_id,)
+            ).fetchone()
+        except Exception:
+            return None
+        return dict(zip(SUMMARY_FIELDS, row)) if row else None
+
+    def rebuild_exam_catalog(self) -> bool:
+        """Recompute the summary columns of every exam."""
+        conn = self._connection()
+        try:
+            rows = conn.execute('SELECT data FROM exams').fetchall()
+            updates = []
+            for (data,) in rows:
+                summary = exam_summary(json.loads(data))
+                updates.append(tuple(summary[field] for field in SUMMARY_FIELDS[1:]) + (summary['exam_id'],))
+            conn.execute('BEGIN')
+            conn.executemany(
+                'UPDATE exams SET title = ?, created_by = ?, created_at = ?, '
+                'question_count = ?, content_hash = ? WHERE exam_id = ?',
+                updates
+            )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            return False
+
+    # Submissions
+
+    def save_submission(self, submission: dict) -> bool:
+        """Save a submission."""
+        try:
+            return self._execute(
+                'INSERT OR REPLACE INTO submissions (submission_id, exam_id, student_id, data) '
+                'VALUES (?, ?, ?, ?)',
+                (submission['submission_id'], submission.get('exam_id'),
+                 submission.get('student_id'), _dumps(submission))
+            )
+        except Exception:
+            return False
+
+    def load_submission(self, submission_id: str) -> Optional[dict]:
+        """Load a submission or None if not found."""
+        return self._fetch_one(
+            'SELECT data FROM submissions WHERE submission_id = ?', (submission_id,)
+        )
+
+    def delete_submission(self, submission_id: str) -> bool:
+        """Delete a submission."""
+        return self._delete('DELETE FROM submissions WHERE submission_id = ?', (submission_id,))
+
+    def list_submissions(self, exam_id: Optional[str] = None, student_id: Optional[str] = None) -> List[dict]:
+        """List submissions, optionally filtered by exam_id or student_id."""
+        where, params = self._where({'exam_id': exam_id, 'student_id': student_id})
+        return self._fetch_all(f'SELECT data FROM submissions{where} ORDER BY rowid', params)
+
+    def list_submission_ids(self, exam_id: Optional[str] = None) -> List[str]:
+        """List submission IDs, optionally filtered by exam_id."""
+        where, params = self._where({'exam_id': exam_id})
+        try:
+            rows = self._connection().execute(
+                f'SELECT submission_id FROM submissions{where} ORDER BY rowid', params
+            ).fetchall()
+        except Exception:
+            return []
+        return [row[0] for row in rows]
+
+    # Results
+
+    def save_result(self, result: dict) -> bool:
+        """Save a result."""
+        return self.save_results([result])
+
+    def save_results(self, results: List[dict]) -> bool:
+        """Save several results in one transaction."""
+        conn = self._connection()
+        try:
+            rows = [
+                (result['result_id'], result.get('exam_id'), result.get('student_id'),
+                 result.get('graded_at'), _dumps(result))
+                for result in results
+            ]
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT OR REPLACE INTO results (result_id, exam_id, student_id, graded_at, data) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            return False
+
+    def save_submissions(self, submissions: List[dict]) -> bool:
+        """Save several submissions in one transaction."""
+        return self.save_graded_many(submissions, [])
+
+    def save_graded(self, submission: dict, result: dict) -> bool:
+        """Save a submission and its result in one transaction."""
+        return self.save_graded_many([submission], [result])
+
+    def save_graded_many(self, submissions: List[dict], results: List[dict]) -> bool:
+        """Save several submissions and their results in one transaction."""
+        conn = self._connection()
+        try:
+            submission_rows = [
+                (submission['submission_id'], submission.get('exam_id'),
+                 submission.get('student_id'), _dumps(submission))
+                for submission in submissions
+            ]
+            result_rows = [
+                (result['result_id'], result.get('exam_id'), result.get('student_id'),
+                 result.get('graded_at'), _dumps(result))
+                for result in results
+            ]
+            conn.execute('BEGIN')
+            conn.executemany(
+                'INSERT OR REPLACE INTO submissions (submission_id, exam_id, student_id, data) '
+                'VALUES (?, ?, ?, ?)',
+                submission_rows
+            )
+            conn.executemany(
+                'INSERT OR REPLACE INTO results (result_id, exam_id, student_id, graded_at, data) '
+                'VALUES (?, ?, ?, ?, ?)',
+                result_rows
+            )
+            conn.execute('COMMIT')
+            return True
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            return False
+
+    def load_result(self, result_id: str) -> Optional[dict]:
+        """Load a result or None if not found."""
+        return self._fetch_one('SELECT data FROM results WHERE result_id = ?', (result_id,))
+
+    def delete_result(self, result_id: str) -> bool:
+        """Delete a result."""
+        return self._delete('DELETE FROM results WHERE result_id = ?', (result_id,))
+
+    def list_results(self, exam_id: Optional[str] = None, student_id: Optional[str] = None) -> List[dict]:
+        """List results, optionally filtered by exam_id or student_id."""
+        where, params = self._where({'exam_id': exam_id, 'student_id': student_id})
+        return self._fetch_all(f'SELECT data FROM results{where} ORDER BY rowid', params)
+
+    def list_result_ids(self, exam_id: Optional[str] = None) -> List[str]:
+        """List result IDs, optionally filtered by exam_id."""
+        where, params = self._where({'exam_id': exam_id})
+        try:
+            rows = self._connection().execute(
+                f'SELECT result_id FROM results{where} ORDER BY rowid', params
+            ).fetchall()
+        except Exception:
+            return []
+        return [row[0] for row in rows]
+
+    def iter_results(
+        self,
+        exam_id: Optional[str] = None,
+        student_id: Optional[str] = None,
+        graded_from: Optional[str] = None,
+        graded_to: Optional[str] = None,
+        after: Optional[str] = None,
+        order_by: str = 'result_id'
+    ) -> Iterator[dict]:
+        """Yield results in the given order, fetching rows in batches."""
+        check_result_order(order_by, after)
+        where, params = self._where({'exam_id': exam_id, 'student_id': student_id})
+        clauses = [where[len(' WHERE '):]] if where else []
+        for condition, value in (('graded_at >= ?', graded_from), ('graded_at <= ?', graded_to),
+                                 ('result_id > ?', after)):
+            if value is not None and value != '':
+                clauses.append(condition)
+                params += (value,)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ''
+
+        cursor = self._connection().execute(
+            f'SELECT data FROM results{where} ORDER BY {order_by}, result_id', params
+        )
+        while True:
+            rows = cursor.fetchmany(ITER_BATCH_SIZE)
+            if not rows:
+                break
+            for (data,) in rows:
+                yield json.loads(data)
+
+    # Users
+
+    def save_user(self, user: dict) -> bool:
+        """Save a user."""
+        try:
+            return self._execute(
+                'INSERT OR REPLACE INTO users (user_id, role, data) VALUES (?, ?, ?)',
+                (user['user_id'], user.get('role'), _dumps(user))
+            )
+        except Exception:
+            return False
+
+    def load_user(self, user_id: str) -> Optional[dict]:
+        """Load a user or None if not found."""
+        return self._fetch_one('SELECT data FROM users WHERE user_id = ?', (user_id,))
+
+    def list_users(self, role: Optional[str] = None) -> List[dict]:
+        """List all users, optionally filtered by role."""
+        where, params = self._where({'role': role})
+        return self._fetch_all(f'SELECT data FROM users{where} ORDER BY rowid', params)
+
+    def delete_user(self, user_id: str) -> bool:
+        """Delete a user."""
+        return self._delete('DELETE FROM users WHERE user_id = ?', (user_id,))
+
+    # Index maintenance
+
+    def rebuild_indexes(self, entity: Optional[str] = None) -> bool:
+        """Rebuild the SQLite indexes (REINDEX)."""
+        tables = [entity] if entity else ['submissions', 'results']
+        return all(self._execute(f'REINDEX {table}') for table in tables)
+
+    def check_integrity(self) -> List[str]:
+        """Run PRAGMA integrity_check.
+
+        SQLite maintains its own indexes, so there are no index files for
+        check_indexes; this check covers the tables and their indexes.
+
+        Returns:
+            Problems reported by SQLite (empty if the database is intact)
+        """
+        try:
+            rows = self._connection().execute('PRAGMA integrity_check').fetchall()
+        except Exception as e:
+            return [str(e)]
+        return [] if rows == [('ok',)] else [row[0] for row in rows]
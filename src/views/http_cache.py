@@ -0,0 +1,129 @@
+"""Conditional GET support for JSON API responses.
+
+Responses carry a strong ETag computed from data the storage layer keeps
+up to date (e.g. an exam's content hash), so the ETag can be checked
+without reading or serializing anything. A matching If-None-Match gets a
+304; otherwise the serialized body is served from a per-process cache
+keyed by (cache key, ETag), so an unchanged exam is serialized once.
+Bodies may also be cached gzip-compressed for clients that accept it.
+"""
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional
+
+from flask import Response, current_app, request
+
+
+DEFAULT_MAX_ENTRIES = 512
+
+# Clients must revalidate on every use (a 304 costs no disk read or
+# serialization), so corrected exams are seen immediately
+DEFAULT_CACHE_CONTROL = 'no-cache'
+
+
+def combined_etag(parts: Iterable[str]) -> str:
+    """Derive one ETag value from several (e.g. one content hash per exam)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """LRU cache of serialized JSON bodies, keyed by (cache key, ETag).
+
+    Each entry holds the plain body and, once requested, its gzip form.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """Initialize ResponseCache.
+
+        Args:
+            max_entries: Maximum number of cached bodies
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, list]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, etag: str, compressed: bool = False) -> Optional[bytes]:
+        """Return the cached body (or its gzip form) if the ETag matches."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+            if not compressed:
+                return entry[1]
+            if entry[2] is None:
+                entry[2] = gzip.compress(entry[1], mtime=0)
+            return entry[2]
+
+    def put(self, key: str, etag: str, body: bytes, compressed_body: Optional[bytes] = None):
+        with self._lock:
+            self._entries[key] = [etag, body, compressed_body]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def prime(self, key: str, etag: str, payload: dict, compress: bool = False):
+        """Serialize (and compress) a payload ahead of the first request.
+
+        Must be called inside a Flask app context.
+        """
+        body = current_app.json.dumps(payload).encode('utf-8')
+        self.put(key, etag, body, gzip.compress(body, mtime=0) if compress else None)
+
+    def invalidate(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def conditional_json(
+        self,
+        key: str,
+        etag: str,
+        build_payload: Callable[[], dict],
+        cache_control: str = DEFAULT_CACHE_CONTROL,
+        compress: bool = False
+    ) -> Response:
+        """Serve a JSON payload with ETag / If-None-Match handling.
+
+        Args:
+            key: Cache key of the resource (e.g. 'exam:E001')
+            etag: Strong ETag value (unquoted) of the current content
+            build_payload: Returns the payload; only called on a cache miss
+            cache_control: Cache-Control header value
+            compress: Send the cached gzip body to clients accepting gzip
+
+        Returns:
+            304 response if the client's copy is current, else a 200 JSON
+            response
+        """
+        use_gzip = compress and 'gzip' in request.accept_encodings
+        # Each representation has its own strong ETag
+        response_etag = f'{etag}-gzip' if use_gzip else etag
+        if request.if_none_match.contains(response_etag):
+            response = Response(status=304)
+        else:
+            body = self.get(key, etag, compressed=use_gzip)
+            if body is None:
+                plain = current_app.json.dumps(build_payload()).encode('utf-8')
+                self.put(key, etag, plain)
+                body = self.get(key, etag, compressed=use_gzip)
+                if body is None:
+                    body = gzip.compress(plain, mtime=0) if use_gzip else plain
+            response = Response(body, mimetype='application/json')
+            if use_gzip:
+                response.headers['Content-Encoding'] = 'gzip'
+        if compress:
+            response.vary.add('Accept-Encoding')
+        response.set_etag(response_etag)
+        response.headers['Cache-Control'] = cache_control
+        return response
@@ -5,9 +5,10 @@ Feature: multiple-choice-grading-system, Property 2: Adding questions increases
 
 import tempfile
 import shutil
+import pytest
 from hypothesis import given, strategies as st, settings
 from src.models.exam import Exam, Question
-from src.storage.file_storage import FileStorageManager
+from src.storage import create_storage
 from src.business.exam_manager import ExamManager
 
 
@@ -26,6 +27,7 @@ def valid_question_data_strategy(draw):
     return content, choices, correct_answer
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(
     st.text(min_size=1, max_size=50),
     st.text(min_size=1, max_size=20, alphabet=st.characters(
@@ -34,7 +36,7 @@ def valid_question_data_strategy(draw):
     valid_question_data_strategy()
 )
 @settings(max_examples=100)
-def test_adding_question_increases_count(title, teacher_id, question_data):
+def test_adding_question_increases_count(backend, title, teacher_id, question_data):
     """
     Feature: multiple-choice-grading-system, Property 2: Adding questions increases count
     
@@ -48,7 +50,7 @@ def test_adding_question_increases_count(title, teacher_id, question_data):
     
     try:
         # Initialize storage and manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         manager = ExamManager(storage)
         
         # Create exam
@@ -81,6 +83,7 @@ def test_adding_question_increases_count(title, teacher_id, question_data):
         shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(
     st.text(min_size=1, max_size=50),
     st.text(min_size=1, max_size=20, alphabet=st.characters(
@@ -89,14 +92,14 @@ def test_adding_question_increases_count(title, teacher_id, question_data):
     st.lists(valid_question_data_strategy(), min_size=1, max_size=10)
 )
 @settings(max_examples=100)
-def test_adding_multiple_questions_increases_count_correctly(title, teacher_id, questions_data):
+def test_adding_multiple_questions_increases_count_correctly(backend, title, teacher_id, questions_data):
     """Test that adding multiple questions increases count correctly."""
     # Create temporary directory
     temp_dir = tempfile.mkdtemp()
     
     try:
         # Initialize storage and manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         manager = ExamManager(storage)
         
         # Create exam
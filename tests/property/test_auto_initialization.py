@@ -6,7 +6,9 @@ Feature: multiple-choice-grading-system, Property 26: Auto-initialization
 import tempfile
 import shutil
 import os
+import pytest
 from hypothesis import given, strategies as st, settings
+from src.storage import create_storage
 from src.storage.file_storage import FileStorageManager
 
 
@@ -51,18 +53,19 @@ def test_auto_initialization_creates_directories(base_dir_name):
         shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(st.text(min_size=1, max_size=20, alphabet=st.characters(
     whitelist_categories=('Lu', 'Ll', 'Nd'), min_codepoint=48, max_codepoint=122
 )))
 @settings(max_examples=100)
-def test_load_nonexistent_file_returns_none(entity_id):
+def test_load_nonexistent_file_returns_none(backend, entity_id):
     """Test that loading a non-existent file returns None gracefully."""
     # Create temporary directory
     temp_dir = tempfile.mkdtemp()
     
     try:
         # Initialize storage manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         
         # Try to load non-existent entities - should return None, not crash
         exam = storage.load_exam(entity_id)
@@ -5,11 +5,13 @@ Feature: multiple-choice-grading-system, Property 4: Deletion preserves related
 
 import tempfile
 import shutil
+import pytest
 from hypothesis import given, strategies as st, settings
-from src.storage.file_storage import FileStorageManager
+from src.storage import create_storage
 from src.business.exam_manager import ExamManager
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(
     st.text(min_size=1, max_size=50),
     st.text(min_size=1, max_size=20, alphabet=st.characters(
@@ -17,7 +19,7 @@ from src.business.exam_manager import ExamManager
     ))
 )
 @settings(max_examples=100)
-def test_deletion_preserves_related_results(title, teacher_id):
+def test_deletion_preserves_related_results(backend, title, teacher_id):
     """
     Feature: multiple-choice-grading-system, Property 4: Deletion preserves related results
     
@@ -31,7 +33,7 @@ def test_deletion_preserves_related_results(title, teacher_id):
     
     try:
         # Initialize storage and manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         manager = ExamManager(storage)
         
         # Create exam
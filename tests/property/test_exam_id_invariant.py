@@ -5,11 +5,13 @@ Feature: multiple-choice-grading-system, Property 3: Exam ID invariant on update
 
 import tempfile
 import shutil
+import pytest
 from hypothesis import given, strategies as st, settings
-from src.storage.file_storage import FileStorageManager
+from src.storage import create_storage
 from src.business.exam_manager import ExamManager
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(
     st.text(min_size=1, max_size=50),
     st.text(min_size=1, max_size=20, alphabet=st.characters(
@@ -18,7 +20,7 @@ from src.business.exam_manager import ExamManager
     st.text(min_size=1, max_size=50)  # New title for update
 )
 @settings(max_examples=100)
-def test_exam_id_invariant_on_update(original_title, teacher_id, new_title):
+def test_exam_id_invariant_on_update(backend, original_title, teacher_id, new_title):
     """
     Feature: multiple-choice-grading-system, Property 3: Exam ID invariant on update
     
@@ -32,7 +34,7 @@ def test_exam_id_invariant_on_update(original_title, teacher_id, new_title):
     
     try:
         # Initialize storage and manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         manager = ExamManager(storage)
         
         # Create exam
@@ -68,6 +70,7 @@ def test_exam_id_invariant_on_update(original_title, teacher_id, new_title):
         shutil.rmtree(temp_dir, ignore_errors=True)
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(
     st.text(min_size=1, max_size=50),
     st.text(min_size=1, max_size=20, alphabet=st.characters(
@@ -76,14 +79,14 @@ def test_exam_id_invariant_on_update(original_title, teacher_id, new_title):
     st.lists(st.text(min_size=1, max_size=50), min_size=1, max_size=5)
 )
 @settings(max_examples=100)
-def test_exam_id_invariant_on_multiple_updates(title, teacher_id, new_titles):
+def test_exam_id_invariant_on_multiple_updates(backend, title, teacher_id, new_titles):
     """Test that exam ID remains unchanged after multiple updates."""
     # Create temporary directory
     temp_dir = tempfile.mkdtemp()
     
     try:
         # Initialize storage and manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         manager = ExamManager(storage)
         
         # Create exam
@@ -5,9 +5,10 @@ Feature: multiple-choice-grading-system, Property 1: Exam persistence round-trip
 
 import tempfile
 import shutil
+import pytest
 from hypothesis import given, strategies as st, settings
 from src.models.exam import Exam, Question
-from src.storage.file_storage import FileStorageManager
+from src.storage import create_storage
 
 
 # Strategy for generating valid questions
@@ -69,9 +70,10 @@ def exam_strategy(draw):
     )
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(exam_strategy())
 @settings(max_examples=100)
-def test_exam_persistence_round_trip(exam):
+def test_exam_persistence_round_trip(backend, exam):
     """
     Feature: multiple-choice-grading-system, Property 1: Exam persistence round-trip
     
@@ -86,7 +88,7 @@ def test_exam_persistence_round_trip(exam):
     
     try:
         # Initialize storage manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         
         # Convert exam to dict and save
         exam_dict = exam.to_dict()
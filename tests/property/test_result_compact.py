@@ -0,0 +1,65 @@
+"""Property-based tests for the compact result encoding.
+
+Feature: multiple-choice-grading-system, Property: Compact result round-trip
+"""
+
+from hypothesis import given, strategies as st, settings
+from src.models.result import Result, pack_details
+
+
+# Strategy for generating result details
+@st.composite
+def details_strategy(draw):
+    """Generate verbose details, sometimes with non-default question ids."""
+    num_questions = draw(st.integers(min_value=1, max_value=80))
+    custom_ids = draw(st.booleans())
+    details = []
+    for i in range(num_questions):
+        student_answer = draw(st.sampled_from(['', 'A', 'B', 'C', 'D', 'a', ' B', 'AB']))
+        correct_answer = draw(st.sampled_from(['A', 'B', 'C', 'D']))
+        details.append({
+            'question_id': f"C{i}" if custom_ids else f"Q{i + 1:03d}",
+            'student_answer': student_answer,
+            'correct_answer': correct_answer,
+            'is_correct': student_answer.strip().upper() == correct_answer
+        })
+    return details
+
+
+def make_result(details):
+    correct = sum(1 for d in details if d['is_correct'])
+    return Result(
+        result_id='R001',
+        submission_id='S001',
+        exam_id='E001',
+        student_id='ST001',
+        score=round(correct / len(details) * 10, 2),
+        total_questions=len(details),
+        correct_answers=correct,
+        wrong_answers=len(details) - correct,
+        details=details
+    )
+
+
+@given(details_strategy())
+@settings(max_examples=200)
+def test_compact_result_round_trip(details):
+    """
+    Feature: multiple-choice-grading-system, Property: Compact result round-trip
+    
+    For any result, converting to the compact storage form and back must
+    produce exactly the verbose dictionary; results whose answers cannot be
+    packed keep their verbose details.
+    """
+    result = make_result(details)
+    verbose = result.to_dict()
+    compact = result.to_dict(compact=True)
+    
+    assert Result.from_dict(compact).to_dict() == verbose
+    assert Result.verbose_dict(compact) == verbose
+    assert Result.from_dict(compact).correct_bits == result.correct_bits
+    if pack_details(details) is None:
+        assert compact['details'] == details
+    else:
+        assert 'details' not in compact
+        assert len(compact['packed_answers']) == len(details)
@@ -5,9 +5,10 @@ Feature: multiple-choice-grading-system, Property 9: Submission round-trip
 
 import tempfile
 import shutil
+import pytest
 from hypothesis import given, strategies as st, settings
 from src.models.submission import Submission
-from src.storage.file_storage import FileStorageManager
+from src.storage import create_storage
 
 
 # Strategy for generating valid submissions
@@ -40,9 +41,10 @@ def submission_strategy(draw):
     )
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(submission_strategy())
 @settings(max_examples=100)
-def test_submission_persistence_round_trip(submission):
+def test_submission_persistence_round_trip(backend, submission):
     """
     Feature: multiple-choice-grading-system, Property 9: Submission round-trip
     
@@ -56,7 +58,7 @@ def test_submission_persistence_round_trip(submission):
     
     try:
         # Initialize storage manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         
         # Convert submission to dict and save
         submission_dict = submission.to_dict()
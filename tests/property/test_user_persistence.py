@@ -5,9 +5,10 @@ Feature: multiple-choice-grading-system, Property 14: User persistence round-tri
 
 import tempfile
 import shutil
+import pytest
 from hypothesis import given, strategies as st, settings
 from src.models.user import User
-from src.storage.file_storage import FileStorageManager
+from src.storage import create_storage
 
 
 # Strategy for generating valid users
@@ -27,9 +28,10 @@ def user_strategy(draw):
     )
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(user_strategy())
 @settings(max_examples=100)
-def test_user_persistence_round_trip(user):
+def test_user_persistence_round_trip(backend, user):
     """
     Feature: multiple-choice-grading-system, Property 14: User persistence round-trip
     
@@ -43,7 +45,7 @@ def test_user_persistence_round_trip(user):
     
     try:
         # Initialize storage manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         
         # Convert user to dict and save
         user_dict = user.to_dict()
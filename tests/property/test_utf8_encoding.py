@@ -5,9 +5,10 @@ Feature: multiple-choice-grading-system, Property 25: UTF-8 encoding preservatio
 
 import tempfile
 import shutil
+import pytest
 from hypothesis import given, strategies as st, settings
 from src.models.exam import Exam, Question
-from src.storage.file_storage import FileStorageManager
+from src.storage import create_storage
 
 
 # Strategy for generating Vietnamese text
@@ -75,9 +76,10 @@ def exam_with_vietnamese_strategy(draw):
     )
 
 
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
 @given(exam_with_vietnamese_strategy())
 @settings(max_examples=100)
-def test_utf8_encoding_preservation(exam):
+def test_utf8_encoding_preservation(backend, exam):
     """
     Feature: multiple-choice-grading-system, Property 25: UTF-8 encoding preservation
     
@@ -91,7 +93,7 @@ def test_utf8_encoding_preservation(exam):
     
     try:
         # Initialize storage manager
-        storage = FileStorageManager(base_path=temp_dir)
+        storage = create_storage(base_path=temp_dir, backend=backend)
         
         # Convert exam to dict and save
         exam_dict = exam.to_dict()
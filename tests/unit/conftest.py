@@ -0,0 +1,31 @@
+"""Fixture dùng chung cho các unit test."""
+
+import pytest
+from src.storage import create_storage, STORAGE_BACKENDS
+from src.business.exam_manager import ExamManager
+
+
+@pytest.fixture
+def temp_dir(tmp_path):
+    """Temporary directory (as a string path), removed by pytest."""
+    return str(tmp_path)
+
+
+@pytest.fixture(params=STORAGE_BACKENDS)
+def storage(request, tmp_path):
+    """Create a temporary storage manager for each backend."""
+    storage_manager = create_storage(base_path=str(tmp_path), backend=request.param)
+    yield storage_manager
+    storage_manager.close()
+
+
+@pytest.fixture
+def exam_id(storage):
+    """Create a 4-question exam with key B, C, C, C."""
+    questions = [
+        {'content': f'Question {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': answer}
+        for i, answer in enumerate('BCCC', 1)
+    ]
+    success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001", questions=questions)
+    assert success is True
+    return exam_id
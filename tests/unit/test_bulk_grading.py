@@ -0,0 +1,127 @@
+"""Unit tests for bulk grading of answer-sheet files."""
+
+import csv
+import io
+import json
+import pytest
+from src.business.answer_key import AnswerKey
+from src.business.bulk_grading import BulkGrader, iter_sheet_rows, map_answers, sheet_format, REPORT_HEADER
+from src.business.grading_engine import GradingEngine
+
+
+def test_parse_csv_formats():
+    """Test positional, packed and question-id CSV rows."""
+    rows = list(iter_sheet_rows(['HS1,B,C,,C', 'HS2,bcca', ',A,B']))
+    assert rows[0] == {'line': 1, 'student_id': 'HS1', 'answers': ['B', 'C', '', 'C']}
+    assert rows[1]['answers'] == ['B', 'C', 'C', 'A']
+    assert rows[2] == {'line': 3, 'error': 'Thiếu mã học sinh'}
+    
+    rows = list(iter_sheet_rows(['student_id,Q002,Q001', 'HS1,c,b']))
+    assert rows == [{'line': 2, 'student_id': 'HS1', 'answers': {'Q002': 'C', 'Q001': 'B'}}]
+    
+    rows = list(iter_sheet_rows(['ma_hs,1,2', 'HS1,B,C']))
+    assert rows[0]['answers'] == ['B', 'C']
+
+
+def test_parse_jsonl():
+    """Test JSONL rows with string, list and dict answers."""
+    lines = [
+        json.dumps({'student_id': 'HS1', 'answers': 'BCCC'}),
+        json.dumps({'student_id': 'HS2', 'answers': ['b', 'c']}),
+        json.dumps({'student_id': 'HS3', 'answers': {'Q001': 'a'}}),
+        '',
+        '{not json',
+    ]
+    rows = list(iter_sheet_rows(lines, 'jsonl'))
+    assert [row.get('answers') for row in rows[:3]] == [['B', 'C', 'C', 'C'], ['B', 'C'], {'Q001': 'A'}]
+    assert rows[3] == {'line': 5, 'error': 'Dòng JSON không hợp lệ'}
+
+
+def test_map_answers():
+    """Test positional answers map to question ids and blanks are dropped."""
+    key = AnswerKey('E1', ['Q1', 'Q2', 'Q3'], ['A', 'B', 'C'])
+    assert map_answers(key, ['A', '', 'C']) == {'Q1': 'A', 'Q3': 'C'}
+    assert map_answers(key, {'Q2': 'B', 'Q3': ''}) == {'Q2': 'B'}
+    # Shifted or mistyped rows are rejected instead of truncated or padded
+    with pytest.raises(ValueError):
+        map_answers(key, ['A', '', 'C', 'D'])
+    with pytest.raises(ValueError):
+        map_answers(key, ['A', 'B'])
+    with pytest.raises(ValueError):
+        map_answers(key, {'Q2': 'B', 'Q9': 'A'})
+
+
+def test_sheet_format():
+    """Test the format is guessed from the file extension."""
+    assert sheet_format('lop10a.jsonl') == 'jsonl'
+    assert sheet_format('lop10a.CSV') == 'csv'
+    assert sheet_format('') == 'csv'
+
+
+def test_grade_sheet(storage, exam_id):
+    """Test a sheet is graded, stored and reported row by row."""
+    sheet = ['ma_hs,1,2,3,4', 'HS1,B,C,C,C', 'HS2,A,C,C,A', ',B,B,B,B', 'HS3,BCCC']
+    report = io.StringIO()
+    
+    summary = BulkGrader(storage).grade_sheet(exam_id, sheet, report=report)
+    
+    assert summary['total'] == 4
+    assert summary['graded'] == 3
+    assert summary['failed'] == 1
+    assert summary['errors'] == [{'line': 4, 'student_id': None, 'message': 'Thiếu mã học sinh'}]
+    scores = {r['student_id']: r['score'] for r in storage.list_results(exam_id=exam_id)}
+    assert scores == {'HS1': 10.0, 'HS2': 5.0, 'HS3': 10.0}
+    assert len(storage.list_submissions(exam_id=exam_id)) == 3
+    
+    rows = list(csv.reader(io.StringIO(report.getvalue())))
+    assert rows[0] == REPORT_HEADER
+    assert rows[1][:3] == ['2', 'HS1', '10.0']
+    assert rows[3] == ['4', '', '', '', '', '', 'Thiếu mã học sinh']
+
+
+def test_grade_sheet_rejects_mismatched_rows(storage, exam_id):
+    """Test rows with too many or too few answers are row errors, not graded."""
+    sheet = ['HS1,BCCC', 'HS10,ABCDAB', 'HS11,B,C', json.dumps({'student_id': 'HS12', 'answers': {'Q9': 'A'}})]
+    
+    summary = BulkGrader(storage).grade_sheet(exam_id, sheet[:3])
+    assert (summary['graded'], summary['failed']) == (1, 2)
+    assert [error['student_id'] for error in summary['errors']] == ['HS10', 'HS11']
+    assert 'khác số câu' in summary['errors'][0]['message']
+    
+    summary = BulkGrader(storage).grade_sheet(exam_id, sheet[3:], fmt='jsonl')
+    assert summary['failed'] == 1
+    assert 'Q9' in summary['errors'][0]['message']
+    
+    question_ids = ','.join(q['question_id'] for q in storage.load_exam(exam_id)['questions'])
+    summary = BulkGrader(storage).grade_sheet(exam_id, [f'ma_hs,{question_ids}', 'HS13,B,C,C,C,A'])
+    assert summary['errors'] == [{'line': 2, 'student_id': 'HS13', 'message': 'Dòng có nhiều cột hơn tiêu đề'}]
+    assert {r['student_id'] for r in storage.list_results(exam_id=exam_id)} == {'HS1'}
+
+
+def test_grade_sheet_in_batches(storage, exam_id):
+    """Test rows are stored one batch per save_graded_many call."""
+    calls = []
+    save_graded_many = storage.save_graded_many
+    
+    def counting(submissions, results):
+        calls.append(len(results))
+        return save_graded_many(submissions, results)
+    
+    storage.save_graded_many = counting
+    engine = GradingEngine(storage)
+    seen = []
+    engine.add_result_listener(lambda result, previous: seen.append(result['student_id']))
+    sheet = (f'HS{i:04d},{"BCCC" if i % 2 else "ACCC"}' for i in range(250))
+    
+    summary = BulkGrader(storage, engine=engine, batch_size=100).grade_sheet(exam_id, sheet)
+    
+    assert summary['graded'] == 250
+    assert calls == [100, 100, 50]
+    assert len(seen) == 250
+    assert len(storage.list_results(exam_id=exam_id)) == 250
+
+
+def test_grade_sheet_unknown_exam(storage):
+    """Test an unknown exam is rejected before reading the sheet."""
+    with pytest.raises(ValueError):
+        BulkGrader(storage).grade_sheet('MISSING', ['HS1,B'])
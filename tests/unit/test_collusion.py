@@ -0,0 +1,143 @@
+"""Unit tests for answer-copying detection."""
+
+import random
+import pytest
+from src.storage import create_storage
+from src.business.answer_key import AnswerKey
+from src.business.collusion import CollusionDetector, compare_sheets, pack_answers, wrong_tokens
+from src.business.exam_manager import ExamManager
+
+QUESTIONS = 40
+
+
+@pytest.fixture
+def key():
+    rng = random.Random(3)
+    return AnswerKey('E1', [f'Q{i:03d}' for i in range(1, QUESTIONS + 1)],
+                     [rng.choice('ABCD') for _ in range(QUESTIONS)])
+
+
+def make_class(key, students, copiers, seed=5):
+    """Independent students, then copiers each changing 2 answers of a source."""
+    rng = random.Random(seed)
+    submissions = []
+    for number in range(students):
+        ability = rng.uniform(0.3, 0.9)
+        answers = {
+            qid: correct if rng.random() < ability else rng.choice([c for c in 'ABCD' if c != correct])
+            for qid, correct in zip(key.question_ids, key.normalized)
+        }
+        submissions.append({'submission_id': f'S{number:04d}', 'student_id': f'ST{number:04d}', 'answers': answers})
+    for number in range(copiers):
+        answers = dict(submissions[number]['answers'])
+        for qid in rng.sample(key.question_ids, 2):
+            answers[qid] = rng.choice('ABCD')
+        submissions.append({'submission_id': f'C{number:04d}', 'student_id': f'CP{number:04d}', 'answers': answers})
+    return submissions
+
+
+def brute_force(detector, key, submissions):
+    """Compare every pair, as the detector would report them."""
+    sheets = [pack_answers(key, s['answers']) for s in submissions]
+    found = set()
+    for i in range(len(sheets)):
+        for j in range(i + 1, len(sheets)):
+            identical_wrong, _ = compare_sheets(sheets[i], sheets[j])
+            union = bin(sheets[i][4]).count('1') + bin(sheets[j][4]).count('1') - identical_wrong
+            if identical_wrong >= detector.min_identical_wrong and identical_wrong / union >= detector.min_similarity:
+                found.add(tuple(sorted((submissions[i]['submission_id'], submissions[j]['submission_id']))))
+    return found
+
+
+def test_pack_and_compare(key):
+    """Test bit-planes count identical wrong and identical answers."""
+    correct = dict(zip(key.question_ids, key.normalized))
+    wrong_choice = {qid: 'A' if answer != 'A' else 'B' for qid, answer in correct.items()}
+    first = dict(correct, Q001=wrong_choice['Q001'], Q002=wrong_choice['Q002'], Q003='')
+    second = dict(correct, Q001=wrong_choice['Q001'], Q002='d ', Q003='')
+    
+    a, b = pack_answers(key, first), pack_answers(key, second)
+    
+    assert len(wrong_tokens(a)) == 2
+    assert compare_sheets(a, b)[0] == 1
+    # Blanks never match; Q002 matches only if both chose D
+    expected_same = QUESTIONS - 3 + 1 + (wrong_choice['Q002'] == 'D' and correct['Q002'] != 'D')
+    assert compare_sheets(a, b)[1] == expected_same
+
+
+def test_detects_copiers_like_brute_force(key):
+    """Test LSH finds the same suspicious pairs as comparing every pair."""
+    submissions = make_class(key, 300, 10)
+    detector = CollusionDetector(None, workers=1)
+    
+    report = detector.detect(key, submissions)
+    
+    found = {tuple(pair['submission_ids']) for pair in report['pairs']}
+    assert found == brute_force(detector, key, submissions)
+    # Every copier of a source with enough wrong answers is caught
+    copied = {
+        f'C{number:04d}' for number in range(10)
+        if len(wrong_tokens(pack_answers(key, submissions[number]['answers']))) >= 8
+    }
+    assert copied and copied <= {pair[0] for pair in found}
+    assert report['candidates'] < len(submissions) * (len(submissions) - 1) // 20
+    ranks = [(-pair['identical_wrong'], -pair['similarity']) for pair in report['pairs']]
+    assert ranks == sorted(ranks)
+
+
+def test_same_student_and_few_wrong_are_ignored(key):
+    """Test resubmissions of one student and near-perfect sheets are not reported."""
+    wrong = {qid: 'A' if answer != 'A' else 'B' for qid, answer in zip(key.question_ids, key.normalized)}
+    perfect = dict(zip(key.question_ids, key.normalized))
+    submissions = [
+        {'submission_id': 'S1', 'student_id': 'ST1', 'answers': wrong},
+        {'submission_id': 'S2', 'student_id': 'ST1', 'answers': wrong},
+        {'submission_id': 'S3', 'student_id': 'ST3', 'answers': perfect},
+        {'submission_id': 'S4', 'student_id': 'ST4', 'answers': perfect},
+        {'submission_id': 'S5', 'student_id': 'ST5', 'answers': wrong}
+    ]
+    
+    report = CollusionDetector(None, workers=1).detect(key, submissions)
+    
+    assert report['eligible'] == 3
+    assert [pair['submission_ids'] for pair in report['pairs']] == [['S1', 'S5'], ['S2', 'S5']]
+    assert report['pairs'][0]['identical_wrong'] == QUESTIONS
+    assert report['pairs'][0]['similarity'] == 1.0
+
+
+def test_worker_processes_match_single_process(key):
+    """Test the process pool returns the same report."""
+    submissions = make_class(key, 200, 6)
+    single = CollusionDetector(None, workers=1).detect(key, submissions)
+    pooled = CollusionDetector(None, workers=2, chunk_size=50).detect(key, submissions)
+    
+    assert pooled['pairs'] == single['pairs']
+    assert pooled['candidates'] == single['candidates']
+
+
+def test_run_reads_stored_submissions(key, temp_dir):
+    """Test run() loads the exam key and its submissions from storage."""
+    storage = create_storage(base_path=temp_dir)
+    try:
+        questions = [
+            {'content': f'Question {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'}
+            for i in range(10)
+        ]
+        success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001", questions=questions)
+        question_ids = [q['question_id'] for q in storage.load_exam(exam_id)['questions']]
+        for number, answers in enumerate(['BBBBBBCCAA', 'BBBBBBCCAB', 'AAAAAAAAAA']):
+            storage.save_submission({
+                'submission_id': f'S{number}', 'exam_id': exam_id, 'student_id': f'ST{number}',
+                'answers': dict(zip(question_ids, answers)), 'submitted_at': '2024-01-01T00:00:00Z'
+            })
+        
+        success, msg, report = CollusionDetector(storage, workers=1).run(exam_id)
+        assert success is True
+        assert [pair['submission_ids'] for pair in report['pairs']] == [['S0', 'S1']]
+        assert report['pairs'][0]['identical_wrong'] == 8
+        
+        success, msg, report = CollusionDetector(storage, workers=1).run('E404')
+        assert success is False
+        assert report is None
+    finally:
+        storage.close()
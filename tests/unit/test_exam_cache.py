@@ -0,0 +1,120 @@
+"""Unit tests for the exam cache in FileStorageManager."""
+
+import os
+import json
+import pytest
+from src.storage.file_storage import FileStorageManager
+from src.storage.exam_cache import ExamCache
+from src.business.exam_manager import ExamManager
+
+
+@pytest.fixture
+def storage(tmp_path):
+    """Create a temporary file storage manager for testing."""
+    return FileStorageManager(base_path=str(tmp_path))
+
+
+def make_exam(exam_id, title='Test Exam'):
+    return {
+        'exam_id': exam_id,
+        'title': title,
+        'created_by': 'T001',
+        'created_at': '2024-01-01T00:00:00Z',
+        'questions': [{
+            'question_id': 'Q001',
+            'content': '1 + 1 = ?',
+            'choices': {'A': '1', 'B': '2', 'C': '3', 'D': '4'},
+            'correct_answer': 'B'
+        }]
+    }
+
+
+def test_repeated_loads_hit_cache(storage):
+    """Test that loading an unchanged exam is served from the cache."""
+    storage.save_exam(make_exam('E001'))
+    
+    storage.load_exam('E001')
+    storage.load_exam('E001')
+    storage.load_exam('E001')
+    
+    stats = storage.exam_cache.stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 2
+    assert stats['entries'] == 1
+
+
+def test_returned_exam_is_a_copy(storage):
+    """Test that mutating a loaded exam does not corrupt the cache."""
+    storage.save_exam(make_exam('E001'))
+    storage.load_exam('E001')
+    
+    exam = storage.load_exam('E001')
+    exam['title'] = 'Changed'
+    exam['questions'][0]['choices']['A'] = 'Changed'
+    exam['questions'].append({})
+    
+    fresh = storage.load_exam('E001')
+    assert fresh['title'] == 'Test Exam'
+    assert fresh['questions'][0]['choices']['A'] == '1'
+    assert len(fresh['questions']) == 1
+
+
+def test_update_exam_does_not_corrupt_cache(storage):
+    """Test ExamManager.update_exam against a cached exam."""
+    storage.save_exam(make_exam('E001'))
+    manager = ExamManager(storage)
+    manager.get_exam('E001')
+    
+    success, msg = manager.update_exam('E001', {'title': ''})
+    assert success is False
+    assert storage.load_exam('E001')['title'] == 'Test Exam'
+    
+    success, msg = manager.update_exam('E001', {'title': 'New Title'})
+    assert success is True
+    assert storage.load_exam('E001')['title'] == 'New Title'
+
+
+def test_external_change_invalidates_entry(storage):
+    """Test that a file changed by another process is re-read."""
+    storage.save_exam(make_exam('E001'))
+    storage.load_exam('E001')
+    
+    file_path = os.path.join(storage.base_path, 'exams', 'E001.json')
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(make_exam('E001', title='Edited elsewhere'), f)
+    
+    assert storage.load_exam('E001')['title'] == 'Edited elsewhere'
+    
+    os.remove(file_path)
+    assert storage.load_exam('E001') is None
+
+
+def test_delete_exam_invalidates_entry(storage):
+    """Test that deleting an exam removes it from the cache."""
+    storage.save_exam(make_exam('E001'))
+    storage.load_exam('E001')
+    storage.delete_exam('E001')
+    
+    assert storage.load_exam('E001') is None
+    assert storage.exam_cache.stats()['entries'] == 0
+
+
+def test_cache_limits():
+    """Test eviction by entry count and total size."""
+    cache = ExamCache(max_entries=2, max_bytes=100)
+    cache.put('E1', 1, {'exam_id': 'E1'}, 10)
+    cache.put('E2', 1, {'exam_id': 'E2'}, 10)
+    cache.get('E1', 1)
+    cache.put('E3', 1, {'exam_id': 'E3'}, 10)
+    
+    assert cache.get('E2', 1) is None
+    assert cache.get('E1', 1) == {'exam_id': 'E1'}
+    assert cache.stats()['evictions'] == 1
+    
+    cache.put('E4', 1, {'exam_id': 'E4'}, 95)
+    assert cache.stats()['entries'] == 1
+    cache.put('E5', 1, {'exam_id': 'E5'}, 500)
+    assert cache.get('E5', 1) is None
+    
+    # A stale stamp is a miss
+    assert cache.get('E4', 2) is None
@@ -0,0 +1,98 @@
+"""Unit tests for the exam catalog (list_exam_summaries)."""
+
+import os
+import json
+import pytest
+from src.storage import create_storage
+from src.storage.exam_catalog import exam_content_hash
+from src.business.exam_manager import ExamManager
+
+
+def make_exam(exam_id, title='Test Exam', num_questions=2):
+    return {
+        'exam_id': exam_id,
+        'title': title,
+        'created_by': 'T001',
+        'created_at': '2024-01-01T00:00:00Z',
+        'questions': [{
+            'question_id': f'Q{i:03d}',
+            'content': f'Question {i}',
+            'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'},
+            'correct_answer': 'A'
+        } for i in range(num_questions)]
+    }
+
+
+def test_summaries_follow_save_and_delete(storage):
+    """Test that the catalog is maintained by save_exam/delete_exam."""
+    storage.save_exam(make_exam('E001', num_questions=3))
+    storage.save_exam(make_exam('E002', title='Other'))
+    
+    summaries = {s['exam_id']: s for s in storage.list_exam_summaries()}
+    assert set(summaries) == {'E001', 'E002'}
+    assert summaries['E001']['question_count'] == 3
+    assert summaries['E002']['title'] == 'Other'
+    assert 'questions' not in summaries['E001']
+    assert summaries['E001']['content_hash'] == exam_content_hash(make_exam('E001', num_questions=3))
+    
+    storage.save_exam(make_exam('E002', title='Renamed'))
+    storage.delete_exam('E001')
+    summaries = storage.list_exam_summaries()
+    assert [(s['exam_id'], s['title']) for s in summaries] == [('E002', 'Renamed')]
+
+
+def test_summaries_do_not_load_exams(storage):
+    """Test that listing summaries does not read full exams."""
+    storage.save_exam(make_exam('E001'))
+    storage.list_exam_summaries()
+    
+    storage.list_exams = lambda: pytest.fail("list_exams should not be called")
+    storage.load_exam = lambda exam_id: pytest.fail("load_exam should not be called")
+    assert len(storage.list_exam_summaries()) == 1
+
+
+def test_catalog_rebuilt_when_out_of_sync(storage):
+    """Test that exams added outside the storage API are picked up."""
+    if storage.storage_mode == 'sqlite':
+        pytest.skip("SQLite keeps summary columns in the exams table")
+    storage.save_exam(make_exam('E001'))
+    
+    file_path = os.path.join(storage.base_path, 'exams', 'E002.json')
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(make_exam('E002'), f)
+    
+    assert {s['exam_id'] for s in storage.list_exam_summaries()} == {'E001', 'E002'}
+
+
+def test_manager_list_exam_summaries(storage):
+    """Test ExamManager.list_exam_summaries."""
+    manager = ExamManager(storage)
+    success, msg, exam_id = manager.create_exam("Test Exam", "T001")
+    manager.add_question(exam_id, "1 + 1 = ?", {'A': '1', 'B': '2', 'C': '3', 'D': '4'}, 'B')
+    
+    success, msg, summaries = manager.list_exam_summaries()
+    assert success is True
+    assert summaries[0]['exam_id'] == exam_id
+    assert summaries[0]['question_count'] == 1
+
+
+def test_get_exam_summary(storage):
+    """Test looking up one exam summary without loading the exam."""
+    storage.save_exam(make_exam('E001', num_questions=3))
+    storage.load_exam = lambda exam_id: pytest.fail("load_exam should not be called")
+    
+    summary = storage.get_exam_summary('E001')
+    assert summary['question_count'] == 3
+    assert summary['content_hash'] == exam_content_hash(make_exam('E001', num_questions=3))
+    assert storage.get_exam_summary('E404') is None
+
+
+def test_listing_empty_storage_writes_nothing(temp_dir):
+    """Test listing an empty file storage does not create the catalog."""
+    storage = create_storage(base_path=temp_dir, backend='file')
+    assert storage.list_exam_summaries() == []
+    assert not os.path.exists(os.path.join(temp_dir, 'catalog.json'))
+    
+    storage.save_exam(make_exam('E001'))
+    assert [s['exam_id'] for s in storage.list_exam_summaries()] == ['E001']
+    storage.close()
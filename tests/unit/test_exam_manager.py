@@ -1,20 +1,14 @@
 """Unit tests for ExamManager."""
 
-import tempfile
-import shutil
 import pytest
 from src.storage.file_storage import FileStorageManager
 from src.business.exam_manager import ExamManager
 
 
 @pytest.fixture
-def manager():
+def manager(tmp_path):
     """Create a temporary exam manager for testing."""
-    temp_dir = tempfile.mkdtemp()
-    storage = FileStorageManager(base_path=temp_dir)
-    exam_manager = ExamManager(storage)
-    yield exam_manager
-    shutil.rmtree(temp_dir, ignore_errors=True)
+    return ExamManager(FileStorageManager(base_path=str(tmp_path)))
 
 
 def test_create_exam_success(manager):
@@ -208,3 +202,105 @@ def test_validate_exam_empty_questions(manager):
     
     assert is_valid is False
     assert "câu hỏi" in error_msg.lower()
+
+
+def test_add_questions_batch_single_write(manager):
+    """Test adding several questions with one save."""
+    success, msg, exam_id = manager.create_exam("Test Exam", "T001")
+    manager.add_question(exam_id, "First?", {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'A')
+    
+    saves = []
+    original_save = manager.storage.save_exam
+    manager.storage.save_exam = lambda exam: saves.append(exam) or original_save(exam)
+    
+    questions = [
+        {'content': f'Question {i}?', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'C'}
+        for i in range(5)
+    ]
+    success, msg, question_ids, errors = manager.add_questions(exam_id, questions)
+    
+    assert success is True
+    assert question_ids == ['Q002', 'Q003', 'Q004', 'Q005', 'Q006']
+    assert errors == []
+    assert len(saves) == 1
+    
+    success, msg, exam_dict = manager.get_exam(exam_id)
+    assert len(exam_dict['questions']) == 6
+
+
+def test_add_questions_reports_all_errors_without_writing(manager):
+    """Test that invalid questions are reported and nothing is saved."""
+    success, msg, exam_id = manager.create_exam("Test Exam", "T001")
+    
+    questions = [
+        {'content': 'Valid?', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'},
+        {'content': '', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'},
+        {'content': 'Bad answer?', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'E'},
+        {'content': 'Bad choices?', 'choices': 'abc', 'correct_answer': 'A'},
+        {'content': 'Bad key?', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': ['A']},
+    ]
+    success, msg, question_ids, errors = manager.add_questions(exam_id, questions)
+    
+    assert success is False
+    assert question_ids == []
+    assert [error.split(':')[0] for error in errors] == ["Câu 2", "Câu 3", "Câu 4", "Câu 5"]
+    
+    success, msg, exam_dict = manager.get_exam(exam_id)
+    assert exam_dict['questions'] == []
+
+
+def test_create_exam_with_questions(manager):
+    """Test creating an exam together with its questions."""
+    questions = [
+        {'content': f'Question {i}?', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'B'}
+        for i in range(3)
+    ]
+    success, msg, exam_id = manager.create_exam("Test Exam", "T001", questions=questions)
+    assert success is True
+    
+    success, msg, exam_dict = manager.get_exam(exam_id)
+    assert [q['question_id'] for q in exam_dict['questions']] == ['Q001', 'Q002', 'Q003']
+    
+    # An invalid question prevents the exam from being created at all
+    questions.append({'content': 'Missing choices', 'choices': {'A': 'a'}, 'correct_answer': 'A'})
+    success, msg, exam_id = manager.create_exam("Second Exam", "T001", questions=questions)
+    assert success is False
+    assert "Câu 4" in msg
+    assert exam_id is None
+    assert len(manager.list_all_exams()[2]) == 1
+
+
+def test_student_view_hides_answers(manager):
+    """Test the student projection keeps questions and choices only."""
+    from src.models.exam import Exam
+    questions = [
+        {'content': 'Question 1', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'B'}
+    ]
+    success, msg, exam_id = manager.create_exam("Test Exam", "T001", questions=questions)
+    success, msg, exam_dict = manager.get_exam(exam_id)
+    
+    view = Exam.from_dict(exam_dict).to_student_dict()
+    
+    assert view == {
+        'exam_id': exam_id,
+        'title': 'Test Exam',
+        'questions': [{
+            'question_id': 'Q001',
+            'content': 'Question 1',
+            'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}
+        }]
+    }
+
+
+def test_create_exam_rejects_malformed_choices(manager):
+    """Test malformed question data is a per-question error, not an exception."""
+    questions = [
+        {'content': 'Valid?', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'},
+        {'content': 'Bad choices?', 'choices': 'abc', 'correct_answer': 'A'},
+        'not a question',
+    ]
+    success, msg, exam_id = manager.create_exam("Test Exam", "T001", questions=questions)
+    
+    assert success is False
+    assert exam_id is None
+    assert msg == "Câu 2: Dữ liệu câu hỏi không hợp lệ; Câu 3: Dữ liệu câu hỏi không hợp lệ"
@@ -0,0 +1,220 @@
+"""Unit tests for the running exam statistics store."""
+
+import threading
+from src.storage import create_storage
+from src.storage import exam_stats
+from src.storage.exam_stats import ExamStatsStore, open_exam_stats
+from src.business.exam_manager import ExamManager
+from src.business.grading_engine import GradingEngine
+from src.models.submission import Submission
+
+
+def make_result(exam_id, score, result_id=None):
+    result = {'exam_id': exam_id, 'score': score}
+    if result_id is not None:
+        result.update(result_id=result_id, student_id=f'ST{result_id}')
+    return result
+
+
+def test_record_and_summary(temp_dir):
+    """Test count, mean, stddev, min, max and histogram."""
+    store = ExamStatsStore(temp_dir)
+    for score in [4.0, 6.0, 10.0, 8.0]:
+        store.record(make_result('E001', score))
+    store.record(make_result('E002', 5.5))
+    
+    stats = store.get('E001')
+    assert stats['count'] == 4
+    assert stats['mean'] == 7.0
+    assert stats['stddev'] == 2.24
+    assert (stats['min'], stats['max']) == (4.0, 10.0)
+    assert stats['histogram'] == [0, 0, 0, 0, 1, 0, 1, 0, 1, 1]
+    assert [s['exam_id'] for s in store.list()] == ['E001', 'E002']
+    assert store.overall() == {'count': 5, 'mean': 6.7}
+    
+    # A second store instance reads the same files
+    assert ExamStatsStore(temp_dir).get('E001') == stats
+
+
+def test_replace_result(temp_dir):
+    """Test replacing a result removes its previous score exactly."""
+    store = ExamStatsStore(temp_dir)
+    store.record(make_result('E001', 2.5))
+    store.record(make_result('E001', 7.5))
+    
+    store.record(make_result('E001', 9.0), previous=make_result('E001', 2.5))
+    
+    stats = store.get('E001')
+    assert stats['count'] == 2
+    assert (stats['min'], stats['max']) == (7.5, 9.0)
+    assert stats['mean'] == 8.25
+
+
+def test_empty_exam(temp_dir):
+    """Test statistics of an exam without results."""
+    stats = ExamStatsStore(temp_dir).get('E404')
+    assert stats['count'] == 0
+    assert stats['mean'] is None
+    assert stats['histogram'] == [0] * 10
+
+
+def test_engine_listener_and_rebuild(storage):
+    """Test graded results update the store and rebuild matches it."""
+    questions = [
+        {'content': f'Question {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'}
+        for i in range(4)
+    ]
+    success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001", questions=questions)
+    store = open_exam_stats(storage.base_path)
+    engine = GradingEngine(storage)
+    engine.add_result_listener(store.record)
+    
+    for i, answers in enumerate(['AAAA', 'AABB', 'BBBB']):
+        submission = Submission(
+            submission_id=f'S{i:03d}',
+            exam_id=exam_id,
+            student_id=f'ST{i:03d}',
+            answers=dict(zip(['Q001', 'Q002', 'Q003', 'Q004'], answers))
+        )
+        storage.save_submission(submission.to_dict())
+    engine.grade_submission('S000')
+    engine.grade_stored_submissions(['S001', 'S002'])
+    
+    live = store.get(exam_id)
+    assert live['count'] == 3
+    assert live['mean'] == 5.0
+    live_top = store.top_k(exam_id, 5)
+    assert [(entry['student_id'], entry['score']) for entry in live_top] == [
+        ('ST000', 10.0), ('ST001', 5.0), ('ST002', 0.0)
+    ]
+    assert store.percentile(exam_id, 10.0) == 83.3
+    
+    assert store.rebuild(storage.iter_results) is True
+    assert store.exists()
+    assert store.get(exam_id) == live
+    assert store.top_k(exam_id, 5) == live_top
+
+
+
+def test_cli_engine_updates_stats(monkeypatch, temp_dir):
+    """Test results graded by the CLI engine reach the statistics store."""
+    import cham_nhanh
+    storage = create_storage(base_path=temp_dir)
+    try:
+        questions = [
+            {'content': f'Question {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'}
+            for i in range(4)
+        ]
+        success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001", questions=questions)
+        store = open_exam_stats(temp_dir)
+        assert store.rebuild(storage.iter_results) is True
+        
+        monkeypatch.setattr(cham_nhanh, 'create_storage', lambda base_path: storage)
+        monkeypatch.setattr(cham_nhanh, '_grading', None)
+        cham_nhanh.cham_tu_dap_an(exam_id, 'ST001', ['A', 'A', 'B', 'B'])
+        cham_nhanh.cham_tu_dap_an(exam_id, 'ST002', ['A', 'A', 'A', 'A'])
+        
+        # The store was already built, so the web app never rebuilds it
+        stats = store.get(exam_id)
+        assert stats['count'] == 2
+        assert stats['mean'] == 7.5
+    finally:
+        storage.close()
+
+def test_percentile(temp_dir):
+    """Test percentile ranks count lower scores and half of the ties."""
+    store = ExamStatsStore(temp_dir)
+    assert store.percentile('E001', 5.0) is None
+    for score in [2.0, 5.0, 5.0, 7.5]:
+        store.record(make_result('E001', score))
+    
+    assert store.percentile('E001', 5.0) == 50.0
+    assert store.percentile('E001', 7.5) == 87.5
+    assert store.percentile('E001', 10.0) == 100.0
+    assert store.percentile('E001', 0.0) == 0.0
+
+
+def test_top_k(temp_dir, monkeypatch):
+    """Test the bounded leaderboard keeps the best results in order."""
+    monkeypatch.setattr(exam_stats, 'TOP_CAPACITY', 3)
+    store = ExamStatsStore(temp_dir)
+    for number, score in enumerate([6.0, 9.5, 3.0, 8.25, 7.0]):
+        store.record(make_result('E001', score, f'R{number}'))
+    
+    top = store.top_k('E001', 10)
+    assert [(entry['rank'], entry['result_id'], entry['score']) for entry in top] == [
+        (1, 'R1', 9.5), (2, 'R3', 8.25), (3, 'R4', 7.0)
+    ]
+    assert top[0]['student_id'] == 'STR1'
+    assert [entry['result_id'] for entry in store.top_k('E001', 1)] == ['R1']
+    assert store.top_k('E404', 5) == []
+
+
+def test_top_k_after_regrade(temp_dir, monkeypatch):
+    """Test a leaderboard entry regraded lower marks the exam for rebuild."""
+    monkeypatch.setattr(exam_stats, 'TOP_CAPACITY', 2)
+    store = ExamStatsStore(temp_dir)
+    results = [make_result('E001', score, f'R{number}') for number, score in enumerate([9.0, 8.0, 7.0])]
+    for result in results:
+        store.record(result)
+    
+    # Regraded higher: still in the leaderboard, nothing lost
+    store.record(make_result('E001', 9.5, 'R1'), previous=results[1])
+    assert not store.needs_rebuild('E001')
+    assert [entry['result_id'] for entry in store.top_k('E001', 2)] == ['R1', 'R0']
+    
+    # Regraded lower: R2 (7.0) was dropped and should take its place
+    store.record(make_result('E001', 1.0, 'R0'), previous=results[0])
+    assert store.needs_rebuild('E001')
+    regraded = [make_result('E001', 9.5, 'R1'), make_result('E001', 1.0, 'R0'), results[2]]
+    assert store.rebuild_exam('E001', regraded) is True
+    assert not store.needs_rebuild('E001')
+    assert [entry['result_id'] for entry in store.top_k('E001', 2)] == ['R1', 'R2']
+    assert store.get('E001')['count'] == 3
+
+
+def test_rebuild_exam_keeps_concurrent_record(temp_dir):
+    """Test a result recorded by another worker during a rebuild is not lost."""
+    store = ExamStatsStore(temp_dir)
+    recorder = threading.Thread(target=ExamStatsStore(temp_dir).record, args=(make_result('E001', 5.0, 'R9'),))
+    
+    def stored_results():
+        yield make_result('E001', 9.0, 'R1')
+        # Graded after the scan started; its record() must wait for the rebuild
+        recorder.start()
+        recorder.join(0.3)
+        yield make_result('E001', 8.0, 'R2')
+    
+    assert store.rebuild_exam('E001', stored_results()) is True
+    recorder.join()
+    assert store.get('E001')['count'] == 3
+
+
+def test_rebuild_locks_each_exam(temp_dir):
+    """Test rebuild reads each exam's results under its lock and drops empty exams."""
+    store = ExamStatsStore(temp_dir)
+    store.record(make_result('E404', 3.0, 'R0'))
+    stored = [make_result('E001', 9.0, 'R1'), make_result('E002', 4.0, 'R2')]
+    calls = []
+    
+    def iter_results(exam_id=None):
+        # A generator, like storage.iter_results: nothing is read before iteration
+        calls.append(exam_id)
+        if exam_id is not None:
+            # The exam's lock is held: another worker's record() has to wait
+            recorder = threading.Thread(target=ExamStatsStore(temp_dir).record, args=(make_result(exam_id, 5.0, 'R9'),))
+            recorder.start()
+            recorder.join(0.1)
+            assert recorder.is_alive()
+            threads.append(recorder)
+        yield from (result for result in stored if exam_id in (None, result['exam_id']))
+    
+    threads = []
+    assert store.rebuild(iter_results) is True
+    for recorder in threads:
+        recorder.join()
+    
+    assert calls == [None, 'E001', 'E002', 'E404']
+    assert store.get('E001')['count'] == 2
+    assert store.get('E002')['count'] == 2
+    assert store.get('E404')['count'] == 1
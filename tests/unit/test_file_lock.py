@@ -0,0 +1,88 @@
+"""Unit tests for inter-process locks and atomic writes."""
+
+import json
+import multiprocessing
+import os
+import threading
+import pytest
+from src.storage import create_storage
+from src.storage.file_lock import atomic_write_json, file_lock
+from src.business.exam_manager import ExamManager
+
+
+def test_atomic_write_json(temp_dir):
+    """Test the document is replaced whole and no temporary file is left."""
+    path = f'{temp_dir}/doc.json'
+    atomic_write_json(path, {'a': 1})
+    atomic_write_json(path, {'a': 2, 'text': 'Tiếng Việt'}, indent=2)
+    
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'a': 2, 'text': 'Tiếng Việt'}
+    assert os.listdir(temp_dir) == ['doc.json']
+
+
+def test_atomic_write_failure_keeps_old(temp_dir):
+    """Test a failed write leaves the previous document untouched."""
+    path = f'{temp_dir}/doc.json'
+    atomic_write_json(path, {'a': 1})
+    
+    with pytest.raises(TypeError):
+        atomic_write_json(path, {'a': object()})
+    
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == {'a': 1}
+
+
+def test_file_lock_reentrant_and_exclusive(temp_dir):
+    """Test a thread may re-acquire its lock while other threads wait."""
+    lock_file = f'{temp_dir}/x.lock'
+    order = []
+    
+    def other():
+        with file_lock(lock_file):
+            order.append('other')
+    
+    with file_lock(lock_file):
+        with file_lock(lock_file):
+            thread = threading.Thread(target=other)
+            thread.start()
+            thread.join(0.2)
+            order.append('owner')
+    thread.join(5)
+    
+    assert order == ['owner', 'other']
+
+
+def _add_questions(base_path, backend, exam_id, count):
+    storage = create_storage(base_path=base_path, backend=backend)
+    manager = ExamManager(storage)
+    for i in range(count):
+        success, msg, question_id = manager.add_question(
+            exam_id, f'Question {i}', {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'A'
+        )
+        assert success, msg
+    storage.close()
+
+
+@pytest.mark.parametrize('backend', ['file', 'sqlite'])
+def test_concurrent_add_question_across_processes(temp_dir, backend):
+    """Test no question is lost when several processes update one exam."""
+    storage = create_storage(base_path=temp_dir, backend=backend)
+    success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001")
+    
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(target=_add_questions, args=(temp_dir, backend, exam_id, 10))
+        for _ in range(4)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+    
+    assert all(process.exitcode == 0 for process in processes)
+    exam = storage.load_exam(exam_id)
+    assert len(exam['questions']) == 40
+    assert len({q['question_id'] for q in exam['questions']}) == 40
+    assert storage.get_exam_summary(exam_id)['question_count'] == 40
+    storage.close()
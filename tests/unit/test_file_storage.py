@@ -1,20 +1,8 @@
-"""Unit tests for FileStorageManager."""
+"""Unit tests for FileStorageManager and the other storage backends."""
 
-import tempfile
-import shutil
 import os
 import json
 import pytest
-from src.storage.file_storage import FileStorageManager
-
-
-@pytest.fixture
-def storage():
-    """Create a temporary storage manager for testing."""
-    temp_dir = tempfile.mkdtemp()
-    storage_manager = FileStorageManager(base_path=temp_dir)
-    yield storage_manager
-    shutil.rmtree(temp_dir, ignore_errors=True)
 
 
 def test_save_and_load_exam(storage):
@@ -217,6 +205,8 @@ def test_export_to_csv(storage):
 
 def test_directory_creation(storage):
     """Test that all required directories are created."""
+    if storage.storage_mode == 'sqlite':
+        pytest.skip("SQLite backend keeps everything in one database file")
     required_dirs = ['exams', 'submissions', 'results', 'users']
     for dir_name in required_dirs:
         dir_path = os.path.join(storage.base_path, dir_name)
@@ -252,3 +242,145 @@ def test_utf8_encoding(storage):
     assert loaded['title'] == 'Đề thi Toán học'
     assert loaded['questions'][0]['content'] == 'Câu hỏi tiếng Việt có dấu'
     assert loaded['questions'][0]['choices']['A'] == 'Đáp án A'
+
+
+def save_sample_results(storage, count=25):
+    for i in range(count):
+        storage.save_result({
+            'result_id': f'R{i:03d}',
+            'submission_id': f'S{i:03d}',
+            'exam_id': 'E001' if i % 2 == 0 else 'E002',
+            'student_id': f'ST{i % 5:03d}',
+            'score': 5.0,
+            'total_questions': 2,
+            'correct_answers': 1,
+            'wrong_answers': 1,
+            'graded_at': f'2024-01-{i + 1:02d}T00:00:00Z'
+        })
+
+
+def test_list_results_page(storage):
+    """Test cursor pagination returns every result once, in result_id order."""
+    save_sample_results(storage)
+    
+    pages = []
+    cursor = None
+    while True:
+        page, cursor = storage.list_results_page(limit=10, cursor=cursor)
+        pages.append([r['result_id'] for r in page])
+        if cursor is None:
+            break
+    
+    assert [len(page) for page in pages] == [10, 10, 5]
+    assert sum(pages, []) == [f'R{i:03d}' for i in range(25)]
+
+
+def test_iter_results_filters(storage):
+    """Test filtering by exam, student and graded_at range."""
+    save_sample_results(storage)
+    
+    by_exam = [r['result_id'] for r in storage.iter_results(exam_id='E002', student_id='ST001')]
+    assert by_exam == ['R001', 'R011', 'R021']
+    
+    in_range = storage.iter_results(graded_from='2024-01-05', graded_to='2024-01-07T23:59:59Z')
+    assert [r['result_id'] for r in in_range] == ['R004', 'R005', 'R006']
+    
+    page, cursor = storage.list_results_page(limit=2, exam_id='E001')
+    assert [r['result_id'] for r in page] == ['R000', 'R002']
+    page, cursor = storage.list_results_page(limit=2, cursor=cursor, exam_id='E001')
+    assert [r['result_id'] for r in page] == ['R004', 'R006']
+
+
+def test_list_results_page_invalid_cursor(storage):
+    """Test a malformed cursor is rejected."""
+    with pytest.raises(ValueError):
+        storage.list_results_page(limit=10, cursor='not-a-cursor')
+
+
+def test_export_to_csv_streaming(storage):
+    """Test CSV export from a generator, optionally gzip-compressed."""
+    import gzip
+    rows = ({'id': str(i), 'value': str(i * 10)} for i in range(3))
+    
+    csv_file = os.path.join(storage.base_path, 'export.csv.gz')
+    assert storage.export_to_csv(rows, csv_file, compress=True) is True
+    with gzip.open(csv_file, 'rt', encoding='utf-8') as f:
+        assert f.read().splitlines() == ['id,value', '0,0', '1,10', '2,20']
+    
+    assert storage.export_to_csv(iter([]), csv_file) is False
+
+
+def test_iter_results_order_by(storage):
+    """Test results can be streamed by student_id or graded_at."""
+    save_sample_results(storage, count=6)
+    
+    by_student = [r['result_id'] for r in storage.iter_results(order_by='student_id')]
+    assert by_student == ['R000', 'R005', 'R001', 'R002', 'R003', 'R004']
+    by_time = [r['result_id'] for r in storage.iter_results(exam_id='E001', order_by='graded_at')]
+    assert by_time == ['R000', 'R002', 'R004']
+    
+    with pytest.raises(ValueError):
+        list(storage.iter_results(order_by='score'))
+
+
+def test_maintenance_helpers(storage, capsys):
+    """Test the shared maintenance helpers work on every backend."""
+    import bao_tri
+    from src.storage import BaseStorageManager, FileStorageManager, storage_backend_name
+    save_sample_results(storage, count=3)
+    
+    assert isinstance(storage, BaseStorageManager)
+    assert isinstance(storage, FileStorageManager) == (storage.storage_mode != 'sqlite')
+    assert storage.check_integrity() == []
+    with storage.exam_lock('E001'):
+        page, cursor = storage.list_results_page(limit=2)
+    assert [r['result_id'] for r in page] == ['R000', 'R001']
+    assert isinstance(storage.compact_segments(), dict)
+    
+    backend = storage_backend_name(storage)
+    assert bao_tri.main(['--data', str(storage.base_path), '--backend', backend, 'check-indexes']) == 0
+    output = capsys.readouterr().out
+    # SQLite has no index files: its own integrity check is reported instead
+    assert ("✓ integrity_check: ok" in output) == (backend == 'sqlite')
+    assert "✗" not in output
+
+
+def test_export_mixed_results_to_csv(storage):
+    """Test exporting compact, verbose and regraded results together."""
+    import csv
+    from src.business.exam_manager import ExamManager
+    from src.business.grading_engine import GradingEngine
+    questions = [{'content': 'Q?', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'}]
+    success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001", questions=questions)
+    engine = GradingEngine(storage)
+    for number, answer in enumerate(['A', 'a', 'B']):
+        engine.grade({'submission_id': f'S{number}', 'exam_id': exam_id, 'student_id': f'ST{number}',
+                      'answers': {'Q001': answer}})
+    regraded = next(r for r in storage.iter_results() if r['student_id'] == 'ST2')
+    storage.save_result(dict(regraded, regraded_at='2024-02-01T00:00:00Z'))
+    results = list(storage.iter_results())
+    assert any('packed_answers' in r for r in results) and any('details' in r for r in results)
+    
+    csv_file = os.path.join(storage.base_path, 'results.csv')
+    assert storage.export_to_csv(storage.iter_results(), csv_file) is True
+    with open(csv_file, encoding='utf-8', newline='') as f:
+        assert sorted(row['student_id'] for row in csv.DictReader(f)) == ['ST0', 'ST1', 'ST2']
+    
+    fieldnames = ['student_id', 'score', 'graded_at', 'regraded_at']
+    assert storage.export_to_csv(storage.iter_results(order_by='student_id'), csv_file, fieldnames=fieldnames) is True
+    with open(csv_file, encoding='utf-8', newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [(row['student_id'], row['score'], row['regraded_at']) for row in rows] == [
+        ('ST0', '10.0', ''), ('ST1', '10.0', ''), ('ST2', '0.0', '2024-02-01T00:00:00Z')
+    ]
+
+
+def test_failed_csv_export_leaves_no_file(storage):
+    """Test a failure while writing removes the partial file."""
+    def rows():
+        yield {'id': '1'}
+        raise OSError("disk full")
+    
+    csv_file = os.path.join(storage.base_path, 'broken.csv')
+    assert storage.export_to_csv(rows(), csv_file) is False
+    assert not os.path.exists(csv_file)
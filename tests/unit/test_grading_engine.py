@@ -0,0 +1,164 @@
+"""Unit tests for GradingEngine."""
+
+import pytest
+from src.business.grading_engine import GradingEngine
+from src.models.submission import Submission
+
+
+def make_submission(submission_id, exam_id, answers, student_id='ST001'):
+    return Submission(
+        submission_id=submission_id,
+        exam_id=exam_id,
+        student_id=student_id,
+        answers=dict(zip(['Q001', 'Q002', 'Q003', 'Q004'], answers))
+    )
+
+
+def test_grade_submission(storage, exam_id):
+    """Test grading a stored submission."""
+    storage.save_submission(make_submission('S001', exam_id, ['B', 'C', 'A', 'C']).to_dict())
+    engine = GradingEngine(storage)
+    
+    success, msg, result = engine.grade_submission('S001')
+    
+    assert success is True
+    assert result['score'] == 7.5
+    assert result['correct_answers'] == 3
+    assert result['wrong_answers'] == 1
+    assert [d['is_correct'] for d in result['details']] == [True, True, False, True]
+    assert storage.load_result(result['result_id']) is not None
+
+
+def test_grade_submission_missing(storage, exam_id):
+    """Test grading a non-existent submission fails."""
+    success, msg, result = GradingEngine(storage).grade_submission('NOPE')
+    assert success is False
+    assert "không tồn tại" in msg
+    assert result is None
+
+
+def test_grade_batch_loads_exam_once(storage, exam_id):
+    """Test that a batch loads the exam once and saves results once."""
+    engine = GradingEngine(storage)
+    submissions = [
+        make_submission('S001', exam_id, ['B', 'C', 'C', 'C'], 'ST001'),
+        make_submission('S002', exam_id, ['A', 'C', 'C', 'C'], 'ST002').to_dict(),
+        make_submission('S003', 'OTHER', ['B', 'C', 'C', 'C'], 'ST003'),
+        make_submission('S004', exam_id, ['A', 'A', 'A', 'A'], 'ST004'),
+    ]
+    
+    loads = []
+    saves = []
+    original_load = storage.load_exam
+    original_save = storage.save_results
+    storage.load_exam = lambda e: loads.append(e) or original_load(e)
+    storage.save_results = lambda results: saves.append(len(results)) or original_save(results)
+    
+    outcomes = engine.grade_batch(exam_id, submissions)
+    
+    assert loads == [exam_id]
+    assert saves == [3]
+    assert [o[0] for o in outcomes] == [True, True, False, True]
+    assert [o[2]['score'] for o in outcomes if o[0]] == [10.0, 7.5, 0.0]
+    assert len(storage.list_results(exam_id=exam_id)) == 3
+
+
+def test_grade_batch_matches_grade_submission(storage, exam_id):
+    """Test that batch grading gives the same results as one-by-one grading."""
+    engine = GradingEngine(storage)
+    answer_sets = [['B', 'C', 'C', 'C'], ['b ', 'c', '', 'D'], ['A', 'B', 'C', 'D'], []]
+    for i, answers in enumerate(answer_sets):
+        storage.save_submission(make_submission(f'S{i}', exam_id, answers).to_dict())
+    
+    single = [engine.grade_submission(f'S{i}')[2] for i in range(len(answer_sets))]
+    batch = [o[2] for o in engine.grade_stored_submissions([f'S{i}' for i in range(len(answer_sets))])]
+    
+    for one, other in zip(single, batch):
+        assert one['score'] == other['score']
+        assert one['details'] == other['details']
+
+
+def test_grade_stored_submissions_reports_missing(storage, exam_id):
+    """Test that missing submissions are reported in place."""
+    storage.save_submission(make_submission('S001', exam_id, ['B', 'C', 'C', 'C']).to_dict())
+    outcomes = GradingEngine(storage).grade_stored_submissions(['S001', 'MISSING'])
+    
+    assert outcomes[0][0] is True
+    assert outcomes[1][0] is False
+    assert "MISSING" in outcomes[1][1]
+
+
+def test_grade_batch_unknown_exam(storage):
+    """Test batch grading against a missing exam."""
+    outcomes = GradingEngine(storage).grade_batch('NOPE', [make_submission('S001', 'NOPE', ['A'])])
+    assert outcomes == [(False, "Đề thi không tồn tại: NOPE", None)]
+
+
+def test_results_stored_compact(storage, exam_id):
+    """Test results are stored compactly and returned verbose."""
+    storage.save_submission(make_submission('S001', exam_id, ['B', '', 'A', 'C']).to_dict())
+    engine = GradingEngine(storage)
+    
+    success, msg, result = engine.grade_submission('S001')
+    stored = storage.load_result(result['result_id'])
+    
+    assert 'details' not in stored
+    assert stored['packed_answers'] == 'B.AC'
+    assert stored['packed_key'] == 'BCCC'
+    assert engine.get_result(result['result_id'])[2] == result
+
+
+def test_grade_in_memory(storage, exam_id):
+    """Test grading an unsaved submission stores submission and result together."""
+    engine = GradingEngine(storage)
+    load_submission = storage.load_submission
+    storage.load_submission = lambda submission_id: pytest.fail("submission should not be re-read")
+    
+    success, msg, result = engine.grade(make_submission('S001', exam_id, ['B', 'C', 'A', 'C']))
+    storage.load_submission = load_submission
+    
+    assert success is True
+    assert result['score'] == 7.5
+    assert [d['is_correct'] for d in result['details']] == [True, True, False, True]
+    assert [s['submission_id'] for s in storage.list_submissions(exam_id=exam_id)] == ['S001']
+    assert storage.load_result(result['result_id'])['submission_id'] == 'S001'
+
+
+def test_grade_in_memory_uses_key_cache(storage, exam_id):
+    """Test the compiled key is reused until the exam changes."""
+    engine = GradingEngine(storage)
+    engine.grade(make_submission('S001', exam_id, ['B', 'C', 'C', 'C']))
+    
+    load_exam = storage.load_exam
+    storage.load_exam = lambda exam_id: pytest.fail("exam should come from the key cache")
+    assert engine.grade(make_submission('S002', exam_id, ['B', 'C', 'C', 'C']))[2]['score'] == 10.0
+    
+    storage.load_exam = load_exam
+    exam = storage.load_exam(exam_id)
+    exam['questions'][0]['correct_answer'] = 'A'
+    storage.save_exam(exam)
+    assert engine.grade(make_submission('S003', exam_id, ['B', 'C', 'C', 'C']))[2]['score'] == 7.5
+
+
+def test_grade_in_memory_failure_saves_nothing(storage, exam_id):
+    """Test a failed grade leaves neither submission nor result behind."""
+    engine = GradingEngine(storage)
+    
+    success, msg, result = engine.grade(make_submission('S001', 'EXAM_MISSING', ['A'] * 4))
+    
+    assert success is False
+    assert "không tồn tại" in msg
+    assert storage.load_submission('S001') is None
+    assert storage.list_results() == []
+
+
+def test_save_graded_rolls_back(storage, exam_id):
+    """Test the result is removed again if the submission cannot be saved."""
+    result = {
+        'result_id': 'R001', 'submission_id': 'S001', 'exam_id': exam_id, 'student_id': 'ST001',
+        'score': 10.0, 'total_questions': 1, 'correct_answers': 1, 'wrong_answers': 0
+    }
+    
+    # A submission without an id cannot be saved by any backend
+    assert storage.save_graded({'exam_id': exam_id}, result) is False
+    assert storage.load_result('R001') is None
@@ -0,0 +1,201 @@
+"""Unit tests for the durable grading queue and its workers."""
+
+import os
+import time
+import pytest
+from src.storage.job_queue import JobQueue, open_job_queue, QUEUED, RUNNING, DONE, FAILED
+from src.business.grading_engine import GradingEngine
+from src.business.grading_queue import GradingWorkers, IDEMPOTENCY_KEY_FIELD
+from src.storage.idempotency import open_idempotency_index
+
+
+@pytest.fixture
+def queue(temp_dir):
+    job_queue = open_job_queue(temp_dir)
+    yield job_queue
+    job_queue.close()
+
+
+def make_submission(number, exam_id, answers):
+    return {
+        'submission_id': f'S{number:03d}',
+        'exam_id': exam_id,
+        'student_id': f'ST{number:03d}',
+        'answers': dict(zip(['Q001', 'Q002', 'Q003', 'Q004'], answers)),
+        'submitted_at': '2024-01-01T00:00:00Z'
+    }
+
+
+def test_enqueue_claim_complete(queue):
+    """Test a job moves from queued to running to done, oldest first."""
+    first = queue.enqueue(make_submission(1, 'E1', 'BCCC'))
+    second = queue.enqueue(make_submission(2, 'E1', 'ACCC'))
+    assert queue.depth() == 2
+
+    jobs = queue.claim(1)
+
+    assert [job['ticket'] for job in jobs] == [first]
+    assert jobs[0]['submission']['student_id'] == 'ST001'
+    assert queue.get(first)['status'] == RUNNING
+    assert queue.get(second)['status'] == QUEUED
+    assert queue.depth() == 1
+
+    assert queue.complete(first, 'R001') is True
+    assert queue.complete(first, 'R001') is False
+    job = queue.get(first)
+    assert job['status'] == DONE
+    assert job['result_id'] == 'R001'
+    assert queue.get('TMISSING') is None
+
+
+def test_queue_is_durable(temp_dir):
+    """Test enqueued jobs survive reopening the queue."""
+    queue = open_job_queue(temp_dir)
+    ticket = queue.enqueue(make_submission(1, 'E1', 'BCCC'))
+    queue.close()
+
+    reopened = open_job_queue(temp_dir)
+    jobs = reopened.claim(10)
+    reopened.close()
+
+    assert [job['ticket'] for job in jobs] == [ticket]
+
+
+def test_expired_lease_is_claimed_again(temp_dir):
+    """Test a job left running by a dead worker is handed out again."""
+    queue = JobQueue(os.path.join(temp_dir, 'queue.db'), lease_seconds=0.05)
+    ticket = queue.enqueue(make_submission(1, 'E1', 'BCCC'))
+    assert len(queue.claim(1)) == 1
+    assert queue.claim(1) == []
+
+    time.sleep(0.1)
+    jobs = queue.claim(1)
+
+    assert [job['ticket'] for job in jobs] == [ticket]
+    assert queue.get(ticket)['attempts'] == 2
+    queue.close()
+
+
+def test_start_is_stamped_per_job(queue):
+    """Test a job's start time is when its grading begins, not when its batch was claimed."""
+    tickets = [queue.enqueue(make_submission(number, 'E1', 'BCCC')) for number in range(2)]
+    first, second = queue.claim(2)
+    claimed_at = queue.get(second['ticket'])['started_at']
+
+    time.sleep(0.05)
+    assert queue.mark_started(second['ticket']) is True
+    assert queue.get(second['ticket'])['started_at'] >= claimed_at + 0.05
+    assert queue.mark_started('TMISSING') is False
+    queue.complete(second['ticket'], 'R')
+    assert queue.mark_started(second['ticket']) is False
+    assert queue.get(tickets[0])['started_at'] == claimed_at
+
+
+def test_metrics(queue):
+    """Test depth, wait time and latency metrics."""
+    for number in range(3):
+        queue.enqueue(make_submission(number, 'E1', 'BCCC'))
+    for job in queue.claim(2):
+        queue.complete(job['ticket'], 'R')
+
+    metrics = queue.metrics()
+
+    assert metrics['depth'] == 1
+    assert metrics['done'] == 2
+    assert metrics['oldest_wait'] >= 0
+    assert metrics['wait_time']['count'] == 2
+    assert metrics['latency']['count'] == 2
+    assert metrics['latency']['p95'] >= metrics['latency']['p50'] >= 0
+
+
+def test_purge_finished(queue):
+    """Test purge removes finished jobs only."""
+    done = queue.enqueue(make_submission(1, 'E1', 'BCCC'))
+    waiting = queue.enqueue(make_submission(2, 'E1', 'BCCC'))
+    queue.complete(queue.claim(1)[0]['ticket'], 'R')
+
+    assert queue.purge(0) == 1
+    assert queue.get(done) is None
+    assert queue.get(waiting)['status'] == QUEUED
+
+
+def test_workers_drain(storage, exam_id, queue):
+    """Test workers grade queued submissions and record the result id."""
+    engine = GradingEngine(storage)
+    tickets = [
+        queue.enqueue(make_submission(number, exam_id, 'BCCC' if number % 2 else 'ACCA'))
+        for number in range(5)
+    ]
+    bad = queue.enqueue(make_submission(9, 'MISSING', 'BCCC'))
+
+    assert GradingWorkers(queue, engine, batch_size=2).drain() == 6
+
+    for ticket in tickets:
+        job = queue.get(ticket)
+        assert job['status'] == DONE
+        assert storage.load_result(job['result_id'])['exam_id'] == exam_id
+    assert queue.get(bad)['status'] == FAILED
+    assert 'MISSING' in queue.get(bad)['message']
+    scores = sorted(r['score'] for r in storage.list_results(exam_id=exam_id))
+    assert scores == [5.0, 5.0, 5.0, 10.0, 10.0]
+
+
+
+def test_workers_settle_idempotency_keys(storage, exam_id, queue, temp_dir):
+    """Test a graded job stores its result id and a failed job frees its key."""
+    index = open_idempotency_index(temp_dir)
+    tickets = {}
+    for key, job_exam_id in (('good', exam_id), ('bad', 'MISSING')):
+        assert index.claim(key) is None
+        submission = dict(make_submission(len(tickets), job_exam_id, 'BCCC'), **{IDEMPOTENCY_KEY_FIELD: key})
+        tickets[key] = queue.enqueue(submission)
+        index.complete(key, {'ticket': tickets[key]})
+    other_worker = open_idempotency_index(temp_dir)
+    assert other_worker.get('good') == {'ticket': tickets['good']}
+
+    assert GradingWorkers(queue, GradingEngine(storage), idempotency=index).drain() == 2
+
+    result_id = queue.get(tickets['good'])['result_id']
+    assert IDEMPOTENCY_KEY_FIELD not in storage.load_submission('S000')
+    # Retries are answered without the queue row once it is purged
+    queue.purge(0)
+    assert other_worker.refresh('good') == {'ticket': tickets['good'], 'result_id': result_id}
+    assert open_idempotency_index(temp_dir).claim('bad') is None
+
+def test_regraded_job_replaces_its_result(storage, exam_id, temp_dir):
+    """Test a job claimed again after its lease expired keeps a single result."""
+    queue = JobQueue(os.path.join(temp_dir, 'queue.db'), lease_seconds=0.05)
+    engine = GradingEngine(storage)
+    recorded = []
+    engine.add_result_listener(lambda result, previous=None: recorded.append(previous))
+    workers = GradingWorkers(queue, engine)
+    ticket = queue.enqueue(make_submission(1, exam_id, 'BCCC'))
+    slow_job = queue.claim(1)[0]
+    time.sleep(0.1)
+    retried_job = queue.claim(1)[0]
+
+    assert workers.grade_job(retried_job) is True
+    # The first worker finishes late: the job is already done
+    assert workers.grade_job(slow_job) is False
+
+    results = storage.list_results(exam_id=exam_id)
+    assert [r['result_id'] for r in results] == [queue.get(ticket)['result_id']]
+    assert recorded[0] is None
+    assert recorded[1]['result_id'] == results[0]['result_id']
+    queue.close()
+
+
+def test_worker_threads(storage, exam_id, queue):
+    """Test background threads pick up jobs as they are enqueued."""
+    workers = GradingWorkers(queue, GradingEngine(storage), workers=2, poll_interval=0.05)
+    workers.start()
+    try:
+        tickets = [queue.enqueue(make_submission(number, exam_id, 'BCCC')) for number in range(10)]
+        deadline = time.time() + 10
+        while time.time() < deadline and any(queue.get(t)['status'] != DONE for t in tickets):
+            time.sleep(0.02)
+    finally:
+        workers.stop(timeout=5)
+
+    assert all(queue.get(ticket)['status'] == DONE for ticket in tickets)
+    assert len(storage.list_results(exam_id=exam_id)) == 10
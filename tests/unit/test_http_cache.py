@@ -0,0 +1,101 @@
+"""Unit tests for ETag / conditional GET responses."""
+
+import gzip
+import pytest
+from flask import Flask
+from src.views.http_cache import ResponseCache, combined_etag
+
+
+@pytest.fixture
+def app():
+    """Create a Flask app serving one cached resource."""
+    app = Flask(__name__)
+    app.config['calls'] = 0
+    app.config['version'] = 'v1'
+    cache = ResponseCache(max_entries=2)
+    
+    @app.route('/item')
+    def item():
+        def build_payload():
+            app.config['calls'] += 1
+            return {'version': app.config['version']}
+        return cache.conditional_json('item', app.config['version'], build_payload)
+    
+    @app.route('/compressed')
+    def compressed():
+        def build_payload():
+            app.config['calls'] += 1
+            return {'version': app.config['version']}
+        return cache.conditional_json('compressed', app.config['version'], build_payload, compress=True)
+    
+    return app
+
+
+def test_etag_and_not_modified(app):
+    """Test a matching If-None-Match gets a 304 without building the payload."""
+    client = app.test_client()
+    
+    first = client.get('/item')
+    assert first.status_code == 200
+    assert first.json == {'version': 'v1'}
+    assert first.headers['ETag'] == '"v1"'
+    assert first.headers['Cache-Control'] == 'no-cache'
+    
+    second = client.get('/item', headers={'If-None-Match': '"v1"'})
+    assert second.status_code == 304
+    assert second.headers['ETag'] == '"v1"'
+    
+    # Served from the bytes cache, payload built only once
+    assert client.get('/item').json == {'version': 'v1'}
+    assert app.config['calls'] == 1
+
+
+def test_changed_content_is_served(app):
+    """Test a new ETag invalidates both the client copy and the cache."""
+    client = app.test_client()
+    client.get('/item')
+    app.config['version'] = 'v2'
+    
+    response = client.get('/item', headers={'If-None-Match': '"v1"'})
+    assert response.status_code == 200
+    assert response.json == {'version': 'v2'}
+    assert app.config['calls'] == 2
+
+
+def test_gzip_representation(app):
+    """Test gzip bodies are served to clients that accept them."""
+    client = app.test_client()
+    
+    plain = client.get('/compressed')
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.headers['Vary'] == 'Accept-Encoding'
+    
+    zipped = client.get('/compressed', headers={'Accept-Encoding': 'gzip'})
+    assert zipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(zipped.data) == plain.data
+    assert zipped.headers['ETag'] != plain.headers['ETag']
+    assert app.config['calls'] == 1
+    
+    not_modified = client.get('/compressed', headers={
+        'Accept-Encoding': 'gzip', 'If-None-Match': zipped.headers['ETag']
+    })
+    assert not_modified.status_code == 304
+
+
+def test_cache_eviction():
+    """Test the cache keeps at most max_entries bodies."""
+    cache = ResponseCache(max_entries=2)
+    cache.put('a', 'e1', b'1')
+    cache.put('b', 'e1', b'2')
+    cache.put('c', 'e1', b'3')
+    
+    assert cache.get('a', 'e1') is None
+    assert cache.get('c', 'e1') == b'3'
+    assert cache.get('c', 'other') is None
+
+
+def test_combined_etag():
+    """Test combined ETags depend on every part and their order."""
+    assert combined_etag(['a', 'b']) == combined_etag(['a', 'b'])
+    assert combined_etag(['a', 'b']) != combined_etag(['ab'])
+    assert combined_etag(['a', 'b']) != combined_etag(['b', 'a'])
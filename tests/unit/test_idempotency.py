@@ -0,0 +1,150 @@
+"""Unit tests for idempotency keys of submissions."""
+
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from src.storage import create_storage
+from src.storage.idempotency import IdempotencyIndex, client_key, open_idempotency_index, submission_key
+from src.business.exam_manager import ExamManager
+from src.business.grading_engine import GradingEngine
+from src.models.submission import Submission
+
+
+def test_keys():
+    """Test derived keys ignore answer order and client keys are scoped."""
+    assert submission_key('E1', 'ST1', {'Q1': 'A', 'Q2': 'B'}) == submission_key('E1', 'ST1', {'Q2': 'B', 'Q1': 'A'})
+    assert submission_key('E1', 'ST1', {'Q1': 'A'}) != submission_key('E1', 'ST1', {'Q1': 'B'})
+    assert submission_key('E1', 'ST1', {'Q1': 'A'}) != submission_key('E1', 'ST2', {'Q1': 'A'})
+    assert client_key('k', 'E1', 'ST1') == client_key('k', 'E1', 'ST1')
+    assert client_key('k', 'E1', 'ST1') != client_key('k', 'E1', 'ST2')
+
+
+def test_claim_complete_release(temp_dir):
+    """Test the first claim owns the key and later claims get its record."""
+    index = IdempotencyIndex(temp_dir)
+    
+    assert index.claim('a') is None
+    assert index.get('a') is None
+    assert index.complete('a', {'result_id': 'R1'}) is True
+    assert index.claim('a') == {'result_id': 'R1'}
+    
+    # A fresh index (another worker) reads the record from disk
+    other = IdempotencyIndex(temp_dir)
+    assert other.claim('a') == {'result_id': 'R1'}
+    
+    index.release('a')
+    assert IdempotencyIndex(temp_dir).claim('a') is None
+
+
+def test_memory_hit_skips_disk(temp_dir):
+    """Test completed records are served from memory, bounded by max_memory."""
+    index = IdempotencyIndex(temp_dir, max_memory=2)
+    for key in ('a', 'b', 'c'):
+        index.claim(key)
+        index.complete(key, {'result_id': key})
+    shutil.rmtree(temp_dir)
+    
+    assert index.get('c') == {'result_id': 'c'}
+    assert index.get('b') == {'result_id': 'b'}
+    assert index.get('a') is None
+
+
+def test_waiter_gets_record_of_owner(temp_dir):
+    """Test a request for a pending key waits for the owner's record."""
+    owner = IdempotencyIndex(temp_dir)
+    waiter = IdempotencyIndex(temp_dir)
+    assert owner.claim('a') is None
+    
+    timer = threading.Timer(0.1, owner.complete, args=('a', {'result_id': 'R1'}))
+    timer.start()
+    assert waiter.claim('a') == {'result_id': 'R1'}
+    timer.join()
+
+
+def test_abandoned_claim_taken_over(temp_dir):
+    """Test an empty claim older than pending_timeout can be claimed again."""
+    index = IdempotencyIndex(temp_dir, pending_timeout=0.1)
+    assert index.claim('a') is None
+    
+    started = time.perf_counter()
+    assert IdempotencyIndex(temp_dir, pending_timeout=0.1).claim('a') is None
+    assert time.perf_counter() - started < 5
+
+
+def test_purge(temp_dir):
+    """Test purge removes old records but keeps pending claims."""
+    index = open_idempotency_index(temp_dir)
+    index.claim('done')
+    index.complete('done', {'result_id': 'R1'})
+    index.claim('pending')
+    old = time.time() - 3600
+    for path in index.directory.glob('*/*'):
+        os.utime(path, (old, old))
+    
+    assert index.purge(60) == 1
+    assert index.get('done') is None
+    assert IdempotencyIndex(index.directory).claim('done') is None
+
+
+def test_retries_grade_once(temp_dir):
+    """Test concurrent retries of one submission store a single result."""
+    storage = create_storage(base_path=temp_dir)
+    questions = [
+        {'content': f'Question {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': 'A'}
+        for i in range(1, 5)
+    ]
+    success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001", questions=questions)
+    engine = GradingEngine(storage)
+    index = open_idempotency_index(temp_dir)
+    answers = {'Q001': 'A', 'Q002': 'B', 'Q003': 'A', 'Q004': 'A'}
+    key = submission_key(exam_id, 'ST001', answers)
+    replies = []
+    
+    def submit(number):
+        record = index.claim(key)
+        if record is None:
+            submission = Submission(f'S{number:03d}', exam_id, 'ST001', answers)
+            success, msg, result = engine.grade(submission)
+            record = {'result_id': result['result_id']}
+            index.complete(key, record)
+        replies.append(record['result_id'])
+    
+    threads = [threading.Thread(target=submit, args=(number,)) for number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    
+    results = list(storage.iter_results())
+    assert len(results) == 1
+    assert replies == [results[0]['result_id']] * 8
+    storage.close()
+
+
+def _claim(directory, key, queue):
+    index = IdempotencyIndex(directory)
+    record = index.claim(key)
+    if record is None:
+        time.sleep(0.05)
+        record = {'result_id': f'R{os.getpid()}'}
+        index.complete(key, record)
+        queue.put(('owner', record['result_id']))
+    else:
+        queue.put(('retry', record['result_id']))
+
+
+def test_claim_across_processes(temp_dir):
+    """Test exactly one process owns a key claimed by several processes."""
+    context = multiprocessing.get_context('spawn')
+    queue = context.Queue()
+    processes = [context.Process(target=_claim, args=(temp_dir, 'a', queue)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    outcomes = [queue.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join(60)
+    
+    assert [role for role, _ in outcomes].count('owner') == 1
+    assert len({result_id for _, result_id in outcomes}) == 1
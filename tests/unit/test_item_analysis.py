@@ -0,0 +1,146 @@
+"""Unit tests for the incremental item analysis store."""
+
+import random
+import pytest
+from src.storage import create_storage
+from src.storage import item_analysis
+from src.storage.item_analysis import ItemAnalysisStore, build_analysis, summarize, open_item_analysis
+from src.business.exam_manager import ExamManager
+from src.business.grading_engine import GradingEngine
+from src.business.regrade import IncrementalRegrader
+from src.business.answer_key import AnswerKey
+from src.business.bulk_grading import BulkGrader
+from src.models.result import Result
+
+
+def make_result(exam_id, key, answers, compact=False):
+    """Graded result of one student for a key like 'BCCA' ("" = blank answer)."""
+    details = [
+        {'question_id': f'Q{i:03d}', 'student_answer': answer, 'correct_answer': correct,
+         'is_correct': answer == correct}
+        for i, (answer, correct) in enumerate(zip(answers, key), 1)
+    ]
+    correct_count = sum(detail['is_correct'] for detail in details)
+    result = {
+        'result_id': f'R{random.getrandbits(32):08X}',
+        'submission_id': 'S1',
+        'exam_id': exam_id,
+        'student_id': 'ST1',
+        'score': round(correct_count / len(key) * 10, 2),
+        'total_questions': len(key),
+        'correct_answers': correct_count,
+        'wrong_answers': len(key) - correct_count,
+        'graded_at': '2024-01-01T00:00:00Z',
+        'details': details
+    }
+    return Result.compact_dict(result) if compact else result
+
+
+def test_difficulty_discrimination_and_choices():
+    """Test p-values, upper/lower discrimination and distractor counts."""
+    key = 'ABCD'
+    sheets = ['ABCD', 'ABCD', 'ABCA', 'ABAA', 'ACAA', 'BCAA', 'BCA', 'DCAB', 'ABCD', 'ABDD']
+    analysis = item_analysis.empty_analysis('E1')
+    for answers in sheets:
+        item_analysis.add_result(analysis, make_result('E1', key, answers.ljust(4)))
+    
+    summary = summarize(analysis)
+    q1, q2, q3, q4 = summary['questions']
+    
+    assert summary['count'] == 10
+    assert q1['difficulty'] == 0.7
+    assert q1['choices'] == {'A': 7, 'B': 2, 'C': 0, 'D': 1, 'blank': 0}
+    assert q4['choices']['blank'] == 1
+    # Upper 27% (2.7 students, all scoring 10) answer everything right;
+    # the lowest 2.7 students never get Q2 or Q3 right
+    assert q2['discrimination'] == 1.0
+    assert q3['discrimination'] == 1.0
+    assert 0 < q1['discrimination'] <= 1
+
+
+@pytest.mark.parametrize('numpy_installed', [True, False])
+@pytest.mark.parametrize('compact', [True, False])
+def test_rebuild_matches_incremental(monkeypatch, numpy_installed, compact):
+    """Test the (vectorized) rebuild equals adding results one by one."""
+    if not numpy_installed:
+        monkeypatch.setattr(item_analysis, 'np', None)
+    rng = random.Random(7)
+    key = 'ABCDABCDAB'
+    results = [
+        make_result('E1', key, [rng.choice(['A', 'B', 'C', 'D', '']) for _ in key], compact)
+        for _ in range(200)
+    ]
+    
+    incremental = item_analysis.empty_analysis('E1')
+    for result in results:
+        item_analysis.add_result(incremental, result)
+    
+    assert build_analysis('E1', results) == incremental
+
+
+def test_store_records_only_built_exams(temp_dir):
+    """Test results are tallied once an exam is built, and regrades mark it stale."""
+    store = ItemAnalysisStore(temp_dir)
+    first = make_result('E1', 'AB', 'AB')
+    
+    store.record(first)
+    assert store.get('E1') is None
+    assert store.needs_rebuild('E1')
+    
+    store.rebuild_exam('E1', [first])
+    store.record(make_result('E1', 'AB', 'AA'))
+    assert not store.needs_rebuild('E1')
+    assert [q['difficulty'] for q in store.get('E1')['questions']] == [1.0, 0.5]
+    
+    store.record(make_result('E1', 'AB', 'BB'), previous=first)
+    assert store.needs_rebuild('E1')
+
+
+def test_engine_and_regrade_keep_analysis_current(temp_dir):
+    """Test inline updates on grading and a rebuild after the key changes."""
+    storage = create_storage(base_path=temp_dir, backend='sqlite')
+    questions = [
+        {'content': f'Question {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': answer}
+        for i, answer in enumerate('BC', 1)
+    ]
+    success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001", questions=questions)
+    store = open_item_analysis(storage.base_path)
+    engine = GradingEngine(storage)
+    engine.add_result_listener(store.record)
+    store.rebuild_exam(exam_id, storage.iter_results(exam_id=exam_id))
+    
+    for number, answers in enumerate(['BC', 'BA', 'AC']):
+        engine.grade({'submission_id': f'S{number}', 'exam_id': exam_id, 'student_id': f'ST{number}',
+                      'answers': dict(zip(['Q001', 'Q002'], answers))})
+    assert [q['difficulty'] for q in store.get(exam_id)['questions']] == [0.6667, 0.6667]
+    
+    old_key = engine.answer_key(exam_id)
+    exam = storage.load_exam(exam_id)
+    exam['questions'][0]['correct_answer'] = 'A'
+    storage.save_exam(exam)
+    IncrementalRegrader(storage, engine=engine).regrade_exam(exam_id, old_key, AnswerKey.from_exam(exam))
+    
+    assert store.needs_rebuild(exam_id)
+    store.rebuild_exam(exam_id, storage.iter_results(exam_id=exam_id))
+    questions = store.get(exam_id)['questions']
+    assert [q['difficulty'] for q in questions] == [0.3333, 0.6667]
+    assert questions[0]['correct_answer'] == 'A'
+    storage.close()
+
+
+def test_default_engines_update_analysis(temp_dir):
+    """Test results graded outside the web app reach the built tallies."""
+    storage = create_storage(base_path=temp_dir)
+    questions = [
+        {'content': f'Question {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': answer}
+        for i, answer in enumerate('BC', 1)
+    ]
+    success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001", questions=questions)
+    store = open_item_analysis(storage.base_path)
+    store.rebuild_exam(exam_id, storage.iter_results(exam_id=exam_id))
+    
+    summary = BulkGrader(storage).grade_sheet(exam_id, ['HS1,B,C', 'HS2,B,A', 'HS3,A,C'])
+    assert summary['graded'] == 3
+    assert not store.needs_rebuild(exam_id)
+    assert [q['difficulty'] for q in store.get(exam_id)['questions']] == [0.6667, 0.6667]
+    storage.close()
@@ -0,0 +1,200 @@
+"""Unit tests for reading scanned answer sheets."""
+
+import csv
+import io
+import os
+import struct
+import zlib
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from src.storage import create_storage
+from src.business.exam_manager import ExamManager
+from src.omr import batch, image as omr_image
+from src.omr.batch import ScanGrader
+from src.omr.image import decode_pgm, decode_png, read_image, write_pgm, write_png
+from src.omr.reader import LOW_CONFIDENCE, SheetReader
+from src.omr.template import SheetTemplate
+
+
+def filtered_png(pixels, filters):
+    """PNG bytes of an RGB image, row y encoded with filter filters[y]."""
+    height, width, channels = pixels.shape
+    rows = pixels.reshape(height, width * channels).astype(np.int64)
+    data = b''
+    prior = np.zeros(width * channels, dtype=np.int64)
+    for y, kind in enumerate(filters):
+        row = rows[y]
+        left = np.concatenate([np.zeros(channels, dtype=np.int64), row[:-channels]])
+        upper_left = np.concatenate([np.zeros(channels, dtype=np.int64), prior[:-channels]])
+        if kind == 0:
+            predicted = np.zeros_like(row)
+        elif kind == 1:
+            predicted = left
+        elif kind == 2:
+            predicted = prior
+        elif kind == 3:
+            predicted = (left + prior) // 2
+        else:
+            estimate = left + prior - upper_left
+            pa, pb, pc = np.abs(estimate - left), np.abs(estimate - prior), np.abs(estimate - upper_left)
+            predicted = np.where((pa <= pb) & (pa <= pc), left, np.where(pb <= pc, prior, upper_left))
+        data += bytes([kind]) + ((row - predicted) % 256).astype(np.uint8).tobytes()
+        prior = row
+    
+    def chunk(kind, body):
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+    
+    header = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(data))
+            + chunk(b'IEND', b''))
+
+
+def test_png_row_filters():
+    """Test the fallback PNG decoder undoes all five row filters."""
+    rng = np.random.default_rng(1)
+    pixels = rng.integers(0, 256, size=(5, 7, 3), dtype=np.uint8)
+    gray = np.round(pixels @ np.array([0.299, 0.587, 0.114])).astype(np.uint8)
+    
+    assert np.array_equal(decode_png(filtered_png(pixels, [0, 1, 2, 3, 4])), gray)
+    assert np.array_equal(decode_png(filtered_png(pixels, [4, 3, 2, 1, 0])), gray)
+
+
+def test_image_files_round_trip(temp_dir, monkeypatch):
+    """Test PGM (binary, ASCII, 16 bit) and PNG files decode to the same pixels."""
+    monkeypatch.setattr(omr_image, 'Image', None)
+    pixels = np.arange(48, dtype=np.uint8).reshape(6, 8) * 5
+    write_pgm(f'{temp_dir}/a.pgm', pixels)
+    write_png(f'{temp_dir}/a.png', pixels)
+    
+    assert np.array_equal(read_image(f'{temp_dir}/a.pgm'), pixels)
+    assert np.array_equal(read_image(f'{temp_dir}/a.png'), pixels)
+    ascii_pgm = b'P2\n# comment\n3 2\n15\n0 15 5\n10 0 15\n'
+    assert decode_pgm(ascii_pgm).tolist() == [[0, 255, 85], [170, 0, 255]]
+    wide_pgm = b'P5 2 1 65535\n' + struct.pack('>HH', 0, 65535)
+    assert decode_pgm(wide_pgm).tolist() == [[0, 255]]
+    with pytest.raises(ValueError):
+        decode_pgm(b'P5\n3 2\n255\n\x00')
+
+
+def test_damaged_image_files(temp_dir, monkeypatch):
+    """Test truncated and corrupt PGM/PNG files become failed readings."""
+    monkeypatch.setattr(omr_image, 'Image', None)
+    pixels = np.full((6, 8), 200, dtype=np.uint8)
+    write_png(f'{temp_dir}/a.png', pixels)
+    with open(f'{temp_dir}/a.png', 'rb') as f:
+        png = f.read()
+    idat = png.index(b'IDAT') + 4
+    damaged = {
+        'header.pgm': b'P5\n10 10',
+        'comment.pgm': b'P2\n# no newline',
+        'pixels.pgm': b'P5\n8 6\n255\n' + bytes(10),
+        'cut.png': png[:len(omr_image.PNG_SIGNATURE) + 5],
+        'ihdr.png': png[:len(omr_image.PNG_SIGNATURE) + 12],
+        'idat.png': png[:idat] + b'\xff' * 8 + png[idat + 8:],
+        'short.png': png[:idat] + zlib.compress(bytes(5))
+    }
+    
+    for name, data in damaged.items():
+        decode = decode_pgm if name.endswith('.pgm') else decode_png
+        with pytest.raises(ValueError):
+            decode(data)
+        with open(f'{temp_dir}/{name}', 'wb') as f:
+            f.write(data)
+        reading = SheetReader(SheetTemplate(questions=10)).read_file(f'{temp_dir}/{name}')
+        assert reading['student_id'] is None
+        assert 'Không đọc được ảnh' in reading['error']
+
+
+@pytest.mark.parametrize('scan', [
+    {},
+    {'pixels_per_mm': 3.0, 'angle': 2.0, 'offset': (4.0, -3.0), 'noise': 15.0},
+    {'pixels_per_mm': 6.0, 'angle': -1.5, 'offset': (-5.0, 2.0), 'noise': 25.0, 'seed': 3}
+])
+def test_read_rendered_sheet(scan):
+    """Test id and answers are read from shifted, rotated, noisy scans."""
+    template = SheetTemplate(questions=50)
+    answers = ['A', 'B', 'C', 'D', ''] * 10
+    
+    reading = SheetReader(template).read(template.render('042917', answers, **scan))
+    
+    assert reading['error'] is None
+    assert reading['student_id'] == '042917'
+    assert reading['answers'] == answers
+    assert reading['review'] == []
+    assert reading['confidence'] > LOW_CONFIDENCE
+
+
+def test_double_and_faint_marks_need_review():
+    """Test double marks are blank and faint marks get a low confidence."""
+    template = SheetTemplate(questions=10)
+    answers = ['A', 'BC', 'C', 'D', 'A', 'B', 'C', 'D', 'A', 'B']
+    
+    reading = SheetReader(template).read(template.render('123456', answers, faint=[5]))
+    
+    assert reading['answers'][:5] == ['A', '', 'C', 'D', 'A']
+    assert reading['multiple'] == [2]
+    assert reading['review'] == [2, 6]
+    assert reading['confidence'] < LOW_CONFIDENCE
+
+
+def test_unreadable_sheets():
+    """Test missing marks and a missing id digit are reported."""
+    template = SheetTemplate(questions=10)
+    reader = SheetReader(template)
+    
+    assert 'định vị' in reader.read(np.full((1188, 840), 255, dtype=np.uint8))['error']
+    reading = reader.read(template.render('12 456', ['A'] * 10))
+    assert reading['student_id'] is None
+    assert 'mã học sinh' in reading['error']
+    with pytest.raises(ValueError):
+        SheetTemplate(questions=SheetTemplate.max_questions() + 1)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_grade_folder(temp_dir, monkeypatch, workers):
+    """Test a folder of scans is read in parallel, graded and reported."""
+    monkeypatch.setattr(batch, 'OMR_CHUNK_SIZE', 2)
+    storage = create_storage(base_path=f'{temp_dir}/data')
+    questions = [
+        {'content': f'Question {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': answer}
+        for i, answer in enumerate('ABCDABCDAB', 1)
+    ]
+    success, msg, exam_id = ExamManager(storage).create_exam("Test Exam", "T001", questions=questions)
+    template = SheetTemplate(questions=10)
+    scans = f'{temp_dir}/scans'
+    os.makedirs(scans)
+    sheets = {
+        '01.png': ('100001', 'ABCDABCDAB'),
+        '02.pgm': ('100002', 'ABCDABCDAA'),
+        '03.png': ('100003', 'BBBBBBBBBB'),
+        '04.png': ('100004', 'AACDABCDAB'),
+        '05.pgm': ('', 'ABCDABCDAB')
+    }
+    for name, (student_id, answers) in sheets.items():
+        writer = write_pgm if name.endswith('.pgm') else write_png
+        writer(f'{scans}/{name}', template.render(student_id, list(answers), angle=1.0, noise=10.0))
+    with open(f'{scans}/06.png', 'wb') as f:
+        f.write(b'not an image')
+    with open(f'{scans}/notes.txt', 'w') as f:
+        f.write('ignored')
+    
+    report = io.StringIO()
+    summary = ScanGrader(storage, workers=workers).grade_folder(exam_id, scans, report)
+    
+    assert (summary['total'], summary['graded'], summary['failed']) == (6, 4, 2)
+    assert summary['workers'] == workers
+    assert summary['latency']['count'] == 6
+    assert summary['latency']['p95'] >= summary['latency']['p50'] > 0
+    assert summary['throughput'] > 0
+    assert [error['file'] for error in summary['errors']] == ['05.pgm', '06.png']
+    scores = {r['student_id']: r['score'] for r in storage.list_results(exam_id=exam_id)}
+    assert scores == {'100001': 10.0, '100002': 9.0, '100003': 3.0, '100004': 9.0}
+    rows = list(csv.reader(io.StringIO(report.getvalue())))
+    assert len(rows) == 7
+    assert rows[1][:4] == ['01.png', '100001', '10.0', '10']
+    
+    with pytest.raises(ValueError):
+        ScanGrader(storage).grade_folder('E404', scans)
+    storage.close()
@@ -0,0 +1,147 @@
+"""Unit tests for ParallelGrader."""
+
+import os
+import pytest
+from src.business import parallel_grading
+from src.business.exam_manager import ExamManager
+from src.business.grading_engine import GradingEngine
+from src.business.parallel_grading import ParallelGrader
+from src.models.submission import Submission
+
+
+@pytest.fixture
+def exam_id(storage, exam_id):
+    """Add 10 submissions to the shared exam (key B, C, C, C)."""
+    for i in range(10):
+        answers = ['B', 'C', 'C', 'C'] if i % 2 == 0 else ['A', 'C', 'A', 'C']
+        storage.save_submission(Submission(
+            submission_id=f'S{i:03d}',
+            exam_id=exam_id,
+            student_id=f'ST{i:03d}',
+            answers=dict(zip(['Q001', 'Q002', 'Q003', 'Q004'], answers))
+        ).to_dict())
+    return exam_id
+
+
+def test_grade_pending_in_process(storage, exam_id):
+    """Test grading all pending submissions in chunks with progress."""
+    progress = []
+    summary = ParallelGrader(storage, workers=1, chunk_size=3).run(
+        progress=lambda done, total: progress.append((done, total))
+    )
+    
+    assert summary['total'] == 10
+    assert summary['graded'] == 10
+    assert summary['failed'] == 0
+    assert progress == [(3, 10), (6, 10), (9, 10), (10, 10)]
+    scores = sorted(r['score'] for r in storage.list_results(exam_id=exam_id))
+    assert scores == [5.0] * 5 + [10.0] * 5
+
+
+def test_pending_skips_graded(storage, exam_id):
+    """Test a second run grades nothing and regrade replaces results."""
+    grader = ParallelGrader(storage, workers=1, chunk_size=4)
+    grader.run(exam_id=exam_id)
+    result_ids = {r['result_id'] for r in storage.list_results(exam_id=exam_id)}
+    
+    assert grader.run(exam_id=exam_id)['total'] == 0
+    
+    summary = grader.run(exam_id=exam_id, regrade=True)
+    assert summary['graded'] == 10
+    assert {r['result_id'] for r in storage.list_results(exam_id=exam_id)} == result_ids
+
+
+def test_grade_with_process_pool(storage, exam_id):
+    """Test grading with worker processes gives the same results."""
+    storage.save_submission(Submission(
+        submission_id='S999', exam_id='EXAM_MISSING', student_id='ST999', answers={}
+    ).to_dict())
+    
+    summary = ParallelGrader(storage, workers=2, chunk_size=4).run()
+    
+    assert summary['total'] == 11
+    assert summary['graded'] == 10
+    assert summary['errors'] == [('S999', "Đề thi không tồn tại: EXAM_MISSING")]
+    assert len(storage.list_results(exam_id=exam_id)) == 10
+
+
+def failing_chunk(submission_ids):
+    """Worker chunk function that raises on, or crashes at, submission S004."""
+    if 'S004' in submission_ids:
+        if os.environ.get('FAIL_CHUNK') == 'crash':
+            os._exit(1)
+        raise RuntimeError("boom")
+    return parallel_grading._grade_chunk_impl(submission_ids)
+
+
+@pytest.mark.parametrize('failure', ['raise', 'crash'])
+def test_failed_worker_chunks_are_counted(storage, exam_id, monkeypatch, failure):
+    """Test a chunk whose worker raises or dies is failed, not fatal."""
+    monkeypatch.setenv('FAIL_CHUNK', failure)
+    monkeypatch.setattr(parallel_grading, '_grade_chunk_impl', parallel_grading._grade_chunk, raising=False)
+    monkeypatch.setattr(parallel_grading, '_grade_chunk', failing_chunk)
+    
+    summary = ParallelGrader(storage, workers=2, chunk_size=4).run()
+    
+    assert summary['total'] == 10
+    assert summary['graded'] + summary['failed'] == 10
+    # A crash breaks the pool, so chunks still pending fail with it
+    assert summary['failed'] == 4 if failure == 'raise' else summary['failed'] >= 4
+    messages = dict(summary['errors'])
+    assert messages['S004'].startswith("Lỗi khi chấm: ")
+    if failure == 'raise':
+        assert messages['S004'] == "Lỗi khi chấm: boom"
+    graded_ids = {r['submission_id'] for r in storage.list_results(exam_id=exam_id)}
+    assert len(graded_ids) == summary['graded']
+    assert not graded_ids & set(messages)
+
+
+def test_invalid_chunk_size(storage):
+    """Test chunk_size must be positive."""
+    with pytest.raises(ValueError):
+        ParallelGrader(storage, chunk_size=0)
+
+
+def test_listeners_see_replaced_results(storage, exam_id):
+    """Test regrading notifies listeners with the previous result."""
+    engine = GradingEngine(storage)
+    seen = []
+    engine.add_result_listener(lambda result, previous: seen.append((result['result_id'], previous)))
+    grader = ParallelGrader(storage, workers=1, engine=engine)
+    
+    grader.run()
+    assert len(seen) == 10 and all(previous is None for _, previous in seen)
+    
+    seen.clear()
+    grader.run(regrade=True)
+    assert len(seen) == 10
+    assert all(previous['result_id'] == result_id for result_id, previous in seen)
+
+
+def test_regrade_replaces_duplicates_and_skips_stale_ids(storage, exam_id):
+    """Test every duplicate result is replaced and stale ids are skipped."""
+    grader = ParallelGrader(storage, workers=1)
+    grader.run(exam_id=exam_id)
+    first = storage.list_results(exam_id=exam_id)[0]
+    storage.save_result(dict(first, result_id='RDUP0001', score=0.0))
+    
+    success, msg, other_exam = ExamManager(storage).create_exam("Other", "T001", questions=[
+        {'content': 'Question', 'choices': {'A': 'a', 'B': 'b'}, 'correct_answer': 'A'}
+    ])
+    storage.save_submission(Submission(
+        submission_id='S900', exam_id=other_exam, student_id='ST900', answers={'Q001': 'A'}
+    ).to_dict())
+    # Stale index entries: a deleted submission and one of another exam
+    list_submission_ids = storage.list_submission_ids
+    storage.list_submission_ids = lambda exam=None: list_submission_ids(exam) + ['S404', 'S900']
+    
+    summary = grader.run(exam_id=exam_id, regrade=True)
+    
+    assert (summary['graded'], summary['failed'], summary['skipped']) == (10, 0, 2)
+    assert sorted(summary['errors']) == [
+        ('S404', "Bài làm không tồn tại: S404"),
+        ('S900', f"Bài làm không thuộc đề thi: {exam_id}")
+    ]
+    copies = [r for r in storage.list_results(exam_id=exam_id) if r['submission_id'] == first['submission_id']]
+    assert sorted(r['result_id'] for r in copies) == sorted([first['result_id'], 'RDUP0001'])
+    assert all(r['score'] == first['score'] for r in copies)
@@ -0,0 +1,149 @@
+"""Unit tests for incremental regrading."""
+
+import json
+import os
+import time
+import pytest
+from src.business.answer_key import AnswerKey
+from src.business.exam_manager import ExamManager
+from src.business.grading_engine import GradingEngine
+from src.business.regrade import diff_answer_keys, IncrementalRegrader, RegradeJobs
+from src.models.result import Result
+from src.models.submission import Submission
+
+
+def make_questions(key):
+    return [
+        {'question_id': f'Q{i:03d}', 'content': f'Question {i}', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'}, 'correct_answer': answer}
+        for i, answer in enumerate(key, 1)
+    ]
+
+
+@pytest.fixture
+def graded_exam(storage):
+    """Create an exam with key B, C, C, C and grade three submissions."""
+    manager = ExamManager(storage)
+    success, msg, exam_id = manager.create_exam("Test Exam", "T001", questions=make_questions('BCCC'))
+    engine = GradingEngine(storage)
+    for i, answers in enumerate(['BCCC', 'BCAC', 'ACCC']):
+        submission = Submission(
+            submission_id=f'S{i:03d}',
+            exam_id=exam_id,
+            student_id=f'ST{i:03d}',
+            answers=dict(zip(['Q001', 'Q002', 'Q003', 'Q004'], answers))
+        )
+        storage.save_submission(submission.to_dict())
+        engine.grade_submission(submission.submission_id)
+    return exam_id
+
+
+def scores_by_student(storage, exam_id):
+    return {r['student_id']: r['score'] for r in storage.list_results(exam_id=exam_id)}
+
+
+def test_diff_answer_keys():
+    """Test only changed questions are reported."""
+    old = AnswerKey('E1', ['Q1', 'Q2', 'Q3'], ['A', 'B', 'C'])
+    
+    assert diff_answer_keys(old, AnswerKey('E1', ['Q1', 'Q2', 'Q3'], ['A', 'D', 'C'])) == {'Q2'}
+    assert diff_answer_keys(old, AnswerKey('E1', ['Q1', 'Q2', 'Q3'], ['A', 'B', 'C'])) == set()
+    assert diff_answer_keys(old, AnswerKey('E1', ['Q1', 'Q2'], ['A', 'B'])) is None
+
+
+def test_regrade_changed_question(storage, graded_exam):
+    """Test fixing one correct answer updates the affected results."""
+    old_key = AnswerKey.from_exam(storage.load_exam(graded_exam))
+    ExamManager(storage).update_exam(graded_exam, {'questions': make_questions('ACCC')})
+    
+    # Submissions are not needed when only answers change
+    for i in range(3):
+        storage.delete_submission(f'S{i:03d}')
+    summary = IncrementalRegrader(storage).regrade_exam(graded_exam, old_key)
+    
+    assert summary['changed_questions'] == ['Q001']
+    assert summary['total'] == 3
+    assert summary['changed'] == 3
+    assert summary['failed'] == 0
+    assert scores_by_student(storage, graded_exam) == {'ST000': 7.5, 'ST001': 5.0, 'ST002': 10.0}
+    result = Result.verbose_dict(storage.list_results(exam_id=graded_exam, student_id='ST002')[0])
+    assert result['details'][0] == {
+        'question_id': 'Q001', 'student_answer': 'A', 'correct_answer': 'A', 'is_correct': True
+    }
+    assert result['wrong_answers'] == 0
+
+
+def test_regrade_streams_and_keeps_graded_at(storage, graded_exam):
+    """Test results are read in batches and keep their original graded_at."""
+    graded_at = {r['result_id']: r['graded_at'] for r in storage.list_results(exam_id=graded_exam)}
+    old_key = AnswerKey.from_exam(storage.load_exam(graded_exam))
+    ExamManager(storage).update_exam(graded_exam, {'questions': make_questions('BCAC')})
+    storage.list_results = lambda **filters: pytest.fail("results should be streamed")
+    progress = []
+    
+    summary = IncrementalRegrader(storage, batch_size=2).regrade_exam(
+        graded_exam, old_key, progress=lambda done, total: progress.append((done, total))
+    )
+    
+    assert (summary['total'], summary['changed']) == (3, 3)
+    assert progress == [(2, 3), (3, 3)]
+    for result in storage.iter_results(exam_id=graded_exam):
+        assert result['graded_at'] == graded_at[result['result_id']]
+        assert result['regraded_at'] >= result['graded_at']
+
+
+def test_regrade_unchanged_key(storage, graded_exam):
+    """Test nothing is rewritten when the key did not change."""
+    old_key = AnswerKey.from_exam(storage.load_exam(graded_exam))
+    
+    summary = IncrementalRegrader(storage).regrade_exam(graded_exam, old_key)
+    
+    assert summary['changed_questions'] == []
+    assert summary['total'] == 0
+
+
+def test_regrade_question_list_changed(storage, graded_exam):
+    """Test removing a question regrades from the submissions."""
+    old_key = AnswerKey.from_exam(storage.load_exam(graded_exam))
+    ExamManager(storage).update_exam(graded_exam, {'questions': make_questions('BCC')})
+    
+    summary = IncrementalRegrader(storage).regrade_exam(graded_exam, old_key)
+    
+    assert summary['changed_questions'] is None
+    assert scores_by_student(storage, graded_exam) == {'ST000': 10.0, 'ST001': 6.67, 'ST002': 6.67}
+    assert all(r['total_questions'] == 3 for r in storage.list_results(exam_id=graded_exam))
+
+
+def test_regrade_job(storage, graded_exam):
+    """Test the background job reports progress and the changed count."""
+    old_key = AnswerKey.from_exam(storage.load_exam(graded_exam))
+    ExamManager(storage).update_exam(graded_exam, {'questions': make_questions('BCAC')})
+    jobs = RegradeJobs(storage)
+    
+    job = jobs.wait(jobs.start(graded_exam, old_key), timeout=10)
+    
+    assert job['status'] == 'done'
+    assert job['done'] == job['total'] == 3
+    assert job['changed'] == 3
+    assert jobs.get('JMISSING') is None
+
+
+def test_regrade_job_visible_to_other_workers(storage, graded_exam):
+    """Test job state is shared through files and survives a restart."""
+    old_key = AnswerKey.from_exam(storage.load_exam(graded_exam))
+    ExamManager(storage).update_exam(graded_exam, {'questions': make_questions('BCAC')})
+    jobs = RegradeJobs(storage)
+    job_id = jobs.start(graded_exam, old_key)
+    jobs.wait(job_id, timeout=10)
+    
+    # Another gunicorn worker (or this one after a restart)
+    other = RegradeJobs(storage)
+    job = other.get(job_id)
+    assert job['status'] == 'done'
+    assert job['changed'] == 3
+    assert other.get('../../etc/passwd') is None
+    
+    # A running job whose worker died is reported as failed
+    state_path = os.path.join(str(storage.base_path), 'regrade_jobs', f'{job_id}.json')
+    with open(state_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(job, status='running', updated_at=time.time() - 3600), f)
+    assert RegradeJobs(storage).get(job_id)['status'] == 'failed'
@@ -0,0 +1,57 @@
+"""Unit tests for streaming result export."""
+
+import gzip
+import io
+import zipfile
+import pytest
+from src.business.result_export import iter_csv, iter_exam_csv, gzip_chunks, zip_exams_csv
+
+
+@pytest.fixture
+def storage(storage):
+    """Add results of two exams to the shared storage fixture."""
+    for i, student_id in enumerate(['ST003', 'ST001', 'ST002', 'ST004']):
+        storage.save_result({
+            'result_id': f'R{i:03d}',
+            'submission_id': f'S{i:03d}',
+            'exam_id': 'E001' if i < 3 else 'E002',
+            'student_id': student_id,
+            'score': 7.5,
+            'total_questions': 4,
+            'correct_answers': 3,
+            'wrong_answers': 1,
+            'graded_at': f'2024-01-0{4 - i}T00:00:00Z'
+        })
+    return storage
+
+
+def csv_students(data: bytes):
+    return [line.split(',')[0] for line in data.decode('utf-8').splitlines()[1:]]
+
+
+def test_iter_csv_chunks():
+    """Test rows are yielded in chunks and the header comes first."""
+    chunks = list(iter_csv(([i] for i in range(5)), ['n'], rows_per_chunk=2))
+    
+    assert len(chunks) == 3
+    assert b''.join(chunks).decode('utf-8').splitlines() == ['n', '0', '1', '2', '3', '4']
+
+
+def test_exam_csv_sort_orders(storage):
+    """Test the export is sorted by student_id or graded_at."""
+    assert csv_students(b''.join(iter_exam_csv(storage, 'E001'))) == ['ST001', 'ST002', 'ST003']
+    assert csv_students(b''.join(iter_exam_csv(storage, 'E001', 'graded_at'))) == ['ST002', 'ST001', 'ST003']
+
+
+def test_gzip_export(storage):
+    """Test the gzip stream decompresses to the plain CSV."""
+    plain = b''.join(iter_exam_csv(storage, 'E001'))
+    assert gzip.decompress(b''.join(gzip_chunks(iter_exam_csv(storage, 'E001')))) == plain
+
+
+def test_zip_several_exams(storage):
+    """Test one archive holds a CSV per exam."""
+    archive = zipfile.ZipFile(io.BytesIO(b''.join(zip_exams_csv(storage, ['E001', 'E002']))))
+    
+    assert archive.namelist() == ['ket_qua_E001.csv', 'ket_qua_E002.csv']
+    assert csv_students(archive.read('ket_qua_E002.csv')) == ['ST004']
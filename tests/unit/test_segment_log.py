@@ -0,0 +1,202 @@
+"""Unit tests for the segment log storage mode."""
+
+import os
+import pytest
+from src.storage.file_storage import FileStorageManager
+from src.storage.segment_log import SegmentLog
+
+
+def make_result(result_id, exam_id='E001', student_id='ST001', score=10.0):
+    return {
+        'result_id': result_id,
+        'submission_id': f'S{result_id}',
+        'exam_id': exam_id,
+        'student_id': student_id,
+        'score': score,
+        'total_questions': 1,
+        'correct_answers': 1 if score else 0,
+        'wrong_answers': 0 if score else 1,
+        'graded_at': '2024-01-01T00:00:00Z',
+        'details': []
+    }
+
+
+def test_segments_mode_round_trip(temp_dir):
+    """Test saving and loading submissions and results in segment mode."""
+    storage = FileStorageManager(base_path=temp_dir, storage_mode='segments')
+    submission = {'submission_id': 'S001', 'exam_id': 'E001', 'student_id': 'ST001',
+                  'submitted_at': '2024-01-01T00:00:00Z', 'answers': {'Q001': 'A'}}
+    
+    assert storage.save_submission(submission) is True
+    assert storage.save_result(make_result('R001')) is True
+    
+    assert storage.load_submission('S001') == submission
+    assert storage.load_result('R001')['score'] == 10.0
+    assert storage.load_result('MISSING') is None
+    
+    # No per-record files are created
+    assert os.listdir(os.path.join(temp_dir, 'submissions')) == []
+    assert os.listdir(os.path.join(temp_dir, 'results')) == []
+    storage.close()
+
+
+def test_segments_index_rebuilt_on_restart(temp_dir):
+    """Test that a new manager rebuilds the offset index from segments."""
+    storage = FileStorageManager(base_path=temp_dir, storage_mode='segments')
+    for i in range(5):
+        storage.save_result(make_result(f'R{i:03d}', student_id=f'ST{i:03d}'))
+    # Newer version of a record wins
+    storage.save_result(make_result('R002', student_id='ST002', score=0.0))
+    storage.close()
+    
+    reopened = FileStorageManager(base_path=temp_dir, storage_mode='segments')
+    assert reopened.load_result('R002')['score'] == 0.0
+    assert len(reopened.list_results()) == 5
+    assert len(reopened.list_results(student_id='ST004')) == 1
+    reopened.close()
+
+
+def test_segments_rotate(temp_dir):
+    """Test that segments rotate once they reach the size limit."""
+    log = SegmentLog(os.path.join(temp_dir, 'log'), max_segment_bytes=300)
+    for i in range(20):
+        log.append(f'R{i:03d}', make_result(f'R{i:03d}'))
+    
+    segments = [name for name in os.listdir(os.path.join(temp_dir, 'log')) if name.endswith('.jsonl')]
+    assert len(segments) > 1
+    for i in range(20):
+        assert log.read(f'R{i:03d}')['result_id'] == f'R{i:03d}'
+    log.close()
+
+
+def test_segments_read_sees_other_process_updates(temp_dir):
+    """Test a reader serves versions appended by another log instance."""
+    log_dir = os.path.join(temp_dir, 'log')
+    reader = SegmentLog(log_dir, max_segment_bytes=600)
+    writer = SegmentLog(log_dir, max_segment_bytes=600)
+    writer.append('R001', make_result('R001', score=1.0))
+    assert reader.read('R001')['score'] == 1.0
+    
+    writer.append('R001', make_result('R001', score=2.0))
+    assert reader.read('R001')['score'] == 2.0
+    
+    # Newer versions in segments started after the reader's last scan
+    for i in range(10):
+        writer.append(f'R{i + 100:03d}', make_result(f'R{i + 100:03d}'))
+    writer.append('R001', make_result('R001', score=3.0))
+    assert len([name for name in os.listdir(log_dir) if name.endswith('.jsonl')]) > 1
+    assert reader.read('R001')['score'] == 3.0
+    
+    # Appends of the reader go to the newest segment too
+    reader.append('R001', make_result('R001', score=4.0))
+    assert writer.read('R001')['score'] == 4.0
+    writer.delete('R001')
+    assert reader.read('R001') is None
+    reader.close()
+    writer.close()
+
+
+def test_segments_delete_and_torn_tail(temp_dir):
+    """Test tombstones and recovery from a half-written last line."""
+    log_dir = os.path.join(temp_dir, 'log')
+    log = SegmentLog(log_dir)
+    log.append('R001', make_result('R001'))
+    log.append('R002', make_result('R002'))
+    assert log.delete('R001') is True
+    assert log.delete('R001') is False
+    log.close()
+    
+    # Simulate a crash in the middle of a write
+    segment_path = os.path.join(log_dir, sorted(os.listdir(log_dir))[-1])
+    with open(segment_path, 'ab') as f:
+        f.write(b'"R003"\t{"result_id": "R0')
+    
+    reopened = SegmentLog(log_dir)
+    assert reopened.read('R001') is None
+    assert reopened.read('R003') is None
+    assert reopened.read('R002')['result_id'] == 'R002'
+    
+    reopened.append('R004', make_result('R004'))
+    assert reopened.read('R004')['result_id'] == 'R004'
+    reopened.close()
+    
+    assert sorted(SegmentLog(log_dir).keys()) == ['R002', 'R004']
+
+
+def test_segments_compact(temp_dir):
+    """Test compaction keeps only live records and shrinks the log."""
+    log_dir = os.path.join(temp_dir, 'log')
+    log = SegmentLog(log_dir, max_segment_bytes=2000)
+    other = SegmentLog(log_dir, max_segment_bytes=2000)
+    for i in range(200):
+        log.append('R001', make_result('R001', score=float(i % 11)))
+    log.append('R002', make_result('R002'))
+    log.append('R003', make_result('R003'))
+    log.delete('R003')
+    assert other.read('R001')['score'] == 1.0
+    
+    report = log.compact()
+    
+    assert report['records'] == 2
+    assert report['bytes_after'] < report['bytes_before'] / 50
+    assert sorted(log.keys()) == ['R001', 'R002']
+    assert log.read('R001')['score'] == 1.0
+    # The other instance notices the old segments are gone
+    assert other.read('R001')['score'] == 1.0
+    other.append('R002', make_result('R002', score=5.0))
+    assert log.read('R002')['score'] == 5.0
+    
+    # Compacting again never reuses a segment number the other instance knew
+    log.compact()
+    other.append('R004', make_result('R004'))
+    log.compact()
+    assert other.read('R002')['score'] == 5.0
+    assert sorted(other.keys()) == ['R001', 'R002', 'R004']
+    assert [r['result_id'] for r in other.iter_records()] == ['R001', 'R002', 'R004']
+    log.close()
+    other.close()
+    assert sorted(SegmentLog(log_dir).keys()) == ['R001', 'R002', 'R004']
+    
+    empty = SegmentLog(os.path.join(temp_dir, 'empty'))
+    assert empty.compact()['records'] == 0
+    empty.append('R001', make_result('R001'))
+    assert empty.read('R001')['result_id'] == 'R001'
+    empty.close()
+
+
+def test_segments_compact_command(temp_dir):
+    """Test bao_tri compact shrinks the logs of a segments storage."""
+    import bao_tri
+    storage = FileStorageManager(base_path=temp_dir, storage_mode='segments')
+    for i in range(50):
+        storage.save_result(make_result('R001', score=float(i % 2)))
+    storage.close()
+    
+    assert bao_tri.main(['--data', temp_dir, '--backend', 'segments', 'compact']) == 0
+    storage = FileStorageManager(base_path=temp_dir, storage_mode='segments')
+    assert storage.load_result('R001')['score'] == 1.0
+    segments = os.path.join(temp_dir, 'segments', 'results')
+    assert sum(os.path.getsize(os.path.join(segments, name)) for name in os.listdir(segments)
+               if name.endswith('.jsonl')) < 500
+    assert storage.compact_segments()['results']['records'] == 1
+    storage.close()
+    assert bao_tri.main(['--data', temp_dir, '--backend', 'file', 'compact']) == 0
+
+
+def test_segments_read_legacy_files(temp_dir):
+    """Test that per-file records stay readable after switching modes."""
+    legacy = FileStorageManager(base_path=temp_dir)
+    legacy.save_result(make_result('R001'))
+    
+    storage = FileStorageManager(base_path=temp_dir, storage_mode='segments')
+    storage.save_result(make_result('R002'))
+    
+    assert storage.load_result('R001') is not None
+    assert {r['result_id'] for r in storage.list_results()} == {'R001', 'R002'}
+    storage.close()
+
+
+def test_unknown_storage_mode(temp_dir):
+    """Test that an unknown storage mode is rejected."""
+    with pytest.raises(ValueError):
+        FileStorageManager(base_path=temp_dir, storage_mode='tape')
@@ -0,0 +1,121 @@
+"""Unit tests for the vectorized grading path."""
+
+import random
+import pytest
+from src.business.answer_key import AnswerKey
+from src.business import vector_grading
+from src.business.vector_grading import VectorGrader
+from src.business.grading_engine import GradingEngine
+from src.models.result import pack_details
+from src.storage.file_storage import FileStorageManager
+
+np = pytest.importorskip("numpy")
+
+
+def make_key(num_questions, seed=0):
+    rng = random.Random(seed)
+    return AnswerKey(
+        exam_id='E001',
+        question_ids=[f'Q{i:03d}' for i in range(1, num_questions + 1)],
+        correct_answers=[rng.choice('ABCD') for _ in range(num_questions)]
+    )
+
+
+def random_answers(key, rng):
+    variants = ['A', 'B', 'C', 'D', 'a', ' b', 'C ', '', 'E', 'AB']
+    answers = {}
+    for question_id in key.question_ids:
+        if rng.random() < 0.9:
+            answers[question_id] = rng.choice(variants)
+    return answers
+
+
+def test_vector_scores_match_calculate_score():
+    """Test that the score table reproduces calculate_score rounding."""
+    engine = GradingEngine(storage=None)
+    for total in (1, 3, 7, 33, 57):
+        grader = VectorGrader(make_key(total))
+        counts = np.arange(total + 1)
+        assert grader.scores(counts, engine.calculate_score) == [
+            engine.calculate_score(correct, total) for correct in range(total + 1)
+        ]
+
+
+@pytest.mark.parametrize('question_ids, correct_answers', [
+    (None, None),
+    (['X1', 'X2', 'X3', 'X4'], ['A', 'B', 'C', 'D']),
+    (['Q001', 'Q002', 'Q003', 'Q004'], ['a', 'B', 'C', 'D']),
+])
+def test_grade_compact_matches_pack_details(question_ids, correct_answers):
+    """Test compact rows equal pack_details of the scalar details."""
+    rng = random.Random(3)
+    key = make_key(37) if question_ids is None else AnswerKey('E001', question_ids, correct_answers)
+    answers_list = [random_answers(key, rng) for _ in range(300)] + [{key.question_ids[0]: None}, None]
+    engine = GradingEngine(storage=None)
+    
+    graded = VectorGrader(key).grade_compact(answers_list, engine.calculate_score)
+    
+    assert graded[-2] is None and graded[-1] is None
+    for answers, (count, score, packed) in zip(answers_list[:-2], graded):
+        expected_count, expected_details = key.grade_answers(answers)
+        assert count == expected_count
+        assert score == engine.calculate_score(expected_count, key.total_questions)
+        assert packed == pack_details(expected_details)
+
+
+def test_invalid_rows_are_flagged():
+    """Test that rows with non-string answers are reported as invalid."""
+    key = make_key(2)
+    graded = VectorGrader(key).grade_compact([{'Q001': 'A'}, {'Q001': None}, None], GradingEngine(storage=None).calculate_score)
+    assert graded[0] is not None
+    assert graded[1] is None
+    assert graded[2] is None
+
+
+def test_disabled_without_numpy_or_for_unusual_keys(monkeypatch):
+    """Test fallback when NumPy is missing or the key is not A-D."""
+    key = AnswerKey('E001', ['Q001'], ['E'])
+    assert VectorGrader(key).enabled is False
+    
+    monkeypatch.setattr(vector_grading, 'np', None)
+    assert VectorGrader(make_key(3)).grade_compact([{}], GradingEngine(storage=None).calculate_score) is None
+
+
+@pytest.mark.parametrize('numpy_installed', [True, False])
+def test_engine_batch_same_with_and_without_numpy(monkeypatch, numpy_installed, temp_dir):
+    """Test that GradingEngine gives identical results either way."""
+    if not numpy_installed:
+        monkeypatch.setattr(vector_grading, 'np', None)
+    storage = FileStorageManager(base_path=temp_dir)
+    key = make_key(20, seed=7)
+    storage.save_exam({
+        'exam_id': 'E001', 'title': 'T', 'created_by': 'T001',
+        'questions': [
+            {'question_id': qid, 'content': 'x', 'choices': {'A': 'a', 'B': 'b', 'C': 'c', 'D': 'd'},
+             'correct_answer': answer}
+            for qid, answer in zip(key.question_ids, key.correct_answers)
+        ]
+    })
+    rng = random.Random(1)
+    submissions = [
+        {'submission_id': f'S{i}', 'exam_id': 'E001', 'student_id': f'ST{i}',
+         'answers': random_answers(key, rng)}
+        for i in range(150)
+    ]
+    
+    vector_outcomes = GradingEngine(storage).grade_batch('E001', submissions)
+    scalar_outcomes = GradingEngine(storage, vectorize=False).grade_batch('E001', submissions)
+    
+    for vector, scalar in zip(vector_outcomes, scalar_outcomes):
+        assert vector[0] is scalar[0] is True
+        for field in ('score', 'correct_answers', 'wrong_answers', 'details'):
+            assert vector[2][field] == scalar[2][field]
+    
+    # Compact blocks (the vector path) match the scalar path exactly
+    vector_block = GradingEngine(storage).grade_block(key, submissions, compact=True)
+    scalar_block = GradingEngine(storage, vectorize=False).grade_block(key, submissions, compact=True)
+    for vector, scalar in zip(vector_block, scalar_block):
+        assert vector[0] is scalar[0] is True
+        for result in (vector[2], scalar[2]):
+            del result['result_id'], result['graded_at']
+        assert vector[2] == scalar[2]
@@ -1,18 +1,67 @@
 """Web application cho hệ thống chấm trắc nghiệm."""
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for
-from src.storage.file_storage import FileStorageManager
+from flask import Flask, Response, render_template, request, jsonify, redirect, url_for, send_file, stream_with_context
+from src.storage import create_storage
+from src.storage.exam_stats import open_exam_stats, TOP_CAPACITY
+from src.storage.item_analysis import open_item_analysis
+from src.storage.job_queue import open_job_queue, DONE, FAILED
+from src.storage.idempotency import open_idempotency_index, client_key, submission_key
 from src.business.exam_manager import ExamManager
-from src.business.grading_engine import GradingEngine
+from src.business.grading_engine import create_grading_engine
+from src.business.answer_key import AnswerKey
+from src.business.regrade import RegradeJobs
+from src.business.grading_queue import GradingWorkers, IDEMPOTENCY_KEY_FIELD, queue_enabled, queue_workers
+from src.business.bulk_grading import BulkGrader, SHEET_FORMATS, new_report_id, report_path, sheet_format
+from src.business.result_export import EXPORT_ORDERS, iter_exam_csv, gzip_chunks, zip_exams_csv
+from src.models.exam import Exam
 from src.models.submission import Submission
+from src.models.result import Result
+from src.views.http_cache import ResponseCache, combined_etag
+import io
+import os
+import re
 import uuid
 
 app = Flask(__name__)
 
+# Phân trang /api/all-results
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Số bài mặc định của bảng xếp hạng /api/leaderboard
+DEFAULT_LEADERBOARD_SIZE = 20
+
+# Thư mục dữ liệu (đổi bằng biến môi trường DATA_DIR, ví dụ khi chạy test)
+DATA_DIR = os.environ.get('DATA_DIR', 'data')
+
 # Khởi tạo storage và managers
-storage = FileStorageManager(base_path="data")
+storage = create_storage(base_path=DATA_DIR)
 exam_manager = ExamManager(storage)
-grading_engine = GradingEngine(storage)
+grading_engine = create_grading_engine(storage)
+regrade_jobs = RegradeJobs(storage, engine=grading_engine)
+
+# Thống kê điểm theo đề (create_grading_engine cập nhật sau mỗi bài được chấm)
+exam_stats = open_exam_stats(storage.base_path)
+
+# Phân tích câu hỏi (độ khó, độ phân biệt, phương án nhiễu), create_grading_engine
+# cập nhật sau mỗi bài
+item_analysis = open_item_analysis(storage.base_path)
+
+# Khóa chống nộp trùng: bài nộp lại (trình duyệt thử lại) trả về kết quả
+# của lần nộp đầu, không chấm và không ghi thêm
+idempotency = open_idempotency_index(storage.base_path)
+
+# Nội dung JSON đã tuần tự hóa của đề thi, theo ETag
+response_cache = ResponseCache()
+
+# Hàng đợi chấm bài (bật bằng GRADING_QUEUE=1): nộp bài chỉ ghi vào hàng
+# đợi và trả về ticket, các luồng nền chấm và lưu kết quả
+grading_queue = None
+grading_workers = None
+if queue_enabled():
+    grading_queue = open_job_queue(storage.base_path)
+    grading_workers = GradingWorkers(grading_queue, grading_engine, workers=queue_workers(), idempotency=idempotency)
+    grading_workers.start()
 
 
 @app.route('/')
@@ -30,8 +79,8 @@ def teacher():
 @app.route('/student')
 def student():
     """Trang học sinh - làm bài thi."""
-    # Lấy danh sách đề thi
-    success, msg, exams = exam_manager.list_all_exams()
+    # Lấy danh sách đề thi (chỉ thông tin tóm tắt)
+    success, msg, exams = exam_manager.list_exam_summaries()
     return render_template('student.html', exams=exams)
 
 
@@ -40,27 +89,17 @@ def create_exam():
     """API tạo đề thi."""
     data = request.json
     
-    # Tạo đề thi
+    # Tạo đề thi cùng toàn bộ câu hỏi (một lần ghi)
     success, msg, exam_id = exam_manager.create_exam(
         title=data['title'],
-        teacher_id=data['teacher_id']
+        teacher_id=data['teacher_id'],
+        questions=data.get('questions', [])
     )
     
     if not success:
         return jsonify({'success': False, 'message': msg})
     
-    # Thêm câu hỏi
-    for q in data['questions']:
-        success, msg, q_id = exam_manager.add_question(
-            exam_id=exam_id,
-            content=q['content'],
-            choices=q['choices'],
-            correct_answer=q['correct_answer']
-        )
-        
-        if not success:
-            return jsonify({'success': False, 'message': msg})
-    
+    prime_student_exam(exam_id)
     return jsonify({
         'success': True,
         'message': 'Tạo đề thi thành công',
@@ -70,21 +109,107 @@ def create_exam():
 
 @app.route('/api/get-exam/<exam_id>')
 def get_exam(exam_id):
-    """API lấy thông tin đề thi."""
-    success, msg, exam_dict = exam_manager.get_exam(exam_id)
+    """API lấy thông tin đề thi (hỗ trợ ETag / If-None-Match)."""
+    summary = storage.get_exam_summary(exam_id)
+    if not summary:
+        return jsonify({'success': False, 'message': f"Đề thi không tồn tại: {exam_id}"})
     
-    if not success:
-        return jsonify({'success': False, 'message': msg})
+    def build_payload():
+        success, msg, exam_dict = exam_manager.get_exam(exam_id)
+        return {
+            'success': True,
+            'exam': exam_dict
+        }
+    
+    return response_cache.conditional_json(f'exam:{exam_id}', summary['content_hash'], build_payload)
+
+
+@app.route('/api/student/exam/<exam_id>')
+def get_student_exam(exam_id):
+    """API đề thi cho học sinh: chỉ câu hỏi và lựa chọn, không có đáp án.
+    
+    Nội dung được tuần tự hóa và nén gzip một lần cho mỗi phiên bản đề.
+    """
+    summary = storage.get_exam_summary(exam_id)
+    if not summary:
+        return jsonify({'success': False, 'message': f"Đề thi không tồn tại: {exam_id}"})
+    
+    def build_payload():
+        return student_exam_payload(storage.load_exam(exam_id))
+    
+    return response_cache.conditional_json(
+        f'student-exam:{exam_id}', summary['content_hash'], build_payload, compress=True
+    )
+
+
+def student_exam_payload(exam_dict: dict) -> dict:
+    """Nội dung trả về của /api/student/exam."""
+    return {
+        'success': True,
+        'exam': Exam.from_dict(exam_dict).to_student_dict()
+    }
+
+
+def prime_student_exam(exam_id: str):
+    """Chuẩn bị sẵn nội dung đề cho học sinh ngay sau khi lưu đề."""
+    summary = storage.get_exam_summary(exam_id)
+    exam_dict = storage.load_exam(exam_id)
+    if summary and exam_dict:
+        response_cache.prime(
+            f'student-exam:{exam_id}', summary['content_hash'],
+            student_exam_payload(exam_dict), compress=True
+        )
+
+
+@app.route('/api/update-exam/<exam_id>', methods=['PUT', 'POST'])
+def update_exam(exam_id):
+    """API sửa đề thi.
+    
+    Nếu đáp án thay đổi, các kết quả đã chấm được cập nhật trong nền;
+    theo dõi tiến độ qua /api/regrade-status/<job_id>.
+    """
+    # Giữ khóa đề thi để đáp án cũ và mới đúng là của lần sửa này
+    with storage.exam_lock(exam_id):
+        old_exam = storage.load_exam(exam_id)
+        if not old_exam:
+            return jsonify({'success': False, 'message': f"Đề thi không tồn tại: {exam_id}"})
+        
+        success, msg = exam_manager.update_exam(exam_id, request.json)
+        if not success:
+            return jsonify({'success': False, 'message': msg})
+        new_exam = storage.load_exam(exam_id)
+    
+    prime_student_exam(exam_id)
+    old_key = AnswerKey.from_exam(old_exam)
+    new_key = AnswerKey.from_exam(new_exam)
+    job_id = None
+    if (old_key.question_ids, old_key.correct_answers) != (new_key.question_ids, new_key.correct_answers):
+        job_id = regrade_jobs.start(exam_id, old_key, new_key)
     
     return jsonify({
         'success': True,
-        'exam': exam_dict
+        'message': msg,
+        'regrade_job_id': job_id
     })
 
 
+@app.route('/api/regrade-status/<job_id>')
+def regrade_status(job_id):
+    """API xem tiến độ chấm lại."""
+    job = regrade_jobs.get(job_id)
+    if not job:
+        return jsonify({'success': False, 'message': f"Không tìm thấy việc chấm lại: {job_id}"})
+    return jsonify({'success': True, 'job': job})
+
+
 @app.route('/api/submit-exam', methods=['POST'])
 def submit_exam():
-    """API nộp bài thi."""
+    """API nộp bài thi.
+    
+    Bài nộp lại với cùng header Idempotency-Key (hoặc cùng đề, học sinh và
+    đáp án khi không có header) trả về kết quả của lần nộp đầu, kèm
+    'duplicate': True, mà không chấm hay ghi thêm lần nào.
+    """
     data = request.json
     
     # Tạo submission
@@ -97,32 +222,224 @@ def submit_exam():
         answers=data['answers']
     )
     
-    # Lưu submission
-    storage.save_submission(submission.to_dict())
+    key = submission_idempotency_key(submission)
+    while True:
+        record = idempotency.claim(key)
+        if record is None:
+            break
+        response = replay_submission(key, record)
+        if response is not None:
+            return response
+        # Kết quả của lần nộp trước không còn: chấm như bài mới
+        idempotency.release(key)
+    
+    if grading_queue is not None:
+        return enqueue_submission(submission, key)
     
-    # Chấm bài
-    success, msg, result = grading_engine.grade_submission(submission_id)
+    # Chấm bài trong bộ nhớ, lưu bài làm và kết quả cùng lúc
+    try:
+        success, msg, result = grading_engine.grade(submission)
+    except Exception:
+        idempotency.release(key)
+        raise
     
     if not success:
+        idempotency.release(key)
         return jsonify({'success': False, 'message': msg})
     
+    idempotency.complete(key, {'result_id': result['result_id']})
     return jsonify({
         'success': True,
         'message': 'Chấm bài thành công',
-        'result': result
+        'result': result,
+        'percentile': score_percentile(result)
     })
 
 
-@app.route('/api/list-exams')
-def list_exams():
-    """API liệt kê đề thi."""
-    success, msg, exams = exam_manager.list_all_exams()
+def submission_idempotency_key(submission: Submission):
+    """Khóa chống trùng của một bài nộp: header Idempotency-Key hoặc nội dung bài."""
+    header = request.headers.get('Idempotency-Key', '').strip()
+    if header:
+        return client_key(header, submission.exam_id, submission.student_id)
+    return submission_key(submission.exam_id, submission.student_id, submission.answers)
+
+
+def replay_submission(key, record):
+    """Trả lời bài nộp trùng từ bản ghi của lần nộp đầu (None nếu bản ghi không còn dùng được).
+    
+    Bản ghi của bài trong hàng đợi có ticket, và thêm result_id khi đã chấm
+    xong, nên vẫn trả lời được sau khi việc đã bị xóa khỏi hàng đợi.
+    """
+    if 'ticket' in record and 'result_id' not in record:
+        ticket = record['ticket']
+        job = grading_queue.get(ticket) if grading_queue is not None else None
+        if job is not None and job['status'] == DONE:
+            record = dict(record, result_id=job['result_id'])
+        elif job is None or job['status'] == FAILED:
+            # Bản ghi trong bộ nhớ có thể đã cũ: luồng chấm đã ghi result_id
+            # hoặc đã nhả khóa khi chấm lỗi
+            record = idempotency.refresh(key)
+            if record is None or 'result_id' not in record:
+                return None
+    if 'result_id' not in record:
+        return jsonify({
+            'success': True,
+            'queued': True,
+            'duplicate': True,
+            'message': 'Bài này đã được nhận, đang chấm',
+            'ticket': record['ticket'],
+            'status_url': url_for('result_status', ticket=record['ticket'])
+        }), 202
+    
+    success, msg, result = grading_engine.get_result(record['result_id'])
+    if not success:
+        return None
+    return jsonify({
+        'success': True,
+        'duplicate': True,
+        'message': 'Bài này đã được chấm',
+        'result': result,
+        'percentile': score_percentile(result)
+    })
+
+
+def ensure_exam_stats():
+    """Tính thống kê điểm từ các kết quả đã lưu nếu chưa từng tính."""
+    if not exam_stats.exists():
+        exam_stats.rebuild(storage.iter_results)
+
+
+def score_percentile(result):
+    """Thứ hạng phần trăm hiện tại của một kết quả trong đề của nó."""
+    ensure_exam_stats()
+    return exam_stats.percentile(result['exam_id'], result['score'])
+
+
+def enqueue_submission(submission: Submission, key: str):
+    """Ghi bài làm vào hàng đợi chấm và trả về ticket (HTTP 202).
+    
+    key là khóa chống trùng đã giành được, ghi nhận ticket khi thành công.
+    """
+    if grading_engine.answer_key(submission.exam_id) is None:
+        idempotency.release(key)
+        return jsonify({'success': False, 'message': f"Đề thi không tồn tại: {submission.exam_id}"})
+    
+    try:
+        ticket = grading_queue.enqueue(dict(submission.to_dict(), **{IDEMPOTENCY_KEY_FIELD: key}))
+    except Exception:
+        idempotency.release(key)
+        raise
+    if not ticket:
+        idempotency.release(key)
+        return jsonify({'success': False, 'message': 'Không thể ghi bài làm vào hàng đợi'})
+    
+    idempotency.complete(key, {'ticket': ticket})
     return jsonify({
         'success': True,
-        'exams': exams
+        'queued': True,
+        'message': 'Đã nhận bài, đang chấm',
+        'ticket': ticket,
+        'status_url': url_for('result_status', ticket=ticket)
+    }), 202
+
+
+@app.route('/api/result-status/<ticket>')
+def result_status(ticket):
+    """API xem trạng thái một bài làm trong hàng đợi chấm.
+    
+    status là queued, running, done hoặc failed; khi done có kèm kết quả.
+    """
+    job = grading_queue.get(ticket) if grading_queue is not None else None
+    if not job:
+        return jsonify({'success': False, 'message': f"Không tìm thấy ticket: {ticket}"}), 404
+    
+    response = {'success': True, 'ticket': ticket, 'status': job['status'], 'message': job['message'] or ''}
+    if job['status'] == DONE:
+        success, msg, result = grading_engine.get_result(job['result_id'])
+        response['result'] = result
+        if success:
+            response['percentile'] = score_percentile(result)
+    return jsonify(response)
+
+
+@app.route('/api/queue-metrics')
+def queue_metrics():
+    """API số liệu hàng đợi chấm: độ sâu, thời gian chờ, thời gian chấm (giây)."""
+    if grading_queue is None:
+        return jsonify({'success': True, 'enabled': False})
+    return jsonify({'success': True, 'enabled': True, 'metrics': grading_queue.metrics()})
+
+
+@app.route('/api/bulk-grade/<exam_id>', methods=['POST'])
+def bulk_grade(exam_id):
+    """API chấm cả lớp từ file phiếu trả lời (CSV hoặc JSONL).
+    
+    File gửi trong trường 'file' (multipart); định dạng lấy theo đuôi file
+    hoặc tham số ?format=. Trả về tóm tắt và đường dẫn tải báo cáo từng học sinh.
+    """
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'success': False, 'message': 'Thiếu file phiếu trả lời'})
+    
+    fmt = request.args.get('format') or sheet_format(upload.filename)
+    if fmt not in SHEET_FORMATS:
+        return jsonify({'success': False, 'message': f"Định dạng không hỗ trợ: {fmt}"})
+    
+    report_id = new_report_id()
+    path = report_path(storage.base_path, report_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Werkzeug spools large uploads to a temporary file; rows are read one at a time
+    lines = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+    try:
+        with open(path, 'w', encoding='utf-8', newline='') as report:
+            summary = BulkGrader(storage, engine=grading_engine).grade_sheet(exam_id, lines, fmt, report)
+    except (ValueError, UnicodeDecodeError) as e:
+        path.unlink(missing_ok=True)
+        return jsonify({'success': False, 'message': str(e)})
+    
+    return jsonify({
+        'success': True,
+        'message': f"Đã chấm {summary['graded']}/{summary['total']} bài",
+        'summary': summary,
+        'report_url': url_for('bulk_report', report_id=report_id)
     })
 
 
+@app.route('/api/bulk-report/<report_id>')
+def bulk_report(report_id):
+    """API tải báo cáo CSV của một lần chấm cả lớp."""
+    path = report_path(storage.base_path, report_id)
+    if not re.fullmatch(r'B[0-9A-F]{10}', report_id) or not path.exists():
+        return jsonify({'success': False, 'message': f"Không tìm thấy báo cáo: {report_id}"}), 404
+    return send_file(path.resolve(), mimetype='text/csv', as_attachment=True,
+                     download_name=f'bao_cao_{report_id}.csv')
+
+
+@app.route('/api/list-exams')
+def list_exams():
+    """API liệt kê đề thi (hỗ trợ ETag / If-None-Match).
+    
+    Tham số ?summary=1 chỉ trả về thông tin tóm tắt (không có câu hỏi).
+    """
+    summary_only = request.args.get('summary') in ('1', 'true')
+    success, msg, summaries = exam_manager.list_exam_summaries()
+    etag = combined_etag(
+        [str(summary_only)] + [f"{s['exam_id']}:{s['content_hash']}" for s in summaries]
+    )
+    
+    def build_payload():
+        if summary_only:
+            exams = summaries
+        else:
+            success, msg, exams = exam_manager.list_all_exams()
+        return {
+            'success': True,
+            'exams': exams
+        }
+    
+    return response_cache.conditional_json(f'exams:{summary_only}', etag, build_payload)
+
+
 @app.route('/statistics')
 def statistics():
     """Trang thống kê."""
@@ -131,14 +448,101 @@ def statistics():
 
 @app.route('/api/all-results')
 def all_results():
-    """API lấy tất cả kết quả."""
-    results = storage.list_results()
+    """API lấy kết quả.
+    
+    Lọc theo ?exam_id=, ?student_id=, ?graded_from=, ?graded_to= (ISO).
+    Với ?limit= (và ?cursor= của trang trước) chỉ trả về một trang kèm
+    next_cursor; không có limit thì trả về toàn bộ như trước.
+    """
+    filters = {
+        field: request.args.get(field)
+        for field in ('exam_id', 'student_id', 'graded_from', 'graded_to')
+        if request.args.get(field)
+    }
+    
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        results = [Result.verbose_dict(result) for result in storage.iter_results(**filters)]
+        return jsonify({
+            'success': True,
+            'results': results
+        })
+    
+    try:
+        limit = min(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+        results, next_cursor = storage.list_results_page(
+            limit=limit, cursor=request.args.get('cursor'), **filters
+        )
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Tham số limit hoặc cursor không hợp lệ'})
+    
     return jsonify({
         'success': True,
-        'results': results
+        'results': [Result.verbose_dict(result) for result in results],
+        'next_cursor': next_cursor
     })
 
 
+@app.route('/api/exam-stats')
+def exam_stats_api():
+    """API thống kê điểm theo đề (số bài, điểm TB, độ lệch chuẩn, min, max, phân bố).
+    
+    Tham số ?exam_id= chỉ lấy thống kê của một đề.
+    """
+    ensure_exam_stats()
+    
+    exam_id = request.args.get('exam_id')
+    if exam_id:
+        return jsonify({'success': True, 'stats': exam_stats.get(exam_id)})
+    
+    return jsonify({
+        'success': True,
+        'exams': exam_stats.list(),
+        'overall': exam_stats.overall()
+    })
+
+
+@app.route('/api/leaderboard/<exam_id>')
+def leaderboard(exam_id):
+    """API bảng xếp hạng: ?k= bài điểm cao nhất của một đề (mặc định 20).
+    
+    Tham số ?score= trả thêm thứ hạng phần trăm của điểm đó.
+    """
+    if not storage.get_exam_summary(exam_id):
+        return jsonify({'success': False, 'message': f"Đề thi không tồn tại: {exam_id}"})
+    
+    try:
+        k = int(request.args.get('k', DEFAULT_LEADERBOARD_SIZE))
+        score = request.args.get('score')
+        score = float(score) if score is not None else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Tham số k hoặc score không hợp lệ'})
+    if k < 1 or k > TOP_CAPACITY:
+        return jsonify({'success': False, 'message': f"k phải từ 1 đến {TOP_CAPACITY}"})
+    
+    ensure_exam_stats()
+    if exam_stats.needs_rebuild(exam_id):
+        exam_stats.rebuild_exam(exam_id, storage.iter_results(exam_id=exam_id))
+    
+    response = {'success': True, 'exam_id': exam_id, 'top': exam_stats.top_k(exam_id, k)}
+    if score is not None:
+        response['percentile'] = exam_stats.percentile(exam_id, score)
+    return jsonify(response)
+
+
+@app.route('/api/item-analysis/<exam_id>')
+def item_analysis_api(exam_id):
+    """API phân tích câu hỏi của một đề: độ khó (tỉ lệ làm đúng), độ phân biệt
+    (nhóm 27% điểm cao trừ nhóm 27% điểm thấp) và số lần chọn từng phương án.
+    """
+    if not storage.get_exam_summary(exam_id):
+        return jsonify({'success': False, 'message': f"Đề thi không tồn tại: {exam_id}"})
+    
+    if item_analysis.needs_rebuild(exam_id):
+        item_analysis.rebuild_exam(exam_id, storage.iter_results(exam_id=exam_id))
+    
+    return jsonify({'success': True, 'analysis': item_analysis.get(exam_id)})
+
+
 @app.route('/api/delete-exam/<exam_id>', methods=['DELETE'])
 def delete_exam(exam_id):
     """API xóa đề thi."""
@@ -151,43 +555,58 @@ def delete_exam(exam_id):
 
 @app.route('/api/export-results/<exam_id>')
 def export_results(exam_id):
-    """API xuất kết quả ra CSV."""
-    import csv
-    from flask import Response
-    from io import StringIO
+    """API xuất kết quả ra CSV (dạng luồng).
     
+    Tham số: ?sort=student_id|graded_at (mặc định student_id), ?gzip=1 để nén.
+    """
     # Lấy đề thi
     success, msg, exam_dict = exam_manager.get_exam(exam_id)
     if not success:
         return jsonify({'success': False, 'message': msg})
     
-    # Lấy kết quả
-    results = storage.list_results(exam_id=exam_id)
-    
-    # Tạo CSV
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow(['Mã HS', 'Điểm', 'Số câu đúng', 'Số câu sai', 'Tổng câu', 'Thời gian nộp'])
-    
-    # Data
-    for result in results:
-        writer.writerow([
-            result['student_id'],
-            result['score'],
-            result['correct_answers'],
-            result['wrong_answers'],
-            result['total_questions'],
-            result['graded_at']
-        ])
-    
-    # Return CSV
-    output.seek(0)
+    order_by = request.args.get('sort', 'student_id')
+    if order_by not in EXPORT_ORDERS:
+        return jsonify({'success': False, 'message': f"Kiểu sắp xếp không hợp lệ: {order_by}"})
+    
+    chunks = iter_exam_csv(storage, exam_id, order_by)
+    filename = f'ket_qua_{exam_id}.csv'
+    mimetype = 'text/csv'
+    if request.args.get('gzip') in ('1', 'true'):
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+
+@app.route('/api/export-results')
+def export_results_archive():
+    """API xuất kết quả của nhiều đề thi trong một file zip.
+    
+    Tham số: ?exam_ids=E1,E2 (mặc định: tất cả đề thi), ?sort=student_id|graded_at.
+    """
+    exam_ids = [exam_id for exam_id in request.args.get('exam_ids', '').split(',') if exam_id]
+    if not exam_ids:
+        success, msg, summaries = exam_manager.list_exam_summaries()
+        exam_ids = [summary['exam_id'] for summary in summaries]
+    
+    for exam_id in exam_ids:
+        success, msg, exam_dict = exam_manager.get_exam(exam_id)
+        if not success:
+            return jsonify({'success': False, 'message': msg})
+    
+    order_by = request.args.get('sort', 'student_id')
+    if order_by not in EXPORT_ORDERS:
+        return jsonify({'success': False, 'message': f"Kiểu sắp xếp không hợp lệ: {order_by}"})
+    
     return Response(
-        output.getvalue(),
-        mimetype='text/csv',
-        headers={'Content-Disposition': f'attachment; filename=ket_qua_{exam_id}.csv'}
+        stream_with_context(zip_exams_csv(storage, exam_ids, order_by)),
+        mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename=ket_qua.zip'}
     )
 
 